@@ -27,6 +27,7 @@ from sentry_sdk.integrations.flask import FlaskIntegration  # noqa: I001
 from bcol_api import config
 from bcol_api.config import _Config
 from bcol_api.resources import API_BLUEPRINT, OPS_BLUEPRINT
+from bcol_api.services.bcol_soap import preload_wsdl
 from bcol_api.utils.auth import jwt
 from bcol_api.utils.logging import setup_logging
 from bcol_api.utils.run_version import get_run_version
@@ -64,6 +65,8 @@ def create_app(run_mode=os.getenv('FLASK_ENV', 'production')):
 
     register_shellcontext(app)
 
+    preload_wsdl(app)
+
     return app
 
 
@@ -88,11 +88,27 @@ class _Config():  # pylint: disable=too-few-public-methods
     BCOL_LDAP_USER_DN_PATTERN = _get_config('BCOL_LDAP_USER_DN_PATTERN')
     BCOL_DEBIT_ACCOUNT_VERSION = _get_config('BCOL_DEBIT_ACCOUNT_VERSION')
     BCOL_LINK_CODE = _get_config('BCOL_LINK_CODE')
+    BCOL_LDAP_POOL_SIZE = int(_get_config('BCOL_LDAP_POOL_SIZE', default=5))
+    BCOL_LDAP_POOL_MAX_IDLE = int(_get_config('BCOL_LDAP_POOL_MAX_IDLE', default=300))
+    BCOL_LDAP_TIMEOUT = int(_get_config('BCOL_LDAP_TIMEOUT', default=10))
+    BCOL_LDAP_TRACE_LEVEL = int(_get_config('BCOL_LDAP_TRACE_LEVEL', default=0))
+    BCOL_LDAP_DEBUG_LEVEL = int(_get_config('BCOL_LDAP_DEBUG_LEVEL', default=0))
+    # Seconds to cache queryProfile results for, 0 disables the cache.
+    BCOL_PROFILE_CACHE_TTL = int(_get_config('BCOL_PROFILE_CACHE_TTL', default=60))
+    BCOL_PROFILE_CACHE_MAX_SIZE = int(_get_config('BCOL_PROFILE_CACHE_MAX_SIZE', default=1000))
 
     # BCOL PAYMENT
     BCOL_PAYMENTS_WSDL_URL = _get_config('BCOL_PAYMENTS_WSDL_URL')
     BCOL_APPLIED_CHARGE_WSDL_URL = _get_config('BCOL_APPLIED_CHARGE_WSDL_URL')
 
+    # BCOL SOAP clients, the WSDLs are loaded when the app starts and cached in memory and on disk.
+    BCOL_PRELOAD_WSDL = _get_config('BCOL_PRELOAD_WSDL', default='true').lower() == 'true'
+    BCOL_WSDL_CACHE_PATH = _get_config('BCOL_WSDL_CACHE_PATH', default=None)
+    BCOL_WSDL_CACHE_TTL = int(_get_config('BCOL_WSDL_CACHE_TTL', default=86400))
+    BCOL_WSDL_TIMEOUT = int(_get_config('BCOL_WSDL_TIMEOUT', default=30))
+    BCOL_SOAP_TIMEOUT = int(_get_config('BCOL_SOAP_TIMEOUT', default=30))
+    BCOL_POOL_MAXSIZE = int(_get_config('BCOL_POOL_MAXSIZE', default=10))
+
     # Sentry Config
     SENTRY_ENABLE = _get_config('SENTRY_ENABLE', default=False)
     SENTRY_DSN = _get_config('SENTRY_DSN', default=None)
@@ -114,6 +130,9 @@ class TestConfig(_Config):  # pylint: disable=too-few-public-methods
     DEBUG = True
     TESTING = True
     USE_TEST_KEYCLOAK_DOCKER = 'YES'
+    BCOL_PRELOAD_WSDL = False
+    BCOL_LDAP_POOL_SIZE = 0
+    BCOL_PROFILE_CACHE_TTL = 0
 
     JWT_OIDC_TEST_MODE = True
     JWT_OIDC_TEST_AUDIENCE = os.getenv('JWT_OIDC_AUDIENCE')
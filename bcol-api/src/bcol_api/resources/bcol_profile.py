@@ -64,7 +64,9 @@ class BcolProfile(Resource):
     def get(bcol_user_id: str):
         """Return the bcol profile."""
         try:
-            response, status = BcolProfileService().get_profile(bcol_user_id), HTTPStatus.OK
+            # Callers about to take a payment send Cache-Control: no-cache to skip the cached profile.
+            use_cache = not request.cache_control.no_cache
+            response, status = BcolProfileService().get_profile(bcol_user_id, use_cache=use_cache), HTTPStatus.OK
         except BusinessException as exception:
             return exception.response()
         return response, status
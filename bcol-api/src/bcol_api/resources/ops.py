@@ -14,6 +14,9 @@
 """Endpoints to check and manage the health of the service."""
 from flask_restx import Namespace, Resource
 
+from bcol_api.services.bcol_profile import profile_cache
+from bcol_api.services.bcol_soap import soap_metrics
+
 
 API = Namespace('OPS', description='Service - OPS checks')
 
@@ -41,3 +44,13 @@ class Readyz(Resource):
         """Return a JSON object that identifies if the service is setupAnd ready to work."""
         # TODO: add a poll to the DB when called
         return {'message': 'api is ready'}, 200
+
+
+@API.route('metrics')
+class Metrics(Resource):
+    """Latency of the calls to BCOL and the profile cache hit ratio."""
+
+    @staticmethod
+    def get():
+        """Return the call count, errors and latency for each SOAP operation, and the profile cache metrics."""
+        return {'soap': soap_metrics.stats(), 'profile_cache': profile_cache.stats()}, 200
@@ -19,7 +19,7 @@ import zeep
 from flask import current_app
 
 from bcol_api.exceptions import BusinessException, PaymentException
-from bcol_api.services.bcol_soap import BcolSoap
+from bcol_api.services.bcol_soap import BcolSoap, soap_metrics
 from bcol_api.utils.errors import Error
 
 
@@ -103,12 +103,14 @@ class BcolPayment:  # pylint:disable=too-few-public-methods
     def debit_account(self, data: Dict):  # pragma: no cover
         """Debit BCOL account."""
         client = BcolSoap().get_payment_client()
-        return zeep.helpers.serialize_object(client.service.debitAccount(req=data))
+        with soap_metrics.timed('debitAccount'):
+            return zeep.helpers.serialize_object(client.service.debitAccount(req=data))
 
     def apply_charge(self, data: Dict):  # pragma: no cover
         """Debit BCOL account as a staff user."""
         client = BcolSoap().get_applied_chg_client()
-        return zeep.helpers.serialize_object(client.service.appliedCharge(req=data))
+        with soap_metrics.timed('appliedCharge'):
+            return zeep.helpers.serialize_object(client.service.appliedCharge(req=data))
 
     def _pad_zeros(self, amount: str = '0'):
         """Pad the amount with Zeroes to make sure the string is 10 chars."""
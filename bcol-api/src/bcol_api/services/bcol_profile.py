@@ -13,19 +13,86 @@
 # limitations under the License.
 """Service to manage PayBC interaction."""
 
-from typing import Dict
+import copy
+import threading
+import time
+from typing import Dict, Optional
 
-import ldap
 import pycountry
 import zeep
 from flask import current_app
 
 from bcol_api.exceptions import BusinessException, PaymentException
-from bcol_api.services.bcol_soap import BcolSoap
+from bcol_api.services.bcol_soap import BcolSoap, soap_metrics
+from bcol_api.services.ldap_pool import ldap_pool
 from bcol_api.utils.constants import account_type_mapping, auth_code_mapping, tax_status_mapping
 from bcol_api.utils.errors import Error
 
 
+class ProfileCache:
+    """Short lived cache of BCOL profiles, keyed by BCOL user id.
+
+    Linking an account and re-checking the profile at checkout usually query the same profile within seconds.
+    """
+
+    def __init__(self):
+        """Initialize an empty cache."""
+        self._lock = threading.Lock()
+        self._profiles: Dict[str, tuple] = {}
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """Return True if profiles should be cached."""
+        return current_app.config.get('BCOL_PROFILE_CACHE_TTL', 0) > 0
+
+    def get(self, bcol_user_id: str) -> Optional[Dict]:
+        """Return a copy of the cached profile, or None if it isn't cached or has expired."""
+        with self._lock:
+            expires_at, profile = self._profiles.get(bcol_user_id, (0, None))
+            if expires_at <= time.monotonic():
+                self._profiles.pop(bcol_user_id, None)
+                self._misses += 1
+                return None
+            self._hits += 1
+        return copy.deepcopy(profile)
+
+    def set(self, bcol_user_id: str, profile: Dict):
+        """Cache a copy of the profile."""
+        profile = copy.deepcopy(profile)
+        now = time.monotonic()
+        with self._lock:
+            if len(self._profiles) >= current_app.config.get('BCOL_PROFILE_CACHE_MAX_SIZE', 1000):
+                self._profiles = {key: value for key, value in self._profiles.items() if value[0] > now}
+                if len(self._profiles) >= current_app.config.get('BCOL_PROFILE_CACHE_MAX_SIZE', 1000):
+                    # Drop the oldest entry, dicts keep insertion order.
+                    self._profiles.pop(next(iter(self._profiles)))
+            self._profiles[bcol_user_id] = (now + current_app.config.get('BCOL_PROFILE_CACHE_TTL'), profile)
+
+    def invalidate(self, bcol_user_id: str = None):
+        """Remove the profile for the user, or every profile if no user is provided."""
+        with self._lock:
+            if bcol_user_id:
+                self._profiles.pop(bcol_user_id, None)
+            else:
+                self._profiles.clear()
+
+    def stats(self) -> Dict:
+        """Return the cache metrics."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'size': len(self._profiles),
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': round(self._hits / lookups, 4) if lookups else 0
+            }
+
+
+profile_cache = ProfileCache()  # pylint: disable=invalid-name
+
+
 class BcolProfile:  # pylint:disable=too-few-public-methods
     """Service to manage BCOL integration."""
 
@@ -40,8 +107,11 @@ class BcolProfile:  # pylint:disable=too-few-public-methods
         current_app.logger.debug('>query_profile')
         return response
 
-    def get_profile(self, bcol_user_id):
-        """Return bcol profile by user id."""
+    def get_profile(self, bcol_user_id, use_cache: bool = True):
+        """Return bcol profile by user id, use_cache=False always queries BCOL (e.g. before a payment)."""
+        use_cache = use_cache and profile_cache.is_enabled()
+        if use_cache and (response := profile_cache.get(bcol_user_id)) is not None:
+            return response
         # Call the query profile service to fetch profile
         data = {
             'Version': current_app.config.get('BCOL_DEBIT_ACCOUNT_VERSION'),
@@ -111,33 +181,22 @@ class BcolProfile:  # pylint:disable=too-few-public-methods
         except Exception as e:  # NOQA
             current_app.logger.error(e)
             raise BusinessException(Error.SYSTEM_ERROR) from e
+        if profile_cache.is_enabled():
+            # Refresh the cache even when it was bypassed, so the next cached read is current.
+            profile_cache.set(bcol_user_id, response)
         return response
 
     def __authenticate_user(self, user_id: str, password: str) -> bool:
-        """Validate the user by ldap lookup."""
+        """Validate the user by ldap bind, on a pooled connection."""
         current_app.logger.debug('<<< _validate_user')
-        ldap_conn = None
         try:
-            ldap.set_option(ldap.OPT_X_TLS_REQUIRE_CERT, ldap.OPT_X_TLS_NEVER)  # pylint: disable=no-member
-            ldap_conn = ldap.initialize(
-                current_app.config.get('BCOL_LDAP_SERVER'), trace_level=2
-            )
-            ldap_conn.set_option(ldap.OPT_REFERRALS, 0)  # pylint: disable=no-member
-            ldap_conn.set_option(ldap.OPT_PROTOCOL_VERSION, 3)  # pylint: disable=no-member
-            # ldap_conn.set_option(ldap.OPT_X_TLS, ldap.OPT_X_TLS_DEMAND)  # pylint: disable=no-member
-            ldap_conn.set_option(ldap.OPT_X_TLS_DEMAND, True)  # pylint: disable=no-member
-            ldap_conn.set_option(ldap.OPT_DEBUG_LEVEL, 255)  # pylint: disable=no-member
-
             username = current_app.config.get('BCOL_LDAP_USER_DN_PATTERN').format(
                 user_id
             )
-            ldap_conn.simple_bind_s(username, password)
+            ldap_pool.bind(username, password)
         except Exception as error:  # NOQA
             current_app.logger.warning(error)
             raise BusinessException(Error.INVALID_CREDENTIALS) from error
-        finally:
-            if ldap_conn:
-                ldap_conn.unbind_s()
 
         current_app.logger.debug('>>> _validate_user')
 
@@ -150,7 +209,8 @@ class BcolProfile:  # pylint:disable=too-few-public-methods
     def get_profile_response(self, data: Dict):  # pragma: no cover
         """Get Query Profile Response."""
         client = BcolSoap().get_profile_client()
-        return zeep.helpers.serialize_object(client.service.queryProfile(req=data))
+        with soap_metrics.timed('queryProfile'):
+            return zeep.helpers.serialize_object(client.service.queryProfile(req=data))
 
     @staticmethod
     def standardize_country(country):
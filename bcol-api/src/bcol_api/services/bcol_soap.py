@@ -11,10 +11,23 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-"""Holder for SOAP from BCOL."""
+"""Holder for SOAP from BCOL.
 
+The clients share a transport with a keep-alive connection pool. WSDLs and XSDs are cached in memory and on disk, so a
+new worker loads them from the cache rather than from BCOL.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict
+
+import requests
 import zeep
 from flask import current_app
+from requests.adapters import HTTPAdapter
+from zeep.cache import Base, InMemoryCache, SqliteCache
+from zeep.transports import Transport
 
 
 class Singleton(type):
@@ -29,6 +42,85 @@ class Singleton(type):
         return cls._instances[cls]
 
 
+class WsdlCache(Base):
+    """WSDL and XSD cache, in memory in front of the on-disk cache shared by the workers."""
+
+    def __init__(self, path: str = None, timeout: int = 86400):
+        """Create the caches, falling back to memory only if the on-disk cache can't be opened."""
+        self._memory = InMemoryCache(timeout=timeout)
+        try:
+            self._disk = SqliteCache(path=path, timeout=timeout)
+        except Exception as e:  # NOQA # pylint: disable=broad-except
+            current_app.logger.warning(f'WSDL disk cache is not available, using memory only : {e}')
+            self._disk = None
+
+    def add(self, url, content):
+        """Add the content to both caches."""
+        self._memory.add(url, content)
+        if self._disk:
+            self._disk.add(url, content)
+
+    def get(self, url):
+        """Return the content from memory, then disk."""
+        if (content := self._memory.get(url)) is None and self._disk:
+            if (content := self._disk.get(url)) is not None:
+                self._memory.add(url, content)
+        return content
+
+
+@dataclass
+class OperationMetrics:
+    """Latency for a SOAP operation."""
+
+    calls: int = 0
+    errors: int = 0
+    total_ms: float = 0
+    max_ms: float = 0
+
+    def asdict(self) -> Dict:
+        """Return the metrics as a dict."""
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'avg_ms': round(self.total_ms / self.calls, 2) if self.calls else 0,
+            'max_ms': round(self.max_ms, 2)
+        }
+
+
+class SoapMetrics:
+    """Latency per SOAP operation, e.g. queryProfile, debitAccount and appliedCharge."""
+
+    def __init__(self):
+        """Initialize without any operations."""
+        self._lock = threading.Lock()
+        self._operations: Dict[str, OperationMetrics] = {}
+
+    @contextmanager
+    def timed(self, operation: str):
+        """Record the latency of the call, and whether it raised."""
+        start = time.perf_counter()
+        failed = True
+        try:
+            yield
+            failed = False
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                metrics = self._operations.setdefault(operation, OperationMetrics())
+                metrics.calls += 1
+                metrics.errors += 1 if failed else 0
+                metrics.total_ms += elapsed_ms
+                metrics.max_ms = max(metrics.max_ms, elapsed_ms)
+
+    def stats(self) -> Dict:
+        """Return the metrics per operation."""
+        with self._lock:
+            return {operation: metrics.asdict() for operation, metrics in self._operations.items()}
+
+
+soap_metrics = SoapMetrics()  # pylint: disable=invalid-name
+
+
 class BcolSoap(metaclass=Singleton):  # pylint: disable=too-few-public-methods
     """Singleton wrapper for BCOL SOAP."""
 
@@ -50,14 +142,41 @@ class BcolSoap(metaclass=Singleton):  # pylint: disable=too-few-public-methods
 
     def __init__(self):
         """Private constructor."""
+        transport = self._create_transport()
         self.__profile_client = zeep.Client(
-            current_app.config.get('BCOL_QUERY_PROFILE_WSDL_URL')
+            current_app.config.get('BCOL_QUERY_PROFILE_WSDL_URL'), transport=transport
         )
 
         self.__payment_client = zeep.Client(
-            current_app.config.get('BCOL_PAYMENTS_WSDL_URL')
+            current_app.config.get('BCOL_PAYMENTS_WSDL_URL'), transport=transport
         )
 
         self.__applied_chg_client = zeep.Client(
-            current_app.config.get('BCOL_APPLIED_CHARGE_WSDL_URL')
+            current_app.config.get('BCOL_APPLIED_CHARGE_WSDL_URL'), transport=transport
         )
+
+    @staticmethod
+    def _create_transport() -> Transport:
+        """Return a transport with a keep-alive connection pool, cached WSDLs and timeouts."""
+        config = current_app.config
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=3, pool_maxsize=config.get('BCOL_POOL_MAXSIZE', 10))
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return Transport(session=session,
+                         cache=WsdlCache(path=config.get('BCOL_WSDL_CACHE_PATH'),
+                                         timeout=config.get('BCOL_WSDL_CACHE_TTL', 86400)),
+                         timeout=config.get('BCOL_WSDL_TIMEOUT', 30),
+                         operation_timeout=config.get('BCOL_SOAP_TIMEOUT', 30))
+
+
+def preload_wsdl(app):
+    """Load the SOAP clients when the app starts, so the first request doesn't wait on the WSDLs."""
+    if not app.config.get('BCOL_PRELOAD_WSDL'):
+        return
+    with app.app_context():
+        try:
+            BcolSoap()
+        except Exception as e:  # NOQA # pylint: disable=broad-except
+            # The clients are created on the first request instead.
+            app.logger.warning(f'Unable to preload BCOL WSDLs : {e}')
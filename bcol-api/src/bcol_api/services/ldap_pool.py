@@ -0,0 +1,108 @@
+# Copyright © 2024 Province of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Pool of LDAP connections to the BCOL directory.
+
+Connections are kept open between binds, so the TCP and TLS handshakes are done once per connection rather than once
+per login. A bind re-authenticates an open connection as the new user.
+"""
+import threading
+import time
+from typing import List, Tuple
+
+import ldap
+from flask import current_app
+
+
+class LdapConnectionPool:
+    """Bounded pool of open LDAP connections, idle connections are closed after BCOL_LDAP_POOL_MAX_IDLE seconds."""
+
+    def __init__(self):
+        """Initialize an empty pool."""
+        self._lock = threading.Lock()
+        self._idle: List[Tuple[object, float]] = []
+
+    def bind(self, who: str, cred: str):
+        """Bind as the user, raises the ldap error if the credentials are invalid or the directory is down."""
+        ldap_conn, reused = self._acquire()
+        try:
+            try:
+                ldap_conn.simple_bind_s(who, cred)
+            except ldap.SERVER_DOWN:  # pylint: disable=no-member
+                if not reused:
+                    raise
+                # The directory closed the pooled connection, retry once on a new one.
+                self._close(ldap_conn)
+                ldap_conn = self._connect()
+                ldap_conn.simple_bind_s(who, cred)
+        except ldap.INVALID_CREDENTIALS:  # pylint: disable=no-member
+            self._release(ldap_conn)
+            raise
+        except Exception:  # NOQA # pylint: disable=broad-except
+            self._close(ldap_conn)
+            raise
+        self._release(ldap_conn)
+
+    def clear(self):
+        """Close all idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for ldap_conn, _ in idle:
+            self._close(ldap_conn)
+
+    def _acquire(self) -> Tuple[object, bool]:
+        expired = []
+        ldap_conn = None
+        max_idle = current_app.config.get('BCOL_LDAP_POOL_MAX_IDLE', 300)
+        with self._lock:
+            while self._idle and ldap_conn is None:
+                candidate, released_at = self._idle.pop()
+                if time.monotonic() - released_at > max_idle:
+                    expired.append(candidate)
+                else:
+                    ldap_conn = candidate
+        for candidate in expired:
+            self._close(candidate)
+        if ldap_conn is not None:
+            return ldap_conn, True
+        return self._connect(), False
+
+    def _release(self, ldap_conn):
+        with self._lock:
+            if len(self._idle) < current_app.config.get('BCOL_LDAP_POOL_SIZE', 5):
+                self._idle.append((ldap_conn, time.monotonic()))
+                return
+        self._close(ldap_conn)
+
+    @staticmethod
+    def _connect():
+        config = current_app.config
+        ldap.set_option(ldap.OPT_X_TLS_REQUIRE_CERT, ldap.OPT_X_TLS_NEVER)  # pylint: disable=no-member
+        ldap_conn = ldap.initialize(config.get('BCOL_LDAP_SERVER'), trace_level=config.get('BCOL_LDAP_TRACE_LEVEL', 0))
+        ldap_conn.set_option(ldap.OPT_REFERRALS, 0)  # pylint: disable=no-member
+        ldap_conn.set_option(ldap.OPT_PROTOCOL_VERSION, 3)  # pylint: disable=no-member
+        ldap_conn.set_option(ldap.OPT_X_TLS_DEMAND, True)  # pylint: disable=no-member
+        ldap_conn.set_option(ldap.OPT_NETWORK_TIMEOUT, config.get('BCOL_LDAP_TIMEOUT', 10))  # pylint: disable=no-member
+        if debug_level := config.get('BCOL_LDAP_DEBUG_LEVEL', 0):
+            ldap_conn.set_option(ldap.OPT_DEBUG_LEVEL, debug_level)  # pylint: disable=no-member
+        return ldap_conn
+
+    @staticmethod
+    def _close(ldap_conn):
+        try:
+            ldap_conn.unbind_s()
+        except Exception:  # NOQA # pylint: disable=broad-except
+            pass
+
+
+ldap_pool = LdapConnectionPool()  # pylint: disable=invalid-name
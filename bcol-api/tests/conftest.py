@@ -72,7 +72,7 @@ def client_id():
 @pytest.fixture()
 def ldap_mock():
     """Mock ldap."""
-    ldap_patcher = patch('bcol_api.services.bcol_profile.ldap.initialize')
+    ldap_patcher = patch('bcol_api.services.ldap_pool.ldap.initialize')
     _mock_ldap = MockLDAP()
     mock_ldap = ldap_patcher.start()
     mock_ldap.return_value = _mock_ldap
@@ -83,7 +83,7 @@ def ldap_mock():
 @pytest.fixture()
 def ldap_mock_error():
     """Mock ldap error."""
-    ldap_patcher = patch('bcol_api.services.bcol_profile.ldap.initialize', side_effect=Exception('Mocked Error'))
+    ldap_patcher = patch('bcol_api.services.ldap_pool.ldap.initialize', side_effect=Exception('Mocked Error'))
     _mock_ldap = MockLDAP()
     mock_ldap = ldap_patcher.start()
     mock_ldap.return_value = _mock_ldap
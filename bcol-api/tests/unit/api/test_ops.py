@@ -33,3 +33,11 @@ def test_ops_readyz(client):
 
     assert rv.status_code == 200
     assert rv.json == {'message': 'api is ready'}
+
+
+def test_ops_metrics(client):
+    """Asserts that the SOAP metrics are returned."""
+    rv = client.get('/ops/metrics')
+
+    assert rv.status_code == 200
+    assert 'soap' in rv.json
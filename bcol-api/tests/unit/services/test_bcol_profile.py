@@ -16,8 +16,12 @@
 
 Test-Suite to ensure that the BCOL Service layer is working as expected.
 """
+from unittest.mock import patch
 
-from bcol_api.services.bcol_profile import BcolProfile
+import ldap
+
+from bcol_api.services.bcol_profile import BcolProfile, profile_cache
+from bcol_api.services.ldap_pool import ldap_pool
 
 
 def test_query_profile(app, ldap_mock, query_profile_mock):
@@ -28,6 +32,33 @@ def test_query_profile(app, ldap_mock, query_profile_mock):
         assert query_profile_response.get('address').get('country') == 'CA'
 
 
+def test_get_profile_cached(app, query_profile_mock, monkeypatch):
+    """Assert the profile is cached by user id, and use_cache=False always queries BCOL."""
+    monkeypatch.setitem(app.config, 'BCOL_PROFILE_CACHE_TTL', 60)
+    with app.app_context():
+        profile_cache.invalidate()
+        profile = BcolProfile().get_profile('PB25020')
+        profile['userId'] = 'CHANGED'
+        assert BcolProfile().get_profile('PB25020').get('userId') == 'PB25020'
+        assert BcolProfile.get_profile_response.call_count == 1
+
+        BcolProfile().get_profile('PB25020', use_cache=False)
+        assert BcolProfile.get_profile_response.call_count == 2
+        profile_cache.invalidate()
+
+
+def test_ldap_connection_reused(app, ldap_mock, query_profile_mock, monkeypatch):
+    """Assert the LDAP connection is kept open and reused for the next bind."""
+    monkeypatch.setitem(app.config, 'BCOL_LDAP_POOL_SIZE', 1)
+    with app.app_context():
+        ldap_pool.clear()
+        with patch('bcol_api.services.ldap_pool.ldap.initialize', wraps=ldap.initialize) as initialize:
+            BcolProfile().query_profile('TEST', 'TEST')
+            BcolProfile().query_profile('TEST', 'TEST')
+            assert initialize.call_count == 1
+        ldap_pool.clear()
+
+
 def test_standardize_country():
     """Test standardize country to code."""
     code = BcolProfile().standardize_country('CANADA')
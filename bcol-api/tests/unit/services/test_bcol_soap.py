@@ -17,7 +17,9 @@
 Test-Suite to ensure that the BCOL Service layer is working as expected.
 """
 
-from bcol_api.services.bcol_soap import BcolSoap
+import pytest
+
+from bcol_api.services.bcol_soap import BcolSoap, SoapMetrics
 
 
 def test_bcol_soap(app):
@@ -35,3 +37,29 @@ def test_bcol_soap_multiple_instances(app):
         bcol_soap = BcolSoap()
         bcol_soap2 = BcolSoap()
         assert bcol_soap == bcol_soap2
+
+
+def test_bcol_soap_shared_transport(app):
+    """Assert the clients share a pooled transport with the configured timeouts."""
+    with app.app_context():
+        bcol_soap = BcolSoap()
+        transport = bcol_soap.get_profile_client().transport
+        assert transport is bcol_soap.get_payment_client().transport
+        assert transport is bcol_soap.get_applied_chg_client().transport
+        assert transport.operation_timeout == app.config['BCOL_SOAP_TIMEOUT']
+        assert transport.cache is not None
+
+
+def test_soap_metrics():
+    """Assert the latency and errors are recorded per operation."""
+    metrics = SoapMetrics()
+    with metrics.timed('queryProfile'):
+        pass
+    with pytest.raises(ValueError):
+        with metrics.timed('queryProfile'):
+            raise ValueError('BCOL is down')
+
+    stats = metrics.stats()['queryProfile']
+    assert stats['calls'] == 2
+    assert stats['errors'] == 1
+    assert stats['max_ms'] >= stats['avg_ms'] >= 0
@@ -134,6 +134,11 @@ class _Config(object):  # pylint: disable=too-few-public-methods
     MINIO_CGI_BUCKET_NAME = os.getenv('MINIO_CGI_BUCKET_NAME', 'cgi-ejv')
     MINIO_EFT_BUCKET_NAME = os.getenv('MINIO_EFT_BUCKET_NAME', 'eft-sftp')
     MINIO_SECURE = True
+    # Files are uploaded in parts of this size, minio needs at least 5 MiB.
+    MINIO_PART_SIZE = int(os.getenv('MINIO_PART_SIZE', str(10 * 1024 * 1024)))
+
+    # Number of files copied from SFTP to minio at the same time.
+    FTP_TRANSFER_WORKERS = int(os.getenv('FTP_TRANSFER_WORKERS', '4'))
 
     SENTRY_ENABLE = os.getenv('SENTRY_ENABLE', 'False')
     SENTRY_DSN = os.getenv('SENTRY_DSN', None)
@@ -20,6 +20,7 @@ from sbc_common_components.utils.enums import QueueMessageTypes
 
 from services.sftp import SFTPService
 from utils import utils
+from utils.transfer import transfer_to_minio
 
 
 class CGIFeederPollerTask:  # pylint:disable=too-few-public-methods
@@ -40,6 +41,8 @@ class CGIFeederPollerTask:  # pylint:disable=too-few-public-methods
 
                 current_app.logger.info(
                     f'Found {len(file_list)} to be processed.This includes all files in the folder.')
+                ack_file_names: List[str] = []
+                feedback_files: List[SFTPAttributes] = []
                 for file in file_list:
                     file_name = file.filename
                     file_full_name = ftp_dir + '/' + file_name
@@ -48,20 +51,27 @@ class CGIFeederPollerTask:  # pylint:disable=too-few-public-methods
                             f'Skipping directory {file_name}.')
                         continue
                     if cls._is_ack_file(file_name):
-                        utils.publish_to_queue([file_name], QueueMessageTypes.CGI_ACK_MESSAGE_TYPE.value)
-                        cls._move_file_to_backup(sftp_client, [file_name])
+                        ack_file_names.append(file_name)
                     elif cls._is_feedback_file(file_name):
-                        bucket_name = current_app.config.get('MINIO_CGI_BUCKET_NAME')
-                        utils.upload_to_minio(file, file_full_name, sftp_client, bucket_name)
-                        utils.publish_to_queue([file_name], QueueMessageTypes.CGI_FEEDBACK_MESSAGE_TYPE.value,
-                                               location=bucket_name)
-                        cls._move_file_to_backup(sftp_client, [file_name])
+                        feedback_files.append(file)
                     elif cls._is_a_trigger_file(file_name):
                         cls._remove_file(sftp_client, file_name)
                     else:
                         current_app.logger.warning(
                             f'Ignoring file found which is not trigger ACK or feedback {file_name}.')
 
+                # Acknowledgements for the poll are published as one batch, ahead of the feedback files.
+                if ack_file_names:
+                    utils.publish_to_queue(ack_file_names, QueueMessageTypes.CGI_ACK_MESSAGE_TYPE.value)
+                    cls._move_file_to_backup(sftp_client, ack_file_names)
+
+                # Feedback files are copied to minio together, the ones that fail are picked up by the next poll.
+                bucket_name = current_app.config.get('MINIO_CGI_BUCKET_NAME')
+                if feedback_file_names := transfer_to_minio(sftp_client, feedback_files, ftp_dir, bucket_name):
+                    utils.publish_to_queue(feedback_file_names, QueueMessageTypes.CGI_FEEDBACK_MESSAGE_TYPE.value,
+                                           location=bucket_name)
+                    cls._move_file_to_backup(sftp_client, feedback_file_names)
+
             except Exception as e:  # NOQA # pylint: disable=broad-except
                 current_app.logger.error(e)
 
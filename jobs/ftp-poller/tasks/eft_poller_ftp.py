@@ -19,7 +19,8 @@ from paramiko.sftp_attr import SFTPAttributes
 
 from sbc_common_components.utils.enums import QueueMessageTypes
 from services.sftp import SFTPService
-from utils.utils import publish_to_queue, upload_to_minio
+from utils.transfer import transfer_to_minio
+from utils.utils import publish_to_queue
 
 
 class EFTPollerFtpTask:  # pylint:disable=too-few-public-methods
@@ -42,13 +43,11 @@ class EFTPollerFtpTask:  # pylint:disable=too-few-public-methods
                 ftp_dir: str = current_app.config.get('EFT_SFTP_DIRECTORY')
                 file_list: List[SFTPAttributes] = sftp_client.listdir_attr(ftp_dir)
                 current_app.logger.info(f'Found {len(file_list)} to be copied.')
-                for file in file_list:
-                    file_name = file.filename
-                    file_full_name = ftp_dir + '/' + file_name
-                    current_app.logger.info(f'Processing file  {file_full_name} started-----.')
-                    if EFTPollerFtpTask._is_valid_payment_file(sftp_client, file_full_name):
-                        upload_to_minio(file, file_full_name, sftp_client, current_app.config['MINIO_EFT_BUCKET_NAME'])
-                        payment_file_list.append(file_name)
+                payment_files = [file for file in file_list
+                                 if cls._is_valid_payment_file(sftp_client, ftp_dir + '/' + file.filename)]
+                # Only files copied to minio are moved to backup, the others are picked up by the next poll.
+                payment_file_list = transfer_to_minio(sftp_client, payment_files, ftp_dir,
+                                                      current_app.config['MINIO_EFT_BUCKET_NAME'])
 
                 if len(payment_file_list) > 0:
                     EFTPollerFtpTask._post_process(sftp_client, payment_file_list)
@@ -22,6 +22,7 @@ from flask import current_app
 from sbc_common_components.utils.enums import QueueMessageTypes
 
 from services.sftp import SFTPService
+from utils.transfer import transfer_to_minio
 from utils.utils import publish_to_queue
 
 
@@ -40,6 +41,28 @@ def test_poll_ftp_task():
     assert len(files) == 1, 'Files exist in FTP folder'
 
 
+def test_transfer_to_minio(monkeypatch):
+    """Assert files are streamed to minio, and only files with a matching uploaded size are returned."""
+    uploaded = {}
+
+    def put_stream(stream, file_name, bucket_name, file_size):  # pylint:disable=unused-argument
+        uploaded[file_name] = b''.join(iter(lambda: stream.read(3), b''))
+
+    monkeypatch.setattr('utils.transfer.put_stream', put_stream)
+    monkeypatch.setattr('utils.transfer.get_object_size', lambda file_name, bucket_name: len(uploaded[file_name]))
+    monkeypatch.setitem(current_app.config, 'FTP_TRANSFER_WORKERS', 2)
+
+    con = SFTPService.get_connection()
+    ftp_dir: str = current_app.config.get('CAS_SFTP_DIRECTORY')
+    files = con.listdir_attr(ftp_dir)
+    assert transfer_to_minio(con, files, ftp_dir, 'bucket') == [file.filename for file in files]
+    for file in files:
+        assert len(uploaded[file.filename]) == file.st_size
+
+    monkeypatch.setattr('utils.transfer.get_object_size', lambda file_name, bucket_name: -1)
+    assert not transfer_to_minio(con, files, ftp_dir, 'bucket')
+
+
 @pytest.mark.skip(reason='leave this to manually verify pubsub connection;'
                          'needs env vars, disable def mock_queue_publish(monkeypatch):')
 def test_queue_message(session):  # pylint:disable=unused-argument
@@ -12,19 +12,28 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """This module is a wrapper for Minio."""
-import io
+import threading
+from typing import BinaryIO, Dict, Tuple
 
 from flask import current_app
 from minio import Minio
 from urllib3 import HTTPResponse
 
 
-def put_object(value_as_bytes, file_name: str, bucket_name, file_size: int = 0):
-    """Return a pre-signed URL for new doc upload."""
-    current_app.logger.debug(f'Creating pre-signed URL for {file_name}')
-    minio_client: Minio = _get_client()
-    value_as_stream = io.BytesIO(value_as_bytes)
-    minio_client.put_object(bucket_name, file_name, value_as_stream, file_size)
+_clients: Dict[Tuple, Minio] = {}
+_clients_lock = threading.Lock()
+
+
+def put_stream(stream: BinaryIO, file_name: str, bucket_name: str, file_size: int):
+    """Upload from the stream, in parts of MINIO_PART_SIZE, so the file is never held in memory."""
+    current_app.logger.debug(f'Uploading {file_name} to {bucket_name}')
+    _get_client().put_object(bucket_name, file_name, stream, file_size,
+                             part_size=current_app.config['MINIO_PART_SIZE'])
+
+
+def get_object_size(file_name: str, bucket_name: str) -> int:
+    """Return the size of the object."""
+    return _get_client().stat_object(bucket_name, file_name).size
 
 
 def get_object(file_name: str) -> HTTPResponse:
@@ -35,9 +44,13 @@ def get_object(file_name: str) -> HTTPResponse:
 
 
 def _get_client() -> Minio:
-    """Return a minio client."""
+    """Return a minio client, clients are thread safe and reused so their connection pool is too."""
     minio_endpoint = current_app.config['MINIO_ENDPOINT']
     minio_key = current_app.config['MINIO_ACCESS_KEY']
     minio_secret = current_app.config['MINIO_ACCESS_SECRET']
-    return Minio(minio_endpoint, access_key=minio_key, secret_key=minio_secret,
-                 secure=current_app.config['MINIO_SECURE'])
+    key = (minio_endpoint, minio_key, minio_secret, current_app.config['MINIO_SECURE'])
+    with _clients_lock:
+        if (client := _clients.get(key)) is None:
+            client = _clients[key] = Minio(minio_endpoint, access_key=minio_key, secret_key=minio_secret,
+                                           secure=current_app.config['MINIO_SECURE'])
+    return client
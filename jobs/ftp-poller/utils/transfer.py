@@ -0,0 +1,103 @@
+# Copyright © 2024 Province of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Copy files from SFTP to MinIO, a few at a time.
+
+Files are streamed from the SFTP file handle into a multipart upload, so a large CAS or TDI17 file is never held in
+memory. Transfers share the poller's SSH session, each worker opens its own SFTP channel on it.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import paramiko
+from flask import Flask, current_app
+from paramiko.sftp_attr import SFTPAttributes
+from pysftp import Connection
+
+from utils.minio import get_object_size, put_stream
+
+
+class SFTPFileStream:
+    """Read an SFTP file in pipelined windows, memory is bounded by the size asked for rather than the file."""
+
+    def __init__(self, sftp_file: paramiko.SFTPFile, file_size: int):
+        """Read the file from the start."""
+        self._file = sftp_file
+        self._file_size = file_size
+        self._offset = 0
+
+    def read(self, size: int = -1) -> bytes:
+        """Read up to size bytes, the requests for the window are sent together."""
+        remaining = self._file_size - self._offset
+        size = remaining if size is None or size < 0 else min(size, remaining)
+        if size <= 0:
+            return b''
+        data = b''.join(self._file.readv([(self._offset, size)]))
+        self._offset += len(data)
+        return data
+
+
+def transfer_to_minio(sftp_client: Connection, files: List[SFTPAttributes], ftp_dir: str,
+                      bucket_name: str) -> List[str]:
+    """Copy the files to the bucket, returning the names of the files copied and verified, in the order given.
+
+    A file that fails is logged and left on the SFTP server, so it is picked up again by the next poll.
+    """
+    if not files:
+        return []
+    workers = min(max(int(current_app.config.get('FTP_TRANSFER_WORKERS', 1)), 1), len(files))
+    if workers == 1:
+        results = [_transfer_file(sftp_client.sftp_client, file, ftp_dir, bucket_name) for file in files]
+    else:
+        results = _transfer_concurrently(sftp_client, files, ftp_dir, bucket_name, workers)
+    return [file.filename for file, transferred in zip(files, results) if transferred]
+
+
+def _transfer_concurrently(sftp_client: Connection, files: List[SFTPAttributes], ftp_dir: str, bucket_name: str,
+                           workers: int) -> List[bool]:
+    app: Flask = current_app._get_current_object()  # pylint: disable=protected-access
+    transport = sftp_client.sftp_client.get_channel().get_transport()
+    channels = threading.local()
+    opened: List[paramiko.SFTPClient] = []
+    lock = threading.Lock()
+
+    def transfer(file: SFTPAttributes) -> bool:
+        if (channel := getattr(channels, 'sftp', None)) is None:
+            channel = channels.sftp = paramiko.SFTPClient.from_transport(transport)
+            with lock:
+                opened.append(channel)
+        with app.app_context():
+            return _transfer_file(channel, file, ftp_dir, bucket_name)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ftp-transfer') as executor:
+            return list(executor.map(transfer, files))
+    finally:
+        for channel in opened:
+            channel.close()
+
+
+def _transfer_file(sftp: paramiko.SFTPClient, file: SFTPAttributes, ftp_dir: str, bucket_name: str) -> bool:
+    """Stream the file to the bucket and check the uploaded size matches, before the file is moved to backup."""
+    file_full_name = ftp_dir + '/' + file.filename
+    current_app.logger.info(f'Copying file {file_full_name} ({file.st_size} bytes) to {bucket_name}.')
+    try:
+        with sftp.open(file_full_name, 'rb') as sftp_file:
+            put_stream(SFTPFileStream(sftp_file, file.st_size), file.filename, bucket_name, file.st_size)
+        if (uploaded_size := get_object_size(file.filename, bucket_name)) != file.st_size:
+            raise ValueError(f'Uploaded {uploaded_size} bytes, expected {file.st_size} bytes.')
+        return True
+    except Exception:  # NOQA # pylint: disable=broad-except
+        current_app.logger.error(f'upload to minio failed for the file: {file_full_name}', exc_info=True)
+        return False
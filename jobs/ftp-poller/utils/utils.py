@@ -12,54 +12,49 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """Service to manage PAYBC services."""
-from time import time
 from typing import List
 
 from flask import current_app
-from paramiko import SFTPFile
 from pay_api.services import gcp_queue_publisher
 from pay_api.services.gcp_queue_publisher import QueueMessage
 from pay_api.utils.enums import QueueSources
 from sbc_common_components.utils.enums import QueueMessageTypes
 
-from utils.minio import put_object
+
+# Files from one feed are processed in order by pay-queue, different feeds don't wait on each other.
+ORDERING_KEYS = {
+    QueueMessageTypes.CAS_MESSAGE_TYPE.value: 'CAS',
+    QueueMessageTypes.CGI_ACK_MESSAGE_TYPE.value: 'CGI',
+    QueueMessageTypes.CGI_FEEDBACK_MESSAGE_TYPE.value: 'CGI',
+    QueueMessageTypes.EFT_FILE_UPLOADED.value: 'EFT'
+}
 
 
 def publish_to_queue(payment_file_list: List[str], message_type=QueueMessageTypes.CAS_MESSAGE_TYPE.value,
                      location: str = ''):
-    """Publish message to the Queue, saying file has been uploaded. Using the event spec."""
-    queue_data = {
-        'fileSource': 'MINIO',
-        'location': location or current_app.config['MINIO_BUCKET_NAME']
-    }
-    for file_name in payment_file_list:
-        queue_data['fileName'] = file_name
-
-        try:
-            gcp_queue_publisher.publish_to_queue(
-                QueueMessage(
-                    source=QueueSources.FTP_POLLER.value,
-                    message_type=message_type,
-                    payload=queue_data,
-                    topic=current_app.config.get('FTP_POLLER_TOPIC'),
-                    ordering_key=str(time())
-                )
-            )
-        except Exception as e:  # NOQA # pylint: disable=broad-except
-            current_app.logger.warning(
-                f'Notification to Queue failed for the file {file_name}',
-                e)
-            raise
-
+    """Publish message to the Queue, saying file has been uploaded. Using the event spec.
 
-def upload_to_minio(file, file_full_name, sftp_client, bucket_name):
-    """Upload to minio."""
-    f: SFTPFile
-    with sftp_client.open(file_full_name) as f:
-        f.prefetch()
-        value_as_bytes = f.read()
-        try:
-            put_object(value_as_bytes, file.filename, bucket_name, file.st_size, )
-        except Exception:  # NOQA # pylint: disable=broad-except
-            current_app.logger.error(f'upload to minio failed for the file: {file_full_name}')
-            raise
+    The messages for the poll are sent together, in the order of the list, with the ordering key for the feed.
+    """
+    location = location or current_app.config['MINIO_BUCKET_NAME']
+    queue_messages = [
+        QueueMessage(
+            source=QueueSources.FTP_POLLER.value,
+            message_type=message_type,
+            payload={
+                'fileSource': 'MINIO',
+                'location': location,
+                'fileName': file_name
+            },
+            topic=current_app.config.get('FTP_POLLER_TOPIC'),
+            ordering_key=ORDERING_KEYS.get(message_type, message_type)
+        )
+        for file_name in payment_file_list
+    ]
+    try:
+        gcp_queue_publisher.publish_batch_to_queue(queue_messages)
+    except Exception as e:  # NOQA # pylint: disable=broad-except
+        current_app.logger.warning(
+            f'Notification to Queue failed for the files {payment_file_list}',
+            e)
+        raise
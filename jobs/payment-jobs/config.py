@@ -195,6 +195,13 @@ class _Config(object):  # pylint: disable=too-few-public-methods
     EFT_TRANSFER_DESC = os.getenv('EFT_TRANSFER_DESC', 'BCREGISTRIES {} {} EFT TRANSFER')
     EFT_OVERDUE_NOTIFY_EMAILS = os.getenv('EFT_OVERDUE_NOTIFY_EMAILS', '')
 
+    # Sharded execution, JOB_SHARD=N/M handles the accounts where account id % M == N. Can be set with --shard N/M.
+    JOB_SHARD = os.getenv('JOB_SHARD', '0/1')
+    # Threads running accounts in parallel within a job. Can be set with --workers.
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', '1'))
+    # Accounts sent to CFS in parallel when creating invoices, defaults to JOB_WORKERS.
+    CFS_INVOICE_WORKERS = int(os.getenv('CFS_INVOICE_WORKERS', '0'))
+
 
 
 
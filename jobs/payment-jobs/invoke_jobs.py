@@ -28,9 +28,11 @@ from tasks.routing_slip_task import RoutingSlipTask
 from tasks.eft_task import EFTTask
 from tasks.statement_due_task import StatementDueTask
 from utils.logger import setup_logging
+from utils.sharding import SHARDED_JOBS, Shard, split_execution_args
 
 from pay_api.services import Flags
 from pay_api.services.gcp_queue import queue
+from pay_api.utils.user_context import UserContext, use_user_context
 
 setup_logging(os.path.join(os.path.abspath(os.path.dirname(__file__)), 'logging.conf'))  # important to do this first
 
@@ -77,7 +79,7 @@ def register_shellcontext(app):
     app.shell_context_processor(shell_context)
 
 
-def run(job_name, argument=None):
+def run(job_name, argument=None, shard=None, workers=None):
     from tasks.cfs_create_account_task import CreateAccountTask
     from tasks.cfs_create_invoice_task import CreateInvoiceTask
     from tasks.distribution_task import DistributionTask
@@ -91,74 +93,89 @@ def run(job_name, argument=None):
     from tasks.ap_task import ApTask
     from tasks.direct_pay_automated_refund_task import DirectPayAutomatedRefundTask
     from tasks.bcol_refund_confirmation_task import BcolRefundConfirmationTask
+    from tasks.stored_totals_task import StoredTotalsTask
+
+    if shard and job_name not in SHARDED_JOBS:
+        # Any other job would run in full on every pod, repeating its CFS, EJV and AP side effects.
+        raise ValueError(f'--shard is not supported for {job_name}, only for {", ".join(SHARDED_JOBS)}.')
 
     jobs_with_oracle_connections = ['BCOL_REFUND_CONFIRMATION']
     application = create_app(job_name=job_name, init_oracle=job_name in jobs_with_oracle_connections)
+    if shard:
+        application.config['JOB_SHARD'] = str(Shard.parse(shard))
+    if workers:
+        application.config['JOB_WORKERS'] = workers
 
     application.app_context().push()
-    match job_name:
-        case 'UPDATE_GL_CODE':
-            DistributionTask.update_failed_distributions()
-            application.logger.info('<<<< Completed Updating GL Codes >>>>')
-        case 'GENERATE_STATEMENTS':
-            StatementTask.generate_statements(argument)
-            application.logger.info('<<<< Completed Generating Statements >>>>')
-        case 'SEND_NOTIFICATIONS':
-            StatementNotificationTask.send_notifications()
-            application.logger.info('<<<< Completed Sending notifications >>>>')
-        case 'UPDATE_STALE_PAYMENTS':
-            StalePaymentTask.update_stale_payments()
-            application.logger.info('<<<< Completed Updating stale payments >>>>')
-        case 'CREATE_CFS_ACCOUNTS':
-            CreateAccountTask.create_accounts()
-            application.logger.info('<<<< Completed creating cfs accounts >>>>')
-        case 'CREATE_INVOICES':
-            CreateInvoiceTask.create_invoices()
-            application.logger.info('<<<< Completed creating cfs invoices >>>>')
-        case 'ACTIVATE_PAD_ACCOUNTS':
-            ActivatePadAccountTask.activate_pad_accounts()
-            application.logger.info('<<<< Completed Activating PAD accounts >>>>')
-        case 'EJV_PARTNER':
-            EjvPartnerDistributionTask.create_ejv_file()
-            application.logger.info('<<<< Completed Creating EJV File for partner distribution>>>>')
-        case 'NOTIFY_UNPAID_INVOICE_OB':
-            UnpaidInvoiceNotifyTask.notify_unpaid_invoices()
-            application.logger.info('<<<< Completed Sending notification for OB invoices >>>>')
-        case 'STATEMENTS_DUE':
-            action_date_override = argument[0] if len(argument) == 1 else None
-            StatementDueTask.process_unpaid_statements(action_date_override=action_date_override)
-            application.logger.info('<<<< Completed Sending notification for unpaid statements >>>>')
-        case 'ROUTING_SLIP':
-            RoutingSlipTask.link_routing_slips()
-            RoutingSlipTask.process_void()
-            RoutingSlipTask.process_nsf()
-            RoutingSlipTask.process_correction()
-            RoutingSlipTask.adjust_routing_slips()
-            application.logger.info('<<<< Completed Routing Slip tasks >>>>')
-        case 'EFT':
-            EFTTask.link_electronic_funds_transfers_cfs()
-            EFTTask.reverse_electronic_funds_transfers_cfs()
-            application.logger.info('<<<< Completed EFT tasks >>>>')
-        case 'EJV_PAYMENT':
-            EjvPaymentTask.create_ejv_file()
-            application.logger.info('<<<< Completed running EJV payment >>>>')
-        case 'AP':
-            ApTask.create_ap_files()
-            application.logger.info('<<<< Completed running AP Job for refund >>>>')
-        case 'DIRECT_PAY_REFUND':
-            DirectPayAutomatedRefundTask.process_cc_refunds()
-            application.logger.info('<<<< Completed running Direct Pay Automated Refund Job >>>>')
-        case 'BCOL_REFUND_CONFIRMATION':
-            BcolRefundConfirmationTask.update_bcol_refund_invoices()
-            application.logger.info('<<<< Completed running BCOL Refund Confirmation Job >>>>')
-        case _:
-            application.logger.debug('No valid args passed. Exiting job without running any ***************')
+    # Jobs run outside a request, the audit columns are filled from an empty context built once.
+    with use_user_context(UserContext(token_info={})):
+        match job_name:
+            case 'UPDATE_GL_CODE':
+                DistributionTask.update_failed_distributions()
+                application.logger.info('<<<< Completed Updating GL Codes >>>>')
+            case 'GENERATE_STATEMENTS':
+                StatementTask.generate_statements(argument)
+                application.logger.info('<<<< Completed Generating Statements >>>>')
+            case 'SEND_NOTIFICATIONS':
+                StatementNotificationTask.send_notifications()
+                application.logger.info('<<<< Completed Sending notifications >>>>')
+            case 'UPDATE_STALE_PAYMENTS':
+                StalePaymentTask.update_stale_payments()
+                application.logger.info('<<<< Completed Updating stale payments >>>>')
+            case 'CREATE_CFS_ACCOUNTS':
+                CreateAccountTask.create_accounts()
+                application.logger.info('<<<< Completed creating cfs accounts >>>>')
+            case 'CREATE_INVOICES':
+                CreateInvoiceTask.create_invoices()
+                application.logger.info('<<<< Completed creating cfs invoices >>>>')
+            case 'ACTIVATE_PAD_ACCOUNTS':
+                ActivatePadAccountTask.activate_pad_accounts()
+                application.logger.info('<<<< Completed Activating PAD accounts >>>>')
+            case 'EJV_PARTNER':
+                EjvPartnerDistributionTask.create_ejv_file()
+                application.logger.info('<<<< Completed Creating EJV File for partner distribution>>>>')
+            case 'NOTIFY_UNPAID_INVOICE_OB':
+                UnpaidInvoiceNotifyTask.notify_unpaid_invoices()
+                application.logger.info('<<<< Completed Sending notification for OB invoices >>>>')
+            case 'STATEMENTS_DUE':
+                action_date_override = argument[0] if len(argument) == 1 else None
+                StatementDueTask.process_unpaid_statements(action_date_override=action_date_override)
+                application.logger.info('<<<< Completed Sending notification for unpaid statements >>>>')
+            case 'ROUTING_SLIP':
+                RoutingSlipTask.link_routing_slips()
+                RoutingSlipTask.process_void()
+                RoutingSlipTask.process_nsf()
+                RoutingSlipTask.process_correction()
+                RoutingSlipTask.adjust_routing_slips()
+                application.logger.info('<<<< Completed Routing Slip tasks >>>>')
+            case 'EFT':
+                EFTTask.link_electronic_funds_transfers_cfs()
+                EFTTask.reverse_electronic_funds_transfers_cfs()
+                application.logger.info('<<<< Completed EFT tasks >>>>')
+            case 'EJV_PAYMENT':
+                EjvPaymentTask.create_ejv_file()
+                application.logger.info('<<<< Completed running EJV payment >>>>')
+            case 'AP':
+                ApTask.create_ap_files()
+                application.logger.info('<<<< Completed running AP Job for refund >>>>')
+            case 'DIRECT_PAY_REFUND':
+                DirectPayAutomatedRefundTask.process_cc_refunds()
+                application.logger.info('<<<< Completed running Direct Pay Automated Refund Job >>>>')
+            case 'BCOL_REFUND_CONFIRMATION':
+                BcolRefundConfirmationTask.update_bcol_refund_invoices()
+                application.logger.info('<<<< Completed running BCOL Refund Confirmation Job >>>>')
+            case 'REFRESH_STORED_TOTALS':
+                StoredTotalsTask.refresh_totals()
+                application.logger.info('<<<< Completed refreshing stored totals >>>>')
+            case _:
+                application.logger.debug('No valid args passed. Exiting job without running any ***************')
 
 
 if __name__ == "__main__":
-    print('----------------------------Scheduler Ran With Argument--', sys.argv[1])
-    if (len(sys.argv) > 2):
-        params = sys.argv[2:len(sys.argv)]
-        run(sys.argv[1], params)
+    args, shard_arg, workers_arg = split_execution_args(sys.argv[1:])
+    print('----------------------------Scheduler Ran With Argument--', args[0])
+    if (len(args) > 1):
+        params = args[1:len(args)]
+        run(args[0], params, shard=shard_arg, workers=workers_arg)
     else:
-        run(sys.argv[1])
+        run(args[0], shard=shard_arg, workers=workers_arg)
@@ -0,0 +1,3 @@
+#! /bin/sh
+echo 'run invoke_jobs.py REFRESH_STORED_TOTALS'
+python3 invoke_jobs.py REFRESH_STORED_TOTALS
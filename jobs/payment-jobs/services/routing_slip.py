@@ -46,7 +46,7 @@ def create_cfs_account(cfs_account: CfsAccountModel, pay_account: PaymentAccount
                                       rcpt_date=routing_slip.routing_slip_date.strftime('%Y-%m-%d'),
                                       amount=routing_slip.total,
                                       payment_method=pay_account.payment_method,
-                                      access_token=CFSService.get_token(PaymentSystem.FAS).json().get('access_token'))
+                                      access_token=CFSService.get_access_token(PaymentSystem.FAS))
         cfs_account.commit()
         return
 
@@ -30,6 +30,7 @@ from pay_api.models import RoutingSlip as RoutingSlipModel
 from pay_api.models import db
 from pay_api.utils.enums import DisbursementStatus, EjvFileType, EJVLinkType, RoutingSlipStatus
 from tasks.common.cgi_ap import CgiAP
+from tasks.common.cgi_file_writer import CgiFileWriter
 from tasks.common.dataclasses import APLine
 from tasks.ejv_partner_distribution_task import EjvPartnerDistributionTask
 
@@ -84,27 +85,22 @@ class ApTask(CgiAP):
             ).flush()
 
             batch_number: str = cls.get_batch_number(ejv_file_model.id)
-            ap_content: str = cls.get_batch_header(batch_number)
-            batch_total = 0
-            total_line_count: int = 0
-            for rs in routing_slips:
-                current_app.logger.info(f'Creating refund for {rs.number}, Amount {rs.refund_amount}.')
-                refund: RefundModel = RefundModel.find_by_routing_slip_id(rs.id)
-                ap_content = f'{ap_content}{cls.get_ap_header(rs.refund_amount, rs.number,
-                                                              datetime.now(tz=timezone.utc))}'
-                ap_line = APLine(total=rs.refund_amount, invoice_number=rs.number, line_number=1)
-                ap_content = f'{ap_content}{cls.get_ap_invoice_line(ap_line)}'
-                ap_content = f'{ap_content}{cls.get_ap_address(refund.details, rs.number)}'
-                total_line_count += 3
-                if ap_comment := cls.get_ap_comment(refund.details, rs.number):
-                    ap_content = f'{ap_content}{ap_comment:<40}'
-                    total_line_count += 1
-                batch_total += rs.refund_amount
-                rs.status = RoutingSlipStatus.REFUND_UPLOADED.value
-            batch_trailer = cls.get_batch_trailer(batch_number, float(batch_total), control_total=total_line_count)
-            ap_content = f'{ap_content}{batch_trailer}'
-
-            cls._create_file_and_upload(ap_content)
+            with cls.create_file_writer(ejv_file_model.file_ref, cls.get_batch_header(batch_number)) as writer:
+                for rs in routing_slips:
+                    current_app.logger.info(f'Creating refund for {rs.number}, Amount {rs.refund_amount}.')
+                    refund: RefundModel = RefundModel.find_by_routing_slip_id(rs.id)
+                    writer.write(cls.get_ap_header(rs.refund_amount, rs.number, datetime.now(tz=timezone.utc)),
+                                 amount=rs.refund_amount)
+                    ap_line = APLine(total=rs.refund_amount, invoice_number=rs.number, line_number=1)
+                    writer.write(cls.get_ap_invoice_line(ap_line))
+                    writer.write(cls.get_ap_address(refund.details, rs.number))
+                    if ap_comment := cls.get_ap_comment(refund.details, rs.number):
+                        writer.write(f'{ap_comment:<40}')
+                    rs.status = RoutingSlipStatus.REFUND_UPLOADED.value
+                batch_trailer = cls.get_batch_trailer(batch_number, float(writer.batch_total),
+                                                      control_total=writer.control_total)
+
+                cls._create_file_and_upload(writer, batch_trailer)
 
     @classmethod
     def _create_non_gov_disbursement_file(cls):  # pylint:disable=too-many-locals
@@ -135,41 +131,37 @@ class ApTask(CgiAP):
             ).flush()
 
             batch_number: str = cls.get_batch_number(ejv_file_model.id)
-            ap_content: str = cls.get_batch_header(batch_number)
-            batch_total = 0
-            control_total: int = 0
-            for inv in invoices:
-                disbursement_invoice_total = inv.total - inv.service_fees
-                batch_total += disbursement_invoice_total
-                if disbursement_invoice_total == 0:
-                    continue
-                ap_content = f'{ap_content}{cls.get_ap_header(disbursement_invoice_total, inv.id, inv.created_on)}'
-                control_total += 1
-                line_number: int = 0
-                for line_item in inv.payment_line_items:
-                    if line_item.total == 0:
+            with cls.create_file_writer(ejv_file_model.file_ref, cls.get_batch_header(batch_number)) as writer:
+                for inv in invoices:
+                    disbursement_invoice_total = inv.total - inv.service_fees
+                    if disbursement_invoice_total == 0:
                         continue
-                    ap_line = APLine.from_invoice_and_line_item(inv, line_item, line_number + 1, bca_distribution)
-                    ap_content = f'{ap_content}{cls.get_ap_invoice_line(ap_line)}'
-                    line_number += 1
-                control_total += line_number
-            batch_trailer: str = cls.get_batch_trailer(batch_number, batch_total, control_total=control_total)
-            ap_content = f'{ap_content}{batch_trailer}'
-
-            for inv in invoices:
-                db.session.add(EjvLinkModel(link_id=inv.id,
-                                            link_type=EJVLinkType.INVOICE.value,
-                                            ejv_header_id=ejv_header_model.id,
-                                            disbursement_status_code=DisbursementStatus.UPLOADED.value))
-                inv.disbursement_status_code = DisbursementStatus.UPLOADED.value
-            db.session.flush()
-
-            cls._create_file_and_upload(ap_content)
+                    writer.write(cls.get_ap_header(disbursement_invoice_total, inv.id, inv.created_on),
+                                 amount=disbursement_invoice_total)
+                    line_number: int = 0
+                    for line_item in inv.payment_line_items:
+                        if line_item.total == 0:
+                            continue
+                        ap_line = APLine.from_invoice_and_line_item(inv, line_item, line_number + 1, bca_distribution)
+                        writer.write(cls.get_ap_invoice_line(ap_line))
+                        line_number += 1
+                batch_trailer: str = cls.get_batch_trailer(batch_number, writer.batch_total,
+                                                           control_total=writer.control_total)
+
+                for inv in invoices:
+                    db.session.add(EjvLinkModel(link_id=inv.id,
+                                                link_type=EJVLinkType.INVOICE.value,
+                                                ejv_header_id=ejv_header_model.id,
+                                                disbursement_status_code=DisbursementStatus.UPLOADED.value))
+                    inv.disbursement_status_code = DisbursementStatus.UPLOADED.value
+                db.session.flush()
+
+                cls._create_file_and_upload(writer, batch_trailer)
 
     @classmethod
-    def _create_file_and_upload(cls, ap_content):
-        file_path_with_name, trg_file_path = cls.create_inbox_and_trg_files(ap_content)
-        cls.upload(ap_content, cls.get_file_name(), file_path_with_name, trg_file_path)
+    def _create_file_and_upload(cls, writer: CgiFileWriter, batch_trailer: str):
+        file_path_with_name, trg_file_path = writer.complete(batch_trailer)
+        cls.upload(writer.file_name, file_path_with_name, trg_file_path)
         db.session.commit()
         # Add a sleep to prevent collision on file name.
         time.sleep(1)
@@ -78,7 +78,7 @@ def run_update(pay_account_id, num_records):
         .order_by(PaymentAccountModel.id.asc()) \
         .limit(num_records) \
         .all()
-    access_token: str = CFSService.get_token().json().get('access_token')
+    access_token: str = CFSService.get_access_token()
     current_app.logger.info(f'<<<< Total number of records founds: {len(pad_accounts)}')
     current_app.logger.info(f'<<<< records founds: {[accnt.id for accnt in pad_accounts]}')
     if len(pad_accounts) == 0:
@@ -115,7 +115,7 @@ def get_bank_info(party_number: str,  # pylint: disable=too-many-arguments
     current_app.logger.debug('<Updating CFS payment details ')
     site_payment_url = current_app.config.post(
         'CFS_BASE_URL') + f'/cfs/parties/{party_number}/accs/{account_number}/sites/{site_number}/payment/'
-    access_token: str = CFSService.get_token().json().get('access_token')
+    access_token: str = CFSService.get_access_token()
     payment_details = CFSService.get(site_payment_url, access_token, AuthHeaderType.BEARER, ContentType.JSON)
     return payment_details.json()
 
@@ -12,10 +12,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """Task to create CFS invoices offline."""
+from collections import defaultdict
 from datetime import datetime, timezone
 from decimal import Decimal
 import time
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
 from flask import current_app
 from pay_api.models import CfsAccount as CfsAccountModel
@@ -37,8 +38,10 @@ from pay_api.utils.util import generate_transaction_number
 from sbc_common_components.utils.enums import QueueMessageTypes
 from sentry_sdk import capture_message
 from sqlalchemy import select
+from sqlalchemy.orm import selectinload
 
 from utils import mailer
+from utils.sharding import get_shard, run_for_accounts
 
 from .routing_slip_task import RoutingSlipTask
 
@@ -82,9 +85,11 @@ class CreateInvoiceTask:  # pylint:disable=too-few-public-methods
     def _cancel_rs_invoices(cls):
         """Cancel routing slip invoices in CFS."""
         invoices: List[InvoiceModel] = InvoiceModel.query \
+            .join(RoutingSlipModel, RoutingSlipModel.number == InvoiceModel.routing_slip) \
             .filter(InvoiceModel.payment_method_code == PaymentMethod.INTERNAL.value) \
             .filter(InvoiceModel.invoice_status_code == InvoiceStatus.REFUND_REQUESTED.value) \
             .filter(InvoiceModel.routing_slip is not None) \
+            .filter(get_shard().owns_clause(RoutingSlipModel.payment_account_id)) \
             .order_by(InvoiceModel.created_on.asc()).all()
 
         current_app.logger.info(f'Found {len(invoices)} to be cancelled in CFS.')
@@ -142,6 +147,7 @@ class CreateInvoiceTask:  # pylint:disable=too-few-public-methods
             .filter(CfsAccountModel.status.in_([CfsAccountStatus.ACTIVE.value, CfsAccountStatus.FREEZE.value])) \
             .filter(CfsAccountModel.payment_method == PaymentMethod.INTERNAL.value) \
             .filter(InvoiceModel.routing_slip is not None) \
+            .filter(get_shard().owns_clause(RoutingSlipModel.payment_account_id)) \
             .order_by(InvoiceModel.created_on.asc()).all()
 
         current_app.logger.info(f'Found {len(invoices)} to be created in CFS.')
@@ -226,120 +232,158 @@ class CreateInvoiceTask:  # pylint:disable=too-few-public-methods
             invoice.save()
 
     @classmethod
-    def _create_pad_invoices(cls):  # pylint: disable=too-many-locals
+    def _create_pad_invoices(cls):
         """Create PAD invoices in to CFS system."""
-        inv_subquery = db.session.query(InvoiceModel.payment_account_id) \
-            .filter(InvoiceModel.payment_method_code == PaymentMethod.PAD.value) \
-            .filter(InvoiceModel.invoice_status_code == InvoiceStatus.APPROVED.value).subquery()
+        invoice_ids_by_account = cls._find_rollup_invoice_ids(PaymentMethod.PAD)
+        current_app.logger.info(f'Found {len(invoice_ids_by_account)} with PAD transactions.')
 
-        pad_accounts: List[PaymentAccountModel] = db.session.query(PaymentAccountModel) \
-            .join(CfsAccountModel, CfsAccountModel.account_id == PaymentAccountModel.id) \
-            .filter(CfsAccountModel.status != CfsAccountStatus.FREEZE.value) \
-            .filter(CfsAccountModel.payment_method == PaymentMethod.PAD.value) \
-            .filter(PaymentAccountModel.id.in_(select(inv_subquery))).all()
+        run_for_accounts(invoice_ids_by_account.keys(),
+                         lambda account_id: cls._create_pad_invoice(account_id, invoice_ids_by_account[account_id]),
+                         'PAD invoice creation', workers=cls._cfs_workers())
 
-        current_app.logger.info(f'Found {len(pad_accounts)} with PAD transactions.')
+    @classmethod
+    def _create_pad_invoice(cls, account_id: int, invoice_ids: List[int]):
+        """Roll up the approved PAD invoices for the account into one CFS invoice."""
+        account_invoices = cls._load_rollup_invoices(PaymentMethod.PAD, invoice_ids)
+
+        payment_account: PaymentAccountService = PaymentAccountService.find_by_id(account_id)
+
+        if len(account_invoices) == 0:
+            return
+        current_app.logger.debug(
+            f'Found {len(account_invoices)} invoices for account {payment_account.auth_account_id}')
+
+        cfs_account = CfsAccountModel.find_effective_or_latest_by_payment_method(payment_account.id,
+                                                                                 PaymentMethod.PAD.value)
+        if cfs_account.status not in (CfsAccountStatus.ACTIVE.value, CfsAccountStatus.INACTIVE.value):
+            current_app.logger.info(f'CFS status for account {payment_account.auth_account_id} '
+                                    f'is {payment_account.cfs_account_status} skipping.')
+            return
+
+        invoice_response, invoice_total = cls._create_rollup_cfs_invoice(account_invoices, cfs_account,
+                                                                         payment_account, 'PAD')
+        if not invoice_response:
+            return
+
+        additional_params = {
+            'invoice_total': float(invoice_total),
+            'invoice_process_date': f'{datetime.now(tz=timezone.utc)}'
+        }
+        mailer.publish_mailer_events(QueueMessageTypes.PAD_INVOICE_CREATED.value, payment_account,
+                                     additional_params)
+        # Iterate invoice and create invoice reference records
+        for invoice in account_invoices:
+            invoice_reference = InvoiceReferenceModel(
+                invoice_id=invoice.id,
+                invoice_number=invoice_response.get('invoice_number'),
+                reference_number=invoice_response.get('pbc_ref_number', None),
+                status_code=InvoiceReferenceStatus.ACTIVE.value
+            )
+            db.session.add(invoice_reference)
+            invoice.cfs_account_id = cfs_account.id
+        db.session.commit()
 
-        for account in pad_accounts:
-            account_invoices = db.session.query(InvoiceModel) \
-                .filter(InvoiceModel.payment_account_id == account.id) \
-                .filter(InvoiceModel.payment_method_code == PaymentMethod.PAD.value) \
-                .filter(InvoiceModel.invoice_status_code == InvoiceStatus.APPROVED.value) \
-                .filter(InvoiceModel.id.notin_(cls._active_invoice_reference_subquery())) \
-                .order_by(InvoiceModel.created_on.desc()).all()
+    @classmethod
+    def _find_rollup_invoice_ids(cls, payment_method: PaymentMethod) -> Dict[int, List[int]]:
+        """Return the approved invoices without an invoice in CFS, by account, in one query.
 
-            payment_account: PaymentAccountService = PaymentAccountService.find_by_id(account.id)
+        Only accounts with a CFS account for the payment method that isn't frozen are included.
+        """
+        cfs_accounts = select(CfsAccountModel.account_id) \
+            .where(CfsAccountModel.status != CfsAccountStatus.FREEZE.value) \
+            .where(CfsAccountModel.payment_method == payment_method.value)
 
-            if len(account_invoices) == 0:
-                continue
-            current_app.logger.debug(
-                f'Found {len(account_invoices)} invoices for account {payment_account.auth_account_id}')
-
-            cfs_account = CfsAccountModel.find_effective_or_latest_by_payment_method(payment_account.id,
-                                                                                     PaymentMethod.PAD.value)
-            if cfs_account.status not in (CfsAccountStatus.ACTIVE.value, CfsAccountStatus.INACTIVE.value):
-                current_app.logger.info(f'CFS status for account {payment_account.auth_account_id} '
-                                        f'is {payment_account.cfs_account_status} skipping.')
-                continue
+        rows = db.session.query(InvoiceModel.payment_account_id, InvoiceModel.id) \
+            .filter(InvoiceModel.payment_method_code == payment_method.value) \
+            .filter(InvoiceModel.invoice_status_code == InvoiceStatus.APPROVED.value) \
+            .filter(InvoiceModel.payment_account_id.in_(cfs_accounts)) \
+            .filter(InvoiceModel.id.notin_(cls._active_invoice_reference_subquery())) \
+            .order_by(InvoiceModel.created_on.desc()).all()
 
-            lines = []
-            invoice_total = Decimal('0')
-            for invoice in account_invoices:
-                lines.extend(invoice.payment_line_items)
-                invoice_total += invoice.total
-            invoice_number = account_invoices[-1].id
-            try:
-                # Get the first invoice id as the trx number for CFS
-                invoice_response = CFSService.create_account_invoice(transaction_number=invoice_number,
-                                                                     line_items=lines,
-                                                                     cfs_account=cfs_account)
-            except Exception as e:  # NOQA # pylint: disable=broad-except
-                # There is a chance that the error is a timeout from CAS side,
-                # so to make sure we are not missing any data, make a GET call for the invoice we tried to create
-                # and use it if it got created.
-                current_app.logger.info(e)  # INFO is intentional as sentry alerted only after the following try/catch
-                has_invoice_created: bool = False
-                try:
-                    # add a 10 seconds delay here as safe bet, as CFS takes time to create the invoice
-                    time.sleep(10)
-                    invoice_number = generate_transaction_number(str(invoice_number))
-                    invoice_response = CFSService.get_invoice(
-                        cfs_account=cfs_account, inv_number=invoice_number
-                    )
-                    has_invoice_created = invoice_response.get('invoice_number', None) == invoice_number
-                    invoice_total_matches = Decimal(invoice_response.get('total', '0')) == invoice_total
-                except Exception as exc:  # NOQA # pylint: disable=broad-except,unused-variable
-                    # Ignore this error, as it is irrelevant and error on outer level is relevant.
-                    pass
-                # If no invoice is created raise an error for sentry
-                if not has_invoice_created:
-                    capture_message(f'Error on creating PAD invoice: account id={payment_account.id}, '
-                                    f'auth account : {payment_account.auth_account_id}, ERROR : {str(e)}',
-                                    level='error')
-                    current_app.logger.error(e)
-                    continue
-                if not invoice_total_matches:
-                    capture_message(f'Error on creating PAD invoice: account id={payment_account.id}, '
-                                    f'auth account : {payment_account.auth_account_id}, Invoice exists: '
-                                    f' CAS total: {invoice_response.get("total", 0)}, PAY-BC total: {invoice_total}',
-                                    level='error')
-                    current_app.logger.error(e)
-                    continue
+        invoice_ids_by_account = defaultdict(list)
+        for account_id, invoice_id in rows:
+            invoice_ids_by_account[account_id].append(invoice_id)
+        return invoice_ids_by_account
 
-            additional_params = {
-                'invoice_total': float(invoice_total),
-                'invoice_process_date': f'{datetime.now(tz=timezone.utc)}'
-            }
-            mailer.publish_mailer_events(QueueMessageTypes.PAD_INVOICE_CREATED.value, payment_account,
-                                         additional_params)
-            # Iterate invoice and create invoice reference records
-            for invoice in account_invoices:
-                invoice_reference = InvoiceReferenceModel(
-                    invoice_id=invoice.id,
-                    invoice_number=invoice_response.get('invoice_number'),
-                    reference_number=invoice_response.get('pbc_ref_number', None),
-                    status_code=InvoiceReferenceStatus.ACTIVE.value
-                )
-                db.session.add(invoice_reference)
-                invoice.cfs_account_id = cfs_account.id
-            db.session.commit()
+    @classmethod
+    def _load_rollup_invoices(cls, payment_method: PaymentMethod, invoice_ids: List[int]) -> List[InvoiceModel]:
+        """Load the invoices with their line items, newest first, skipping any that changed since they were found."""
+        return db.session.query(InvoiceModel) \
+            .options(selectinload(InvoiceModel.payment_line_items)) \
+            .filter(InvoiceModel.id.in_(invoice_ids)) \
+            .filter(InvoiceModel.payment_method_code == payment_method.value) \
+            .filter(InvoiceModel.invoice_status_code == InvoiceStatus.APPROVED.value) \
+            .filter(InvoiceModel.id.notin_(cls._active_invoice_reference_subquery())) \
+            .order_by(InvoiceModel.created_on.desc()).all()
 
     @classmethod
-    def _return_eft_accounts(cls):
-        """Return EFT accounts."""
-        invoice_subquery = db.session.query(InvoiceModel.payment_account_id) \
-            .filter(InvoiceModel.payment_method_code == PaymentMethod.EFT.value) \
-            .filter(InvoiceModel.invoice_status_code == InvoiceStatus.APPROVED.value).subquery()
+    def _create_rollup_cfs_invoice(cls, account_invoices: List[InvoiceModel], cfs_account: CfsAccountModel,
+                                   payment_account: PaymentAccountService,
+                                   invoice_type: str) -> Tuple[Optional[Dict], Decimal]:
+        """Create one CFS invoice for all of the invoices, returning the CFS response (None on error) and total."""
+        lines = []
+        invoice_total = Decimal('0')
+        for invoice in account_invoices:
+            lines.extend(invoice.payment_line_items)
+            invoice_total += invoice.total
+        # Get the first invoice id as the trx number for CFS
+        invoice_response = cls._create_cfs_invoice(account_invoices[-1].id, lines, cfs_account, payment_account,
+                                                   invoice_type, invoice_total)
+        return invoice_response, invoice_total
 
-        eft_accounts: List[PaymentAccountModel] = db.session.query(PaymentAccountModel) \
-            .join(CfsAccountModel, CfsAccountModel.account_id == PaymentAccountModel.id) \
-            .filter(CfsAccountModel.status != CfsAccountStatus.FREEZE.value) \
-            .filter(CfsAccountModel.payment_method == PaymentMethod.EFT.value) \
-            .filter(PaymentAccountModel.id.in_(select(invoice_subquery))).all()
+    @classmethod
+    def _create_cfs_invoice(cls, transaction_number: int, line_items: List, cfs_account: CfsAccountModel,
+                            payment_account: PaymentAccountService, invoice_type: str,
+                            invoice_total: Decimal = None) -> Optional[Dict]:
+        """Create the invoice in CFS, or use the invoice if CFS already has it, returning None on error.
 
-        current_app.logger.info(f'Found {len(eft_accounts)} with EFT transactions.')
+        Safe to retry, an invoice created by a run that failed before saving the invoice references is found
+        rather than created twice.
+        """
+        try:
+            return CFSService.create_account_invoice(transaction_number=transaction_number,
+                                                     line_items=line_items,
+                                                     cfs_account=cfs_account)
+        except Exception as e:  # NOQA # pylint: disable=broad-except
+            # There is a chance that the error is a timeout from CAS side,
+            # so to make sure we are not missing any data, make a GET call for the invoice we tried to create
+            # and use it if it got created.
+            current_app.logger.info(e)  # INFO is intentional as sentry alerted only after the following try/catch
+            has_invoice_created: bool = False
+            invoice_total_matches: bool = invoice_total is None
+            invoice_response = None
+            try:
+                # add a 10 seconds delay here as safe bet, as CFS takes time to create the invoice
+                time.sleep(10)
+                invoice_number = generate_transaction_number(str(transaction_number))
+                invoice_response = CFSService.get_invoice(
+                    cfs_account=cfs_account, inv_number=invoice_number
+                )
+                has_invoice_created = invoice_response.get('invoice_number', None) == invoice_number
+                if invoice_total is not None:
+                    invoice_total_matches = Decimal(invoice_response.get('total', '0')) == invoice_total
+            except Exception as exc:  # NOQA # pylint: disable=broad-except,unused-variable
+                # Ignore this error, as it is irrelevant and error on outer level is relevant.
+                pass
+            # If no invoice is created raise an error for sentry
+            if not has_invoice_created:
+                capture_message(f'Error on creating {invoice_type} invoice: account id={payment_account.id}, '
+                                f'auth account : {payment_account.auth_account_id}, ERROR : {str(e)}',
+                                level='error')
+                current_app.logger.error(e)
+                return None
+            if not invoice_total_matches:
+                capture_message(f'Error on creating {invoice_type} invoice: account id={payment_account.id}, '
+                                f'auth account : {payment_account.auth_account_id}, Invoice exists: '
+                                f' CAS total: {invoice_response.get("total", 0)}, PAY-BC total: {invoice_total}',
+                                level='error')
+                current_app.logger.error(e)
+                return None
+            return invoice_response
 
-        return eft_accounts
+    @classmethod
+    def _cfs_workers(cls) -> Optional[int]:
+        return current_app.config.get('CFS_INVOICE_WORKERS') or None
 
     @classmethod
     def _save_invoice_reference_records(cls, account_invoices, cfs_account, invoice_response):
@@ -364,80 +408,41 @@ class CreateInvoiceTask:  # pylint:disable=too-few-public-methods
     @classmethod
     def _create_eft_invoices(cls):
         """Create EFT invoices in CFS."""
-        eft_accounts = cls._return_eft_accounts()
+        invoice_ids_by_account = cls._find_rollup_invoice_ids(PaymentMethod.EFT)
+        current_app.logger.info(f'Found {len(invoice_ids_by_account)} with EFT transactions.')
 
-        for eft_account in eft_accounts:
-            account_invoices = db.session.query(InvoiceModel) \
-                .filter(InvoiceModel.payment_account_id == eft_account.id) \
-                .filter(InvoiceModel.payment_method_code == PaymentMethod.EFT.value) \
-                .filter(InvoiceModel.invoice_status_code == InvoiceStatus.APPROVED.value) \
-                .filter(InvoiceModel.id.notin_(cls._active_invoice_reference_subquery())) \
-                .order_by(InvoiceModel.created_on.desc()).all()
+        run_for_accounts(invoice_ids_by_account.keys(),
+                         lambda account_id: cls._create_eft_invoice(account_id, invoice_ids_by_account[account_id]),
+                         'EFT invoice creation', workers=cls._cfs_workers())
 
-            if not account_invoices:
-                continue
+    @classmethod
+    def _create_eft_invoice(cls, account_id: int, invoice_ids: List[int]):
+        """Roll up the approved EFT invoices for the account into one CFS invoice."""
+        account_invoices = cls._load_rollup_invoices(PaymentMethod.EFT, invoice_ids)
 
-            payment_account: PaymentAccountService = PaymentAccountService.find_by_id(eft_account.id)
+        if not account_invoices:
+            return
 
-            if not payment_account:
-                continue
+        payment_account: PaymentAccountService = PaymentAccountService.find_by_id(account_id)
 
-            current_app.logger.debug(
-                f'Found {len(account_invoices)} invoices for account {payment_account.auth_account_id}')
+        if not payment_account:
+            return
 
-            cfs_account = CfsAccountModel.find_effective_or_latest_by_payment_method(payment_account.id,
-                                                                                     PaymentMethod.EFT.value)
-            if cfs_account.status not in (CfsAccountStatus.ACTIVE.value, CfsAccountStatus.INACTIVE.value):
-                current_app.logger.info(f'CFS status for account {payment_account.auth_account_id} '
-                                        f'is {payment_account.cfs_account_status} skipping.')
-                continue
+        current_app.logger.debug(
+            f'Found {len(account_invoices)} invoices for account {payment_account.auth_account_id}')
 
-            lines = []
-            invoice_total = Decimal('0')
-            for invoice in account_invoices:
-                lines.extend(invoice.payment_line_items)
-                invoice_total += invoice.total
+        cfs_account = CfsAccountModel.find_effective_or_latest_by_payment_method(payment_account.id,
+                                                                                 PaymentMethod.EFT.value)
+        if cfs_account.status not in (CfsAccountStatus.ACTIVE.value, CfsAccountStatus.INACTIVE.value):
+            current_app.logger.info(f'CFS status for account {payment_account.auth_account_id} '
+                                    f'is {payment_account.cfs_account_status} skipping.')
+            return
 
-            invoice_number = account_invoices[-1].id
-            try:
-                # Get the first invoice id as the trx number for CFS
-                invoice_response = CFSService.create_account_invoice(transaction_number=invoice_number,
-                                                                     line_items=lines,
-                                                                     cfs_account=cfs_account)
-            except Exception as e:  # NOQA # pylint: disable=broad-except
-                # There is a chance that the error is a timeout from CAS side,
-                # so to make sure we are not missing any data, make a GET call for the invoice we tried to create
-                # and use it if it got created.
-                current_app.logger.info(e)  # INFO is intentional as sentry alerted only after the following try/catch
-                has_invoice_created: bool = False
-                try:
-                    # add a 10 seconds delay here as safe bet, as CFS takes time to create the invoice
-                    time.sleep(10)
-                    invoice_number = generate_transaction_number(str(invoice_number))
-                    invoice_response = CFSService.get_invoice(
-                        cfs_account=cfs_account, inv_number=invoice_number
-                    )
-                    has_invoice_created = invoice_response.get('invoice_number', None) == invoice_number
-                    invoice_total_matches = Decimal(invoice_response.get('total', '0')) == invoice_total
-                except Exception as exc:  # NOQA # pylint: disable=broad-except,unused-variable
-                    # Ignore this error, as it is irrelevant and error on outer level is relevant.
-                    pass
-                # If no invoice is created raise an error for sentry
-                if not has_invoice_created:
-                    capture_message(f'Error on creating EFT invoice: account id={payment_account.id}, '
-                                    f'auth account : {payment_account.auth_account_id}, ERROR : {str(e)}',
-                                    level='error')
-                    current_app.logger.error(e)
-                    continue
-                if not invoice_total_matches:
-                    capture_message(f'Error on creating EFT invoice: account id={payment_account.id}, '
-                                    f'auth account : {payment_account.auth_account_id}, Invoice exists: '
-                                    f' CAS total: {invoice_response.get("total", 0)}, PAY-BC total: {invoice_total}',
-                                    level='error')
-                    current_app.logger.error(e)
-                    continue
+        invoice_response, _ = cls._create_rollup_cfs_invoice(account_invoices, cfs_account, payment_account, 'EFT')
+        if not invoice_response:
+            return
 
-            cls._save_invoice_reference_records(account_invoices, cfs_account, invoice_response)
+        cls._save_invoice_reference_records(account_invoices, cfs_account, invoice_response)
 
     @classmethod
     def _create_online_banking_invoices(cls):
@@ -446,41 +451,56 @@ class CreateInvoiceTask:  # pylint:disable=too-few-public-methods
 
     @classmethod
     def _create_single_invoice_per_purchase(cls, payment_method: PaymentMethod):
-        """Create one CFS invoice per purchase."""
-        invoices: List[InvoiceModel] = InvoiceModel.query \
-            .filter_by(payment_method_code=payment_method.value) \
-            .filter_by(invoice_status_code=InvoiceStatus.CREATED.value) \
+        """Create one CFS invoice per purchase, the accounts are run in parallel and each account is one commit."""
+        query = db.session.query(InvoiceModel.payment_account_id, InvoiceModel.id) \
+            .filter(InvoiceModel.payment_method_code == payment_method.value) \
+            .filter(InvoiceModel.invoice_status_code == InvoiceStatus.CREATED.value)
+        if payment_method == PaymentMethod.ONLINE_BANKING:
+            query = query.join(CorpTypeModel, CorpTypeModel.code == InvoiceModel.corp_type_code) \
+                .filter(CorpTypeModel.is_online_banking_allowed.is_(True))
+        rows = query.order_by(InvoiceModel.created_on.asc()).all()
+
+        invoice_ids_by_account = defaultdict(list)
+        for account_id, invoice_id in rows:
+            invoice_ids_by_account[account_id].append(invoice_id)
+
+        current_app.logger.info(f'Found {len(rows)} to be created in CFS.')
+        run_for_accounts(invoice_ids_by_account.keys(),
+                         lambda account_id: cls._create_single_invoices(payment_method, account_id,
+                                                                        invoice_ids_by_account[account_id]),
+                         f'{payment_method.value} invoice creation', workers=cls._cfs_workers())
+
+    @classmethod
+    def _create_single_invoices(cls, payment_method: PaymentMethod, account_id: int, invoice_ids: List[int]):
+        """Create a CFS invoice for each of the account's invoices, an invoice that fails is left for the next run."""
+        invoices: List[InvoiceModel] = db.session.query(InvoiceModel) \
+            .options(selectinload(InvoiceModel.payment_line_items)) \
+            .filter(InvoiceModel.id.in_(invoice_ids)) \
+            .filter(InvoiceModel.invoice_status_code == InvoiceStatus.CREATED.value) \
             .order_by(InvoiceModel.created_on.asc()).all()
+        if not invoices:
+            return
 
-        current_app.logger.info(f'Found {len(invoices)} to be created in CFS.')
+        payment_account: PaymentAccountService = PaymentAccountService.find_by_id(account_id)
+        # Adding this in for the future when we can switch between BCOL and ONLINE_BANKING.
+        cfs_account = CfsAccountModel.find_effective_or_latest_by_payment_method(payment_account.id,
+                                                                                 PaymentMethod.ONLINE_BANKING.value)
         for invoice in invoices:
-            payment_account: PaymentAccountService = PaymentAccountService.find_by_id(invoice.payment_account_id)
-            # Adding this in for the future when we can switch between BCOL and ONLINE_BANKING.
-            cfs_account = CfsAccountModel.find_effective_or_latest_by_payment_method(payment_account.id,
-                                                                                     PaymentMethod.ONLINE_BANKING.value)
-
-            if invoice.payment_method_code == PaymentMethod.ONLINE_BANKING.value:
-                corp_type: CorpTypeModel = CorpTypeModel.find_by_code(invoice.corp_type_code)
-                if not corp_type.is_online_banking_allowed:
-                    continue
-
             current_app.logger.debug(f'Creating cfs invoice for invoice {invoice.id}')
-            try:
-                invoice_response = CFSService.create_account_invoice(transaction_number=invoice.id,
-                                                                     line_items=invoice.payment_line_items,
-                                                                     cfs_account=cfs_account)
-            except Exception as e:  # NOQA # pylint: disable=broad-except
-                capture_message(f'Error on creating Online Banking invoice: account id={payment_account.id}, '
-                                f'auth account : {payment_account.auth_account_id}, ERROR : {str(e)}', level='error')
-                current_app.logger.error(e)
+            invoice_response = cls._create_cfs_invoice(invoice.id, invoice.payment_line_items, cfs_account,
+                                                       payment_account, 'Online Banking')
+            if not invoice_response:
                 continue
 
             # Create invoice reference, payment record and a payment transaction
-            InvoiceReference.create(
+            db.session.add(InvoiceReferenceModel(
                 invoice_id=invoice.id,
                 invoice_number=invoice_response.get('invoice_number'),
-                reference_number=invoice_response.get('pbc_ref_number', None))
+                reference_number=invoice_response.get('pbc_ref_number', None),
+                status_code=InvoiceReferenceStatus.ACTIVE.value
+            ))
 
             invoice.cfs_account_id = payment_account.cfs_account_id
             invoice.invoice_status_code = InvoiceStatus.SETTLEMENT_SCHEDULED.value
-            invoice.save()
+            # Flushed as each invoice is created in CFS, committed once for the account by run_for_accounts.
+            db.session.flush()
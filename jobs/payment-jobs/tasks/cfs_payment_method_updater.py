@@ -84,7 +84,7 @@ async def get_sites(cfs_accounts: List[CfsAccountModel]):
     current_app.logger.warning('Make sure ACCOUNT_SECRET_KEY, CFS_CLIENT_ID, CFS_CLIENT_SECRET, CFS_BASE_URL are set.')
     current_app.logger.info('Getting access token.')
     try:
-        access_token = CFSService.get_token().json().get('access_token')
+        access_token = CFSService.get_access_token()
     except Exception as e:  # NOQA pylint:disable=broad-except
         current_app.logger.error(f'Error getting access token: {e} - Will need CFS_ACCOUNT.payment_method manually.')
         return
@@ -14,16 +14,17 @@
 """Base class for CGI EJV."""
 
 import os
-import tempfile
 from datetime import datetime, timezone
 
 from flask import current_app
 from pay_api.models import DistributionCode as DistributionCodeModel
 from pay_api.utils.util import get_fiscal_year, get_nearest_business_day
 
-from utils.minio import put_object
+from utils.minio import put_file
 from utils.sftp import upload_to_ftp
 
+from .cgi_file_writer import CgiFileWriter
+
 
 class CgiEjv:
     """Base class for CGI EJV."""
@@ -91,10 +92,10 @@ class CgiEjv:
         return formatted_amount.zfill(15)
 
     @classmethod
-    def upload_to_minio(cls, content, file_name, file_size):
-        """Upload to minio."""
+    def upload_to_minio(cls, file_path_with_name, file_name):
+        """Upload to minio, streaming from the file."""
         try:
-            put_object(content, file_name, file_size)
+            put_file(file_path_with_name, file_name)
         except Exception as e:  # NOQA # pylint: disable=broad-except
             current_app.logger.error(e)
             current_app.logger.error(f'upload to minio failed for the file: {file_name}')
@@ -106,13 +107,11 @@ class CgiEjv:
                f'{dist_code.stob}{dist_code.project_code}0000000000{cls.EMPTY:<16}'
 
     @classmethod
-    def upload(cls, ejv_content, file_name, file_path_with_name, trg_file_path):
+    def upload(cls, file_name, file_path_with_name, trg_file_path):
         """Upload to ftp and to minio."""
         upload_to_ftp(file_path_with_name, trg_file_path)
         # Upload to MINIO
-        cls.upload_to_minio(content=ejv_content.encode(),
-                            file_name=file_name,
-                            file_size=os.stat(file_path_with_name).st_size)
+        cls.upload_to_minio(file_path_with_name=file_path_with_name, file_name=file_name)
 
     @classmethod
     def get_jv_header(cls, batch_type, journal_batch_name, journal_name, total):
@@ -145,16 +144,6 @@ class CgiEjv:
         return current_app.config.get('CGI_TRIGGER_FILE_SUFFIX')
 
     @classmethod
-    def create_inbox_and_trg_files(cls, ejv_content):
-        """Create inbox and trigger files."""
-        file_path: str = tempfile.gettempdir()
-        file_path_with_name = f'{file_path}/{cls.get_file_name()}'
-        trg_file_path = f'{file_path_with_name}.{cls.get_trg_suffix()}'
-        with open(file_path_with_name, 'a+', encoding='utf-8') as jv_file:
-            jv_file.write(ejv_content)
-            jv_file.close()
-        # TRG File
-        with open(trg_file_path, 'a+', encoding='utf-8') as trg_file:
-            trg_file.write('')
-            trg_file.close()
-        return file_path_with_name, trg_file_path
+    def create_file_writer(cls, file_name: str, batch_header: str) -> CgiFileWriter:
+        """Return a writer for the inbox file, the batch header is written first."""
+        return CgiFileWriter(file_name, cls.get_trg_suffix(), batch_header)
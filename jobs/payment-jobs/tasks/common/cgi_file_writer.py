@@ -0,0 +1,75 @@
+# Copyright © 2024 Province of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Streaming writer for CGI feeder (EJV and AP) files.
+
+Records are appended to a temporary file as they are built, instead of being concatenated into one string, so building
+a file is linear in the number of records. The batch total and control total for the batch trailer are kept as records
+are written. Use the writer as a context manager, the temporary file is removed if the file isn't completed.
+"""
+import os
+import tempfile
+from typing import Tuple
+
+
+class CgiFileWriter:
+    """Write a batch header, the records and the batch trailer to the inbox file."""
+
+    def __init__(self, file_name: str, trg_suffix: str, batch_header: str):
+        """Open a temporary file in the temp directory and write the batch header to it."""
+        self.file_name = file_name
+        self.batch_total = 0
+        self.control_total = 0
+        self._directory = tempfile.gettempdir()
+        # pylint: disable=consider-using-with
+        self._file = tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', dir=self._directory,
+                                                 prefix=f'{file_name}.', suffix='.tmp', delete=False)
+        self._trg_suffix = trg_suffix
+        self._file.write(batch_header)
+
+    def __enter__(self):
+        """Return the writer."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Remove the temporary file, if the file wasn't completed, including when an exception was raised."""
+        self.discard()
+
+    def write(self, record: str, amount: float = 0):
+        """Write a record, counting it for the control total and adding the amount to the batch total."""
+        self._file.write(record)
+        self.control_total += 1
+        self.batch_total += amount
+
+    @property
+    def is_empty(self) -> bool:
+        """Return True if no records have been written."""
+        return self.control_total == 0
+
+    def complete(self, batch_trailer: str) -> Tuple[str, str]:
+        """Write the batch trailer, move the file to the inbox file and create the trigger file."""
+        self._file.write(batch_trailer)
+        self._file.close()
+        file_path_with_name = os.path.join(self._directory, self.file_name)
+        trg_file_path = f'{file_path_with_name}.{self._trg_suffix}'
+        os.replace(self._file.name, file_path_with_name)
+        with open(trg_file_path, 'a+', encoding='utf-8') as trg_file:
+            trg_file.write('')
+        return file_path_with_name, trg_file_path
+
+    def discard(self):
+        """Close and remove the temporary file, if it hasn't been completed."""
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self._file.name):
+            os.remove(self._file.name)
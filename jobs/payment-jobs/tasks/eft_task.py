@@ -36,6 +36,7 @@ from sqlalchemy import func, or_
 from sqlalchemy.orm import lazyload, registry
 
 from utils.auth_event import AuthEvent
+from utils.sharding import get_shard
 
 
 class EFTTask:  # pylint:disable=too-few-public-methods
@@ -87,7 +88,8 @@ class EFTTask:  # pylint:disable=too-few-public-methods
             .join(latest_cfs_account, CfsAccountModel.id == latest_cfs_account.c.max_id_per_payment_account) \
             .options(lazyload('*')) \
             .filter(InvoiceModel.payment_method_code == PaymentMethod.EFT.value) \
-            .filter(InvoiceModel.total == cil_rollup.c.rollup_amount)
+            .filter(InvoiceModel.total == cil_rollup.c.rollup_amount) \
+            .filter(get_shard().owns_clause(InvoiceModel.payment_account_id))
 
         match status:
             case EFTCreditInvoiceStatus.PENDING.value:
@@ -215,7 +217,7 @@ class EFTTask:  # pylint:disable=too-few-public-methods
             rcpt_date=datetime.now(tz=timezone.utc).strftime('%Y-%m-%d'),
             amount=cil_rollup.rollup_amount,
             payment_method=PaymentMethod.EFT.value,
-            access_token=CFSService.get_token(PaymentSystem.FAS).json().get('access_token'))
+            access_token=CFSService.get_access_token(PaymentSystem.FAS))
         CFSService.apply_receipt(cfs_account, receipt_number, invoice_reference.invoice_number)
         ReceiptModel(receipt_number=receipt_number,
                      receipt_amount=cil_rollup.rollup_amount,
@@ -14,8 +14,9 @@
 """Task to create Journal Voucher."""
 
 import time
+from collections import defaultdict
 from datetime import datetime, timedelta, timezone
-from typing import List
+from typing import Dict, List
 
 from flask import current_app
 from pay_api.models import CorpType as CorpTypeModel
@@ -26,15 +27,20 @@ from pay_api.models import EjvHeader as EjvHeaderModel
 from pay_api.models import EjvLink as EjvLinkModel
 from pay_api.models import FeeSchedule as FeeScheduleModel
 from pay_api.models import Invoice as InvoiceModel
-from pay_api.models import PaymentLineItem as PaymentLineItemModel
 from pay_api.models import Receipt as ReceiptModel
 from pay_api.models import db
 from pay_api.utils.enums import DisbursementStatus, EjvFileType, EJVLinkType, InvoiceStatus, PaymentMethod
 from sqlalchemy import Date, cast
+from sqlalchemy.orm import joinedload
 
 from tasks.common.cgi_ejv import CgiEjv
 
 
+# REFUND_REQUESTED for credit card payments, CREDITED for AR and REFUNDED for other payments.
+REVERSAL_INVOICE_STATUSES = (InvoiceStatus.REFUNDED.value, InvoiceStatus.REFUND_REQUESTED.value,
+                             InvoiceStatus.CREDITED.value)
+
+
 class EjvPartnerDistributionTask(CgiEjv):
     """Task to create EJV Files."""
 
@@ -75,12 +81,8 @@ class EjvPartnerDistributionTask(CgiEjv):
     @classmethod
     def get_invoices_for_refund_reversal(cls, partner):
         """Return invoices for refund reversal."""
-        # REFUND_REQUESTED for credit card payments, CREDITED for AR and REFUNDED for other payments.
-        refund_inv_statuses = (InvoiceStatus.REFUNDED.value, InvoiceStatus.REFUND_REQUESTED.value,
-                               InvoiceStatus.CREDITED.value)
-
         invoices: List[InvoiceModel] = db.session.query(InvoiceModel) \
-            .filter(InvoiceModel.invoice_status_code.in_(refund_inv_statuses)) \
+            .filter(InvoiceModel.invoice_status_code.in_(REVERSAL_INVOICE_STATUSES)) \
             .filter(
             InvoiceModel.payment_method_code.notin_([PaymentMethod.INTERNAL.value,
                                                      PaymentMethod.DRAWDOWN.value,
@@ -94,9 +96,6 @@ class EjvPartnerDistributionTask(CgiEjv):
     @classmethod
     def _create_ejv_file_for_partner(cls, batch_type: str):  # pylint:disable=too-many-locals, too-many-statements
         """Create EJV file for the partner and upload."""
-        ejv_content: str = ''
-        batch_total: float = 0
-        control_total: int = 0
         today = datetime.now(tz=timezone.utc)
         disbursement_desc = current_app.config.get('CGI_DISBURSEMENT_DESC'). \
             format(today.strftime('%B').upper(), f'{today.day:0>2}')[:100]
@@ -114,138 +113,123 @@ class EjvPartnerDistributionTask(CgiEjv):
         partners = cls._get_partners_by_batch_type(batch_type)
         current_app.logger.info(partners)
 
-        # JV Batch Header
+        # JV Batch Header, records are streamed to the file as they are created.
         batch_header: str = cls.get_batch_header(batch_number, batch_type)
-
-        for partner in partners:
-            # Find all invoices for the partner to disburse.
-            # This includes invoices which are not PAID and invoices which are refunded.
-            payment_invoices = cls.get_invoices_for_disbursement(partner)
-            refund_reversals = cls.get_invoices_for_refund_reversal(partner)
-            invoices = payment_invoices + refund_reversals
-            # If no invoices continue.
-            if not invoices:
-                continue
-
-            effective_date: str = cls.get_effective_date()
-            # Construct journal name
-            ejv_header_model: EjvFileModel = EjvHeaderModel(
-                partner_code=partner.code,
-                disbursement_status_code=DisbursementStatus.UPLOADED.value,
-                ejv_file_id=ejv_file_model.id
-            ).flush()
-            journal_name: str = cls.get_journal_name(ejv_header_model.id)
-
-            # To populate JV Header and JV Details, group these invoices by the distribution
-            # and create one JV Header and detail for each.
-            distribution_code_set = set()
-            invoice_id_list = []
-            for inv in invoices:
-                invoice_id_list.append(inv.id)
-                for line_item in inv.payment_line_items:
-                    distribution_code_set.add(line_item.fee_distribution_id)
-
-            for distribution_code_id in list(distribution_code_set):
-                distribution_code: DistributionCodeModel = DistributionCodeModel.find_by_id(distribution_code_id)
-                credit_distribution_code: DistributionCodeModel = DistributionCodeModel.find_by_id(
-                    distribution_code.disbursement_distribution_code_id
-                )
-                if credit_distribution_code.stop_ejv:
+        with cls.create_file_writer(ejv_file_model.file_ref, batch_header) as writer:
+
+            for partner in partners:
+                # Find all invoices for the partner to disburse.
+                # This includes invoices which are not PAID and invoices which are refunded.
+                payment_invoices = cls.get_invoices_for_disbursement(partner)
+                refund_reversals = cls.get_invoices_for_refund_reversal(partner)
+                invoices = payment_invoices + refund_reversals
+                # If no invoices continue.
+                if not invoices:
                     continue
 
-                line_items = cls._find_line_items_by_invoice_and_distribution(distribution_code_id, invoice_id_list)
-
-                total: float = 0
-                for line in line_items:
-                    total += line.total
-
-                batch_total += total
-
-                debit_distribution = cls.get_distribution_string(distribution_code)  # Debit from BCREG GL
-                credit_distribution = cls.get_distribution_string(credit_distribution_code)  # Credit to partner GL
-
-                # JV Header
-                ejv_content = '{}{}'.format(ejv_content,  # pylint:disable=consider-using-f-string
-                                            cls.get_jv_header(batch_type, cls.get_journal_batch_name(batch_number),
-                                                              journal_name, total))
-                control_total += 1
-
-                line_number: int = 0
-                for line in line_items:
-                    # JV Details
-                    line_number += 1
-                    # Flow Through add it as the invoice id.
-                    flow_through = f'{line.invoice_id:<110}'
+                effective_date: str = cls.get_effective_date()
+                # Construct journal name
+                ejv_header_model: EjvFileModel = EjvHeaderModel(
+                    partner_code=partner.code,
+                    disbursement_status_code=DisbursementStatus.UPLOADED.value,
+                    ejv_file_id=ejv_file_model.id
+                ).flush()
+                journal_name: str = cls.get_journal_name(ejv_header_model.id)
+
+                # To populate JV Header and JV Details, group these invoices by the distribution
+                # and create one JV Header and detail for each. Line items are loaded with the invoices.
+                is_reversal_by_invoice_id = {}
+                line_items_by_distribution = defaultdict(list)
+                for inv in invoices:
                     # debit_distribution and credit_distribution stays as is for invoices which are not PAID
                     # For reversals, we just need to reverse the debit and credit.
-                    is_reversal = InvoiceModel.find_by_id(line.invoice_id).invoice_status_code in \
-                        (InvoiceStatus.REFUNDED.value,
-                         InvoiceStatus.REFUND_REQUESTED.value,
-                         InvoiceStatus.CREDITED.value)
-
-                    invoice_number = f'#{line.invoice_id}'
-                    description = disbursement_desc[:-len(invoice_number)] + invoice_number
-                    description = f'{description[:100]:<100}'
-                    ejv_content = '{}{}'.format(ejv_content,  # pylint:disable=consider-using-f-string
-                                                cls.get_jv_line(batch_type, credit_distribution, description,
-                                                                effective_date, flow_through, journal_name, line.total,
-                                                                line_number, 'C' if not is_reversal else 'D'))
-                    line_number += 1
-                    control_total += 1
-
-                    # Add a line here for debit too
-                    ejv_content = '{}{}'.format(ejv_content,  # pylint:disable=consider-using-f-string
-                                                cls.get_jv_line(batch_type, debit_distribution, description,
-                                                                effective_date, flow_through, journal_name, line.total,
-                                                                line_number, 'D' if not is_reversal else 'C'))
-
-                    control_total += 1
-
-            sequence = 1
-            # Create ejv invoice link records and set invoice status
-            for inv in invoices:
-                # Create Ejv file link and flush
-                link_model = EjvLinkModel(link_id=inv.id,
-                                          ejv_header_id=ejv_header_model.id,
-                                          disbursement_status_code=DisbursementStatus.UPLOADED.value,
-                                          sequence=sequence,
-                                          link_type=EJVLinkType.INVOICE.value)
-                # Set distribution status to invoice
-                db.session.add(link_model)
-                sequence += 1
-                inv.disbursement_status_code = DisbursementStatus.UPLOADED.value
-
-            db.session.flush()
-
-        if not ejv_content:
-            db.session.rollback()
-            return
-
-        # JV Batch Trailer
-        jv_batch_trailer: str = cls.get_batch_trailer(batch_number, batch_total, batch_type, control_total)
-
-        ejv_content = f'{batch_header}{ejv_content}{jv_batch_trailer}'
-        # Create a file add this content.
-        file_path_with_name, trg_file_path = cls.create_inbox_and_trg_files(ejv_content)
-
-        # Upload file and trg to FTP
-        cls.upload(ejv_content, cls.get_file_name(), file_path_with_name, trg_file_path)
-
-        # commit changes to DB
-        db.session.commit()
-
-        # Add a sleep to prevent collision on file name.
-        time.sleep(1)
+                    is_reversal_by_invoice_id[inv.id] = inv.invoice_status_code in REVERSAL_INVOICE_STATUSES
+                    for line_item in inv.payment_line_items:
+                        distribution_line_items = line_items_by_distribution[line_item.fee_distribution_id]
+                        if line_item.total > 0:
+                            distribution_line_items.append(line_item)
+
+                distribution_codes = cls._find_distribution_codes(line_items_by_distribution.keys())
+                for distribution_code_id, line_items in line_items_by_distribution.items():
+                    distribution_code: DistributionCodeModel = distribution_codes.get(distribution_code_id)
+                    credit_distribution_code: DistributionCodeModel = distribution_code.disbursement_distribution_code
+                    if credit_distribution_code.stop_ejv:
+                        continue
+
+                    total: float = 0
+                    for line in line_items:
+                        total += line.total
+
+                    debit_distribution = cls.get_distribution_string(distribution_code)  # Debit from BCREG GL
+                    credit_distribution = cls.get_distribution_string(credit_distribution_code)  # Credit to partner GL
+
+                    # JV Header
+                    writer.write(cls.get_jv_header(batch_type, cls.get_journal_batch_name(batch_number),
+                                                   journal_name, total), amount=total)
+
+                    line_number: int = 0
+                    for line in line_items:
+                        # JV Details
+                        line_number += 1
+                        # Flow Through add it as the invoice id.
+                        flow_through = f'{line.invoice_id:<110}'
+                        is_reversal = is_reversal_by_invoice_id[line.invoice_id]
+
+                        invoice_number = f'#{line.invoice_id}'
+                        description = disbursement_desc[:-len(invoice_number)] + invoice_number
+                        description = f'{description[:100]:<100}'
+                        writer.write(cls.get_jv_line(batch_type, credit_distribution, description,
+                                                     effective_date, flow_through, journal_name, line.total,
+                                                     line_number, 'C' if not is_reversal else 'D'))
+                        line_number += 1
+
+                        # Add a line here for debit too
+                        writer.write(cls.get_jv_line(batch_type, debit_distribution, description,
+                                                     effective_date, flow_through, journal_name, line.total,
+                                                     line_number, 'D' if not is_reversal else 'C'))
+
+                sequence = 1
+                # Create ejv invoice link records and set invoice status
+                for inv in invoices:
+                    # Create Ejv file link and flush
+                    link_model = EjvLinkModel(link_id=inv.id,
+                                              ejv_header_id=ejv_header_model.id,
+                                              disbursement_status_code=DisbursementStatus.UPLOADED.value,
+                                              sequence=sequence,
+                                              link_type=EJVLinkType.INVOICE.value)
+                    # Set distribution status to invoice
+                    db.session.add(link_model)
+                    sequence += 1
+                    inv.disbursement_status_code = DisbursementStatus.UPLOADED.value
+
+                db.session.flush()
+
+            if writer.is_empty:
+                db.session.rollback()
+                return
+
+            # JV Batch Trailer
+            jv_batch_trailer: str = cls.get_batch_trailer(batch_number, writer.batch_total, batch_type,
+                                                          writer.control_total)
+            file_path_with_name, trg_file_path = writer.complete(jv_batch_trailer)
+
+            # Upload file and trg to FTP
+            cls.upload(writer.file_name, file_path_with_name, trg_file_path)
+
+            # commit changes to DB
+            db.session.commit()
+
+            # Add a sleep to prevent collision on file name.
+            time.sleep(1)
 
     @classmethod
-    def _find_line_items_by_invoice_and_distribution(cls, distribution_code_id, invoice_id_list) \
-            -> List[PaymentLineItemModel]:
-        """Find and return all payment line items for this distribution."""
-        line_items: List[PaymentLineItemModel] = db.session.query(PaymentLineItemModel) \
-            .filter(PaymentLineItemModel.invoice_id.in_(invoice_id_list)) \
-            .filter(PaymentLineItemModel.total > 0) \
-            .filter(PaymentLineItemModel.fee_distribution_id == distribution_code_id)
-        return line_items
+    def _find_distribution_codes(cls, distribution_code_ids) -> Dict[int, DistributionCodeModel]:
+        """Return the distribution codes by id, with the partner distribution code they disburse to."""
+        distribution_codes: List[DistributionCodeModel] = db.session.query(DistributionCodeModel) \
+            .options(joinedload(DistributionCodeModel.disbursement_distribution_code)) \
+            .filter(DistributionCodeModel.distribution_code_id.in_(list(distribution_code_ids))) \
+            .all()
+        return {distribution_code.distribution_code_id: distribution_code for distribution_code in distribution_codes}
 
     @classmethod
     def _get_partners_by_batch_type(cls, batch_type) -> List[CorpTypeModel]:
@@ -53,10 +53,6 @@ class EjvPaymentTask(CgiEjv):
     @classmethod
     def _create_ejv_file_for_gov_account(cls, batch_type: str):  # pylint:disable=too-many-locals, too-many-statements
         """Create EJV file for the partner and upload."""
-        ejv_content: str = ''
-        batch_total: float = 0
-        control_total: int = 0
-
         # Create a ejv file model record.
         ejv_file_model: EjvFileModel = EjvFileModel(
             file_type=EjvFileType.PAYMENT.value,
@@ -68,159 +64,153 @@ class EjvPaymentTask(CgiEjv):
         # Get all invoices which should be part of the batch type.
         account_ids = cls._get_account_ids_for_payment(batch_type)
 
-        # JV Batch Header
+        # JV Batch Header, records are streamed to the file as they are created.
         batch_header: str = cls.get_batch_header(batch_number, batch_type)
-
-        current_app.logger.info('Processing accounts.')
-        for account_id in account_ids:
-            account_jv: str = ''
-            # Find all invoices for the gov account to pay.
-            invoices = cls._get_invoices_for_payment(account_id)
-            pay_account: PaymentAccountModel = PaymentAccountModel.find_by_id(account_id)
-            # If no invoices continue.
-            if not invoices or not pay_account.billable:
-                continue
-
-            disbursement_desc = f'{pay_account.name[:100]:<100}'
-            effective_date: str = cls.get_effective_date()
-            # Construct journal name
-            ejv_header_model: EjvFileModel = EjvHeaderModel(
-                payment_account_id=account_id,
-                disbursement_status_code=DisbursementStatus.UPLOADED.value,
-                ejv_file_id=ejv_file_model.id
-            ).flush()
-            journal_name: str = cls.get_journal_name(ejv_header_model.id)
-            # Distribution code for the account.
-            debit_distribution_code: DistributionCodeModel = DistributionCodeModel.find_by_active_for_account(
-                account_id
-            )
-            debit_distribution = cls.get_distribution_string(debit_distribution_code)  # Debit from GOV account GL
-
-            line_number: int = 0
-            total: float = 0
-            current_app.logger.info(f'Processing invoices for account_id: {account_id}.')
-            for inv in invoices:
-                # If it's a JV reversal credit and debit is reversed.
-                is_jv_reversal = inv.invoice_status_code == InvoiceStatus.REFUND_REQUESTED.value
-
-                # If it's reversal, If there is no COMPLETED invoice reference, then no need to reverse it.
-                # Else mark it as CANCELLED, as new invoice reference will be created
-                if is_jv_reversal:
-                    if (inv_ref := InvoiceReferenceModel.find_by_invoice_id_and_status(
-                        inv.id, InvoiceReferenceStatus.COMPLETED.value
-                    )) is None:
-                        continue
-                    inv_ref.status_code = InvoiceReferenceStatus.CANCELLED.value
-
-                line_items = inv.payment_line_items
-                invoice_number = f'#{inv.id}'
-                description = disbursement_desc[:-len(invoice_number)] + invoice_number
-                description = f'{description[:100]:<100}'
-
-                for line in line_items:
-                    # Line can have 2 distribution, 1 for the total and another one for service fees.
-                    line_distribution_code: DistributionCodeModel = DistributionCodeModel.find_by_id(
-                        line.fee_distribution_id)
-                    if line.total > 0:
-                        total += line.total
-                        line_distribution = cls.get_distribution_string(line_distribution_code)
-                        flow_through = f'{line.invoice_id:<110}'
-                        # Credit to BCREG GL
-                        line_number += 1
-                        control_total += 1
-                        # If it's normal payment then the Line distribution goes as Credit,
-                        # else it goes as Debit as we need to debit the fund from BC registry GL.
-                        account_jv = account_jv + cls.get_jv_line(batch_type, line_distribution, description,
-                                                                  effective_date, flow_through, journal_name,
-                                                                  line.total,
-                                                                  line_number, 'C' if not is_jv_reversal else 'D')
-
-                        # Debit from GOV ACCOUNT GL
-                        line_number += 1
-                        control_total += 1
-                        # If it's normal payment then the Gov account GL goes as Debit,
-                        # else it goes as Credit as we need to credit the fund back to ministry.
-                        account_jv = account_jv + cls.get_jv_line(batch_type, debit_distribution, description,
-                                                                  effective_date, flow_through, journal_name,
-                                                                  line.total,
-                                                                  line_number, 'D' if not is_jv_reversal else 'C')
-                    if line.service_fees > 0:
-                        service_fee_distribution_code: DistributionCodeModel = DistributionCodeModel.find_by_id(
-                            line_distribution_code.service_fee_distribution_code_id)
-                        total += line.service_fees
-                        service_fee_distribution = cls.get_distribution_string(service_fee_distribution_code)
-                        flow_through = f'{line.invoice_id:<110}'
-                        # Credit to BCREG GL
-                        line_number += 1
-                        control_total += 1
-                        account_jv = account_jv + cls.get_jv_line(batch_type, service_fee_distribution,
-                                                                  description,
-                                                                  effective_date, flow_through, journal_name,
-                                                                  line.service_fees,
-                                                                  line_number, 'C' if not is_jv_reversal else 'D')
-
-                        # Debit from GOV ACCOUNT GL
-                        line_number += 1
-                        control_total += 1
-                        account_jv = account_jv + cls.get_jv_line(batch_type, debit_distribution, description,
-                                                                  effective_date, flow_through, journal_name,
-                                                                  line.service_fees,
-                                                                  line_number, 'D' if not is_jv_reversal else 'C')
-            batch_total += total
-
-            # Skip if we have no total from the invoices.
-            if total > 0:
-                # A JV header for each account.
-                control_total += 1
-                account_jv = cls.get_jv_header(batch_type, cls.get_journal_batch_name(batch_number),
-                                               journal_name, total) + account_jv
-                ejv_content = ejv_content + account_jv
-
-            # Create ejv invoice link records and set invoice status
-            current_app.logger.info('Creating ejv invoice link records and setting invoice status.')
-            sequence = 1
-            for inv in invoices:
-                current_app.logger.debug(f'Creating EJV Invoice Link for invoice id: {inv.id}')
-                ejv_invoice_link = EjvLinkModel(link_id=inv.id, link_type=EJVLinkType.INVOICE.value,
-                                                ejv_header_id=ejv_header_model.id,
-                                                disbursement_status_code=DisbursementStatus.UPLOADED.value,
-                                                sequence=sequence)
-                db.session.add(ejv_invoice_link)
-                sequence += 1
-                # Set distribution status to invoice
-                # Create invoice reference record
-                current_app.logger.debug(f'Creating Invoice Reference for invoice id: {inv.id}')
-                inv_ref = InvoiceReferenceModel(
-                    invoice_id=inv.id,
-                    invoice_number=generate_transaction_number(inv.id),
-                    reference_number=None,
-                    status_code=InvoiceReferenceStatus.ACTIVE.value
+        with cls.create_file_writer(ejv_file_model.file_ref, batch_header) as writer:
+
+            current_app.logger.info('Processing accounts.')
+            for account_id in account_ids:
+                # JV details for the account, written after the JV header once the account total is known.
+                account_jv: List[str] = []
+                # Find all invoices for the gov account to pay.
+                invoices = cls._get_invoices_for_payment(account_id)
+                pay_account: PaymentAccountModel = PaymentAccountModel.find_by_id(account_id)
+                # If no invoices continue.
+                if not invoices or not pay_account.billable:
+                    continue
+
+                disbursement_desc = f'{pay_account.name[:100]:<100}'
+                effective_date: str = cls.get_effective_date()
+                # Construct journal name
+                ejv_header_model: EjvFileModel = EjvHeaderModel(
+                    payment_account_id=account_id,
+                    disbursement_status_code=DisbursementStatus.UPLOADED.value,
+                    ejv_file_id=ejv_file_model.id
+                ).flush()
+                journal_name: str = cls.get_journal_name(ejv_header_model.id)
+                # Distribution code for the account.
+                debit_distribution_code: DistributionCodeModel = DistributionCodeModel.find_by_active_for_account(
+                    account_id
                 )
-                db.session.add(inv_ref)
-            db.session.flush()  # Instead of flushing every entity, flush all at once.
-
-        if not ejv_content:
-            db.session.rollback()
-            return
-
-        # JV Batch Trailer
-        batch_trailer: str = cls.get_batch_trailer(batch_number, batch_total, batch_type, control_total)
-
-        ejv_content = f'{batch_header}{ejv_content}{batch_trailer}'
-
-        # Create a file add this content.
-        file_path_with_name, trg_file_path = cls.create_inbox_and_trg_files(ejv_content)
-
-        current_app.logger.info('Uploading to ftp.')
-
-        # Upload file and trg to FTP
-        cls.upload(ejv_content, cls.get_file_name(), file_path_with_name, trg_file_path)
-
-        # commit changes to DB
-        db.session.commit()
-
-        # Add a sleep to prevent collision on file name.
-        time.sleep(1)
+                debit_distribution = cls.get_distribution_string(debit_distribution_code)  # Debit from GOV account GL
+
+                line_number: int = 0
+                total: float = 0
+                current_app.logger.info(f'Processing invoices for account_id: {account_id}.')
+                for inv in invoices:
+                    # If it's a JV reversal credit and debit is reversed.
+                    is_jv_reversal = inv.invoice_status_code == InvoiceStatus.REFUND_REQUESTED.value
+
+                    # If it's reversal, If there is no COMPLETED invoice reference, then no need to reverse it.
+                    # Else mark it as CANCELLED, as new invoice reference will be created
+                    if is_jv_reversal:
+                        if (inv_ref := InvoiceReferenceModel.find_by_invoice_id_and_status(
+                            inv.id, InvoiceReferenceStatus.COMPLETED.value
+                        )) is None:
+                            continue
+                        inv_ref.status_code = InvoiceReferenceStatus.CANCELLED.value
+
+                    line_items = inv.payment_line_items
+                    invoice_number = f'#{inv.id}'
+                    description = disbursement_desc[:-len(invoice_number)] + invoice_number
+                    description = f'{description[:100]:<100}'
+
+                    for line in line_items:
+                        # Line can have 2 distribution, 1 for the total and another one for service fees.
+                        line_distribution_code: DistributionCodeModel = DistributionCodeModel.find_by_id(
+                            line.fee_distribution_id)
+                        if line.total > 0:
+                            total += line.total
+                            line_distribution = cls.get_distribution_string(line_distribution_code)
+                            flow_through = f'{line.invoice_id:<110}'
+                            # Credit to BCREG GL
+                            line_number += 1
+                            # If it's normal payment then the Line distribution goes as Credit,
+                            # else it goes as Debit as we need to debit the fund from BC registry GL.
+                            account_jv.append(cls.get_jv_line(batch_type, line_distribution, description,
+                                                              effective_date, flow_through, journal_name,
+                                                              line.total,
+                                                              line_number, 'C' if not is_jv_reversal else 'D'))
+
+                            # Debit from GOV ACCOUNT GL
+                            line_number += 1
+                            # If it's normal payment then the Gov account GL goes as Debit,
+                            # else it goes as Credit as we need to credit the fund back to ministry.
+                            account_jv.append(cls.get_jv_line(batch_type, debit_distribution, description,
+                                                              effective_date, flow_through, journal_name,
+                                                              line.total,
+                                                              line_number, 'D' if not is_jv_reversal else 'C'))
+                        if line.service_fees > 0:
+                            service_fee_distribution_code: DistributionCodeModel = DistributionCodeModel.find_by_id(
+                                line_distribution_code.service_fee_distribution_code_id)
+                            total += line.service_fees
+                            service_fee_distribution = cls.get_distribution_string(service_fee_distribution_code)
+                            flow_through = f'{line.invoice_id:<110}'
+                            # Credit to BCREG GL
+                            line_number += 1
+                            account_jv.append(cls.get_jv_line(batch_type, service_fee_distribution,
+                                                              description,
+                                                              effective_date, flow_through, journal_name,
+                                                              line.service_fees,
+                                                              line_number, 'C' if not is_jv_reversal else 'D'))
+
+                            # Debit from GOV ACCOUNT GL
+                            line_number += 1
+                            account_jv.append(cls.get_jv_line(batch_type, debit_distribution, description,
+                                                              effective_date, flow_through, journal_name,
+                                                              line.service_fees,
+                                                              line_number, 'D' if not is_jv_reversal else 'C'))
+
+                # Skip if we have no total from the invoices.
+                if total > 0:
+                    # A JV header for each account.
+                    writer.write(cls.get_jv_header(batch_type, cls.get_journal_batch_name(batch_number),
+                                                   journal_name, total), amount=total)
+                    for jv_line in account_jv:
+                        writer.write(jv_line)
+
+                # Create ejv invoice link records and set invoice status
+                current_app.logger.info('Creating ejv invoice link records and setting invoice status.')
+                sequence = 1
+                for inv in invoices:
+                    current_app.logger.debug(f'Creating EJV Invoice Link for invoice id: {inv.id}')
+                    ejv_invoice_link = EjvLinkModel(link_id=inv.id, link_type=EJVLinkType.INVOICE.value,
+                                                    ejv_header_id=ejv_header_model.id,
+                                                    disbursement_status_code=DisbursementStatus.UPLOADED.value,
+                                                    sequence=sequence)
+                    db.session.add(ejv_invoice_link)
+                    sequence += 1
+                    # Set distribution status to invoice
+                    # Create invoice reference record
+                    current_app.logger.debug(f'Creating Invoice Reference for invoice id: {inv.id}')
+                    inv_ref = InvoiceReferenceModel(
+                        invoice_id=inv.id,
+                        invoice_number=generate_transaction_number(inv.id),
+                        reference_number=None,
+                        status_code=InvoiceReferenceStatus.ACTIVE.value
+                    )
+                    db.session.add(inv_ref)
+                db.session.flush()  # Instead of flushing every entity, flush all at once.
+
+            if writer.is_empty:
+                db.session.rollback()
+                return
+
+            # JV Batch Trailer
+            batch_trailer: str = cls.get_batch_trailer(batch_number, writer.batch_total, batch_type,
+                                                       writer.control_total)
+            file_path_with_name, trg_file_path = writer.complete(batch_trailer)
+
+            current_app.logger.info('Uploading to ftp.')
+
+            # Upload file and trg to FTP
+            cls.upload(writer.file_name, file_path_with_name, trg_file_path)
+
+            # commit changes to DB
+            db.session.commit()
+
+            # Add a sleep to prevent collision on file name.
+            time.sleep(1)
 
     @classmethod
     def _get_account_ids_for_payment(cls, batch_type) -> List[int]:
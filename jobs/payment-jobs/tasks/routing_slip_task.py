@@ -13,8 +13,9 @@
 # limitations under the License.
 """Task to for linking routing slips."""
 
+from collections import defaultdict
 from datetime import datetime, timezone
-from typing import List
+from typing import Callable, Dict, List
 
 from flask import current_app
 from pay_api.models import CfsAccount as CfsAccountModel
@@ -34,6 +35,9 @@ from pay_api.utils.enums import (
     CfsAccountStatus, CfsReceiptStatus, InvoiceReferenceStatus, InvoiceStatus, LineItemStatus, PaymentMethod,
     PaymentStatus, PaymentSystem, ReverseOperation, RoutingSlipStatus)
 from sentry_sdk import capture_message
+from sqlalchemy import Row, select
+
+from utils.sharding import run_for_accounts
 
 
 class RoutingSlipTask:  # pylint:disable=too-few-public-methods
@@ -47,60 +51,60 @@ class RoutingSlipTask:  # pylint:disable=too-few-public-methods
         1. Find all pending rs with pending status.
         2. Notify mailer
         """
-        routing_slips = cls._get_routing_slip_by_status(RoutingSlipStatus.LINKED.value)
-        for routing_slip in routing_slips:
-            # 1. Reverse the child routing slip.
-            # 2. Create receipt to the parent.
-            # 3. Change the payment account of child to parent.
-            # 4. Change the status.
-            try:
-                current_app.logger.debug(f'Linking Routing Slip: {routing_slip.number}')
-                payment_account: PaymentAccountModel = PaymentAccountModel.find_by_id(
-                    routing_slip.payment_account_id)
-                cfs_account = CfsAccountModel.find_effective_by_payment_method(payment_account.id,
-                                                                               PaymentMethod.INTERNAL.value)
-
-                # reverse routing slip receipt
-                if CFSService.get_receipt(cfs_account, routing_slip.number).get('status') != CfsReceiptStatus.REV.value:
-                    CFSService.reverse_rs_receipt_in_cfs(cfs_account, routing_slip.number, ReverseOperation.LINK.value)
-                cfs_account.status = CfsAccountStatus.INACTIVE.value
-
-                # apply receipt to parent cfs account
-                parent_rs: RoutingSlipModel = RoutingSlipModel.find_by_number(routing_slip.parent_number)
-                parent_payment_account: PaymentAccountModel = PaymentAccountModel.find_by_id(
-                    parent_rs.payment_account_id)
-                parent_cfs_account = CfsAccountModel.find_effective_by_payment_method(
-                    parent_payment_account.id, PaymentMethod.INTERNAL.value)
-                # For linked routing slip receipts, append 'L' to the number to avoid duplicate error
-                receipt_number = routing_slip.generate_cas_receipt_number()
-                CFSService.create_cfs_receipt(cfs_account=parent_cfs_account,
-                                              rcpt_number=receipt_number,
-                                              rcpt_date=routing_slip.routing_slip_date.strftime(
-                                                  '%Y-%m-%d'),
-                                              amount=routing_slip.total,
-                                              payment_method=parent_payment_account.payment_method,
-                                              access_token=CFSService.get_token(
-                                                  PaymentSystem.FAS).json()
-                                              .get('access_token')
-                                              )
-
-                # Add to the list if parent is NSF, to apply the receipts.
-                if parent_rs.status == RoutingSlipStatus.NSF.value:
-                    total_invoice_amount = cls._apply_routing_slips_to_pending_invoices(parent_rs)
-                    current_app.logger.debug(f'Total Invoice Amount : {total_invoice_amount}')
-                    # Update the parent routing slip status to ACTIVE
-                    parent_rs.status = RoutingSlipStatus.ACTIVE.value
-                    # linking routing slip balance is transferred ,so use the total
-                    parent_rs.remaining_amount = routing_slip.total - total_invoice_amount
-
-                routing_slip.save()
+        routing_slips = cls._find_routing_slips(RoutingSlipModel.status == RoutingSlipStatus.LINKED.value)
+        # Routing slips linked to the same parent are run together, as linking updates the parent.
+        parents = dict(db.session.query(RoutingSlipModel.number, RoutingSlipModel.payment_account_id)
+                       .filter(RoutingSlipModel.number.in_({rs.parent_number for rs in routing_slips})).all())
+        routing_slip_ids_by_account = defaultdict(list)
+        for rs in routing_slips:
+            routing_slip_ids_by_account[parents.get(rs.parent_number, rs.payment_account_id)].append(rs.id)
+        cls._run_for_routing_slips(routing_slip_ids_by_account, cls._link_routing_slip,
+                                   'Error on Linking Routing Slip number', 'Routing slip linking')
 
-            except Exception as e:  # NOQA # pylint: disable=broad-except
-                capture_message(
-                    f'Error on Linking Routing Slip number:={routing_slip.number}, '
-                    f'routing slip : {routing_slip.id}, ERROR : {str(e)}', level='error')
-                current_app.logger.error(e)
-                continue
+    @classmethod
+    def _link_routing_slip(cls, routing_slip: RoutingSlipModel):
+        # 1. Reverse the child routing slip.
+        # 2. Create receipt to the parent.
+        # 3. Change the payment account of child to parent.
+        # 4. Change the status.
+        current_app.logger.debug(f'Linking Routing Slip: {routing_slip.number}')
+        payment_account: PaymentAccountModel = PaymentAccountModel.find_by_id(
+            routing_slip.payment_account_id)
+        cfs_account = CfsAccountModel.find_effective_by_payment_method(payment_account.id,
+                                                                       PaymentMethod.INTERNAL.value)
+
+        # reverse routing slip receipt
+        if CFSService.get_receipt(cfs_account, routing_slip.number).get('status') != CfsReceiptStatus.REV.value:
+            CFSService.reverse_rs_receipt_in_cfs(cfs_account, routing_slip.number, ReverseOperation.LINK.value)
+        cfs_account.status = CfsAccountStatus.INACTIVE.value
+
+        # apply receipt to parent cfs account
+        parent_rs: RoutingSlipModel = RoutingSlipModel.find_by_number(routing_slip.parent_number)
+        parent_payment_account: PaymentAccountModel = PaymentAccountModel.find_by_id(
+            parent_rs.payment_account_id)
+        parent_cfs_account = CfsAccountModel.find_effective_by_payment_method(
+            parent_payment_account.id, PaymentMethod.INTERNAL.value)
+        # For linked routing slip receipts, append 'L' to the number to avoid duplicate error
+        receipt_number = routing_slip.generate_cas_receipt_number()
+        CFSService.create_cfs_receipt(cfs_account=parent_cfs_account,
+                                      rcpt_number=receipt_number,
+                                      rcpt_date=routing_slip.routing_slip_date.strftime(
+                                          '%Y-%m-%d'),
+                                      amount=routing_slip.total,
+                                      payment_method=parent_payment_account.payment_method,
+                                      access_token=CFSService.get_access_token(PaymentSystem.FAS)
+                                      )
+
+        # Add to the list if parent is NSF, to apply the receipts.
+        if parent_rs.status == RoutingSlipStatus.NSF.value:
+            total_invoice_amount = cls._apply_routing_slips_to_pending_invoices(parent_rs)
+            current_app.logger.debug(f'Total Invoice Amount : {total_invoice_amount}')
+            # Update the parent routing slip status to ACTIVE
+            parent_rs.status = RoutingSlipStatus.ACTIVE.value
+            # linking routing slip balance is transferred ,so use the total
+            parent_rs.remaining_amount = routing_slip.total - total_invoice_amount
+
+        routing_slip.save()
 
     @classmethod
     def process_correction(cls):
@@ -113,49 +117,45 @@ class RoutingSlipTask:  # pylint:disable=too-few-public-methods
         4. Reapply the invoices.
 
         """
-        routing_slips = cls._get_routing_slip_by_status(RoutingSlipStatus.CORRECTION.value)
+        routing_slips = cls._find_routing_slips(RoutingSlipModel.status == RoutingSlipStatus.CORRECTION.value)
         current_app.logger.info(f'Found {len(routing_slips)} to process CORRECTIONS.')
-        for rs in routing_slips:
-            try:
-                wait_for_create_invoice_job = any(x.invoice_status_code in [
-                                                   InvoiceStatus.APPROVED.value, InvoiceStatus.CREATED.value]
-                                                  for x in rs.invoices)
-                if wait_for_create_invoice_job:
-                    continue
-                current_app.logger.debug(f'Correcting Routing Slip: {rs.number}')
-                payment_account: PaymentAccountModel = PaymentAccountModel.find_by_id(rs.payment_account_id)
-                cfs_account = CfsAccountModel.find_effective_by_payment_method(payment_account.id,
-                                                                               PaymentMethod.INTERNAL.value)
-
-                CFSService.reverse_rs_receipt_in_cfs(cfs_account, rs.generate_cas_receipt_number(),
-                                                     ReverseOperation.CORRECTION.value)
-                # Update the version, which generates a new receipt number. This is to avoid duplicate receipt number.
-                rs.cas_version_suffix += 1
-                # Recreate the receipt with the modified total.
-                CFSService.create_cfs_receipt(cfs_account=cfs_account,
-                                              rcpt_number=rs.generate_cas_receipt_number(),
-                                              rcpt_date=rs.routing_slip_date.strftime(
-                                                  '%Y-%m-%d'),
-                                              amount=rs.total,
-                                              payment_method=payment_account.payment_method,
-                                              access_token=CFSService.get_token(
-                                                  PaymentSystem.FAS).json().get('access_token')
-                                              )
-
-                cls._reset_invoices_and_references_to_created(rs)
-
-                cls._apply_routing_slips_to_pending_invoices(rs)
-
-                rs.status = RoutingSlipStatus.COMPLETE.value if rs.remaining_amount == 0 \
-                    else RoutingSlipStatus.ACTIVE.value
-
-                rs.save()
-            except Exception as e:  # NOQA # pylint: disable=broad-except
-                capture_message(
-                    f'Error on Processing CORRECTION for :={rs.number}, '
-                    f'routing slip : {rs.id}, ERROR : {str(e)}', level='error')
-                current_app.logger.error(e)
-                continue
+        cls._run_for_routing_slips(cls._by_account(routing_slips), cls._correct_routing_slip,
+                                   'Error on Processing CORRECTION for ', 'Routing slip correction')
+
+    @classmethod
+    def _correct_routing_slip(cls, rs: RoutingSlipModel):
+        wait_for_create_invoice_job = any(x.invoice_status_code in [
+                                           InvoiceStatus.APPROVED.value, InvoiceStatus.CREATED.value]
+                                          for x in rs.invoices)
+        if wait_for_create_invoice_job:
+            return
+        current_app.logger.debug(f'Correcting Routing Slip: {rs.number}')
+        payment_account: PaymentAccountModel = PaymentAccountModel.find_by_id(rs.payment_account_id)
+        cfs_account = CfsAccountModel.find_effective_by_payment_method(payment_account.id,
+                                                                       PaymentMethod.INTERNAL.value)
+
+        CFSService.reverse_rs_receipt_in_cfs(cfs_account, rs.generate_cas_receipt_number(),
+                                             ReverseOperation.CORRECTION.value)
+        # Update the version, which generates a new receipt number. This is to avoid duplicate receipt number.
+        rs.cas_version_suffix += 1
+        # Recreate the receipt with the modified total.
+        CFSService.create_cfs_receipt(cfs_account=cfs_account,
+                                      rcpt_number=rs.generate_cas_receipt_number(),
+                                      rcpt_date=rs.routing_slip_date.strftime(
+                                          '%Y-%m-%d'),
+                                      amount=rs.total,
+                                      payment_method=payment_account.payment_method,
+                                      access_token=CFSService.get_access_token(PaymentSystem.FAS)
+                                      )
+
+        cls._reset_invoices_and_references_to_created(rs)
+
+        cls._apply_routing_slips_to_pending_invoices(rs)
+
+        rs.status = RoutingSlipStatus.COMPLETE.value if rs.remaining_amount == 0 \
+            else RoutingSlipStatus.ACTIVE.value
+
+        rs.save()
 
     @classmethod
     def process_void(cls):
@@ -167,37 +167,34 @@ class RoutingSlipTask:  # pylint:disable=too-few-public-methods
         3. Change the CFS Account status.
         4. Adjust the remaining amount and cas_version_suffix for VOID.
         """
-        routing_slips = cls._get_routing_slip_by_status(RoutingSlipStatus.VOID.value)
+        routing_slips = cls._find_routing_slips(RoutingSlipModel.status == RoutingSlipStatus.VOID.value)
         current_app.logger.info(f'Found {len(routing_slips)} to process VOID.')
-        for routing_slip in routing_slips:
-            try:
-                current_app.logger.debug(f'Reverse receipt {routing_slip.number}')
-                if routing_slip.invoices:
-                    # FUTURE: If this is hit, and needs to change, we can do something similar to NSF.
-                    # EX. Reset the invoices to created, invoice reference to active.
-                    raise Exception('VOID - has transactions/invoices.')  # pylint: disable=broad-exception-raised
-
-                payment_account: PaymentAccountModel = PaymentAccountModel.find_by_id(routing_slip.payment_account_id)
-                cfs_account = CfsAccountModel.find_effective_by_payment_method(payment_account.id,
-                                                                               PaymentMethod.INTERNAL.value)
-
-                # Reverse all child routing slips, as all linked routing slips are also considered as VOID.
-                child_routing_slips: List[RoutingSlipModel] = RoutingSlipModel.find_children(routing_slip.number)
-                for rs in (routing_slip, *child_routing_slips):
-                    receipt_number = rs.generate_cas_receipt_number()
-                    CFSService.reverse_rs_receipt_in_cfs(cfs_account, receipt_number, ReverseOperation.VOID.value)
-                # Void routing slips aren't supposed to have pending transactions, so no need to look at invoices.
-                cfs_account.status = CfsAccountStatus.INACTIVE.value
-                routing_slip.remaining_amount = 0
-                # Increasing the version, incase we need to reuse the routing slip number in CAS.
-                routing_slip.cas_version_suffix += 1
-                routing_slip.save()
-            except Exception as e:  # NOQA # pylint: disable=broad-except
-                capture_message(
-                    f'Error on Processing VOID for :={routing_slip.number}, '
-                    f'routing slip : {routing_slip.id}, ERROR : {str(e)}', level='error')
-                current_app.logger.error(e)
-                continue
+        cls._run_for_routing_slips(cls._by_account(routing_slips), cls._void_routing_slip,
+                                   'Error on Processing VOID for ', 'Routing slip VOID')
+
+    @classmethod
+    def _void_routing_slip(cls, routing_slip: RoutingSlipModel):
+        current_app.logger.debug(f'Reverse receipt {routing_slip.number}')
+        if routing_slip.invoices:
+            # FUTURE: If this is hit, and needs to change, we can do something similar to NSF.
+            # EX. Reset the invoices to created, invoice reference to active.
+            raise Exception('VOID - has transactions/invoices.')  # pylint: disable=broad-exception-raised
+
+        payment_account: PaymentAccountModel = PaymentAccountModel.find_by_id(routing_slip.payment_account_id)
+        cfs_account = CfsAccountModel.find_effective_by_payment_method(payment_account.id,
+                                                                       PaymentMethod.INTERNAL.value)
+
+        # Reverse all child routing slips, as all linked routing slips are also considered as VOID.
+        child_routing_slips: List[RoutingSlipModel] = RoutingSlipModel.find_children(routing_slip.number)
+        for rs in (routing_slip, *child_routing_slips):
+            receipt_number = rs.generate_cas_receipt_number()
+            CFSService.reverse_rs_receipt_in_cfs(cfs_account, receipt_number, ReverseOperation.VOID.value)
+        # Void routing slips aren't supposed to have pending transactions, so no need to look at invoices.
+        cfs_account.status = CfsAccountStatus.INACTIVE.value
+        routing_slip.remaining_amount = 0
+        # Increasing the version, incase we need to reuse the routing slip number in CAS.
+        routing_slip.cas_version_suffix += 1
+        routing_slip.save()
 
     @classmethod
     def process_nsf(cls):
@@ -208,43 +205,41 @@ class RoutingSlipTask:  # pylint:disable=too-few-public-methods
         2. Reverse the receipt for the NSF routing slips.
         3. Add an invoice for NSF fees.
         """
-        routing_slips = cls._get_routing_slip_by_status(RoutingSlipStatus.NSF.value)
+        routing_slips = cls._find_routing_slips(RoutingSlipModel.status == RoutingSlipStatus.NSF.value)
         current_app.logger.info(f'Found {len(routing_slips)} to process NSF.')
-        for routing_slip in routing_slips:
-            # 1. Reverse the routing slip receipt.
-            # 2. Reverse all the child receipts.
-            # 3. Change the CFS Account status to FREEZE.
-            try:
-                current_app.logger.debug(f'Reverse receipt {routing_slip.number}')
-                payment_account: PaymentAccountModel = PaymentAccountModel.find_by_id(routing_slip.payment_account_id)
-                cfs_account = CfsAccountModel.find_effective_by_payment_method(payment_account.id,
-                                                                               PaymentMethod.INTERNAL.value)
+        cls._run_for_routing_slips(cls._by_account(routing_slips), cls._nsf_routing_slip,
+                                   'Error on Processing NSF for ', 'Routing slip NSF')
 
-                # Find all child routing slip and reverse it, as all linked routing slips are also considered as NSF.
-                child_routing_slips: List[RoutingSlipModel] = RoutingSlipModel.find_children(routing_slip.number)
-                for rs in (routing_slip, *child_routing_slips):
-                    receipt_number = rs.generate_cas_receipt_number()
-                    CFSService.reverse_rs_receipt_in_cfs(cfs_account, receipt_number, ReverseOperation.NSF.value)
-
-                    for payment in db.session.query(PaymentModel) \
-                            .filter(PaymentModel.receipt_number == receipt_number).all():
-                        payment.payment_status_code = PaymentStatus.FAILED.value
-
-                cfs_account.status = CfsAccountStatus.FREEZE.value
-
-                cls._reset_invoices_and_references_to_created(routing_slip)
-
-                inv = cls._create_nsf_invoice(cfs_account, routing_slip.number, payment_account)
-                # Reduce the NSF fee from remaining amount.
-                routing_slip.remaining_amount = routing_slip.remaining_amount - inv.total
-                routing_slip.save()
-
-            except Exception as e:  # NOQA # pylint: disable=broad-except
-                capture_message(
-                    f'Error on Processing NSF for :={routing_slip.number}, '
-                    f'routing slip : {routing_slip.id}, ERROR : {str(e)}', level='error')
-                current_app.logger.error(e)
-                continue
+    @classmethod
+    def _nsf_routing_slip(cls, routing_slip: RoutingSlipModel):
+        # 1. Reverse the routing slip receipt.
+        # 2. Reverse all the child receipts.
+        # 3. Change the CFS Account status to FREEZE.
+        current_app.logger.debug(f'Reverse receipt {routing_slip.number}')
+        payment_account: PaymentAccountModel = PaymentAccountModel.find_by_id(routing_slip.payment_account_id)
+        cfs_account = CfsAccountModel.find_effective_by_payment_method(payment_account.id,
+                                                                       PaymentMethod.INTERNAL.value)
+
+        # Find all child routing slip and reverse it, as all linked routing slips are also considered as NSF.
+        child_routing_slips: List[RoutingSlipModel] = RoutingSlipModel.find_children(routing_slip.number)
+        receipt_numbers = []
+        for rs in (routing_slip, *child_routing_slips):
+            receipt_number = rs.generate_cas_receipt_number()
+            CFSService.reverse_rs_receipt_in_cfs(cfs_account, receipt_number, ReverseOperation.NSF.value)
+            receipt_numbers.append(receipt_number)
+
+        for payment in db.session.query(PaymentModel) \
+                .filter(PaymentModel.receipt_number.in_(receipt_numbers)).all():
+            payment.payment_status_code = PaymentStatus.FAILED.value
+
+        cfs_account.status = CfsAccountStatus.FREEZE.value
+
+        cls._reset_invoices_and_references_to_created(routing_slip)
+
+        inv = cls._create_nsf_invoice(cfs_account, routing_slip.number, payment_account)
+        # Reduce the NSF fee from remaining amount.
+        routing_slip.remaining_amount = routing_slip.remaining_amount - inv.total
+        routing_slip.save()
 
     @classmethod
     def adjust_routing_slips(cls):
@@ -257,47 +252,79 @@ class RoutingSlipTask:  # pylint:disable=too-few-public-methods
         current_app.logger.info('<<adjust_routing_slips')
         adjust_statuses = [RoutingSlipStatus.REFUND_AUTHORIZED.value, RoutingSlipStatus.WRITE_OFF_AUTHORIZED.value]
         # For any pending refund/write off balance should be more than $0
-        routing_slips = db.session.query(RoutingSlipModel) \
-            .filter(RoutingSlipModel.status.in_(adjust_statuses), RoutingSlipModel.remaining_amount > 0).all()
+        routing_slips = cls._find_routing_slips(RoutingSlipModel.status.in_(adjust_statuses),
+                                                RoutingSlipModel.remaining_amount > 0, active_cfs_account=False)
         current_app.logger.info(f'Found {len(routing_slips)} to write off or refund authorized.')
-        for routing_slip in routing_slips:
-            try:
-                # 1.Adjust the routing slip and it's child routing slips for the remaining balance.
-                current_app.logger.debug(f'Adjusting routing slip {routing_slip.number}')
-                payment_account: PaymentAccountModel = PaymentAccountModel.find_by_id(routing_slip.payment_account_id)
-                cfs_account = CfsAccountModel.find_effective_by_payment_method(payment_account.id,
-                                                                               PaymentMethod.INTERNAL.value)
-
-                # reverse routing slip receipt
-                # Find all child routing slip and reverse it, as all linked routing slips are also considered as NSF.
-                child_routing_slips: List[RoutingSlipModel] = RoutingSlipModel.find_children(routing_slip.number)
-                for rs in (routing_slip, *child_routing_slips):
-
-                    is_refund = routing_slip.status == RoutingSlipStatus.REFUND_AUTHORIZED.value
-                    receipt_number = rs.generate_cas_receipt_number()
-                    # Adjust the receipt to zero in CFS
-                    CFSService.adjust_receipt_to_zero(cfs_account, receipt_number, is_refund)
-
-                routing_slip.refund_amount = routing_slip.remaining_amount
-                routing_slip.remaining_amount = 0
-                routing_slip.save()
+        cls._run_for_routing_slips(cls._by_account(routing_slips), cls._adjust_routing_slip,
+                                   'Error on Adjusting Routing Slip for ', 'Routing slip adjustment')
 
-            except Exception as e:  # NOQA # pylint: disable=broad-except
-                capture_message(
-                    f'Error on Adjusting Routing Slip for :={routing_slip.number}, '
-                    f'routing slip : {routing_slip.id}, ERROR : {str(e)}', level='error')
-                current_app.logger.error(e)
-                continue
+    @classmethod
+    def _adjust_routing_slip(cls, routing_slip: RoutingSlipModel):
+        # 1.Adjust the routing slip and it's child routing slips for the remaining balance.
+        current_app.logger.debug(f'Adjusting routing slip {routing_slip.number}')
+        payment_account: PaymentAccountModel = PaymentAccountModel.find_by_id(routing_slip.payment_account_id)
+        cfs_account = CfsAccountModel.find_effective_by_payment_method(payment_account.id,
+                                                                       PaymentMethod.INTERNAL.value)
+
+        # reverse routing slip receipt
+        # Find all child routing slip and reverse it, as all linked routing slips are also considered as NSF.
+        child_routing_slips: List[RoutingSlipModel] = RoutingSlipModel.find_children(routing_slip.number)
+        for rs in (routing_slip, *child_routing_slips):
+
+            is_refund = routing_slip.status == RoutingSlipStatus.REFUND_AUTHORIZED.value
+            receipt_number = rs.generate_cas_receipt_number()
+            # Adjust the receipt to zero in CFS
+            CFSService.adjust_receipt_to_zero(cfs_account, receipt_number, is_refund)
+
+        routing_slip.refund_amount = routing_slip.remaining_amount
+        routing_slip.remaining_amount = 0
+        routing_slip.save()
+
+    @classmethod
+    def _find_routing_slips(cls, *criteria, active_cfs_account: bool = True) -> List[Row]:
+        """Return the id, number, payment account and parent of the routing slips, without loading the models.
+
+        With active_cfs_account, only routing slips with an active INTERNAL CFS account are returned.
+        """
+        query = db.session.query(RoutingSlipModel.id, RoutingSlipModel.number, RoutingSlipModel.payment_account_id,
+                                 RoutingSlipModel.parent_number).filter(*criteria)
+        if active_cfs_account:
+            query = query.filter(RoutingSlipModel.payment_account_id.in_(
+                select(CfsAccountModel.account_id)
+                .where(CfsAccountModel.payment_method == PaymentMethod.INTERNAL.value)
+                .where(CfsAccountModel.status == CfsAccountStatus.ACTIVE.value)))
+        return query.order_by(RoutingSlipModel.id).all()
 
     @classmethod
-    def _get_routing_slip_by_status(cls, status: RoutingSlipStatus) -> List[RoutingSlipModel]:
-        """Get routing slip by status."""
-        return db.session.query(RoutingSlipModel) \
-            .join(PaymentAccountModel, PaymentAccountModel.id == RoutingSlipModel.payment_account_id) \
-            .join(CfsAccountModel, CfsAccountModel.account_id == PaymentAccountModel.id) \
-            .filter(RoutingSlipModel.status == status) \
-            .filter(CfsAccountModel.payment_method == PaymentMethod.INTERNAL.value) \
-            .filter(CfsAccountModel.status == CfsAccountStatus.ACTIVE.value).all()
+    def _by_account(cls, routing_slips: List[Row]) -> Dict[int, List[int]]:
+        routing_slip_ids_by_account = defaultdict(list)
+        for rs in routing_slips:
+            routing_slip_ids_by_account[rs.payment_account_id].append(rs.id)
+        return routing_slip_ids_by_account
+
+    @classmethod
+    def _run_for_routing_slips(cls, routing_slip_ids_by_account: Dict[int, List[int]],
+                               process: Callable[[RoutingSlipModel], None], error_message: str, description: str):
+        """Process the routing slips, the accounts are run in parallel by run_for_accounts.
+
+        Every routing slip is committed or rolled back on its own, so one CFS failure doesn't affect the others.
+        """
+        def work(account_id: int):
+            for routing_slip in db.session.query(RoutingSlipModel) \
+                    .filter(RoutingSlipModel.id.in_(routing_slip_ids_by_account[account_id])) \
+                    .order_by(RoutingSlipModel.id).all():
+                number, routing_slip_id = routing_slip.number, routing_slip.id
+                try:
+                    process(routing_slip)
+                    db.session.commit()
+                except Exception as e:  # NOQA # pylint: disable=broad-except
+                    db.session.rollback()
+                    capture_message(
+                        f'{error_message}:={number}, '
+                        f'routing slip : {routing_slip_id}, ERROR : {str(e)}', level='error')
+                    current_app.logger.error(e)
+
+        run_for_accounts(routing_slip_ids_by_account.keys(), work, description)
 
     @classmethod
     def _reset_invoices_and_references_to_created(cls, routing_slip: RoutingSlipModel):
@@ -306,16 +333,19 @@ class RoutingSlipTask:  # pylint:disable=too-few-public-methods
             .filter(InvoiceModel.routing_slip == routing_slip.number) \
             .filter(InvoiceModel.invoice_status_code == InvoiceStatus.PAID.value) \
             .all()
+        if not invoices:
+            return
+        invoice_ids = [inv.id for inv in invoices]
+        inv_refs = {inv_ref.invoice_id: inv_ref for inv_ref in db.session.query(InvoiceReferenceModel)
+                    .filter(InvoiceReferenceModel.invoice_id.in_(invoice_ids))
+                    .filter(InvoiceReferenceModel.status_code == InvoiceReferenceStatus.COMPLETED.value).all()}
         for inv in invoices:
             # Reset the statuses
             inv.invoice_status_code = InvoiceStatus.CREATED.value
-            inv_ref = InvoiceReferenceModel.find_by_invoice_id_and_status(
-                inv.id, InvoiceReferenceStatus.COMPLETED.value
-            )
-            inv_ref.status_code = InvoiceReferenceStatus.ACTIVE.value
-            # Delete receipts as receipts are reversed in CFS.
-            for receipt in ReceiptModel.find_all_receipts_for_invoice(inv.id):
-                db.session.delete(receipt)
+            inv_refs[inv.id].status_code = InvoiceReferenceStatus.ACTIVE.value
+        # Delete receipts as receipts are reversed in CFS.
+        for receipt in db.session.query(ReceiptModel).filter(ReceiptModel.invoice_id.in_(invoice_ids)).all():
+            db.session.delete(receipt)
 
     @classmethod
     def _create_nsf_invoice(cls, cfs_account: CfsAccountModel, rs_number: str,
@@ -388,13 +418,16 @@ class RoutingSlipTask:  # pylint:disable=too-few-public-methods
                     InvoiceModel.invoice_status_code.in_([InvoiceStatus.CREATED.value, InvoiceStatus.APPROVED.value])) \
             .all()
         current_app.logger.info(f'Found {len(invoices)} to apply receipt')
+        inv_refs = {inv_ref.invoice_id: inv_ref for inv_ref in db.session.query(InvoiceReferenceModel)
+                    .filter(InvoiceReferenceModel.invoice_id.in_([inv.id for inv in invoices]))
+                    .filter(InvoiceReferenceModel.status_code == InvoiceReferenceStatus.ACTIVE.value).all()}
+        child_routing_slips: List[RoutingSlipModel] = RoutingSlipModel.find_children(routing_slip.number)
         applied_amount = 0
         for inv in invoices:
-            inv_ref: InvoiceReferenceModel = InvoiceReferenceModel.find_by_invoice_id_and_status(
-                inv.id, InvoiceReferenceStatus.ACTIVE.value
-            )
+            inv_ref: InvoiceReferenceModel = inv_refs.get(inv.id)
             cls.apply_routing_slips_to_invoice(
-                routing_slip_payment_account, active_cfs_account, routing_slip, inv, inv_ref.invoice_number
+                routing_slip_payment_account, active_cfs_account, routing_slip, inv, inv_ref.invoice_number,
+                child_routing_slips
             )
 
             # IF invoice balance is zero, then update records.
@@ -413,10 +446,12 @@ class RoutingSlipTask:  # pylint:disable=too-few-public-methods
                                        active_cfs_account: CfsAccountModel,
                                        parent_routing_slip: RoutingSlipModel,
                                        invoice: InvoiceModel,
-                                       invoice_number: str) -> bool:
-        """Apply routing slips (receipts in CFS) to invoice."""
+                                       invoice_number: str,
+                                       child_routing_slips: List[RoutingSlipModel] = None) -> bool:
+        """Apply routing slips (receipts in CFS) to invoice, child_routing_slips saves looking them up per invoice."""
         has_errors = False
-        child_routing_slips: List[RoutingSlipModel] = RoutingSlipModel.find_children(parent_routing_slip.number)
+        if child_routing_slips is None:
+            child_routing_slips = RoutingSlipModel.find_children(parent_routing_slip.number)
         # an invoice has to be applied to multiple receipts (incl. all linked RS); apply till the balance is zero
         for routing_slip in (parent_routing_slip, *child_routing_slips):
             try:
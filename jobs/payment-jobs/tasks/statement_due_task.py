@@ -36,6 +36,7 @@ from sentry_sdk import capture_message
 from utils.auth_event import AuthEvent
 from utils.enums import StatementNotificationAction
 from utils.mailer import StatementNotificationInfo, publish_payment_notification
+from utils.sharding import get_shard
 
 
 # IMPORTANT: Due to the nature of dates, run this job at least 08:00 UTC or greater.
@@ -72,7 +73,9 @@ class StatementDueTask:   # pylint: disable=too-few-public-methods
             .filter(InvoiceModel.payment_method_code == PaymentMethod.EFT.value,
                     InvoiceModel.overdue_date.isnot(None),
                     InvoiceModel.overdue_date <= now,
-                    InvoiceModel.invoice_status_code.in_(cls.unpaid_status))
+                    InvoiceModel.invoice_status_code.in_(cls.unpaid_status),
+                    get_shard().owns_clause(InvoiceModel.payment_account_id))
+        # Bulk updates skip the statement totals refresh, an owing invoice becoming overdue doesn't change them.
         query.update({InvoiceModel.invoice_status_code: InvoiceStatus.OVERDUE.value}, synchronize_session='fetch')
         db.session.commit()
 
@@ -99,8 +102,9 @@ class StatementDueTask:   # pylint: disable=too-few-public-methods
         previous_month = cls.statement_date_override or current_local_time().replace(day=1) - timedelta(days=1)
         statement_settings = StatementSettingsModel.find_accounts_settings_by_frequency(previous_month,
                                                                                         StatementFrequency.MONTHLY)
+        shard = get_shard()
         eft_payment_accounts = [pay_account for _, pay_account in statement_settings
-                                if pay_account.payment_method == PaymentMethod.EFT.value]
+                                if pay_account.payment_method == PaymentMethod.EFT.value and shard.owns(pay_account.id)]
 
         current_app.logger.info(f'Processing {len(eft_payment_accounts)} EFT accounts for monthly reminders.')
         for payment_account in eft_payment_accounts:
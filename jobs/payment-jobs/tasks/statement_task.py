@@ -13,6 +13,7 @@
 # limitations under the License.
 """Service to manage PAYBC services."""
 
+from collections import defaultdict
 from datetime import datetime, timedelta, timezone
 
 from dateutil.parser import parse
@@ -27,7 +28,7 @@ from pay_api.utils.enums import NotificationStatus, PaymentMethod, StatementFreq
 from pay_api.utils.util import (
     get_first_and_last_dates_of_month, get_local_time, get_previous_day, get_previous_month_and_year,
     get_week_start_and_end_date)
-from sqlalchemy import delete
+from sqlalchemy import delete, insert
 
 
 class StatementTask:  # pylint:disable=too-few-public-methods
@@ -121,23 +122,20 @@ class StatementTask:  # pylint:disable=too-few-public-methods
         cls._create_statement_records(search_filter, statement_settings, account_override)
 
     @classmethod
-    def _upsert_statements(cls, statement_settings, invoice_detail_tuple, reuse_statements):
+    def _upsert_statements(cls, statement_settings, invoices_by_account, reuse_statements):
         """Upsert statements to reuse statement ids because they are referenced in the EFT Shortname History."""
         statements = []
+        reuse_statements_by_key = {(statement.payment_account_id, statement.frequency,
+                                    statement.from_date, statement.to_date): statement
+                                   for statement in reversed(reuse_statements)}
         for setting, pay_account in statement_settings:
-            existing_statement = next(
-                    (statement for statement in reuse_statements
-                     if statement.payment_account_id == pay_account.id and
-                     statement.frequency == setting.frequency and
-                     statement.from_date == cls.statement_from.date() and statement.to_date == cls.statement_to.date()),
-                    None
-                   )
+            existing_statement = reuse_statements_by_key.get((pay_account.id, setting.frequency,
+                                                              cls.statement_from.date(), cls.statement_to.date()))
             notification_status = NotificationStatus.PENDING.value \
                 if pay_account.statement_notification_enabled is True and cls.has_date_override is False \
                 else NotificationStatus.SKIP.value
-            payment_methods = StatementService.determine_payment_methods(invoice_detail_tuple,
-                                                                         pay_account,
-                                                                         existing_statement)
+            payment_methods = StatementService.determine_payment_methods(
+                invoices_by_account.get(pay_account.auth_account_id, []), pay_account, existing_statement)
             created_on = get_local_time(datetime.now(tz=timezone.utc))
             if existing_statement:
                 current_app.logger.debug(f'Reusing existing statement already exists for {cls.statement_from.date()}')
@@ -186,24 +184,27 @@ class StatementTask:  # pylint:disable=too-few-public-methods
         # statement logic when transitioning payment methods
         search_filter['matchPaymentMethods'] = [PaymentMethod.EFT.value]
         invoice_detail_tuple = PaymentModel.get_invoices_and_payment_accounts_for_statements(search_filter)
+        # Group the invoices by account once, instead of scanning every invoice for every statement.
+        invoices_by_account = defaultdict(list)
+        for invoice_detail in invoice_detail_tuple:
+            invoices_by_account[invoice_detail.auth_account_id].append(invoice_detail)
         reuse_statements = []
         if cls.has_date_override and statement_settings:
             reuse_statements = cls._clean_up_old_statements(statement_settings)
         current_app.logger.debug('Upserting statements.')
-        statements = cls._upsert_statements(statement_settings, invoice_detail_tuple, reuse_statements)
+        statements = cls._upsert_statements(statement_settings, invoices_by_account, reuse_statements)
         # Return defaults which returns the id.
         db.session.bulk_save_objects(statements, return_defaults=True)
         db.session.flush()
 
         current_app.logger.debug('Inserting statement invoices.')
-        statement_invoices = []
-        for statement, auth_account_id in zip(statements, auth_account_ids):
-            invoices = [i for i in invoice_detail_tuple if i.auth_account_id == auth_account_id]
-            statement_invoices = statement_invoices + [StatementInvoicesModel(
-                statement_id=statement.id,
-                invoice_id=invoice.id
-            ) for invoice in invoices]
-        db.session.bulk_save_objects(statement_invoices)
+        statement_invoices = [{'statement_id': statement.id, 'invoice_id': invoice.id}
+                              for statement, (_, pay_account) in zip(statements, statement_settings)
+                              for invoice in invoices_by_account.get(pay_account.auth_account_id, [])]
+        if statement_invoices:
+            db.session.execute(insert(StatementInvoicesModel), statement_invoices)
+        # Bulk inserts skip the flush events, so the totals are calculated here for new and reused statements.
+        StatementModel.refresh_totals({statement.id for statement in (*statements, *reuse_statements)})
 
     @classmethod
     def _clean_up_old_statements(cls, statement_settings):
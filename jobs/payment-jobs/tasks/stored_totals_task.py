@@ -0,0 +1,49 @@
+# Copyright © 2024 Province of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Task to recalculate the stored totals and summaries, correcting any drift from writes that didn't refresh them."""
+from typing import Callable, List
+
+from flask import current_app
+from pay_api.models import db
+from pay_api.models.eft_short_name_summaries import EFTShortnameSummaries as EFTShortnameSummariesModel
+from pay_api.models.eft_short_names import EFTShortnames as EFTShortnamesModel
+from pay_api.models.statement import Statement as StatementModel
+from sqlalchemy import select
+
+
+class StoredTotalsTask:  # pylint: disable=too-few-public-methods
+    """Task to recalculate the stored totals from their source rows."""
+
+    batch_size = 500
+
+    @classmethod
+    def refresh_totals(cls):
+        """Recalculate the stored statement totals and EFT short name summaries, one batch per transaction."""
+        cls._refresh_in_batches(StatementModel.id, StatementModel.refresh_totals, 'statements')
+        cls._refresh_in_batches(EFTShortnamesModel.id, EFTShortnameSummariesModel.refresh, 'EFT short names')
+
+    @classmethod
+    def _refresh_in_batches(cls, id_column, refresh: Callable[[List[int]], None], description: str):
+        """Refresh the rows in batches, by id, committing each batch."""
+        last_id = 0
+        refreshed = 0
+        while ids := db.session.scalars(select(id_column)
+                                        .where(id_column > last_id)
+                                        .order_by(id_column)
+                                        .limit(cls.batch_size)).all():
+            refresh(ids)
+            db.session.commit()
+            last_id = ids[-1]
+            refreshed += len(ids)
+        current_app.logger.info(f'Refreshed the totals of {refreshed} {description}.')
@@ -26,6 +26,7 @@ from pay_api.models import InvoiceReference as InvoiceReferenceModel
 # from pay_api.models import Payment as PaymentModel
 from pay_api.services import CFSService
 from pay_api.utils.enums import CfsAccountStatus, InvoiceReferenceStatus, InvoiceStatus, PaymentMethod
+from pay_api.utils.util import generate_transaction_number
 from requests import Response
 from requests.exceptions import HTTPError
 
@@ -143,6 +144,31 @@ def test_create_rs_invoice_single_transaction(session):
     assert updated_invoice.invoice_status_code == InvoiceStatus.PAID.value
 
 
+def test_create_rs_invoices_sharded(session, app, monkeypatch):
+    """Assert each routing slip invoice is created in CFS once when the job is split between two shards."""
+    previous_day = datetime.now(tz=timezone.utc) - timedelta(days=1)
+    fee_schedule = FeeScheduleModel.find_by_filing_type_and_corp_type('CP', 'OTANN')
+    invoice_ids = []
+    for rs_number in ('111', '222'):
+        account = factory_routing_slip_account(number=rs_number, status=CfsAccountStatus.ACTIVE.value)
+        invoice = factory_invoice(payment_account=account, created_on=previous_day, total=10,
+                                  status_code=InvoiceStatus.APPROVED.value,
+                                  payment_method_code=PaymentMethod.INTERNAL.value, routing_slip=rs_number)
+        factory_payment_line_item(invoice.id, fee_schedule_id=fee_schedule.fee_schedule_id).save()
+        invoice_ids.append(invoice.id)
+
+    def create_account_invoice(transaction_number, line_items, cfs_account):  # pylint: disable=unused-argument
+        return {'invoice_number': generate_transaction_number(str(transaction_number)), 'pbc_ref_number': '10005'}
+
+    with patch.object(CFSService, 'create_account_invoice', side_effect=create_account_invoice) as mock_cfs:
+        for shard in ('0/2', '1/2'):
+            monkeypatch.setitem(app.config, 'JOB_SHARD', shard)
+            CreateInvoiceTask.create_invoices()
+        created = sorted(call.kwargs['transaction_number'] for call in mock_cfs.call_args_list)
+
+    assert created == sorted(invoice_ids)
+
+
 def test_create_pad_invoice_single_transaction_run_again(session):
     """Assert PAD invoices are created."""
     # Create an account and an invoice for the account
@@ -274,6 +300,62 @@ def test_create_online_banking_transaction(session):
     assert updated_invoice.invoice_status_code == InvoiceStatus.SETTLEMENT_SCHEDULED.value
 
 
+def test_create_online_banking_transaction_existing_cfs_invoice(session):
+    """Assert an Online Banking invoice already in CFS is used when creating it fails."""
+    account = factory_create_online_banking_account(auth_account_id='1', status=CfsAccountStatus.ACTIVE.value)
+    previous_day = datetime.now(tz=timezone.utc) - timedelta(days=1)
+    invoice = factory_invoice(payment_account=account, created_on=previous_day, total=10, payment_method_code=None)
+
+    fee_schedule = FeeScheduleModel.find_by_filing_type_and_corp_type('CP', 'OTANN')
+    line = factory_payment_line_item(invoice.id, fee_schedule_id=fee_schedule.fee_schedule_id)
+    line.save()
+
+    invoice_data = {
+        'invoice_number': generate_transaction_number(str(invoice.id)),
+        'pbc_ref_number': '10005',
+        'party_number': '11111',
+        'party_name': 'invoice'
+    }
+    with patch.object(CFSService, 'create_account_invoice', side_effect=HTTPError()) as mock_create_invoice, \
+            patch.object(CFSService, 'get_invoice', return_value=invoice_data) as mock_get_invoice, \
+            patch('tasks.cfs_create_invoice_task.time.sleep'):
+        CreateInvoiceTask.create_invoices()
+        mock_create_invoice.assert_called()
+        mock_get_invoice.assert_called()
+
+    updated_invoice: InvoiceModel = InvoiceModel.find_by_id(invoice.id)
+    inv_ref: InvoiceReferenceModel = InvoiceReferenceModel. \
+        find_by_invoice_id_and_status(invoice.id, InvoiceReferenceStatus.ACTIVE.value)
+
+    assert inv_ref
+    assert inv_ref.invoice_number == invoice_data['invoice_number']
+    assert updated_invoice.invoice_status_code == InvoiceStatus.SETTLEMENT_SCHEDULED.value
+
+
+def test_create_pad_invoice_account_failure(session):
+    """Assert an account that fails is rolled back without rolling back the other accounts."""
+    previous_day = datetime.now(tz=timezone.utc) - timedelta(days=1)
+    fee_schedule = FeeScheduleModel.find_by_filing_type_and_corp_type('CP', 'OTANN')
+    invoices = {}
+    for auth_account_id in ('1', '2'):
+        account = factory_create_pad_account(auth_account_id=auth_account_id, status=CfsAccountStatus.ACTIVE.value)
+        invoice = factory_invoice(payment_account=account, created_on=previous_day, total=10,
+                                  status_code=InvoiceStatus.APPROVED.value, payment_method_code=None)
+        factory_payment_line_item(invoice.id, fee_schedule_id=fee_schedule.fee_schedule_id).save()
+        invoices[auth_account_id] = invoice.id
+
+    def publish_mailer_events(message_type, payment_account, additional_params):  # pylint: disable=unused-argument
+        if payment_account.auth_account_id == '1':
+            raise ValueError('Mailer failed')
+
+    with patch('utils.mailer.publish_mailer_events', side_effect=publish_mailer_events):
+        CreateInvoiceTask.create_invoices()
+
+    assert InvoiceReferenceModel.find_by_invoice_id_and_status(invoices['1'],
+                                                               InvoiceReferenceStatus.ACTIVE.value) is None
+    assert InvoiceReferenceModel.find_by_invoice_id_and_status(invoices['2'], InvoiceReferenceStatus.ACTIVE.value)
+
+
 def test_create_eft_invoice(session):
     """Assert EFT invoice is created."""
     account = factory_create_eft_account(auth_account_id='1', status=CfsAccountStatus.ACTIVE.value)
@@ -0,0 +1,86 @@
+# Copyright © 2024 Province of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests to assure the streaming CGI file writer.
+
+Test-Suite to ensure that EJV files are written with the right batch totals, including for large batches.
+"""
+import os
+import time
+
+from flask import current_app
+
+from tasks.common.cgi_ejv import CgiEjv
+
+
+def test_file_writer(app):
+    """Assert the header, records and trailer are written in order with the batch totals."""
+    with app.app_context():
+        writer = CgiEjv.create_file_writer('INBOX.TEST.WRITER', CgiEjv.get_batch_header('000000001', 'GI'))
+        writer.write(CgiEjv.get_jv_header('GI', CgiEjv.get_journal_batch_name('000000001'), 'JOURNAL', 30.5),
+                     amount=30.5)
+        writer.write('JD1\n')
+        writer.write('JD2\n')
+        assert not writer.is_empty
+        assert writer.control_total == 3
+        assert writer.batch_total == 30.5
+
+        file_path, trg_file_path = writer.complete(
+            CgiEjv.get_batch_trailer('000000001', writer.batch_total, 'GI', writer.control_total))
+        assert os.path.basename(file_path) == 'INBOX.TEST.WRITER'
+        assert os.path.exists(trg_file_path)
+        with open(file_path, encoding='utf-8') as jv_file:
+            lines = jv_file.read().splitlines()
+        assert 'GIBH' in lines[0]
+        assert lines[2:4] == ['JD1', 'JD2']
+        assert 'GIBT' in lines[-1] and f'{3:0>15}{CgiEjv.format_amount(30.5)}' in lines[-1]
+        os.remove(file_path)
+        os.remove(trg_file_path)
+
+        writer = CgiEjv.create_file_writer('INBOX.TEST.EMPTY', CgiEjv.get_batch_header('000000002', 'GI'))
+        assert writer.is_empty
+        writer.discard()
+        assert not any(name.startswith('INBOX.TEST.EMPTY') for name in os.listdir(os.path.dirname(file_path)))
+
+
+def test_file_writer_large_batch(app):
+    """Write 100k synthetic invoices (a JV header and 2 JV lines each), the time taken should grow linearly."""
+    invoice_count = 100_000
+    with app.app_context():
+        distribution = f'112320123450000000000000{CgiEjv.EMPTY:<16}'
+        description = f'{"BENCHMARK":<100}'
+        effective_date = CgiEjv.get_effective_date()
+        start = time.perf_counter()
+        writer = CgiEjv.create_file_writer('INBOX.TEST.LARGE', CgiEjv.get_batch_header('000000003', 'GI'))
+        for invoice_id in range(1, invoice_count + 1):
+            journal_name = CgiEjv.get_journal_name(invoice_id)
+            flow_through = f'{invoice_id:<110}'
+            writer.write(CgiEjv.get_jv_header('GI', CgiEjv.get_journal_batch_name('000000003'), journal_name, 10),
+                         amount=10)
+            writer.write(CgiEjv.get_jv_line('GI', distribution, description, effective_date, flow_through,
+                                            journal_name, 10, 1, 'C'))
+            writer.write(CgiEjv.get_jv_line('GI', distribution, description, effective_date, flow_through,
+                                            journal_name, 10, 2, 'D'))
+        file_path, trg_file_path = writer.complete(
+            CgiEjv.get_batch_trailer('000000003', writer.batch_total, 'GI', writer.control_total))
+        elapsed = time.perf_counter() - start
+        current_app.logger.info(f'Wrote {invoice_count} invoices ({os.stat(file_path).st_size} bytes) '
+                                f'in {elapsed:.2f}s')
+
+        assert writer.control_total == invoice_count * 3
+        assert writer.batch_total == invoice_count * 10
+        with open(file_path, encoding='utf-8') as jv_file:
+            assert sum(1 for _ in jv_file) == invoice_count * 3 + 2
+        os.remove(file_path)
+        os.remove(trg_file_path)
@@ -136,3 +136,33 @@ def test_payments_for_gov_accounts(session, monkeypatch):
         ejv_file: EjvFile = EjvFile.find_by_id(ejv_header.ejv_file_id)
         assert ejv_file
         assert ejv_file.file_type == EjvFileType.PAYMENT.value
+
+
+def test_payments_batch_totals(session, monkeypatch):
+    """Assert the batch trailer counts the records written, an account with a zero total writes and counts none."""
+    uploaded_files = []
+
+    def upload(file_name, file_path_with_name, trg_file_path):  # pylint: disable=unused-argument
+        with open(file_path_with_name, encoding='utf-8') as jv_file:
+            uploaded_files.append(jv_file.read().splitlines())
+
+    monkeypatch.setattr(EjvPaymentTask, 'upload', upload)
+
+    fee_schedule: FeeSchedule = FeeSchedule.find_by_filing_type_and_corp_type('BEN', 'BCINC')
+    paid_account = factory_create_ejv_account(auth_account_id='1', client='111')
+    zero_account = factory_create_ejv_account(auth_account_id='2', client='111')
+    for jv_acc, total in ((paid_account, 100), (zero_account, 0)):
+        inv = factory_invoice(payment_account=jv_acc, corp_type_code='BEN', total=total,
+                              status_code=InvoiceStatus.APPROVED.value, payment_method_code=None)
+        factory_payment_line_item(invoice_id=inv.id, fee_schedule_id=fee_schedule.fee_schedule_id,
+                                  filing_fees=total, total=total)
+
+    EjvPaymentTask.create_ejv_file()
+
+    assert len(uploaded_files) == 1
+    lines = uploaded_files[0]
+    # Batch header, a JV header and a credit and debit line for the paid account, then the batch trailer.
+    assert len(lines) == 5
+    assert 'GIJH' in lines[1]
+    assert 'GIBT' in lines[-1]
+    assert f'{3:0>15}{EjvPaymentTask.format_amount(100)}' in lines[-1]
@@ -90,6 +90,26 @@ def test_statements(session):
     assert len(StatementInvoices.find_all_invoices_for_statement(first_statement_id)) == 2
 
 
+@freeze_time('2023-01-02 12:00:00T08:00:00')
+def test_statements_multiple_accounts(session):
+    """Test each account's statement only has that account's invoices."""
+    previous_day = localize_date(get_previous_day(datetime.utcnow()))
+    account_invoices = {}
+    for index in range(3):
+        account = factory_premium_payment_account(bcol_account_id=f'123456789{index}', auth_account_id=f'100{index}')
+        account_invoices[account.auth_account_id] = {factory_invoice(payment_account=account,
+                                                                     created_on=previous_day).id
+                                                     for _ in range(index + 1)}
+        factory_statement_settings(pay_account_id=account.id, from_date=previous_day, frequency='DAILY')
+
+    StatementTask.generate_statements()
+
+    for auth_account_id, invoice_ids in account_invoices.items():
+        statements = StatementService.get_account_statements(auth_account_id=auth_account_id, page=1, limit=100)
+        invoices = StatementInvoices.find_all_invoices_for_statement(statements[0][0].id)
+        assert {invoice.invoice_id for invoice in invoices} == invoice_ids
+
+
 def test_statements_for_empty_results(session):
     """Test daily statement generation works.
 
@@ -319,3 +319,27 @@ def test_receipt_adjustments(session, rs_status):
 
     parent_rs = RoutingSlipModel.find_by_number(parent_rs.number)
     assert parent_rs.remaining_amount == 0
+
+
+def test_process_void_error_isolated(session):
+    """Assert a routing slip that fails in CFS is rolled back, without stopping the other routing slips."""
+    failing, passing = '222222222', '333333333'
+    for number in (failing, passing):
+        factory_routing_slip_account(number=number, status=CfsAccountStatus.ACTIVE.value, total=10,
+                                     remaining_amount=10, routing_slip_status=RoutingSlipStatus.VOID.value)
+
+    def reverse(cfs_account, receipt_number, operation):
+        if receipt_number == failing:
+            raise ValueError('CFS is down')
+
+    with patch('pay_api.services.CFSService.reverse_rs_receipt_in_cfs', side_effect=reverse) as mock_cfs_reverse:
+        RoutingSlipTask.process_void()
+        assert mock_cfs_reverse.call_count == 2
+
+    failed_rs = RoutingSlipModel.find_by_number(failing)
+    assert float(failed_rs.remaining_amount) == 10
+    assert failed_rs.cas_version_suffix == 1
+    assert CfsAccountModel.find_effective_by_payment_method(failed_rs.payment_account_id,
+                                                            PaymentMethod.INTERNAL.value).status == \
+        CfsAccountStatus.ACTIVE.value
+    assert float(RoutingSlipModel.find_by_number(passing).remaining_amount) == 0
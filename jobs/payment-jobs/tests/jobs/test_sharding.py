@@ -0,0 +1,76 @@
+# Copyright © 2024 Province of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests to assure the sharded account execution.
+
+Test-Suite to ensure that accounts are split between shards and run in isolation.
+"""
+import pytest
+from pay_api.models import PaymentAccount as PaymentAccountModel
+from pay_api.models import db
+
+from invoke_jobs import run
+from tests.jobs.factory import factory_create_account
+from utils.sharding import Shard, run_for_accounts, split_execution_args
+
+
+def test_shard_parse():
+    """Assert shards are parsed and accounts are split between them."""
+    assert Shard.parse('1/4') == Shard(index=1, count=4)
+    for value in ('4/4', '-1/2', '1', 'a/b', '0/0'):
+        with pytest.raises(ValueError):
+            Shard.parse(value)
+
+    shards = [Shard.parse(f'{index}/3') for index in range(3)]
+    for account_id in range(1, 100):
+        assert sum(shard.owns(account_id) for shard in shards) == 1
+
+
+def test_split_execution_args():
+    """Assert --shard and --workers are split from the job arguments."""
+    assert split_execution_args(['STATEMENTS_DUE', '2024-01-01', '--shard', '1/2', '--workers', '4']) == \
+        (['STATEMENTS_DUE', '2024-01-01'], '1/2', 4)
+    assert split_execution_args(['EFT']) == (['EFT'], None, None)
+
+
+def test_run_for_accounts(session, app, monkeypatch):
+    """Assert only the shard's accounts run, and a failing account doesn't stop the others."""
+    monkeypatch.setitem(app.config, 'JOB_SHARD', '1/2')
+    completed = []
+
+    def work(account_id):
+        if account_id == 3:
+            raise ValueError('CFS is down')
+        completed.append(account_id)
+
+    run_for_accounts(range(1, 10), work, 'Test')
+    assert completed == [1, 5, 7, 9]
+
+
+def test_shard_owns_clause(session):
+    """Assert the shard filter matches the same accounts as owns."""
+    for auth_account_id in ('1', '2', '3', '4'):
+        factory_create_account(auth_account_id=auth_account_id)
+    shard = Shard.parse('1/2')
+    account_ids = [account_id for account_id, in
+                   db.session.query(PaymentAccountModel.id).filter(shard.owns_clause(PaymentAccountModel.id))]
+    assert account_ids and all(shard.owns(account_id) for account_id in account_ids)
+    assert db.session.query(PaymentAccountModel.id).filter(Shard().owns_clause(PaymentAccountModel.id)).count() == \
+        db.session.query(PaymentAccountModel.id).count()
+
+
+def test_shard_rejected_for_unsharded_job():
+    """Assert --shard is refused for a job that doesn't split its accounts, rather than running it in full."""
+    with pytest.raises(ValueError):
+        run('EJV_PAYMENT', shard='0/2')
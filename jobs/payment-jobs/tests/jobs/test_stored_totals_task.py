@@ -0,0 +1,60 @@
+# Copyright © 2024 Province of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests to assure the stored totals job.
+
+Test-Suite to ensure that the stored totals job corrects totals and summaries that have drifted from their source rows.
+"""
+from datetime import datetime, timezone
+
+from pay_api.models import EFTShortnameSummaries, Statement, StatementInvoices, db
+from pay_api.utils.enums import InvoiceStatus, PaymentMethod
+from sqlalchemy import update
+
+from tasks.stored_totals_task import StoredTotalsTask
+
+from .factory import (
+    factory_create_account, factory_create_eft_shortname, factory_eft_shortname_link, factory_invoice)
+
+
+def test_refresh_statement_totals(session):
+    """Assert statement totals changed without the session events are recalculated."""
+    account = factory_create_account(auth_account_id='1', payment_method_code=PaymentMethod.PAD.value)
+    invoice = factory_invoice(payment_account=account, total=50, status_code=InvoiceStatus.APPROVED.value,
+                              payment_method_code=PaymentMethod.PAD.value)
+    statement = Statement(frequency='WEEKLY', payment_account_id=account.id,
+                          from_date=datetime.now(tz=timezone.utc), to_date=datetime.now(tz=timezone.utc),
+                          payment_methods=PaymentMethod.PAD.value).save()
+    StatementInvoices(statement_id=statement.id, invoice_id=invoice.id).save()
+    db.session.execute(update(Statement.__table__).where(Statement.__table__.c.id == statement.id)
+                       .values(total_fees=0, total_due=0))
+
+    StoredTotalsTask.refresh_totals()
+
+    db.session.refresh(statement)
+    assert statement.total_fees == 50
+    assert statement.total_due == 50
+
+
+def test_refresh_short_name_summaries(session):
+    """Assert EFT short name summaries changed without the session events are recalculated."""
+    short_name = factory_create_eft_shortname('TESTSHORTNAME')
+    factory_eft_shortname_link(short_name_id=short_name.id)
+    db.session.execute(update(EFTShortnameSummaries.__table__)
+                       .where(EFTShortnameSummaries.__table__.c.short_name_id == short_name.id)
+                       .values(linked_accounts_count=0))
+
+    StoredTotalsTask.refresh_totals()
+
+    assert db.session.get(EFTShortnameSummaries, short_name.id, populate_existing=True).linked_accounts_count == 1
@@ -12,19 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """This module is a wrapper for Minio."""
-import io
-
 from flask import current_app
 from minio import Minio
 from urllib3 import HTTPResponse
 
 
-def put_object(value_as_bytes, file_name: str, file_size: int = 0):
-    """Return a pre-signed URL for new doc upload."""
-    current_app.logger.debug(f'Creating pre-signed URL for {file_name}')
+def put_file(file_path: str, file_name: str):
+    """Upload the file to the bucket, streaming it from disk."""
+    current_app.logger.debug(f'Uploading {file_path} as {file_name}')
     minio_client: Minio = _get_client()
-    value_as_stream = io.BytesIO(value_as_bytes)
-    minio_client.put_object(current_app.config.get('MINIO_BUCKET_NAME'), file_name, value_as_stream, file_size)
+    minio_client.fput_object(current_app.config.get('MINIO_BUCKET_NAME'), file_name, file_path)
 
 
 def _get_client() -> Minio:
@@ -0,0 +1,120 @@
+# Copyright © 2024 Province of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Run per account work across pods (shards) and a bounded pool of workers.
+
+A job run with --shard N/M only handles the accounts where account id % M == N, so M pods can split a job between
+them. Only the jobs in SHARDED_JOBS split their accounts, any other job refuses --shard rather than running in full
+on every pod. Within a pod, JOB_WORKERS threads each run an account at a time in their own app context and database
+session, and every account is committed or rolled back on its own so one CFS failure doesn't stop the others.
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Tuple
+
+from flask import Flask, current_app, g
+from pay_api.models import db
+from pay_api.utils.user_context import UserContext, use_user_context
+from sentry_sdk import capture_message
+from sqlalchemy import true
+
+
+# Jobs that only handle the accounts in their shard.
+SHARDED_JOBS = ('CREATE_INVOICES', 'EFT', 'ROUTING_SLIP', 'STATEMENTS_DUE')
+
+
+@dataclass(frozen=True)
+class Shard:
+    """The slice of accounts a job run handles."""
+
+    index: int = 0
+    count: int = 1
+
+    @classmethod
+    def parse(cls, value: str) -> 'Shard':
+        """Parse N/M, where 0 <= N < M."""
+        try:
+            index, count = (int(part) for part in value.split('/'))
+        except ValueError as e:
+            raise ValueError(f'Invalid shard {value}, expected N/M.') from e
+        if count < 1 or not 0 <= index < count:
+            raise ValueError(f'Invalid shard {value}, expected 0 <= N < M.')
+        return cls(index=index, count=count)
+
+    def owns(self, account_id: int) -> bool:
+        """Return True if the account belongs to this shard."""
+        return account_id % self.count == self.index
+
+    def owns_clause(self, account_id_column):
+        """Return a filter for the rows whose account belongs to this shard."""
+        return true() if self.count == 1 else account_id_column % self.count == self.index
+
+    def __str__(self):
+        """Return the shard as N/M."""
+        return f'{self.index}/{self.count}'
+
+
+def split_execution_args(args: List[str]) -> Tuple[List[str], str, int]:
+    """Split --shard and --workers from the job name and job arguments."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--shard', default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    known, remaining = parser.parse_known_args(args)
+    return remaining, known.shard, known.workers
+
+
+def get_shard() -> Shard:
+    """Return the shard for this run, from --shard or JOB_SHARD."""
+    return Shard.parse(current_app.config.get('JOB_SHARD') or '0/1')
+
+
+def run_for_accounts(account_ids: Iterable[int], work: Callable[[int], None], description: str, workers: int = None):
+    """Run work(account_id) for every account in this shard, committing each account on its own.
+
+    Workers get account ids rather than models, as models can't be shared between sessions. workers overrides
+    JOB_WORKERS, for work that is limited by another system (e.g. CFS) rather than the job.
+    """
+    shard = get_shard()
+    account_ids = [account_id for account_id in account_ids if shard.owns(account_id)]
+    workers = max(int(workers or current_app.config.get('JOB_WORKERS', 1)), 1)
+    current_app.logger.info(f'{description}: {len(account_ids)} accounts in shard {shard} with {workers} workers.')
+    if workers == 1 or len(account_ids) <= 1:
+        for account_id in account_ids:
+            _run_isolated(work, account_id, description)
+        return
+
+    app = current_app._get_current_object()  # pylint: disable=protected-access
+    user = g.get('user_context') or UserContext(token_info={})
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='payment-jobs') as executor:
+        # list() so any unexpected error is raised here, rather than lost with the future.
+        list(executor.map(lambda account_id: _run_in_app_context(app, user, work, account_id, description),
+                          account_ids))
+
+
+def _run_in_app_context(app: Flask, user: UserContext, work: Callable[[int], None], account_id: int,
+                        description: str):
+    # Each app context gets its own scoped session, which is removed when the context is popped.
+    # The job's user context is shared, g isn't.
+    with app.app_context(), use_user_context(user):
+        _run_isolated(work, account_id, description)
+
+
+def _run_isolated(work: Callable[[int], None], account_id: int, description: str):
+    try:
+        work(account_id)
+        db.session.commit()
+    except Exception as e:  # NOQA # pylint: disable=broad-except
+        db.session.rollback()
+        current_app.logger.error(f'{description} failed for account id={account_id}', exc_info=True)
+        capture_message(f'{description} failed for account id={account_id}, ERROR : {str(e)}', level='error')
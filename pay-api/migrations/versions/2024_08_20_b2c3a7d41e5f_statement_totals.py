@@ -0,0 +1,73 @@
+"""Add statement totals, so the previous statement total and the amount owing don't need to sum every invoice.
+
+Revision ID: b2c3a7d41e5f
+Revises: 5cb9c5f5896c
+Create Date: 2024-08-20 10:12:31.418220
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+# Note you may see foreign keys with distribution_codes_history
+# For disbursement_distribution_code_id, service_fee_distribution_code_id
+# Please ignore those lines and don't include in migration.
+
+revision = 'b2c3a7d41e5f'
+down_revision = '5cb9c5f5896c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('statements', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('total_fees', sa.Numeric(precision=19, scale=2), nullable=False,
+                                      server_default='0'))
+        batch_op.add_column(sa.Column('total_service_fees', sa.Numeric(precision=19, scale=2), nullable=False,
+                                      server_default='0'))
+        batch_op.add_column(sa.Column('total_paid', sa.Numeric(precision=19, scale=2), nullable=False,
+                                      server_default='0'))
+        batch_op.add_column(sa.Column('total_due', sa.Numeric(precision=19, scale=2), nullable=False,
+                                      server_default='0'))
+        batch_op.add_column(sa.Column('oldest_overdue_date', sa.DateTime(), nullable=True))
+
+    # Statements without invoices keep the zero defaults.
+    op.execute("""
+        update
+            statements
+        set
+            total_fees = totals.total_fees,
+            total_service_fees = totals.total_service_fees,
+            total_paid = totals.total_paid,
+            total_due = totals.total_due,
+            oldest_overdue_date = totals.oldest_overdue_date
+        from (
+            select
+                statement_invoices.statement_id,
+                coalesce(sum(invoices.total), 0) as total_fees,
+                coalesce(sum(invoices.service_fees), 0) as total_service_fees,
+                coalesce(sum(invoices.paid), 0) as total_paid,
+                coalesce(sum(case when invoices.invoice_status_code in
+                    ('SETTLEMENT_SCHED', 'PARTIAL_PAID', 'APPROVED', 'OVERDUE')
+                    then invoices.total - invoices.paid end), 0) as total_due,
+                min(case when invoices.invoice_status_code in
+                    ('SETTLEMENT_SCHED', 'PARTIAL_PAID', 'APPROVED', 'OVERDUE')
+                    then invoices.overdue_date end) as oldest_overdue_date
+            from
+                statement_invoices
+            join invoices on
+                invoices.id = statement_invoices.invoice_id
+            group by statement_invoices.statement_id
+        ) as totals
+        where statements.id = totals.statement_id;
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('statements', schema=None) as batch_op:
+        batch_op.drop_column('oldest_overdue_date')
+        batch_op.drop_column('total_due')
+        batch_op.drop_column('total_paid')
+        batch_op.drop_column('total_service_fees')
+        batch_op.drop_column('total_fees')
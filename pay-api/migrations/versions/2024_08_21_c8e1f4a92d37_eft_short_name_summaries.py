@@ -0,0 +1,79 @@
+"""Table to store the EFT short name summaries, so the staff screens don't aggregate credits, links and transactions.
+
+Revision ID: c8e1f4a92d37
+Revises: b2c3a7d41e5f
+Create Date: 2024-08-21 09:41:18.275610
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+# Note you may see foreign keys with distribution_codes_history
+# For disbursement_distribution_code_id, service_fee_distribution_code_id
+# Please ignore those lines and don't include in migration.
+
+revision = 'c8e1f4a92d37'
+down_revision = 'b2c3a7d41e5f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('eft_short_name_summaries',
+                    sa.Column('short_name_id', sa.Integer(), nullable=False),
+                    sa.Column('credits_remaining', sa.Numeric(precision=19, scale=2), nullable=False),
+                    sa.Column('last_payment_received_date', sa.DateTime(), nullable=True),
+                    sa.Column('linked_accounts_count', sa.Integer(), nullable=False),
+                    sa.ForeignKeyConstraint(['short_name_id'], ['eft_short_names.id'], ondelete='CASCADE'),
+                    sa.PrimaryKeyConstraint('short_name_id')
+                    )
+    with op.batch_alter_table('eft_short_name_summaries', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_eft_short_name_summaries_credits_remaining'), ['credits_remaining'],
+                              unique=False)
+        batch_op.create_index(batch_op.f('ix_eft_short_name_summaries_last_payment_received_date'),
+                              ['last_payment_received_date'], unique=False)
+        batch_op.create_index(batch_op.f('ix_eft_short_name_summaries_linked_accounts_count'),
+                              ['linked_accounts_count'], unique=False)
+
+    # The summaries are refreshed per short name, these keep that from scanning every credit and transaction.
+    with op.batch_alter_table('eft_credits', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_eft_credits_short_name_id'), ['short_name_id'], unique=False)
+    with op.batch_alter_table('eft_transactions', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_eft_transactions_short_name_id'), ['short_name_id'], unique=False)
+
+    op.execute("""
+        insert into eft_short_name_summaries
+            (short_name_id, credits_remaining, last_payment_received_date, linked_accounts_count)
+        select
+            eft_short_names.id,
+            (select coalesce(sum(eft_credits.remaining_amount), 0)
+             from eft_credits
+             where eft_credits.short_name_id = eft_short_names.id),
+            (select max(eft_transactions.deposit_date)
+             from eft_transactions
+             where eft_transactions.short_name_id = eft_short_names.id
+               and eft_transactions.status_code = 'COMPLETED'
+               and eft_transactions.line_type = 'TRANSACTION'),
+            (select count(eft_short_name_links.id)
+             from eft_short_name_links
+             where eft_short_name_links.eft_short_name_id = eft_short_names.id
+               and eft_short_name_links.status_code in ('PENDING', 'LINKED'))
+        from
+            eft_short_names;
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('eft_transactions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_eft_transactions_short_name_id'))
+    with op.batch_alter_table('eft_credits', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_eft_credits_short_name_id'))
+
+    with op.batch_alter_table('eft_short_name_summaries', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_eft_short_name_summaries_linked_accounts_count'))
+        batch_op.drop_index(batch_op.f('ix_eft_short_name_summaries_last_payment_received_date'))
+        batch_op.drop_index(batch_op.f('ix_eft_short_name_summaries_credits_remaining'))
+
+    op.drop_table('eft_short_name_summaries')
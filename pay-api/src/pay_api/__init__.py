@@ -22,7 +22,6 @@ from flask_migrate import Migrate, upgrade
 import sentry_sdk  # noqa: I001; pylint: disable=ungrouped-imports,wrong-import-order; conflicts with Flake8
 from flask import Flask
 from sbc_common_components.exception_handling.exception_handler import ExceptionHandler
-from sbc_common_components.utils.camel_case_response import convert_to_camel
 from sentry_sdk.integrations.flask import FlaskIntegration  # noqa: I001
 
 # import pay_api.config as config
@@ -34,6 +33,7 @@ from pay_api.models import db, ma
 from pay_api.services.gcp_queue import queue
 from pay_api.utils.auth import jwt
 from pay_api.utils.cache import cache
+from pay_api.utils.camel_case import convert_response_to_camel
 from pay_api.utils.logging import setup_logging
 from pay_api.utils.run_version import get_run_version
 
@@ -70,7 +70,7 @@ def create_app(run_mode=os.getenv('DEPLOYMENT_ENV', 'production')):
                 integrations=[FlaskIntegration()]
             )
 
-    app.after_request(convert_to_camel)
+    app.after_request(convert_response_to_camel)
 
     setup_jwt_manager(app, jwt)
 
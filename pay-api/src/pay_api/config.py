@@ -110,6 +110,9 @@ class _Config:  # pylint: disable=too-few-public-methods
     CFS_CLIENT_SECRET = _get_config('CFS_CLIENT_SECRET')
     PAYBC_PORTAL_URL = _get_config('PAYBC_PORTAL_URL')
     CONNECT_TIMEOUT = int(_get_config('CONNECT_TIMEOUT', default=10))
+    # Connection pool size per host for outgoing HTTP calls, and whether to wait for a free connection when it's full
+    HTTP_POOL_MAXSIZE = int(_get_config('HTTP_POOL_MAXSIZE', default=10))
+    HTTP_POOL_BLOCK = _get_config('HTTP_POOL_BLOCK', default='False').lower() == 'true'
     GENERATE_RANDOM_INVOICE_NUMBER = _get_config(
         'CFS_GENERATE_RANDOM_INVOICE_NUMBER', default='False'
     )
@@ -117,6 +120,8 @@ class _Config:  # pylint: disable=too-few-public-methods
     CFS_INVOICE_PREFIX = os.getenv('CFS_INVOICE_PREFIX', 'REG')
     CFS_RECEIPT_PREFIX = os.getenv('CFS_RECEIPT_PREFIX', 'RCPT')
     CFS_PARTY_PREFIX = os.getenv('CFS_PARTY_PREFIX', 'BCR-')
+    # Seconds before expiry a cached CFS token is refreshed.
+    CFS_TOKEN_REFRESH_MARGIN = int(os.getenv('CFS_TOKEN_REFRESH_MARGIN', '60'))
 
     # EFT Config
     EFT_INVOICE_PREFIX = os.getenv('EFT_INVOICE_PREFIX', 'REG')
@@ -180,6 +185,11 @@ class _Config:  # pylint: disable=too-few-public-methods
         _get_config('TRANSACTION_REPORT_DEFAULT_TOTAL', default=50)
     )
 
+    # Number of invoices fetched per round trip when streaming transaction reports
+    TRANSACTION_REPORT_STREAM_CHUNK_SIZE = int(
+        _get_config('TRANSACTION_REPORT_STREAM_CHUNK_SIZE', default=1000)
+    )
+
     # Default number of routing slips to be returned for routing slip search
     ROUTING_SLIP_DEFAULT_TOTAL = int(
         _get_config('ROUTING_SLIP_DEFAULT_TOTAL', default=50)
@@ -214,6 +224,16 @@ class _Config:  # pylint: disable=too-few-public-methods
         os.getenv('ALLOW_LEGACY_ROUTING_SLIPS', 'True').lower() == 'true'
     )
 
+    # Cache auth-api authorization responses for this many seconds (0 disables the cache)
+    AUTH_CACHE_TTL = int(os.getenv('AUTH_CACHE_TTL', '30'))
+    AUTH_CACHE_MAX_SIZE = int(os.getenv('AUTH_CACHE_MAX_SIZE', '1000'))
+
+    # Serve fee lookups from the in-process fee schedule index, TTL is how often it checks for changes in the DB
+    FEE_SCHEDULE_INDEX_ENABLED = (
+        os.getenv('FEE_SCHEDULE_INDEX_ENABLED', 'True').lower() == 'true'
+    )
+    FEE_SCHEDULE_INDEX_TTL = int(os.getenv('FEE_SCHEDULE_INDEX_TTL', '300'))
+
     TESTING = False
     DEBUG = True
 
@@ -245,6 +265,11 @@ class TestConfig(_Config):  # pylint: disable=too-few-public-methods
         default=f'postgresql+pg8000://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{int(DB_PORT)}/{DB_NAME}',
     )
 
+    # Fee schedules are created and rolled back inside tests, so the index would go stale between tests.
+    FEE_SCHEDULE_INDEX_ENABLED = False
+    # Tests mock different authorizations for the same user.
+    AUTH_CACHE_TTL = 0
+
     JWT_OIDC_TEST_MODE = True
     # JWT_OIDC_ISSUER = _get_config('JWT_OIDC_TEST_ISSUER')
     JWT_OIDC_TEST_AUDIENCE = _get_config('JWT_OIDC_TEST_AUDIENCE')
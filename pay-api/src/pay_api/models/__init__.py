@@ -35,6 +35,7 @@ from .eft_short_names import EFTShortnames, EFTShortnameSchema, EFTShortnameSumm
 from .eft_short_names_historical import EFTShortnamesHistorical
 from .eft_refund import EFTRefund
 from .eft_short_name_links import EFTShortnameLinks, EFTShortnameLinkSchema
+from .eft_short_name_summaries import EFTShortnameSummaries
 from .eft_transaction import EFTTransaction, EFTTransactionSchema
 from .ejv_file import EjvFile
 from .ejv_header import EjvHeader
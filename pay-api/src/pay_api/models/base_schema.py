@@ -13,6 +13,8 @@
 # limitations under the License.
 """Super class to handle all operations related to base schema."""
 
+from functools import lru_cache
+
 from marshmallow import post_dump
 
 from .db import ma
@@ -47,3 +49,13 @@ class BaseSchema(ma.SQLAlchemyAutoSchema):  # pylint: disable=too-many-ancestors
                 if not value and not isinstance(value, float):
                     item.pop(key)
         return data
+
+
+@lru_cache(maxsize=None)
+def get_schema(schema_class, exclude: tuple = (), only: tuple = None, many: bool = False):
+    """Return a shared schema instance for dumping, rather than building the fields for every row.
+
+    A schema is safe to share for dumps as long as its context isn't changed, so schemas that need a context are
+    still built per call.
+    """
+    return schema_class(exclude=exclude, only=only, many=many)
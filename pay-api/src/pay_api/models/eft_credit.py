@@ -53,7 +53,7 @@ class EFTCredit(BaseModel):  # pylint:disable=too-many-instance-attributes
     created_on = db.Column('created_on', db.DateTime, nullable=False, default=datetime.now(tz=timezone.utc))
 
     eft_file_id = db.Column(db.Integer, ForeignKey('eft_files.id'), nullable=False)
-    short_name_id = db.Column(db.Integer, ForeignKey('eft_short_names.id'), nullable=False)
+    short_name_id = db.Column(db.Integer, ForeignKey('eft_short_names.id'), nullable=False, index=True)
     eft_transaction_id = db.Column(db.Integer, ForeignKey('eft_transactions.id'), nullable=True)
 
     @classmethod
@@ -0,0 +1,140 @@
+# Copyright © 2024 Province of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Model to handle the stored EFT short name summaries, the remaining credit, linked accounts and last payment."""
+from typing import Iterable
+
+from sqlalchemy import ForeignKey, event, func, inspect, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from ..utils.enums import EFTFileLineType, EFTProcessStatus, EFTShortnameStatus
+from .base_model import BaseModel
+from .db import db
+from .eft_credit import EFTCredit
+from .eft_short_name_links import EFTShortnameLinks
+from .eft_short_names import EFTShortnames
+from .eft_transaction import EFTTransaction
+
+
+# Short name id field and the fields the summary is calculated from, for each model that changes a summary.
+_SUMMARY_SOURCE_FIELDS = {
+    EFTCredit: ('short_name_id', ('remaining_amount', 'short_name_id')),
+    EFTShortnameLinks: ('eft_short_name_id', ('eft_short_name_id', 'status_code')),
+    EFTTransaction: ('short_name_id', ('deposit_date', 'line_type', 'short_name_id', 'status_code'))
+}
+
+
+class EFTShortnameSummaries(BaseModel):
+    """This class manages the stored summary of each EFT short name, kept up to date as its records change."""
+
+    __tablename__ = 'eft_short_name_summaries'
+    # this mapper is used so that new and old versions of the service can be run simultaneously,
+    # making rolling upgrades easier
+    # This is used by SQLAlchemy to explicitly define which fields we're interested
+    # so it doesn't freak out and say it can't map the structure if other fields are present.
+    # This could occur from a failed deploy or during an upgrade.
+    # The other option is to tell SQLAlchemy to ignore differences, but that is ambiguous
+    # and can interfere with Alembic upgrades.
+    #
+    # NOTE: please keep mapper names in alpha-order, easier to track that way
+    #       Exception, id is always first, _fields first
+    __mapper_args__ = {
+        'include_properties': [
+            'short_name_id',
+            'credits_remaining',
+            'last_payment_received_date',
+            'linked_accounts_count'
+        ]
+    }
+
+    short_name_id = db.Column(db.Integer, ForeignKey('eft_short_names.id', ondelete='CASCADE'), primary_key=True)
+    credits_remaining = db.Column(db.Numeric(19, 2), nullable=False, default=0, index=True)
+    last_payment_received_date = db.Column(db.DateTime, nullable=True, index=True)
+    linked_accounts_count = db.Column(db.Integer, nullable=False, default=0, index=True)
+
+    @classmethod
+    def refresh(cls, short_name_ids: Iterable[int], connection=None):
+        """Recalculate the summaries of the short names, inserting any that don't exist yet, in one statement."""
+        if not (short_name_ids := list(short_name_ids)):
+            return
+        connection = connection or db.session.connection()
+        # Lock the short names in id order before reading their credits, links and transactions. A concurrent refresh
+        # waits for this transaction, then reads the rows it committed, rather than writing an older snapshot.
+        # FOR NO KEY UPDATE doesn't conflict with the key share locks taken by inserts referencing the short names.
+        connection.execute(select(EFTShortnames.id).where(EFTShortnames.id.in_(short_name_ids))
+                           .order_by(EFTShortnames.id).with_for_update(key_share=True))
+        # pylint: disable=not-callable
+        credits_remaining = select(func.coalesce(func.sum(EFTCredit.remaining_amount), 0)) \
+            .where(EFTCredit.short_name_id == EFTShortnames.id) \
+            .scalar_subquery()
+        last_payment_received_date = select(func.max(EFTTransaction.deposit_date)) \
+            .where(EFTTransaction.short_name_id == EFTShortnames.id) \
+            .where(EFTTransaction.status_code == EFTProcessStatus.COMPLETED.value) \
+            .where(EFTTransaction.line_type == EFTFileLineType.TRANSACTION.value) \
+            .scalar_subquery()
+        linked_accounts_count = select(func.count(EFTShortnameLinks.id)) \
+            .where(EFTShortnameLinks.eft_short_name_id == EFTShortnames.id) \
+            .where(EFTShortnameLinks.status_code.in_([EFTShortnameStatus.PENDING.value,
+                                                      EFTShortnameStatus.LINKED.value])) \
+            .scalar_subquery()
+        summaries = select(EFTShortnames.id, credits_remaining, last_payment_received_date, linked_accounts_count) \
+            .where(EFTShortnames.id.in_(short_name_ids))
+
+        statement = insert(cls.__table__).from_select(
+            ['short_name_id', 'credits_remaining', 'last_payment_received_date', 'linked_accounts_count'], summaries)
+        statement = statement.on_conflict_do_update(
+            index_elements=['short_name_id'],
+            set_={'credits_remaining': statement.excluded.credits_remaining,
+                  'last_payment_received_date': statement.excluded.last_payment_received_date,
+                  'linked_accounts_count': statement.excluded.linked_accounts_count})
+        connection.execute(statement)
+
+    @classmethod
+    def refresh_for_file(cls, file_id: int, connection=None):
+        """Recalculate the summaries of the short names with transactions in the EFT file."""
+        connection = connection or db.session.connection()
+        cls.refresh(connection.execute(
+            select(EFTTransaction.short_name_id).distinct()
+            .where(EFTTransaction.file_id == file_id)
+            .where(EFTTransaction.short_name_id.isnot(None))).scalars().all(), connection)
+
+
+def _changed_short_name_ids(session):
+    """Return the ids of short names whose credits, links or transactions were changed in the flush."""
+    short_name_ids = {instance.id for instance in session.new if isinstance(instance, EFTShortnames)}
+    for instance in (*session.new, *session.deleted):
+        if (source_fields := _SUMMARY_SOURCE_FIELDS.get(type(instance))) is not None:
+            # Read the loaded value, a deleted row can't be refreshed.
+            short_name_ids.add(inspect(instance).dict.get(source_fields[0]))
+    for instance in session.dirty:
+        if (source_fields := _SUMMARY_SOURCE_FIELDS.get(type(instance))) is None:
+            continue
+        id_field, fields = source_fields
+        state = inspect(instance)
+        if any(state.attrs[field].history.has_changes() for field in fields):
+            # Moving a record to another short name changes the summary of both.
+            short_name_ids.update(state.attrs[id_field].history.deleted)
+            short_name_ids.add(getattr(instance, id_field))
+    short_name_ids.discard(None)
+    return short_name_ids
+
+
+def _refresh_short_name_summaries(session, flush_context):  # pylint: disable=unused-argument
+    """Refresh the summaries of short names whose credits, links or transactions were changed in the flush."""
+    if short_name_ids := _changed_short_name_ids(session):
+        EFTShortnameSummaries.refresh(short_name_ids, session.connection())
+
+
+# Bulk inserts and updates skip this, they call refresh themselves.
+event.listen(Session, 'after_flush', _refresh_short_name_summaries)
@@ -72,7 +72,7 @@ class EFTTransaction(BaseModel):  # pylint: disable=too-many-instance-attributes
     jv_type = db.Column('jv_type', db.String(1), nullable=True)
     jv_number = db.Column('jv_number', db.String(10), nullable=True)
     sequence_number = db.Column('sequence_number', db.String(3), nullable=True)
-    short_name_id = db.Column(db.Integer, ForeignKey('eft_short_names.id'), nullable=True)
+    short_name_id = db.Column(db.Integer, ForeignKey('eft_short_names.id'), nullable=True, index=True)
     status_code = db.Column(db.String, ForeignKey('eft_process_status_codes.code'), nullable=False)
     deposit_amount_cents = db.Column('deposit_amount_cents', db.BigInteger, nullable=True)
     deposit_date = db.Column('deposit_date', db.DateTime, nullable=True)
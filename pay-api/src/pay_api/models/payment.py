@@ -199,8 +199,32 @@ class Payment(BaseModel):  # pylint: disable=too-many-instance-attributes
         user: UserContext = kwargs['user']
         search_filter['userProductCode'] = user.product_code
 
+        query = cls.get_purchase_history_query()
+        query = cls.filter(query, auth_account_id, search_filter)
+        if not return_all:
+            count = cls.get_count(auth_account_id, search_filter)
+            # Add pagination
+            sub_query = cls.generate_subquery(auth_account_id, search_filter, limit, page)
+            result = query.order_by(Invoice.id.desc()).filter(Invoice.id.in_(sub_query.subquery().select())).all()
+            # If maximum number of records is provided, return it as total
+            if max_no_records > 0:
+                count = max_no_records if max_no_records < count else count
+        elif max_no_records > 0:
+            # If maximum number of records is provided, set the page with that number
+            sub_query = cls.generate_subquery(auth_account_id, search_filter, max_no_records, page=None)
+            result, count = query.filter(Invoice.id.in_(sub_query.subquery().select())).all(), sub_query.count()
+        else:
+            count = cls.get_count(auth_account_id, search_filter)
+            if count > 60000:
+                raise BusinessException(Error.PAYMENT_SEARCH_TOO_MANY_RECORDS)
+            result = query.all()
+        return result, count
+
+    @classmethod
+    def get_purchase_history_query(cls):
+        """Return the base purchase history query, only loading the columns that get serialized."""
         # Exclude 'receipts' they aren't serialized, use specific fields that will be serialized.
-        query = db.session.query(Invoice) \
+        return db.session.query(Invoice) \
             .outerjoin(PaymentAccount, Invoice.payment_account_id == PaymentAccount.id) \
             .outerjoin(PaymentLineItem, PaymentLineItem.invoice_id == Invoice.id) \
             .outerjoin(FeeSchedule, FeeSchedule.fee_schedule_id == PaymentLineItem.fee_schedule_id) \
@@ -241,25 +265,50 @@ class Payment(BaseModel):  # pylint: disable=too-many-instance-attributes
                                                              InvoiceReference.reference_number,
                                                              InvoiceReference.status_code),
         )
-        query = cls.filter(query, auth_account_id, search_filter)
-        if not return_all:
-            count = cls.get_count(auth_account_id, search_filter)
-            # Add pagination
-            sub_query = cls.generate_subquery(auth_account_id, search_filter, limit, page)
+
+    @classmethod
+    @user_context
+    def search_purchase_history_by_cursor(cls,  # pylint:disable=too-many-arguments
+                                          auth_account_id: str, search_filter: Dict, after_id: int,
+                                          limit: int, include_count: bool = False, **kwargs):
+        """Search for purchase history using keyset pagination on the invoice id.
+
+        Returns up to limit invoices with an id lower than after_id, whether more records exist and
+        the total count (only calculated when include_count is set, it is as expensive as the page itself).
+        """
+        user: UserContext = kwargs['user']
+        search_filter['userProductCode'] = user.product_code
+
+        query = cls.filter(cls.get_purchase_history_query(), auth_account_id, search_filter)
+        # Fetch one extra id, so we know if there is another page without running a count.
+        sub_query = cls.generate_subquery(auth_account_id, search_filter, limit + 1, page=None, after_id=after_id)
+        result = query.order_by(Invoice.id.desc()).filter(Invoice.id.in_(sub_query.subquery().select())).all()
+        has_more = len(result) > limit
+        count = cls.get_count(auth_account_id, search_filter) if include_count else None
+        return result[:limit], has_more, count
+
+    @classmethod
+    @user_context
+    def stream_purchase_history(cls, auth_account_id: str, search_filter: Dict, chunk_size: int,
+                                max_no_records: int = 0, **kwargs):
+        """Yield purchase history in chunks of invoices, seeking on the invoice id so memory stays flat."""
+        user: UserContext = kwargs['user']
+        search_filter['userProductCode'] = user.product_code
+
+        after_id = None
+        remaining = max_no_records
+        while True:
+            limit = min(chunk_size, remaining) if max_no_records > 0 else chunk_size
+            query = cls.filter(cls.get_purchase_history_query(), auth_account_id, search_filter)
+            sub_query = cls.generate_subquery(auth_account_id, search_filter, limit, page=None, after_id=after_id)
             result = query.order_by(Invoice.id.desc()).filter(Invoice.id.in_(sub_query.subquery().select())).all()
-            # If maximum number of records is provided, return it as total
-            if max_no_records > 0:
-                count = max_no_records if max_no_records < count else count
-        elif max_no_records > 0:
-            # If maximum number of records is provided, set the page with that number
-            sub_query = cls.generate_subquery(auth_account_id, search_filter, max_no_records, page=None)
-            result, count = query.filter(Invoice.id.in_(sub_query.subquery().select())).all(), sub_query.count()
-        else:
-            count = cls.get_count(auth_account_id, search_filter)
-            if count > 60000:
-                raise BusinessException(Error.PAYMENT_SEARCH_TOO_MANY_RECORDS)
-            result = query.all()
-        return result, count
+            if not result:
+                return
+            yield result
+            after_id = result[-1].id
+            remaining -= len(result)
+            if len(result) < limit or (max_no_records > 0 and remaining <= 0):
+                return
 
     @classmethod
     def get_invoices_and_payment_accounts_for_statements(cls, search_filter: Dict):
@@ -411,10 +460,13 @@ class Payment(BaseModel):  # pylint: disable=too-many-instance-attributes
         return query
 
     @classmethod
-    def generate_subquery(cls, auth_account_id, search_filter, limit, page):
+    def generate_subquery(cls, auth_account_id, search_filter, limit, page, after_id: int = None):
         """Generate subquery for invoices, used for pagination."""
         sub_query = db.session.query(Invoice) \
             .outerjoin(PaymentAccount, Invoice.payment_account_id == PaymentAccount.id)
+        if after_id is not None:
+            # Keyset pagination, seeks on the primary key instead of scanning past an offset.
+            sub_query = sub_query.filter(Invoice.id < after_id)
         sub_query = cls.filter(sub_query, auth_account_id, search_filter, add_outer_joins=True).\
             with_entities(Invoice.id).\
             group_by(Invoice.id).\
@@ -12,17 +12,29 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """Model to handle statements data."""
-from typing import List
+from typing import Iterable, List
 
 import pytz
 from marshmallow import fields
-from sqlalchemy import ForeignKey, Integer, cast
+from sqlalchemy import ForeignKey, Integer, case, cast, event, func, inspect, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
 
 from pay_api.utils.constants import LEGISLATIVE_TIMEZONE
+from pay_api.utils.enums import InvoiceStatus
 
 from .base_model import BaseModel
 from .db import db, ma
 from .invoice import Invoice
+from .statement_invoices import StatementInvoices as StatementInvoicesModel
+
+
+# Invoice statuses counted as owing on a statement.
+OWING_INVOICE_STATUSES = (InvoiceStatus.SETTLEMENT_SCHEDULED.value, InvoiceStatus.PARTIAL.value,
+                          InvoiceStatus.APPROVED.value, InvoiceStatus.OVERDUE.value)
+# Invoice fields the statement totals are calculated from, and the statement totals.
+_STATEMENT_TOTAL_INVOICE_FIELDS = ('invoice_status_code', 'overdue_date', 'paid', 'service_fees', 'total')
+_STATEMENT_TOTAL_FIELDS = ['oldest_overdue_date', 'total_due', 'total_fees', 'total_paid', 'total_service_fees']
 
 
 class Statement(BaseModel):
@@ -48,11 +60,16 @@ class Statement(BaseModel):
             'is_interim_statement',
             'notification_date',
             'notification_status_code',
+            'oldest_overdue_date',
             'overdue_notification_date',
             'payment_account_id',
             'payment_methods',
             'statement_settings_id',
-            'to_date'
+            'to_date',
+            'total_due',
+            'total_fees',
+            'total_paid',
+            'total_service_fees'
         ]
     }
 
@@ -69,6 +86,12 @@ class Statement(BaseModel):
     notification_status_code = db.Column(db.String(20), ForeignKey('notification_status_codes.code'), nullable=True)
     notification_date = db.Column(db.Date, default=None, nullable=True)
     payment_methods = db.Column(db.String(100), nullable=True)
+    # Totals of the statement invoices, kept up to date as the invoices change, see refresh_totals.
+    total_fees = db.Column(db.Numeric(19, 2), nullable=False, default=0)
+    total_service_fees = db.Column(db.Numeric(19, 2), nullable=False, default=0)
+    total_paid = db.Column(db.Numeric(19, 2), nullable=False, default=0)
+    total_due = db.Column(db.Numeric(19, 2), nullable=False, default=0)
+    oldest_overdue_date = db.Column(db.DateTime, nullable=True)
 
     @classmethod
     def find_all_statements_by_notification_status(cls, statuses):
@@ -79,16 +102,52 @@ class Statement(BaseModel):
     @classmethod
     def find_all_payments_and_invoices_for_statement(cls, statement_id: str) -> List[Invoice]:
         """Find all payment and invoices specific to a statement."""
-        # Import from here as the statement invoice already imports statement and causes circular import.
-        from .statement_invoices import StatementInvoices  # pylint: disable=import-outside-toplevel
-
         query = db.session.query(Invoice) \
-            .join(StatementInvoices, StatementInvoices.invoice_id == Invoice.id) \
-            .filter(StatementInvoices.statement_id == cast(statement_id, Integer)) \
+            .join(StatementInvoicesModel, StatementInvoicesModel.invoice_id == Invoice.id) \
+            .filter(StatementInvoicesModel.statement_id == cast(statement_id, Integer)) \
             .order_by(Invoice.id.asc())
 
         return query.all()
 
+    @classmethod
+    def refresh_totals(cls, statement_ids: Iterable[int], connection=None):
+        """Recalculate the stored totals of the statements from their invoices, in one update."""
+        if not (statement_ids := list(statement_ids)):
+            return
+        connection = connection or db.session.connection()
+        # Lock the statements in id order before reading their invoices. A concurrent refresh waits for this
+        # transaction, then reads the invoices it committed, rather than writing totals from an older snapshot.
+        # FOR NO KEY UPDATE doesn't conflict with the key share locks taken by inserts referencing the statements.
+        connection.execute(select(cls.id).where(cls.id.in_(statement_ids)).order_by(cls.id)
+                           .with_for_update(key_share=True))
+        is_owing = Invoice.invoice_status_code.in_(OWING_INVOICE_STATUSES)
+        totals = select(
+            cls.id.label('statement_id'),
+            func.coalesce(func.sum(Invoice.total), 0).label('total_fees'),
+            func.coalesce(func.sum(Invoice.service_fees), 0).label('total_service_fees'),
+            func.coalesce(func.sum(Invoice.paid), 0).label('total_paid'),
+            func.coalesce(func.sum(case((is_owing, Invoice.total - Invoice.paid))), 0).label('total_due'),
+            func.min(case((is_owing, Invoice.overdue_date))).label('oldest_overdue_date')) \
+            .select_from(cls) \
+            .outerjoin(StatementInvoicesModel, StatementInvoicesModel.statement_id == cls.id) \
+            .outerjoin(Invoice, Invoice.id == StatementInvoicesModel.invoice_id) \
+            .where(cls.id.in_(statement_ids)) \
+            .group_by(cls.id) \
+            .subquery()
+        statement = update(cls.__table__) \
+            .where(cls.__table__.c.id == totals.c.statement_id) \
+            .values(total_fees=totals.c.total_fees, total_service_fees=totals.c.total_service_fees,
+                    total_paid=totals.c.total_paid, total_due=totals.c.total_due,
+                    oldest_overdue_date=totals.c.oldest_overdue_date)
+        connection.execute(statement)
+
+    @classmethod
+    def find_ids_for_invoices(cls, invoice_ids: Iterable[int], connection=None) -> List[int]:
+        """Return the ids of the statements the invoices are on."""
+        return (connection or db.session.connection()).execute(
+            select(StatementInvoicesModel.statement_id).distinct()
+            .where(StatementInvoicesModel.invoice_id.in_(list(invoice_ids)))).scalars().all()
+
 
 class StatementSchema(ma.SQLAlchemyAutoSchema):  # pylint: disable=too-many-ancestors
     """Main schema used to serialize the Statements."""
@@ -98,6 +157,7 @@ class StatementSchema(ma.SQLAlchemyAutoSchema):  # pylint: disable=too-many-ance
 
         model = Statement
         load_instance = True
+        exclude = _STATEMENT_TOTAL_FIELDS
 
     from_date = fields.Date(tzinfo=pytz.timezone(LEGISLATIVE_TIMEZONE))
     to_date = fields.Date(tzinfo=pytz.timezone(LEGISLATIVE_TIMEZONE))
@@ -108,3 +168,28 @@ class StatementSchema(ma.SQLAlchemyAutoSchema):  # pylint: disable=too-many-ance
     def payment_methods_to_list(self, target):
         """Convert comma separated string to list."""
         return target.payment_methods.split(',') if target.payment_methods else []
+
+
+def _refresh_statement_totals(session, flush_context):  # pylint: disable=unused-argument
+    """Refresh the totals of statements whose invoices or invoice links were changed in the flush."""
+    invoice_ids = {instance.id for instance in session.dirty if isinstance(instance, Invoice) and any(
+        inspect(instance).attrs[field].history.has_changes() for field in _STATEMENT_TOTAL_INVOICE_FIELDS)}
+    statement_ids = {instance.statement_id for instance in (*session.new, *session.deleted)
+                     if isinstance(instance, StatementInvoicesModel)}
+    if invoice_ids:
+        statement_ids.update(Statement.find_ids_for_invoices(invoice_ids, session.connection()))
+    if statement_ids:
+        Statement.refresh_totals(statement_ids, session.connection())
+        session.info.setdefault('refreshed_statement_ids', set()).update(statement_ids)
+
+
+def _expire_statement_totals(session, flush_context):  # pylint: disable=unused-argument
+    """Expire the refreshed totals on statements already loaded, once the flush has finished."""
+    for statement_id in session.info.pop('refreshed_statement_ids', ()):
+        if (statement := session.identity_map.get(identity_key(Statement, statement_id))) is not None:
+            session.expire(statement, _STATEMENT_TOTAL_FIELDS)
+
+
+# Bulk inserts and updates skip these, they call refresh_totals themselves.
+event.listen(Session, 'after_flush', _refresh_statement_totals)
+event.listen(Session, 'after_flush_postexec', _expire_statement_totals)
@@ -16,6 +16,10 @@ from flask import Blueprint
 from sqlalchemy import exc, text
 
 from pay_api.models import db
+from pay_api.services.auth import auth_cache
+from pay_api.services.http_client import http_client
+from pay_api.utils.auth import jwt as _jwt
+from pay_api.utils.enums import Role
 
 
 bp = Blueprint('OPS', __name__, url_prefix='/ops')
@@ -40,3 +44,11 @@ def get_ops_readyz():
     """Return a JSON object that identifies if the service is setupAnd ready to work."""
     # TODO: add a poll to the DB when called
     return {'message': 'api is ready'}, 200
+
+
+@bp.route('metrics')
+@_jwt.requires_auth
+@_jwt.has_one_of_roles([Role.SYSTEM.value])
+def get_ops_metrics():
+    """Return the in-process cache and outgoing HTTP metrics."""
+    return {'authorization_cache': auth_cache.stats(), 'http_client': http_client.stats()}, 200
@@ -15,15 +15,16 @@
 from datetime import datetime, timezone
 from http import HTTPStatus
 
-from flask import Blueprint, Response, abort, current_app, jsonify, request
+from flask import Blueprint, Response, abort, current_app, jsonify, request, stream_with_context
 from flask_cors import cross_origin
 
 from pay_api.exceptions import BusinessException, ServiceUnavailableException, error_to_response
 from pay_api.schemas import utils as schema_utils
 from pay_api.services import Payment
-from pay_api.services.auth import check_auth
+from pay_api.services.auth import auth_cache, check_auth
 from pay_api.services.payment_account import PaymentAccount as PaymentAccountService
 from pay_api.utils.auth import jwt as _jwt
+from pay_api.utils.camel_case import native_camel_case
 from pay_api.utils.constants import EDIT_ROLE, VIEW_ROLE
 from pay_api.utils.endpoints_enums import EndpointEnum
 from pay_api.utils.enums import CfsAccountStatus, ContentType, Role
@@ -120,6 +121,7 @@ def put_account(account_number: str):
         return error_to_response(Error.INVALID_REQUEST, invalid_params=schema_utils.serialize(errors))
     try:
         response = PaymentAccountService.update(account_number, request_json)
+        auth_cache.invalidate(account_id=account_number)
     except ServiceUnavailableException as exception:
         return exception.response()
     except BusinessException as exception:
@@ -143,6 +145,7 @@ def delete_account(account_number: str):
     check_auth(business_identifier=None, account_id=account_number, one_of_roles=[EDIT_ROLE, VIEW_ROLE])
     try:
         PaymentAccountService.delete_account(account_number)
+        auth_cache.invalidate(account_id=account_number)
     except BusinessException as exception:
         return exception.response()
     except ServiceUnavailableException as exception:
@@ -226,6 +229,7 @@ def put_account_fee_product(account_number: str, product: str):
 @bp.route('/<string:account_number>/payments/queries', methods=['POST', 'OPTIONS'])
 @cross_origin(origins='*', methods=['POST'])
 @_jwt.requires_auth
+@native_camel_case
 def post_search_purchase_history(account_number: str):
     """Search purchase history."""
     current_app.logger.info('<post_search_purchase_history')
@@ -244,10 +248,22 @@ def post_search_purchase_history(account_number: str):
     check_auth(business_identifier=None, account_id=account_number, all_of_roles=required_roles)
 
     account_to_search = None if view_all else account_number
-    page: int = int(request.args.get('page', '1'))
     limit: int = int(request.args.get('limit', '10'))
-    response, status = Payment.search_purchase_history(account_to_search, request_json, page,
-                                                       limit), HTTPStatus.OK
+    # Cursor mode (keyset pagination), an empty cursor returns the first page.
+    if (cursor := request.args.get('cursor', None)) is not None:
+        if limit < 1:
+            return error_to_response(Error.INVALID_CURSOR_LIMIT)
+        include_total = request.args.get('includeTotal', None) == 'true'
+        try:
+            response, status = Payment.search_purchase_history_by_cursor(account_to_search, request_json, cursor,
+                                                                         limit, include_total,
+                                                                         camel_case=True), HTTPStatus.OK
+        except BusinessException as exception:
+            return exception.response()
+    else:
+        page: int = int(request.args.get('page', '1'))
+        response, status = Payment.search_purchase_history(account_to_search, request_json, page,
+                                                           limit, camel_case=True), HTTPStatus.OK
     current_app.logger.debug('>post_search_purchase_history')
     return jsonify(response), status
 
@@ -275,6 +291,13 @@ def post_account_purchase_report(account_number: str):
 
     # Check if user is authorized to perform this action
     check_auth(business_identifier=None, account_id=account_number, contains_role=EDIT_ROLE)
+    if response_content_type == ContentType.CSV.value and request.args.get('stream', None) == 'true':
+        # Generated here chunk by chunk, instead of building the whole report in memory for the report-api.
+        report = stream_with_context(Payment.create_payment_report_csv_stream(account_number, request_json))
+        response = Response(report, 201, mimetype=ContentType.CSV.value)
+        response.headers.set('Content-Disposition', 'attachment', filename=report_name)
+        response.headers.set('Access-Control-Expose-Headers', 'Content-Disposition')
+        return response
     try:
         report = Payment.create_payment_report(account_number, request_json, response_content_type, report_name)
         response = Response(report, 201)
@@ -13,6 +13,11 @@
 # limitations under the License.
 
 """This manages all of the authorization service."""
+import copy
+import threading
+from typing import Dict, Optional, Tuple
+
+from cachetools import TTLCache
 from flask import abort, current_app, g
 
 from pay_api.services.code import Code as CodeService
@@ -23,6 +28,89 @@ from pay_api.utils.user_context import UserContext, user_context
 PREMIUM_ACCOUNT_TYPES = (AccountType.PREMIUM.value, AccountType.SBC_STAFF.value, AccountType.STAFF.value)
 
 
+class AuthorizationCache:
+    """Bounded TTL cache of auth-api authorization responses, keyed by (token subject, account or business, product).
+
+    The same user usually hits several pay endpoints within seconds, this saves the auth-api round trip for those.
+    """
+
+    def __init__(self):
+        """Initialize the cache, it is sized from config on first use."""
+        self._lock = threading.Lock()
+        self._cache: Optional[TTLCache] = None
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """Return True if authorization responses should be cached."""
+        return current_app.config.get('AUTH_CACHE_TTL', 0) > 0
+
+    def _get_cache(self) -> TTLCache:
+        if self._cache is None:
+            self._cache = TTLCache(maxsize=current_app.config.get('AUTH_CACHE_MAX_SIZE', 1000),
+                                   ttl=current_app.config.get('AUTH_CACHE_TTL'))
+        return self._cache
+
+    def get(self, key: Tuple) -> Optional[Dict]:
+        """Return a copy of the cached authorization response, callers are free to modify it."""
+        with self._lock:
+            auth_response = self._get_cache().get(key)
+            if auth_response is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+        return copy.deepcopy(auth_response)
+
+    def set(self, key: Tuple, auth_response: Dict):
+        """Cache a copy of the authorization response."""
+        auth_response = copy.deepcopy(auth_response)
+        with self._lock:
+            self._get_cache()[key] = auth_response
+
+    def invalidate(self, sub: str = None, account_id: str = None, business_identifier: str = None):
+        """Remove the entries matching every provided argument, or everything if none are provided."""
+        with self._lock:
+            if self._cache is None:
+                return
+            if not (sub or account_id or business_identifier):
+                self._cache.clear()
+                return
+            for key in list(self._cache.keys()):
+                key_sub, key_type, key_id, _ = key
+                if (sub and key_sub != sub) or \
+                        (account_id and (key_type != 'account' or key_id != str(account_id))) or \
+                        (business_identifier and (key_type != 'business' or key_id != business_identifier)):
+                    continue
+                self._cache.pop(key, None)
+
+    def stats(self) -> Dict:
+        """Return the cache metrics."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'size': len(self._cache) if self._cache is not None else 0,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': round(self._hits / lookups, 4) if lookups else 0
+            }
+
+
+auth_cache = AuthorizationCache()  # pylint: disable=invalid-name
+
+
+def _get_authorizations(user: UserContext, auth_url: str, cache_key: Tuple, additional_headers: Dict = None):
+    """Return the authorization response from auth-api, or from the cache when it's enabled."""
+    use_cache = auth_cache.is_enabled() and user.sub
+    if use_cache and (auth_response := auth_cache.get(cache_key)) is not None:
+        return auth_response
+    auth_response = RestService.get(auth_url, user.bearer_token, AuthHeaderType.BEARER, ContentType.JSON,
+                                    additional_headers=additional_headers).json()
+    if use_cache:
+        auth_cache.set(cache_key, auth_response)
+    return auth_response
+
+
 @user_context
 def check_auth(business_identifier: str, account_id: str = None, corp_type_code: str = None,
                **kwargs):  # pylint: disable=unused-argument, too-many-branches, too-many-statements
@@ -47,7 +135,6 @@ def check_auth(business_identifier: str, account_id: str = None, corp_type_code:
             auth_response = {'account': {'id': user.account_id or user.user_name}}
 
     if call_auth_svc:
-        bearer_token = user.bearer_token
         current_app.logger.info(f'Checking auth for Account : {account_id}, Business : {business_identifier}, '
                                 f'Is Staff : {user.is_staff()}')
         roles: list = []
@@ -59,14 +146,14 @@ def check_auth(business_identifier: str, account_id: str = None, corp_type_code:
             additional_headers = None
             if corp_type_code:
                 additional_headers = {'Product-Code': product_code}
-            auth_response = RestService.get(auth_url, bearer_token, AuthHeaderType.BEARER, ContentType.JSON,
-                                            additional_headers=additional_headers).json()
+            auth_response = _get_authorizations(user, auth_url, (user.sub, 'account', str(account_id), product_code),
+                                                additional_headers)
             roles: list = auth_response.get('roles', [])
             g.account_id = account_id
         elif business_identifier:
             auth_url = current_app.config.get(
                 'AUTH_API_ENDPOINT') + f'entities/{business_identifier}/authorizations?expanded=true'
-            auth_response = RestService.get(auth_url, bearer_token, AuthHeaderType.BEARER, ContentType.JSON).json()
+            auth_response = _get_authorizations(user, auth_url, (user.sub, 'business', business_identifier, None))
 
             roles: list = auth_response.get('roles', [])
             g.account_id = auth_response.get('account').get('id') if auth_response.get('account', None) else None
@@ -14,7 +14,10 @@
 """Service to invoke CFS related operations."""
 import base64
 import re
+import threading
+import time
 from collections import defaultdict
+from dataclasses import dataclass
 from http import HTTPStatus
 from typing import Any, Dict, List, Tuple
 
@@ -35,9 +38,91 @@ from pay_api.utils.enums import AuthHeaderType, ContentType, PaymentMethod, Paym
 from pay_api.utils.util import current_local_time, generate_transaction_number
 
 
+@dataclass
+class _CachedToken:
+    """Bearer token and when it should be refreshed."""
+
+    access_token: str
+    refresh_at: float
+
+
+class CfsTokenManager:
+    """Caches the PayBC and FAS bearer tokens until shortly before they expire.
+
+    When several threads need a new token, only one of them requests it.
+    """
+
+    def __init__(self):
+        """Initialize without tokens, they are fetched on first use."""
+        self._tokens: Dict[PaymentSystem, _CachedToken] = {}
+        self._locks: Dict[PaymentSystem, threading.Lock] = {
+            system: threading.Lock() for system in (PaymentSystem.PAYBC, PaymentSystem.FAS)
+        }
+
+    def get_access_token(self, payment_system: PaymentSystem = PaymentSystem.PAYBC) -> str:
+        """Return a cached bearer token for the payment system, requesting a new one if it is about to expire."""
+        if (token := self._tokens.get(payment_system)) and token.refresh_at > time.monotonic():
+            return token.access_token
+        if payment_system not in self._locks:
+            raise ValueError('Invalid Payment System')
+        with self._locks[payment_system]:
+            if (token := self._tokens.get(payment_system)) and token.refresh_at > time.monotonic():
+                return token.access_token
+            token_response = CFSService.get_token(payment_system).json()
+            access_token = token_response.get('access_token')
+            refresh_margin = current_app.config.get('CFS_TOKEN_REFRESH_MARGIN', 60)
+            expires_in = int(token_response.get('expires_in') or 0)
+            if expires_in > refresh_margin:
+                self._tokens[payment_system] = _CachedToken(access_token=access_token,
+                                                            refresh_at=time.monotonic() + expires_in - refresh_margin)
+            return access_token
+
+    def invalidate(self, payment_system: PaymentSystem = None, access_token: str = None):
+        """Drop the cached token for the payment system, or whichever payment system holds the access token."""
+        for system in list(self._tokens):
+            token = self._tokens.get(system)
+            if (payment_system is None or system == payment_system) and \
+                    (access_token is None or (token and token.access_token == access_token)):
+                self._tokens.pop(system, None)
+
+
+cfs_token_manager = CfsTokenManager()  # pylint: disable=invalid-name
+
+
 class CFSService(OAuthService):
     """Service to invoke CFS related operations."""
 
+    @staticmethod
+    def get(endpoint, token, *args, **kwargs):
+        """GET from CFS, dropping the cached token if CFS rejects it."""
+        try:
+            return OAuthService.get(endpoint, token, *args, **kwargs)
+        except HTTPError as exc:
+            CFSService._invalidate_if_unauthorized(exc.response, token)
+            raise
+
+    @staticmethod
+    def post(endpoint, token, *args, **kwargs):
+        """POST to CFS, dropping the cached token if CFS rejects it."""
+        try:
+            response = OAuthService.post(endpoint, token, *args, **kwargs)
+        except HTTPError as exc:
+            CFSService._invalidate_if_unauthorized(exc.response, token)
+            raise
+        CFSService._invalidate_if_unauthorized(response, token)
+        return response
+
+    @staticmethod
+    def _invalidate_if_unauthorized(response, token: str):
+        if response is not None and response.status_code == HTTPStatus.UNAUTHORIZED:
+            current_app.logger.info('CFS rejected the bearer token, it will be requested again.')
+            cfs_token_manager.invalidate(access_token=token)
+
+    @staticmethod
+    def get_access_token(payment_system=PaymentSystem.PAYBC) -> str:
+        """Return the cached PayBC/FAS bearer token, see CfsTokenManager."""
+        return cfs_token_manager.get_access_token(payment_system)
+
     @classmethod
     def create_cfs_account(cls, identifier: str, contact_info: Dict[str, Any],  # pylint: disable=too-many-arguments
                            payment_info: Dict[str, any] = None,
@@ -45,7 +130,7 @@ class CFSService(OAuthService):
         """Create a cfs account and return the details."""
         current_app.logger.info(f'Creating CFS Customer Profile Details for : {identifier}')
         party_id = f"{current_app.config.get('CFS_PARTY_PREFIX')}{identifier}"
-        access_token = CFSService.get_token().json().get('access_token')
+        access_token = CFSService.get_access_token()
         party = CFSService._create_party(access_token, party_id)
         account = CFSService._create_paybc_account(access_token, party, is_fas)
         site = CFSService._create_site(access_token, account, contact_info, receipt_method, site_name, is_fas)
@@ -64,7 +149,7 @@ class CFSService(OAuthService):
     @staticmethod
     def get_site(cfs_account: CfsAccountModel) -> Dict[str, any]:
         """Get the site details."""
-        access_token = CFSService.get_token().json().get('access_token')
+        access_token = CFSService.get_access_token()
         cfs_base: str = current_app.config.get('CFS_BASE_URL')
         site_url = f'{cfs_base}/cfs/parties/{cfs_account.cfs_party}/accs/{cfs_account.cfs_account}/' \
                    f'sites/{cfs_account.cfs_site}/'
@@ -74,7 +159,7 @@ class CFSService(OAuthService):
     @staticmethod
     def update_site_receipt_method(cfs_account: CfsAccountModel, receipt_method: str):
         """Update the receipt method for the site."""
-        access_token = CFSService.get_token().json().get('access_token')
+        access_token = CFSService.get_access_token()
         pad_stop_payload = {
             'receipt_method': receipt_method
         }
@@ -98,7 +183,7 @@ class CFSService(OAuthService):
             'bankNumber': f'{bank_number:0>4}',
         }
         try:
-            access_token = CFSService.get_token().json().get('access_token')
+            access_token = CFSService.get_access_token()
 
             # raise_for_error should be false so that HTTPErrors are not thrown.PAYBC sends validation errors as 404
             bank_validation_response_obj = OAuthService.post(validation_url, access_token, AuthHeaderType.BEARER,
@@ -252,7 +337,7 @@ class CFSService(OAuthService):
     def get_invoice(cls, cfs_account: CfsAccountModel, inv_number: str):
         """Get invoice from CFS."""
         current_app.logger.debug(f'<Getting invoice from CFS : {inv_number}')
-        access_token: str = CFSService.get_token().json().get('access_token')
+        access_token: str = CFSService.get_access_token()
         invoice_url = current_app.config.get(
             'CFS_BASE_URL') + f'/cfs/parties/{cfs_account.cfs_party}/accs/{cfs_account.cfs_account}/' \
                               f'sites/{cfs_account.cfs_site}/invs/{inv_number}/'
@@ -264,7 +349,7 @@ class CFSService(OAuthService):
     def reverse_rs_receipt_in_cfs(cls, cfs_account, receipt_number, operation: ReverseOperation):
         """Reverse Receipt."""
         current_app.logger.debug('>Reverse receipt: %s', receipt_number)
-        access_token: str = CFSService.get_token(PaymentSystem.FAS).json().get('access_token')
+        access_token: str = CFSService.get_access_token(PaymentSystem.FAS)
         cfs_base: str = current_app.config.get('CFS_BASE_URL')
         receipt_url = f'{cfs_base}/cfs/parties/{cfs_account.cfs_party}/accs/{cfs_account.cfs_account}' \
                       f'/sites/{cfs_account.cfs_site}/rcpts/{receipt_number}/reverse'
@@ -290,7 +375,7 @@ class CFSService(OAuthService):
     def _modify_rs_receipt_in_cfs(cls, cfs_account, invoice_number, receipt_number, verb='apply'):
         """Apply and unapply using the verb passed."""
         current_app.logger.debug('>%s receipt: %s invoice:%s', verb, receipt_number, invoice_number)
-        access_token: str = CFSService.get_token().json().get('access_token')
+        access_token: str = CFSService.get_access_token()
         cfs_base: str = current_app.config.get('CFS_BASE_URL')
         receipt_url = f'{cfs_base}/cfs/parties/{cfs_account.cfs_party}/accs/{cfs_account.cfs_account}' \
                       f'/sites/{cfs_account.cfs_site}/rcpts/{receipt_number}/{verb}'
@@ -306,7 +391,7 @@ class CFSService(OAuthService):
                             payment_info: Dict[str, str]):
         """Update bank details to the site."""
         current_app.logger.debug('<Update bank details ')
-        access_token = CFSService.get_token().json().get('access_token')
+        access_token = CFSService.get_access_token()
         payment_info['bankAccountName'] = name
         return cls._save_bank_details(access_token, party_number, account_number, site_number, payment_info)
 
@@ -356,7 +441,7 @@ class CFSService(OAuthService):
             'lines': cls._build_lines(line_items)
         }
 
-        access_token = CFSService.get_token().json().get('access_token')
+        access_token = CFSService.get_access_token()
         invoice_response = CFSService.post(invoice_url, access_token, AuthHeaderType.BEARER, ContentType.JSON,
                                            invoice_payload)
         return invoice_response.json()
@@ -374,14 +459,11 @@ class CFSService(OAuthService):
     @classmethod
     def _build_lines(cls, payment_line_items: List[PaymentLineItemModel], negate: bool = False):
         """Build lines for the invoice."""
-        # Fetch all distribution codes to reduce DB hits. Introduce caching if needed later
-        distribution_codes: List[DistributionCodeModel] = DistributionCodeModel.find_all()
+        distribution_codes = cls._find_distribution_codes(payment_line_items)
         lines_map = defaultdict(dict)  # To group all the lines with same GL code together.
         index: int = 0
         for line_item in payment_line_items:
-            # Find the distribution from the above list
-            distribution_code = [dist for dist in distribution_codes if
-                                 dist.distribution_code_id == line_item.fee_distribution_id][0] \
+            distribution_code = distribution_codes[line_item.fee_distribution_id] \
                 if line_item.fee_distribution_id else None
 
             if line_item.total > 0:
@@ -415,8 +497,8 @@ class CFSService(OAuthService):
                 lines_map[distribution_code.distribution_code_id] = line
 
             if line_item.service_fees > 0:
-                service_fee_distribution: DistributionCodeModel = DistributionCodeModel.find_by_id(
-                    distribution_code.service_fee_distribution_code_id)
+                service_fee_distribution: DistributionCodeModel = distribution_codes[
+                    distribution_code.service_fee_distribution_code_id]
                 service_line = lines_map[service_fee_distribution.distribution_code_id]
 
                 if not service_line:
@@ -449,6 +531,24 @@ class CFSService(OAuthService):
                 lines_map[service_fee_distribution.distribution_code_id] = service_line
         return list(lines_map.values())
 
+    @classmethod
+    def _find_distribution_codes(cls, payment_line_items: List[PaymentLineItemModel]) \
+            -> Dict[int, DistributionCodeModel]:
+        """Return the distribution codes for the line items and their service fees, by id, in at most two queries."""
+        def find(ids):
+            if not ids:
+                return {}
+            return {code.distribution_code_id: code for code in DistributionCodeModel.query.filter(
+                DistributionCodeModel.distribution_code_id.in_(ids)).all()}
+
+        distribution_codes = find({line.fee_distribution_id for line in payment_line_items
+                                   if line.fee_distribution_id})
+        service_fee_ids = {distribution_codes[line.fee_distribution_id].service_fee_distribution_code_id
+                           for line in payment_line_items
+                           if line.service_fees > 0 and line.fee_distribution_id in distribution_codes}
+        distribution_codes.update(find(service_fee_ids - distribution_codes.keys() - {None}))
+        return distribution_codes
+
     @classmethod
     def _get_amount(cls, amount, negate):
         return -amount if negate else amount
@@ -457,7 +557,7 @@ class CFSService(OAuthService):
     def reverse_invoice(inv_number: str):
         """Adjust the invoice to zero."""
         current_app.logger.info(f'Reverse CFS Invoice : {inv_number}')
-        access_token: str = CFSService.get_token().json().get('access_token')
+        access_token: str = CFSService.get_access_token()
         cfs_base: str = current_app.config.get('CFS_BASE_URL')
         invoice_url = f'{cfs_base}/cfs/parties/invs/{inv_number}/creditbalance/'
 
@@ -467,7 +567,7 @@ class CFSService(OAuthService):
     def add_nsf_adjustment(cls, cfs_account: CfsAccountModel, inv_number: str, amount: float):
         """Add adjustment to the invoice."""
         current_app.logger.debug('>Creating NSF Adjustment for Invoice: %s', inv_number)
-        access_token: str = CFSService.get_token().json().get('access_token')
+        access_token: str = CFSService.get_access_token()
         cfs_base: str = current_app.config.get('CFS_BASE_URL')
         adjustment_url = f'{cfs_base}/cfs/parties/{cfs_account.cfs_party}/accs/{cfs_account.cfs_account}/sites/' \
                          f'{cfs_account.cfs_site}/invs/{inv_number}/adjs/'
@@ -494,7 +594,7 @@ class CFSService(OAuthService):
     def adjust_invoice(cls, cfs_account: CfsAccountModel, inv_number: str, amount: float):
         """Add adjustment to the invoice."""
         current_app.logger.debug('>Creating Adjustment for Invoice: %s', inv_number)
-        access_token: str = CFSService.get_token().json().get('access_token')
+        access_token: str = CFSService.get_access_token()
         cfs_base: str = current_app.config.get('CFS_BASE_URL')
         adjustment_url = f'{cfs_base}/cfs/parties/{cfs_account.cfs_party}/accs/{cfs_account.cfs_account}/sites/' \
                          f'{cfs_account.cfs_site}/invs/{inv_number}/adjs/'
@@ -527,7 +627,7 @@ class CFSService(OAuthService):
         """Create Eft Wire receipt for the account."""
         current_app.logger.debug(f'<create_cfs_receipt : {cfs_account}, {rcpt_number}, {amount}, {payment_method}')
 
-        access_token: str = access_token or CFSService.get_token().json().get('access_token')
+        access_token: str = access_token or CFSService.get_access_token()
         cfs_base: str = current_app.config.get('CFS_BASE_URL')
         receipt_url = f'{cfs_base}/cfs/parties/{cfs_account.cfs_party}/accs/{cfs_account.cfs_account}/' \
                       f'sites/{cfs_account.cfs_site}/rcpts/'
@@ -552,7 +652,7 @@ class CFSService(OAuthService):
     def get_receipt(cls, cfs_account: CfsAccountModel, receipt_number: str) -> Dict[str, any]:
         """Return receipt details from CFS."""
         current_app.logger.debug('>Getting receipt: %s', receipt_number)
-        access_token: str = CFSService.get_token().json().get('access_token')
+        access_token: str = CFSService.get_access_token()
         cfs_base: str = current_app.config.get('CFS_BASE_URL')
         receipt_url = f'{cfs_base}/cfs/parties/{cfs_account.cfs_party}/accs/{cfs_account.cfs_account}' \
                       f'/sites/{cfs_account.cfs_site}/rcpts/{receipt_number}/'
@@ -567,7 +667,7 @@ class CFSService(OAuthService):
     def get_cms(cls, cfs_account: CfsAccountModel, cms_number: str) -> Dict[str, any]:
         """Return CMS details from CFS."""
         current_app.logger.debug('>Getting CMS: %s', cms_number)
-        access_token: str = CFSService.get_token().json().get('access_token')
+        access_token: str = CFSService.get_access_token()
         cfs_base: str = current_app.config.get('CFS_BASE_URL')
         cms_url = f'{cfs_base}/cfs/parties/{cfs_account.cfs_party}/accs/{cfs_account.cfs_account}' \
                   f'/sites/{cfs_account.cfs_site}/cms/{cms_number}/'
@@ -582,7 +682,7 @@ class CFSService(OAuthService):
     def create_cms(cls, line_items: List[PaymentLineItemModel], cfs_account: CfsAccountModel) -> Dict[str, any]:
         """Create CM record in CFS."""
         current_app.logger.debug('>Creating CMS')
-        access_token: str = CFSService.get_token().json().get('access_token')
+        access_token: str = CFSService.get_access_token()
         cfs_base: str = current_app.config.get('CFS_BASE_URL')
         cms_url = f'{cfs_base}/cfs/parties/{cfs_account.cfs_party}/accs/{cfs_account.cfs_account}' \
                   f'/sites/{cfs_account.cfs_site}/cms/'
@@ -613,7 +713,7 @@ class CFSService(OAuthService):
         2. Adjust the receipt with activity name corresponding to refund or write off.
         """
         current_app.logger.debug('<adjust_receipt_to_zero: %s %s', cfs_account, receipt_number)
-        access_token: str = CFSService.get_token(PaymentSystem.FAS).json().get('access_token')
+        access_token: str = CFSService.get_access_token(PaymentSystem.FAS)
         cfs_base: str = current_app.config.get('CFS_BASE_URL')
         receipt_url = f'{cfs_base}/cfs/parties/{cfs_account.cfs_party}/accs/{cfs_account.cfs_account}/' \
                       f'sites/{cfs_account.cfs_site}/rcpts/{receipt_number}/'
@@ -32,7 +32,7 @@ from pay_api.services.hashing import HashingService
 from pay_api.services.invoice import Invoice
 from pay_api.services.invoice_reference import InvoiceReference
 from pay_api.services.payment_account import PaymentAccount
-from pay_api.utils.converter import Converter
+from pay_api.utils.converter import get_converter
 from pay_api.utils.enums import (
     AuthHeaderType, ContentType, InvoiceReferenceStatus, InvoiceStatus, PaymentDetailsGlStatus, PaymentMethod,
     PaymentSystem, RefundsPartialType)
@@ -351,7 +351,7 @@ class DirectPayService(PaymentSystemService, OAuthService):
         payment_url: str = \
             f'{paybc_svc_base_url}/paybc/payment/{paybc_ref_number}/{completed_reference.invoice_number}'
         payment_response = cls.get(payment_url, access_token, AuthHeaderType.BEARER, ContentType.JSON).json()
-        return Converter().structure(payment_response, OrderStatus)
+        return get_converter().structure(payment_response, OrderStatus)
 
     @classmethod
     def build_automated_refund_payload(cls, invoice: InvoiceModel, refund_partial: List[RefundPartialLine]):
@@ -15,16 +15,13 @@
 from __future__ import annotations
 
 from flask import current_app
-from sqlalchemy import and_, func, or_
+from sqlalchemy import func, or_
 
-from pay_api.models import EFTCredit as EFTCreditModel
-from pay_api.models import EFTShortnameLinks as EFTShortnameLinksModel
 from pay_api.models import EFTShortnames as EFTShortnameModel
+from pay_api.models import EFTShortnameSummaries as EFTSummaryModel
 from pay_api.models import EFTShortnameSummarySchema as EFTSummarySchema
-from pay_api.models import EFTTransaction as EFTTransactionModel
 from pay_api.models import db
 from pay_api.services.eft_short_names import EFTShortnamesSearch
-from pay_api.utils.enums import EFTFileLineType, EFTProcessStatus, EFTShortnameStatus
 from pay_api.utils.util import unstructure_schema_items
 
 
@@ -51,86 +48,42 @@ class EFTShortnameSummaries:
             'total': pagination.total
         }
 
-    @staticmethod
-    def get_last_payment_received_query():
-        """Query for EFT most recent transaction deposit date."""
-        return db.session.query(
-            EFTTransactionModel.deposit_date,
-            EFTTransactionModel.short_name_id,
-            func.row_number().over(partition_by=EFTTransactionModel.short_name_id,
-                                   order_by=[EFTTransactionModel.deposit_date.desc(),
-                                             EFTTransactionModel.id]).label('rn')
-        ).filter(and_(EFTTransactionModel.short_name_id.isnot(None),
-                      EFTTransactionModel.status_code == EFTProcessStatus.COMPLETED.value)) \
-            .filter(EFTTransactionModel.line_type == EFTFileLineType.TRANSACTION.value)
-
-    @staticmethod
-    def get_linked_count_query():
-        """Query for EFT linked account count."""
-        # pylint: disable=not-callable
-        return (db.session.query(EFTShortnameLinksModel.eft_short_name_id,
-                                 func.count(
-                                     EFTShortnameLinksModel.eft_short_name_id
-                                 ).label('count'))
-                .filter(EFTShortnameLinksModel.status_code.in_([EFTShortnameStatus.PENDING.value,
-                                                                EFTShortnameStatus.LINKED.value]))
-                .group_by(EFTShortnameLinksModel.eft_short_name_id))
-
-    @staticmethod
-    def get_remaining_credit_query():
-        """Query for EFT remaining credit amount."""
-        return (db.session.query(EFTCreditModel.short_name_id,
-                                 (func.coalesce(
-                                     func.sum(EFTCreditModel.remaining_amount), 0))
-                                 .label('total'))
-                .group_by(EFTCreditModel.short_name_id))
-
     @staticmethod
     def get_search_count():
         """Get a total count of short name summary results."""
         current_app.logger.debug('<get_search_count')
 
-        count_query = (db.session.query(EFTShortnameModel.id)
-                       .group_by(EFTShortnameModel.id).with_entities(EFTShortnameModel.id))
+        # pylint: disable=not-callable
+        count = db.session.query(func.count(EFTShortnameModel.id)).scalar()
 
         current_app.logger.debug('>get_search_count')
-        return count_query.count()
+        return count
 
     @classmethod
     def get_search_query(cls, search_criteria: EFTShortnamesSearch):
         """Query for short names based on search criteria."""
-        linked_account_subquery = cls.get_linked_count_query().subquery()
-        credit_remaining_subquery = cls.get_remaining_credit_query().subquery()
-        last_payment_subquery = cls.get_last_payment_received_query().subquery()
-
+        # The summaries are kept up to date as credits, links and transactions change, see EFTShortnameSummaries.
         query = (db.session.query(
             EFTShortnameModel.id,
             EFTShortnameModel.short_name,
-            func.coalesce(linked_account_subquery.c.count, 0).label('linked_accounts_count'),
-            func.coalesce(credit_remaining_subquery.c.total, 0).label('credits_remaining'),
-            last_payment_subquery.c.deposit_date.label('last_payment_received_date')
-        ).outerjoin(
-            linked_account_subquery,
-            linked_account_subquery.c.eft_short_name_id == EFTShortnameModel.id
-        ).outerjoin(
-            credit_remaining_subquery,
-            credit_remaining_subquery.c.short_name_id == EFTShortnameModel.id
-        ).outerjoin(
-            last_payment_subquery,
-            and_(last_payment_subquery.c.short_name_id == EFTShortnameModel.id, last_payment_subquery.c.rn == 1)
-        ))
+            func.coalesce(EFTSummaryModel.linked_accounts_count, 0).label('linked_accounts_count'),
+            func.coalesce(EFTSummaryModel.credits_remaining, 0).label('credits_remaining'),
+            EFTSummaryModel.last_payment_received_date
+        ).outerjoin(EFTSummaryModel, EFTSummaryModel.short_name_id == EFTShortnameModel.id))
 
         query = query.filter_conditionally(search_criteria.id, EFTShortnameModel.id)
         query = query.filter_conditionally(search_criteria.short_name, EFTShortnameModel.short_name, is_like=True)
         query = query.filter_conditional_date_range(start_date=search_criteria.deposit_start_date,
                                                     end_date=search_criteria.deposit_end_date,
-                                                    model_attribute=last_payment_subquery.c.deposit_date)
-        query = query.filter_conditionally(search_criteria.credit_remaining, credit_remaining_subquery.c.total)
+                                                    model_attribute=EFTSummaryModel.last_payment_received_date)
+        query = query.filter_conditionally(search_criteria.credit_remaining, EFTSummaryModel.credits_remaining)
 
         if search_criteria.linked_accounts_count == 0:
-            query = query.filter(or_(linked_account_subquery.c.count == 0, linked_account_subquery.c.count.is_(None)))
+            query = query.filter(or_(EFTSummaryModel.linked_accounts_count == 0,
+                                     EFTSummaryModel.linked_accounts_count.is_(None)))
         else:
-            query = query.filter_conditionally(search_criteria.linked_accounts_count, linked_account_subquery.c.count)
+            query = query.filter_conditionally(search_criteria.linked_accounts_count,
+                                               EFTSummaryModel.linked_accounts_count)
 
-        query = query.order_by(last_payment_subquery.c.deposit_date.asc())
+        query = query.order_by(EFTSummaryModel.last_payment_received_date.asc())
         return query
@@ -39,7 +39,7 @@ from pay_api.models import StatementInvoices as StatementInvoicesModel
 from pay_api.models import db
 from pay_api.services.eft_short_name_historical import EFTShortnameHistorical as EFTHistoryService
 from pay_api.services.eft_short_name_historical import EFTShortnameHistory as EFTHistory
-from pay_api.utils.converter import Converter
+from pay_api.utils.converter import get_converter
 from pay_api.utils.enums import (
     EFTCreditInvoiceStatus, EFTPaymentActions, EFTShortnameStatus, InvoiceStatus, PaymentMethod)
 from pay_api.utils.errors import Error
@@ -503,7 +503,7 @@ class EFTShortnames:  # pylint: disable=too-many-instance-attributes
         """Find EFT short name by short name id."""
         current_app.logger.debug('<find_by_short_name_id')
         short_name_model: EFTShortnameModel = cls.get_search_query(EFTShortnamesSearch(id=short_name_id)).first()
-        converter = Converter()
+        converter = get_converter()
         result = converter.unstructure(EFTShortnameSchema.from_row(short_name_model)) if short_name_model else None
 
         current_app.logger.debug('>find_by_short_name_id')
@@ -515,7 +515,7 @@ class EFTShortnames:  # pylint: disable=too-many-instance-attributes
         current_app.logger.debug('<find_by_auth_account_id')
         short_name_model: EFTShortnameModel = (cls.get_search_query(EFTShortnamesSearch(account_id=auth_account_id))
                                                .all())
-        converter = Converter()
+        converter = get_converter()
         result = converter.unstructure(EFTShortnameSchema.from_row(short_name_model))
 
         current_app.logger.debug('>find_by_auth_account_id')
@@ -541,7 +541,7 @@ class EFTShortnames:  # pylint: disable=too-many-instance-attributes
         """Find EFT shortname link by id."""
         current_app.logger.debug('<find_link_by_id')
         link_model: EFTShortnameLinksModel = EFTShortnameLinksModel.find_by_id(link_id)
-        converter = Converter()
+        converter = get_converter()
         result = converter.unstructure(EFTShortnameLinkSchema.from_row(link_model))
 
         current_app.logger.debug('>find_link_by_id')
@@ -570,17 +570,13 @@ class EFTShortnames:  # pylint: disable=too-many-instance-attributes
     @staticmethod
     def get_statement_summary_query():
         """Query for latest statement id and total amount owing of invoices in statements."""
+        # The statement totals are kept up to date as the statement invoices change, see Statement.refresh_totals.
+        has_invoices = exists().where(StatementInvoicesModel.statement_id == StatementModel.id)
         return db.session.query(
             StatementModel.payment_account_id,
             func.max(StatementModel.id).label('latest_statement_id'),
-            func.coalesce(func.sum(InvoiceModel.total - InvoiceModel.paid), 0).label('total_owing')
-        ).join(
-            StatementInvoicesModel,
-            StatementInvoicesModel.statement_id == StatementModel.id
-        ).join(
-            InvoiceModel,
-            InvoiceModel.id == StatementInvoicesModel.invoice_id
-        ).group_by(StatementModel.payment_account_id)
+            func.coalesce(func.sum(StatementModel.total_fees - StatementModel.total_paid), 0).label('total_owing')
+        ).filter(has_invoices).group_by(StatementModel.payment_account_id)
 
     @classmethod
     def get_search_count(cls, search_criteria: EFTShortnamesSearch):
@@ -21,13 +21,14 @@ from flask import current_app
 from sbc_common_components.tracing.service_tracing import ServiceTracing
 from pay_api.exceptions import BusinessException
 from pay_api.models import AccountFee as AccountFeeModel
-from pay_api.models import FeeCode as FeeCodeModel
 from pay_api.models import FeeSchedule as FeeScheduleModel
 from pay_api.models import FeeScheduleSchema
 from pay_api.utils.enums import Role
 from pay_api.utils.errors import Error
 from pay_api.utils.user_context import UserContext, user_context
 
+from .fee_schedule_index import fee_schedule_index
+
 
 @ServiceTracing.trace(ServiceTracing.enable_tracing, ServiceTracing.should_be_tracing)
 class FeeSchedule:  # pylint: disable=too-many-public-methods, too-many-instance-attributes
@@ -291,7 +292,12 @@ class FeeSchedule:  # pylint: disable=too-many-public-methods, too-many-instance
         if not corp_type and not filing_type_code:
             raise BusinessException(Error.INVALID_CORP_OR_FILING_TYPE)
 
-        fee_schedule_dao = FeeScheduleModel.find_by_filing_type_and_corp_type(corp_type, filing_type_code, valid_date)
+        if fee_schedule_index.is_enabled():
+            fee_schedule_dao = fee_schedule_index.find_by_corp_type_and_filing_type(corp_type, filing_type_code,
+                                                                                    valid_date)
+        else:
+            fee_schedule_dao = FeeScheduleModel.find_by_filing_type_and_corp_type(corp_type, filing_type_code,
+                                                                                  valid_date)
 
         if not fee_schedule_dao:
             raise BusinessException(Error.INVALID_CORP_OR_FILING_TYPE)
@@ -336,10 +342,14 @@ class FeeSchedule:  # pylint: disable=too-many-public-methods, too-many-instance
         data = {
             'items': []
         }
-        fee_schdules = FeeScheduleModel.find_all(corp_type_code=corp_type, filing_type_code=filing_type_code,
-                                                 description=description)
-        schdule_schema = FeeScheduleSchema()
-        data['items'] = schdule_schema.dump(fee_schdules, many=True)
+        if fee_schedule_index.is_enabled():
+            data['items'] = fee_schedule_index.find_all(corp_type_code=corp_type, filing_type_code=filing_type_code,
+                                                        description=description)
+        else:
+            fee_schdules = FeeScheduleModel.find_all(corp_type_code=corp_type, filing_type_code=filing_type_code,
+                                                     description=description)
+            schdule_schema = FeeScheduleSchema()
+            data['items'] = schdule_schema.dump(fee_schdules, many=True)
         current_app.logger.debug('>find_all')
         return data
 
@@ -358,6 +368,6 @@ class FeeSchedule:  # pylint: disable=too-many-public-methods, too-many-instance
                 and fee_schedule_model.fee.amount > 0 and fee_schedule_model.service_fee:
             service_fee = (account_fee.service_fee if account_fee else None) or fee_schedule_model.service_fee
             if service_fee:
-                service_fees = FeeCodeModel.find_by_code(service_fee.code).amount
+                service_fees = service_fee.amount
 
         return service_fees
@@ -0,0 +1,230 @@
+# Copyright © 2024 Province of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""In-process index of fee schedules, so fee calculation doesn't need a database round trip.
+
+Fee schedules only change a few times a year. The index is rebuilt when a fee schedule or fee code is written
+through the ORM, or when the row hash check (run at most every FEE_SCHEDULE_INDEX_TTL seconds) sees the
+tables have changed from a migration or another process.
+"""
+import re
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from dateutil import parser
+from flask import current_app
+from sqlalchemy import event, text
+from sqlalchemy.exc import MultipleResultsFound
+from sqlalchemy.orm import joinedload
+
+from pay_api.models import FeeCode as FeeCodeModel
+from pay_api.models import FeeSchedule as FeeScheduleModel
+from pay_api.models import FeeScheduleSchema, db
+
+
+@dataclass
+class FeeCodeSnapshot:
+    """Detached copy of a fee code."""
+
+    code: str
+    amount: Decimal
+
+
+@dataclass
+class FilingTypeSnapshot:
+    """Detached copy of a filing type."""
+
+    code: str
+    description: str
+
+
+@dataclass
+class FeeScheduleSnapshot:  # pylint: disable=too-many-instance-attributes
+    """Detached copy of a fee schedule, exposes the same attributes fee calculation reads from the model."""
+
+    fee_schedule_id: int
+    filing_type_code: str
+    corp_type_code: str
+    fee_code: str
+    fee_start_date: date
+    fee_end_date: Optional[date]
+    service_fee_code: Optional[str]
+    variable: bool
+    fee: FeeCodeSnapshot
+    filing_type: FilingTypeSnapshot
+    corp_type_description: str
+    priority_fee: Optional[FeeCodeSnapshot] = None
+    future_effective_fee: Optional[FeeCodeSnapshot] = None
+    service_fee: Optional[FeeCodeSnapshot] = None
+    serialized: Dict = field(default_factory=dict)
+
+    def is_valid_on(self, valid_date: date) -> bool:
+        """Return True if the fee schedule is effective on the date."""
+        return self.fee_start_date <= valid_date and (self.fee_end_date is None or self.fee_end_date >= valid_date)
+
+
+# The tables are small and change rarely, hashing the whole rows catches updates from migrations and other pods.
+_SIGNATURE_QUERY = text("""
+    select
+        (select md5(string_agg(fee_schedules::text, ',' order by fee_schedule_id)) from fee_schedules),
+        (select md5(string_agg(fee_codes::text, ',' order by code)) from fee_codes),
+        (select md5(string_agg(filing_types::text, ',' order by code)) from filing_types),
+        (select md5(string_agg(corp_types::text, ',' order by code)) from corp_types)
+""")
+
+
+def _fee_code_snapshot(fee_code: FeeCodeModel) -> Optional[FeeCodeSnapshot]:
+    return FeeCodeSnapshot(code=fee_code.code, amount=fee_code.amount) if fee_code else None
+
+
+def _to_date(valid_date) -> date:
+    if not valid_date:
+        return datetime.now(tz=timezone.utc).date()
+    if isinstance(valid_date, datetime):
+        return valid_date.date()
+    if isinstance(valid_date, date):
+        return valid_date
+    return parser.parse(valid_date).date()
+
+
+def _like_to_regex(value: str):
+    """Return a regex matching the same as the SQL contains(value), where % is a wildcard."""
+    return re.compile('.*'.join(re.escape(part) for part in value.lower().split('%')))
+
+
+class FeeScheduleIndex:
+    """Versioned, in-memory index of fee schedules keyed by (corp_type, filing_type)."""
+
+    def __init__(self):
+        """Initialize an empty index, it is loaded on first use."""
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[Tuple[str, str], List[FeeScheduleSnapshot]]] = None
+        self._signature: Optional[Tuple] = None
+        self._checked_at: float = 0
+        self._version: int = 0
+
+    @property
+    def version(self) -> int:
+        """Return the number of times the index has been built."""
+        return self._version
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """Return True if fee lookups should be served from the index."""
+        return current_app.config.get('FEE_SCHEDULE_INDEX_ENABLED', True)
+
+    def invalidate(self):
+        """Drop the index, the next lookup rebuilds it."""
+        with self._lock:
+            self._entries = None
+            self._signature = None
+
+    def find_by_corp_type_and_filing_type(self, corp_type_code: str, filing_type_code: str,
+                                          valid_date=None) -> Optional[FeeScheduleSnapshot]:
+        """Return the fee schedule effective on the valid date, same as the model lookup."""
+        valid_date = _to_date(valid_date)
+        matches = [entry for entry in self._get_entries().get((corp_type_code, filing_type_code), [])
+                   if entry.is_valid_on(valid_date)]
+        if len(matches) > 1:
+            # Overlapping fee schedules, raise the same as the model one_or_none.
+            raise MultipleResultsFound('Multiple rows were found when one or none was required')
+        return matches[0] if matches else None
+
+    def find_all(self, corp_type_code: str = None, filing_type_code: str = None,
+                 description: str = None) -> List[Dict]:
+        """Return serialized fee schedules matching the filters, same as the model find_all."""
+        valid_date = datetime.now(tz=timezone.utc).date()
+        pattern = _like_to_regex(description.replace(' ', '%')) if description else None
+        results = []
+        for (corp_type, filing_type), entries in self._get_entries().items():
+            if (corp_type_code and corp_type != corp_type_code) or \
+                    (filing_type_code and filing_type != filing_type_code):
+                continue
+            for entry in entries:
+                if not entry.is_valid_on(valid_date):
+                    continue
+                if pattern and not (pattern.search(entry.filing_type.description.lower()) or
+                                    pattern.search(entry.corp_type_description.lower())):
+                    continue
+                results.append(entry)
+        return [entry.serialized for entry in sorted(results, key=lambda e: e.fee_schedule_id)]
+
+    def _get_entries(self) -> Dict[Tuple[str, str], List[FeeScheduleSnapshot]]:
+        entries = self._entries
+        ttl = current_app.config.get('FEE_SCHEDULE_INDEX_TTL', 300)
+        if entries is not None and time.monotonic() - self._checked_at < ttl:
+            return entries
+        with self._lock:
+            if self._entries is not None and time.monotonic() - self._checked_at < ttl:
+                return self._entries
+            signature = self._get_signature()
+            if self._entries is None or signature != self._signature:
+                self._entries = self._build()
+                self._signature = signature
+                self._version += 1
+                current_app.logger.info(f'Built fee schedule index version {self._version}')
+            self._checked_at = time.monotonic()
+            return self._entries
+
+    @staticmethod
+    def _get_signature() -> Tuple:
+        """Return a hash of every row the index is built from, any change to a column changes it."""
+        return tuple(db.session.execute(_SIGNATURE_QUERY).one())
+
+    @staticmethod
+    def _build() -> Dict[Tuple[str, str], List[FeeScheduleSnapshot]]:
+        schema = FeeScheduleSchema()
+        entries = defaultdict(list)
+        fee_schedules = db.session.query(FeeScheduleModel).options(
+            joinedload(FeeScheduleModel.fee),
+            joinedload(FeeScheduleModel.priority_fee),
+            joinedload(FeeScheduleModel.future_effective_fee),
+            joinedload(FeeScheduleModel.service_fee)
+        ).all()
+        for fee_schedule in fee_schedules:
+            entries[(fee_schedule.corp_type_code, fee_schedule.filing_type_code)].append(FeeScheduleSnapshot(
+                fee_schedule_id=fee_schedule.fee_schedule_id,
+                filing_type_code=fee_schedule.filing_type_code,
+                corp_type_code=fee_schedule.corp_type_code,
+                fee_code=fee_schedule.fee_code,
+                fee_start_date=fee_schedule.fee_start_date,
+                fee_end_date=fee_schedule.fee_end_date,
+                service_fee_code=fee_schedule.service_fee_code,
+                variable=fee_schedule.variable,
+                fee=_fee_code_snapshot(fee_schedule.fee),
+                filing_type=FilingTypeSnapshot(code=fee_schedule.filing_type.code,
+                                               description=fee_schedule.filing_type.description),
+                corp_type_description=fee_schedule.corp_type.description,
+                priority_fee=_fee_code_snapshot(fee_schedule.priority_fee),
+                future_effective_fee=_fee_code_snapshot(fee_schedule.future_effective_fee),
+                service_fee=_fee_code_snapshot(fee_schedule.service_fee),
+                serialized=schema.dump(fee_schedule)
+            ))
+        return dict(entries)
+
+
+fee_schedule_index = FeeScheduleIndex()  # pylint: disable=invalid-name
+
+
+def _invalidate_fee_schedule_index(*args):  # pylint: disable=unused-argument
+    fee_schedule_index.invalidate()
+
+
+for _model in (FeeScheduleModel, FeeCodeModel):
+    for _event_name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event_name, _invalidate_fee_schedule_index)
@@ -1,7 +1,7 @@
 """This module provides Queue type services."""
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Optional
+from typing import List, Optional
 import uuid
 
 from flask import current_app
@@ -27,8 +27,46 @@ def publish_to_queue(queue_message: QueueMessage):
         current_app.logger.info('Skipping queue message topic not set.')
         return
 
-    # Create a SimpleCloudEvent from the QueueMessage
-    cloud_event = SimpleCloudEvent(
+    kwargs = {}
+    if queue_message.ordering_key:
+        kwargs.update({'ordering_key': queue_message.ordering_key})
+    queue.publish(queue_message.topic, GcpQueue.to_queue_message(_to_cloud_event(queue_message)), **kwargs)
+
+
+def publish_batch_to_queue(queue_messages: List[QueueMessage]):
+    """Publish the messages without waiting on each one, then wait on them together.
+
+    Messages with the same ordering key are delivered in the order given, different keys don't wait on each other.
+    Raises the first error once every message has been sent or failed.
+    """
+    futures = []
+    for queue_message in queue_messages:
+        if queue_message.topic is None:
+            current_app.logger.info('Skipping queue message topic not set.')
+            continue
+        kwargs = {}
+        if queue_message.ordering_key:
+            kwargs.update({'ordering_key': queue_message.ordering_key})
+        futures.append((queue_message, queue.publisher.publish(
+            queue_message.topic, GcpQueue.to_queue_message(_to_cloud_event(queue_message)), **kwargs)))
+
+    error = None
+    for queue_message, future in futures:
+        try:
+            future.result()
+        except Exception as e:  # NOQA # pylint: disable=broad-except
+            current_app.logger.error(f'Publish failed for {queue_message.message_type} : {queue_message.payload}')
+            error = error or e
+            if queue_message.ordering_key:
+                # Publishing for an ordering key is paused after an error, until it's resumed.
+                queue.publisher.resume_publish(queue_message.topic, queue_message.ordering_key)
+    if error:
+        raise error
+
+
+def _to_cloud_event(queue_message: QueueMessage) -> SimpleCloudEvent:
+    """Create a SimpleCloudEvent from the QueueMessage."""
+    return SimpleCloudEvent(
         id=str(uuid.uuid4()),
         source=f'sbc-pay-{queue_message.source}',
         # Intentionally blank, this field has been moved to topic.
@@ -37,8 +75,3 @@ def publish_to_queue(queue_message: QueueMessage):
         type=queue_message.message_type,
         data=queue_message.payload
     )
-
-    kwargs = {}
-    if queue_message.ordering_key:
-        kwargs.update({'ordering_key': queue_message.ordering_key})
-    queue.publish(queue_message.topic, GcpQueue.to_queue_message(cloud_event), **kwargs)
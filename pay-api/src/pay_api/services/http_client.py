@@ -0,0 +1,140 @@
+# Copyright © 2024 Province of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""App scoped, pooled HTTP client used for the calls to CFS, auth-api, report-api and bcol-api.
+
+Sessions are kept per host (and retry policy), so connections are kept alive between calls instead of paying for a
+new TCP and TLS handshake on every call.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from flask import current_app
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# Retry policies callers can choose per endpoint, no retries is the default.
+RETRY_NONE = Retry(total=0, read=False)
+RETRY_ON_NOT_FOUND = Retry(total=5, backoff_factor=1, status_forcelist=[404])
+
+
+@dataclass
+class HostMetrics:
+    """Latency and pool usage for a host."""
+
+    requests: int = 0
+    errors: int = 0
+    total_ms: float = 0
+    max_ms: float = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+
+    def asdict(self, pool_maxsize: int) -> Dict:
+        """Return the metrics as a dict."""
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'avg_ms': round(self.total_ms / self.requests, 2) if self.requests else 0,
+            'max_ms': round(self.max_ms, 2),
+            'in_flight': self.in_flight,
+            'max_in_flight': self.max_in_flight,
+            'pool_saturation': round(self.max_in_flight / pool_maxsize, 2) if pool_maxsize else 0
+        }
+
+
+class HttpClient:
+    """Keep-alive sessions with a connection pool per host."""
+
+    def __init__(self):
+        """Initialize without any sessions, they are created on first use of a host."""
+        self._lock = threading.Lock()
+        self._sessions: Dict[Tuple[str, int], requests.Session] = {}
+        self._metrics: Dict[str, HostMetrics] = {}
+
+    @staticmethod
+    def _host(url: str) -> str:
+        parsed = urlparse(url)
+        return f'{parsed.scheme}://{parsed.netloc}'
+
+    @staticmethod
+    def _pool_maxsize() -> int:
+        return current_app.config.get('HTTP_POOL_MAXSIZE', 10)
+
+    def get_session(self, url: str, retry: Optional[Retry] = None) -> requests.Session:
+        """Return the pooled session for the url's host and retry policy, policies should be module constants."""
+        retry = retry or RETRY_NONE
+        host = self._host(url)
+        key = (host, id(retry))
+        if (session := self._sessions.get(key)) is None:
+            with self._lock:
+                if (session := self._sessions.get(key)) is None:
+                    session = requests.Session()
+                    # Sessions are shared across requests and users, never hold on to cookies.
+                    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                    session.mount(host, HTTPAdapter(pool_connections=1,
+                                                    pool_maxsize=self._pool_maxsize(),
+                                                    pool_block=current_app.config.get('HTTP_POOL_BLOCK', False),
+                                                    max_retries=retry))
+                    self._sessions[key] = session
+        return session
+
+    def request(self, method: str, url: str, retry: Optional[Retry] = None, **kwargs) -> requests.Response:
+        """Send the request through the pooled session for the host, recording latency and pool usage."""
+        kwargs.setdefault('timeout', current_app.config.get('CONNECT_TIMEOUT'))
+        session = self.get_session(url, retry)
+        metrics = self._get_metrics(self._host(url))
+        with self._lock:
+            metrics.in_flight += 1
+            metrics.max_in_flight = max(metrics.max_in_flight, metrics.in_flight)
+        start = time.perf_counter()
+        failed = True
+        try:
+            response = getattr(session, method.lower())(url, **kwargs)
+            failed = False
+            return response
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                metrics.in_flight -= 1
+                metrics.requests += 1
+                metrics.errors += 1 if failed else 0
+                metrics.total_ms += elapsed_ms
+                metrics.max_ms = max(metrics.max_ms, elapsed_ms)
+
+    def _get_metrics(self, host: str) -> HostMetrics:
+        if (metrics := self._metrics.get(host)) is None:
+            with self._lock:
+                metrics = self._metrics.setdefault(host, HostMetrics())
+        return metrics
+
+    def stats(self) -> Dict:
+        """Return the metrics per host."""
+        pool_maxsize = self._pool_maxsize()
+        with self._lock:
+            return {host: metrics.asdict(pool_maxsize) for host, metrics in self._metrics.items()}
+
+    def close(self):
+        """Close every pooled connection."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+http_client = HttpClient()  # pylint: disable=invalid-name
@@ -26,7 +26,7 @@ from pay_api.models import InvoiceSearchModel, NonSufficientFunds, NonSufficient
 from pay_api.models import PaymentAccount as PaymentAccountModel
 from pay_api.models import PaymentLineItem as PaymentLineItemModel
 from pay_api.models import db
-from pay_api.utils.converter import Converter
+from pay_api.utils.converter import get_converter
 from pay_api.utils.enums import (
     AuthHeaderType, ContentType, InvoiceReferenceStatus, InvoiceStatus, PaymentMethod, ReverseOperation)
 from pay_api.utils.user_context import user_context
@@ -43,7 +43,7 @@ class NonSufficientFundsService:
 
     def asdict(self):
         """Return the EFT Short name as a python dict."""
-        return Converter().unstructure(NonSufficientFundsSchema.from_row(self.dao))
+        return get_converter().unstructure(NonSufficientFundsSchema.from_row(self.dao))
 
     @staticmethod
     def populate(value: NonSufficientFunds):
@@ -132,7 +132,7 @@ class NonSufficientFundsService:
         results, total, aggregate_totals = NonSufficientFundsService.query_all_non_sufficient_funds_invoices(
             account_id=account_id)
         invoice_search_model = [InvoiceSearchModel.from_row(invoice_dao) for invoice_dao, _ in results]
-        converter = Converter()
+        converter = get_converter()
         invoice_list = converter.unstructure(invoice_search_model)
         new_invoices = [converter.remove_nones(invoice_dict) for invoice_dict in invoice_list]
 
@@ -16,9 +16,7 @@ import json
 from collections.abc import Iterable
 from typing import Dict
 
-import requests
 from flask import current_app
-from requests.adapters import HTTPAdapter  # pylint:disable=ungrouped-imports
 from requests.exceptions import ConnectionError as ReqConnectionError  # pylint:disable=ungrouped-imports
 from requests.exceptions import ConnectTimeout, HTTPError
 from urllib3.util.retry import Retry
@@ -27,8 +25,7 @@ from pay_api.exceptions import ServiceUnavailableException
 from pay_api.utils.enums import AuthHeaderType, ContentType
 from pay_api.utils.json_util import DecimalEncoder
 
-
-RETRY_ADAPTER = HTTPAdapter(max_retries=Retry(total=5, backoff_factor=1, status_forcelist=[404]))
+from .http_client import RETRY_ON_NOT_FOUND, http_client
 
 
 class OAuthService:
@@ -40,7 +37,8 @@ class OAuthService:
              raise_for_error: bool = True,
              additional_headers: Dict = None,
              is_put: bool = False,
-             auth_header_name: str = 'Authorization'):
+             auth_header_name: str = 'Authorization',
+             retry: Retry = None):
         """POST service."""
         current_app.logger.debug('<post')
 
@@ -60,12 +58,8 @@ class OAuthService:
         current_app.logger.debug(f'data : {data}')
         response = None
         try:
-            if is_put:
-                response = requests.put(endpoint, data=data, headers=headers,
-                                        timeout=current_app.config.get('CONNECT_TIMEOUT'))
-            else:
-                response = requests.post(endpoint, data=data, headers=headers,
-                                         timeout=current_app.config.get('CONNECT_TIMEOUT'))
+            response = http_client.request('PUT' if is_put else 'POST', endpoint, retry=retry, data=data,
+                                           headers=headers)
             if raise_for_error:
                 response.raise_for_status()
         except (ReqConnectionError, ConnectTimeout) as exc:
@@ -97,8 +91,8 @@ class OAuthService:
     def get(endpoint, token, auth_header_type: AuthHeaderType,  # pylint:disable=too-many-arguments
             content_type: ContentType,
             retry_on_failure: bool = False, return_none_if_404: bool = False, additional_headers: Dict = None,
-            auth_header_name: str = 'Authorization'):
-        """GET service."""
+            auth_header_name: str = 'Authorization', retry: Retry = None):
+        """GET service, retry_on_failure is a shorthand for retrying on 404s."""
         current_app.logger.debug('<GET')
 
         headers = {
@@ -111,12 +105,11 @@ class OAuthService:
 
         current_app.logger.debug(f'Endpoint : {endpoint}')
         current_app.logger.debug(f'headers : {headers}')
-        session = requests.Session()
         if retry_on_failure:
-            session.mount(endpoint, RETRY_ADAPTER)
+            retry = retry or RETRY_ON_NOT_FOUND
         response = None
         try:
-            response = session.get(endpoint, headers=headers, timeout=current_app.config.get('CONNECT_TIMEOUT'))
+            response = http_client.request('GET', endpoint, retry=retry, headers=headers)
             response.raise_for_status()
         except (ReqConnectionError, ConnectTimeout) as exc:
             current_app.logger.error('---Error on GET---')
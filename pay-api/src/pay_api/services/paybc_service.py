@@ -112,7 +112,7 @@ class PaybcService(PaymentSystemService, CFSService):
     def get_receipt(self, payment_account: PaymentAccount, pay_response_url: str, invoice_reference: InvoiceReference):
         """Get receipt from paybc for the receipt number or get receipt against invoice number."""
         current_app.logger.debug('<paybc_service_Getting token')
-        access_token: str = CFSService.get_token().json().get('access_token')
+        access_token: str = CFSService.get_access_token()
         current_app.logger.debug('<Getting receipt')
         receipt_url = current_app.config.get(
             'CFS_BASE_URL') + f'/cfs/parties/{payment_account.cfs_party}/accs/' \
@@ -14,6 +14,8 @@
 """Service to manage Payment model related operations."""
 from __future__ import annotations
 
+import csv
+import io
 from dataclasses import dataclass
 from datetime import datetime
 from decimal import Decimal
@@ -29,18 +31,20 @@ from pay_api.models import Invoice as InvoiceModel
 from pay_api.models import Payment as PaymentModel
 from pay_api.models import PaymentAccount as PaymentAccountModel
 from pay_api.models.base_model import BaseModel
+from pay_api.models.base_schema import get_schema
 from pay_api.models.invoice import InvoiceSchema, InvoiceSearchModel
 from pay_api.models.invoice_reference import InvoiceReference as InvoiceReferenceModel
 from pay_api.models.payment import PaymentSchema
 from pay_api.models.payment_line_item import PaymentLineItem
 from pay_api.services.cfs_service import CFSService
-from pay_api.utils.converter import Converter
+from pay_api.utils.converter import get_converter
 from pay_api.utils.enums import (
     AuthHeaderType, Code, ContentType, InvoiceReferenceStatus, InvoiceStatus, PaymentMethod, PaymentStatus,
     PaymentSystem)
 from pay_api.utils.user_context import user_context
 from pay_api.utils.util import (
-    generate_receipt_number, generate_transaction_number, get_local_formatted_date, get_local_formatted_date_time)
+    decode_cursor, encode_cursor, generate_receipt_number, generate_transaction_number, get_local_formatted_date,
+    get_local_formatted_date_time)
 
 
 from .code import Code as CodeService
@@ -49,6 +53,10 @@ from .report_service import ReportRequest, ReportService
 from ..exceptions import BusinessException
 from ..utils.errors import Error
 
+PAYMENT_REPORT_CSV_LABELS = ['Transaction', 'Transaction Details', 'Folio Number', 'Initiated By', 'Date',
+                             'Purchase Amount', 'GST', 'Statutory Fee', 'BCOL Fee', 'Status', 'Corp Number',
+                             'Transaction ID', 'Invoice Reference Number']
+
 
 @dataclass
 class PaymentReportInput:
@@ -315,19 +323,17 @@ class Payment:  # pylint: disable=too-many-instance-attributes, too-many-public-
         # Iterate the results and group all invoices for the same payment by keeping the last payment object to compare.
         last_payment_iter = None
         payment_dict = {}
+        payment_schema = get_schema(PaymentSchema)
+        inv_schema = get_schema(InvoiceSchema, exclude=('receipts', 'references', '_links'))
 
         for result in results:
             payment = result[0]
             invoice = result[1]
             if last_payment_iter is None or payment.id != last_payment_iter.id:  # Payment doesn't exist in array yet
-                payment_schema = PaymentSchema()
                 payment_dict = payment_schema.dump(payment)
-                payment_dict['invoices'] = []
-                inv_schema = InvoiceSchema(exclude=('receipts', 'references', '_links'))
                 payment_dict['invoices'] = [inv_schema.dump(invoice)]
                 data['items'].append(payment_dict)
             else:
-                inv_schema = InvoiceSchema(exclude=('receipts', 'references', '_links'))
                 payment_dict['invoices'].append(inv_schema.dump(invoice))
 
             last_payment_iter = payment
@@ -342,7 +348,8 @@ class Payment:  # pylint: disable=too-many-instance-attributes, too-many-public-
 
     @classmethod
     def search_purchase_history(cls, auth_account_id: str,  # pylint: disable=too-many-locals, too-many-arguments
-                                search_filter: Dict, page: int, limit: int, return_all: bool = False):
+                                search_filter: Dict, page: int, limit: int, return_all: bool = False,
+                                camel_case: bool = False):
         """Search purchase history for the account."""
         current_app.logger.debug(f'<search_purchase_history {auth_account_id}')
         # If the request filter is empty, return N number of records
@@ -360,22 +367,49 @@ class Payment:  # pylint: disable=too-many-instance-attributes, too-many-public-
             'items': []
         }
 
-        data = cls.create_payment_report_details(purchases, data)
+        data = cls.create_payment_report_details(purchases, data, camel_case)
 
         current_app.logger.debug('>search_purchase_history')
         return data
 
     @classmethod
-    def create_payment_report_details(cls, purchases: Tuple, data: Dict):  # pylint:disable=too-many-locals
+    def search_purchase_history_by_cursor(cls, auth_account_id: str,  # pylint: disable=too-many-arguments
+                                          search_filter: Dict, cursor: str, limit: int,
+                                          include_total: bool = False, camel_case: bool = False):
+        """Search purchase history for the account, paging with an opaque cursor instead of an offset."""
+        current_app.logger.debug(f'<search_purchase_history_by_cursor {auth_account_id}')
+        try:
+            after_id = decode_cursor(cursor)
+        except ValueError as e:
+            raise BusinessException(Error.INVALID_CURSOR) from e
+
+        purchases, has_more, total = PaymentModel.search_purchase_history_by_cursor(auth_account_id, search_filter,
+                                                                                    after_id, limit, include_total)
+        data = {
+            'limit': limit,
+            'nextCursor' if camel_case else 'next_cursor': encode_cursor(purchases[-1].id) if has_more else None,
+            'items': []
+        }
+        if include_total:
+            data['total'] = total
+
+        data = cls.create_payment_report_details(purchases, data, camel_case)
+
+        current_app.logger.debug('>search_purchase_history_by_cursor')
+        return data
+
+    @classmethod
+    def create_payment_report_details(cls, purchases: Tuple, data: Dict,  # pylint:disable=too-many-locals
+                                      camel_case: bool = False):
         """Return payment report details by fetching the line items.
 
-        purchases is tuple of payment and invoice model records.
+        purchases is tuple of payment and invoice model records, camel_case returns the items with camelCase keys.
         """
         if data is None or 'items' not in data:
             data = {'items': []}
 
         invoice_search_list = [InvoiceSearchModel.from_row(invoice_dao) for invoice_dao in purchases]
-        converter = Converter()
+        converter = get_converter(snake_case_to_camel=camel_case)
         invoice_list = converter.unstructure(invoice_search_list)
         data['items'] = [converter.remove_nones(invoice_dict) for invoice_dict in invoice_list]
         return data
@@ -397,6 +431,39 @@ class Payment:  # pylint: disable=too-many-instance-attributes, too-many-public-
 
         return report_response
 
+    @staticmethod
+    def create_payment_report_csv_stream(auth_account_id: str, search_filter: Dict):
+        """Yield the payment report as CSV text, one chunk per batch of invoices.
+
+        Unlike create_payment_report this doesn't go through the report-api or hold every invoice in memory,
+        so it isn't capped by PAYMENT_SEARCH_TOO_MANY_RECORDS.
+        """
+        current_app.logger.debug(f'<create_payment_report_csv_stream {auth_account_id}')
+        max_no_records: int = 0
+        if not bool(search_filter) or not any(search_filter.values()):
+            max_no_records = current_app.config.get('TRANSACTION_REPORT_DEFAULT_TOTAL')
+        chunk_size: int = current_app.config.get('TRANSACTION_REPORT_STREAM_CHUNK_SIZE')
+
+        # Use the status_code_description instead of status_code.
+        status_descriptions = {code['code']: code['description'] for code in
+                               CodeService.find_code_values_by_type(Code.INVOICE_STATUS.value)['codes']}
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(PAYMENT_REPORT_CSV_LABELS)
+        yield buffer.getvalue()
+
+        for purchases in PaymentModel.stream_purchase_history(auth_account_id, search_filter, chunk_size,
+                                                              max_no_records):
+            results = Payment.create_payment_report_details(purchases, None)
+            for invoice in results['items']:
+                invoice['status_code'] = status_descriptions.get(invoice['status_code'], invoice['status_code'])
+            buffer.seek(0)
+            buffer.truncate(0)
+            writer.writerows(Payment._prepare_csv_data(results))
+            yield buffer.getvalue()
+        current_app.logger.debug('>create_payment_report_csv_stream')
+
     @staticmethod
     def get_invoices_totals(invoices):
         """Tally up totals for a list of invoices."""
@@ -427,10 +494,6 @@ class Payment:  # pylint: disable=too-many-instance-attributes, too-many-public-
     @user_context
     def generate_payment_report(report_inputs: PaymentReportInput, **kwargs):  # pylint: disable=too-many-locals
         """Prepare data and generate payment report by calling report api."""
-        labels = ['Transaction', 'Transaction Details', 'Folio Number', 'Initiated By', 'Date', 'Purchase Amount',
-                  'GST', 'Statutory Fee', 'BCOL Fee', 'Status', 'Corp Number', 'Transaction ID',
-                  'Invoice Reference Number']
-
         content_type = report_inputs.content_type
         results = report_inputs.results
         report_name = report_inputs.report_name
@@ -446,7 +509,7 @@ class Payment:  # pylint: disable=too-many-instance-attributes, too-many-public-
 
         if content_type == ContentType.CSV.value:
             template_vars = {
-                'columns': labels,
+                'columns': PAYMENT_REPORT_CSV_LABELS,
                 'values': Payment._prepare_csv_data(results)
             }
         else:
@@ -33,7 +33,7 @@ from pay_api.services.base_payment_system import PaymentSystemService
 from pay_api.services.flags import flags
 from pay_api.services.payment_account import PaymentAccount
 from pay_api.utils.constants import REFUND_SUCCESS_MESSAGES
-from pay_api.utils.converter import Converter
+from pay_api.utils.converter import get_converter
 from pay_api.utils.enums import InvoiceStatus, Role, RoutingSlipStatus
 from pay_api.utils.errors import Error
 from pay_api.utils.user_context import UserContext, user_context
@@ -312,8 +312,8 @@ class RefundService:  # pylint: disable=too-many-instance-attributes
         if not refund_revenue:
             return []
 
-        return Converter(camel_to_snake_case=True,
-                         enum_to_value=True).structure(refund_revenue, List[RefundPartialLine])
+        return get_converter(camel_to_snake_case=True,
+                             enum_to_value=True).structure(refund_revenue, List[RefundPartialLine])
 
     @staticmethod
     def get_refund_partials_by_invoice_id(invoice_id: int):
@@ -278,12 +278,8 @@ class Statement:  # pylint:disable=too-many-instance-attributes
     @classmethod
     def _populate_statement_summary(cls, statement: StatementModel, statement_invoices: List[InvoiceModel]) -> dict:
         """Populate statement summary with additional information."""
+        # The previous statement's totals are stored on it, rather than summed from its invoices.
         previous_statement: StatementModel = Statement.get_previous_statement(statement)
-        previous_totals = None
-        if previous_statement:
-            previous_invoices = StatementModel.find_all_payments_and_invoices_for_statement(previous_statement.id)
-            previous_items: dict = PaymentService.create_payment_report_details(purchases=previous_invoices, data=None)
-            previous_totals = PaymentService.get_invoices_totals(previous_items.get('items', None))
 
         latest_payment_date = None
         for invoice in statement_invoices:
@@ -291,8 +287,8 @@ class Statement:  # pylint:disable=too-many-instance-attributes
                 latest_payment_date = invoice.payment_date
 
         return {
-            'lastStatementTotal': previous_totals['fees'] if previous_totals else 0,
-            'lastStatementPaidAmount': previous_totals['paid'] if previous_totals else 0,
+            'lastStatementTotal': float(previous_statement.total_fees) if previous_statement else 0,
+            'lastStatementPaidAmount': float(previous_statement.total_paid) if previous_statement else 0,
             'latestStatementPaymentDate': latest_payment_date.strftime(DT_SHORT_FORMAT) if latest_payment_date else None
         }
 
@@ -349,26 +345,20 @@ class Statement:  # pylint:disable=too-many-instance-attributes
         # This is written outside of the model, because we have multiple model references that need to be included.
         # If we include these references inside of a model, it runs the risk of having circular dependencies.
         # It's easier to build out features if our models don't rely on other models.
-        result = db.session.query(func.sum(InvoiceModel.total - InvoiceModel.paid).label('total_due'),
-                                  func.min(InvoiceModel.overdue_date).label('oldest_overdue_date')) \
-            .join(PaymentAccountModel) \
-            .join(StatementInvoicesModel) \
-            .filter(PaymentAccountModel.auth_account_id == auth_account_id) \
-            .filter(InvoiceModel.invoice_status_code.in_((InvoiceStatus.SETTLEMENT_SCHEDULED.value,
-                                                          InvoiceStatus.PARTIAL.value,
-                                                          InvoiceStatus.APPROVED.value,
-                                                          InvoiceStatus.OVERDUE.value))) \
-            .filter(StatementInvoicesModel.invoice_id == InvoiceModel.id)
+        # The amount owing and oldest overdue date of each statement are kept up to date as its invoices change.
+        result = db.session.query(func.sum(StatementModel.total_due).label('total_due'),
+                                  func.min(StatementModel.oldest_overdue_date).label('oldest_overdue_date')) \
+            .join(PaymentAccountModel, PaymentAccountModel.id == StatementModel.payment_account_id) \
+            .filter(PaymentAccountModel.auth_account_id == auth_account_id)
 
         if statement_id:
-            result = result.filter(StatementInvoicesModel.statement_id == statement_id)
+            result = result.filter(StatementModel.id == statement_id)
 
-        result = result.group_by(InvoiceModel.payment_account_id) \
-            .one_or_none()
+        result = result.one()
 
-        total_due = float(result.total_due) if result else 0
+        total_due = float(result.total_due) if result.total_due else 0
         oldest_overdue_date = result.oldest_overdue_date.strftime('%Y-%m-%d') \
-            if result and result.oldest_overdue_date else None
+            if result.oldest_overdue_date else None
 
         # Unpaid invoice amount total that are not part of a statement yet
         invoices_unpaid_amount = Statement.get_invoices_owing_amount(auth_account_id)
@@ -457,6 +447,7 @@ class Statement:  # pylint:disable=too-many-instance-attributes
         ) for invoice in invoice_ids]
 
         db.session.bulk_save_objects(statement_invoices)
+        StatementModel.refresh_totals([statement.id])
 
         # Create new statement settings for the transition
         latest_settings = StatementSettingsModel.find_latest_settings(str(auth_account_id))
@@ -0,0 +1,49 @@
+# Copyright © 2024 Province of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Serialize responses with camelCase keys.
+
+The convert_to_camel after request hook parses every JSON response, rewrites its keys and dumps it again. Endpoints
+decorated with native_camel_case build their payload with camelCase keys already, so the rewrite is skipped for them.
+"""
+from functools import lru_cache, wraps
+
+import humps
+from flask import g
+from sbc_common_components.utils.camel_case_response import convert_to_camel
+
+
+@lru_cache(maxsize=1024)
+def camelcase(name: str) -> str:
+    """Return the camelCase key for a snake_case name."""
+    return humps.camelize(name)
+
+
+def native_camel_case(f):
+    """Mark the endpoint as returning camelCase keys, so the response isn't rewritten."""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        g.native_camel_case = True
+        return f(*args, **kwargs)
+
+    return decorated
+
+
+def convert_response_to_camel(response):
+    """Rewrite the JSON response keys to camelCase, unless the endpoint returned camelCase keys already.
+
+    Error responses are always rewritten, they are built by the exception handlers rather than the endpoint.
+    """
+    if g.get('native_camel_case') and response.status_code < 400:
+        return response
+    return convert_to_camel(response)
@@ -3,17 +3,24 @@ import re
 from datetime import datetime
 from decimal import Decimal
 from enum import Enum
+from functools import lru_cache
 from typing import Any, Dict, Type
 import cattrs
 from attrs import fields, has
 from cattrs.gen import make_dict_structure_fn, make_dict_unstructure_fn, override
 
+from .camel_case import camelcase
+
 
 class Converter(cattrs.Converter):
     """Addon to cattr converter."""
 
-    def __init__(self, camel_to_snake_case: bool = False, enum_to_value: bool = False):
-        """Initialize function, add in extra unstructure hooks."""
+    def __init__(self, camel_to_snake_case: bool = False, enum_to_value: bool = False,
+                 snake_case_to_camel: bool = False):
+        """Initialize function, add in extra unstructure hooks.
+
+        snake_case_to_camel unstructures to camelCase keys, so the response doesn't need to be rewritten.
+        """
         super().__init__()
         # More from cattrs-extras/blob/master/src/cattrs_extras/converter.py
         self.register_structure_hook(Decimal, self._structure_decimal)
@@ -31,6 +38,12 @@ class Converter(cattrs.Converter):
                 has, self._to_snake_case_structure
             )
 
+        if snake_case_to_camel:
+            self.register_unstructure_hook_factory(
+                has, self._to_camel_case_unstructure
+            )
+            self.register_unstructure_hook(dict, self._unstructure_camel_case_dict)
+
     def _to_snake_case(self, camel_str: str) -> str:
         return re.sub(r'(?<!^)(?=[A-Z])', '_', camel_str).lower()
 
@@ -48,6 +61,21 @@ class Converter(cattrs.Converter):
             }
         )
 
+    def _to_camel_case_unstructure(self, cls):
+        return make_dict_unstructure_fn(
+            cls,
+            self,
+            **{
+                a.name: override(rename=camelcase(a.name))
+                for a in fields(cls)
+            }
+        )
+
+    def _unstructure_camel_case_dict(self, obj: Dict) -> Dict:
+        # Plain dicts (e.g. JSON columns) are rewritten the same way the after request hook would.
+        return {camelcase(key) if isinstance(key, str) else key: self.unstructure(value)
+                for key, value in obj.items()}
+
     def _to_snake_case_structure(self, cls):
         # When structuring the target classes attribute is used for look up on the source, so we need to convert it
         # to camel case.
@@ -89,3 +117,16 @@ class Converter(cattrs.Converter):
             elif val is not None:
                 new_data[key] = val
         return new_data
+
+
+@lru_cache(maxsize=None)
+def get_converter(camel_to_snake_case: bool = False, enum_to_value: bool = False,
+                  snake_case_to_camel: bool = False) -> Converter:
+    """Return a shared converter for the options.
+
+    Building a converter registers its hooks, and the unstructure functions for attrs classes are generated on first
+    use and cached on the converter, so hot paths should share one rather than build a new one per call. Generating
+    a function twice on a race is harmless, so the shared converters are safe to use from any thread.
+    """
+    return Converter(camel_to_snake_case=camel_to_snake_case, enum_to_value=enum_to_value,
+                     snake_case_to_camel=snake_case_to_camel)
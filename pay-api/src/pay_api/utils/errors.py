@@ -62,6 +62,9 @@ class Error(Enum):
 
     PAYMENT_SEARCH_TOO_MANY_RECORDS = 'PAYMENT_SEARCH_TOO_MANY_RECORDS', HTTPStatus.BAD_REQUEST
 
+    INVALID_CURSOR = 'INVALID_CURSOR', HTTPStatus.BAD_REQUEST
+    INVALID_CURSOR_LIMIT = 'INVALID_CURSOR_LIMIT', HTTPStatus.BAD_REQUEST, 'Limit must be at least 1'
+
     DIRECT_PAY_INVALID_RESPONSE = 'DIRECT_PAY_INVALID_RESPONSE', HTTPStatus.BAD_REQUEST
 
     ACCOUNT_EXISTS = 'ACCOUNT_EXISTS', HTTPStatus.BAD_REQUEST
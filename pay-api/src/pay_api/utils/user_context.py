@@ -11,38 +11,89 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-"""User Context to hold request scoped variables."""
+"""User Context to hold request scoped variables.
+
+The context is built once per request and kept in the WSGI environ, the token is only read when a property needs it.
+Outside a request (jobs, the queue) an explicit context can be set with use_user_context.
+"""
 
 import functools
+from contextlib import contextmanager
 from typing import Dict, List
 
-from flask import g, request
+from flask import g, has_app_context, has_request_context, request
 
 from pay_api.utils.enums import Role
 
 
+_REQUEST_CONTEXT_KEY = 'pay_api.user_context'
+
+
 def _get_context():
-    """Return User context."""
-    return UserContext()
+    """Return User context, the explicit context if one is set, else the context for the request."""
+    if has_app_context() and (context := g.get('user_context')) is not None:
+        return context
+    if not has_request_context():
+        return UserContext()
+    if (context := request.environ.get(_REQUEST_CONTEXT_KEY)) is None:
+        context = request.environ[_REQUEST_CONTEXT_KEY] = UserContext()
+    return context
+
+
+@contextmanager
+def use_user_context(context: 'UserContext'):
+    """Use the context for decorated calls in the block, for work outside a request such as jobs and the queue."""
+    previous = g.get('user_context')
+    g.user_context = context
+    try:
+        yield context
+    finally:
+        g.user_context = previous
 
 
 class UserContext:  # pylint: disable=too-many-instance-attributes
     """Object to hold request scoped user context."""
 
-    def __init__(self):
-        """Return a User Context object."""
-        token_info: Dict = _get_token_info()
-        self._user_name: str = token_info.get('username', None) or token_info.get('preferred_username', None)
-        self._first_name: str = token_info.get('firstname', None)
-        self._bearer_token: str = _get_token()
-        self._roles: list = token_info.get('realm_access', None).get('roles', None) if 'realm_access' in token_info \
+    def __init__(self, token_info: Dict = None, bearer_token: str = None):
+        """Return a User Context object, the token is read from the request unless token_info is passed in."""
+        self._explicit = token_info is not None
+        self._token_info_override = token_info
+        self._bearer_token_override = bearer_token
+
+    @functools.cached_property
+    def _token_info(self) -> Dict:
+        return self._token_info_override if self._explicit else _get_token_info()
+
+    @functools.cached_property
+    def _user_name(self) -> str:
+        return self._token_info.get('username', None) or self._token_info.get('preferred_username', None)
+
+    @functools.cached_property
+    def _roles(self) -> list:
+        return self._token_info.get('realm_access', None).get('roles', None) if 'realm_access' in self._token_info \
             else None
-        self._sub: str = token_info.get('sub', None)
-        self._login_source: str = token_info.get('loginSource', None)
-        self._account_id: str = get_auth_account_id()
-        self._name = token_info.get('name', None)
-        self._product_code: str = token_info.get('product_code', None)
-        self._permission = _get_permission()
+
+    @functools.cached_property
+    def _role_set(self) -> frozenset:
+        return frozenset(self._roles or ())
+
+    @functools.cached_property
+    def _bearer_token(self) -> str:
+        return self._bearer_token_override if self._explicit else _get_token()
+
+    @property
+    def _login_source(self) -> str:
+        return self._token_info.get('loginSource', None)
+
+    @property
+    def _account_id(self) -> str:
+        # Not stored, check_auth sets the account on g part way through the request.
+        return self._token_info.get('Account-Id', None) if self._explicit else get_auth_account_id()
+
+    @property
+    def _permission(self):
+        # Not stored, check_auth sets the permissions on g part way through the request.
+        return [] if self._explicit else _get_permission()
 
     @property
     def user_name(self) -> str:
@@ -61,7 +112,7 @@ class UserContext:  # pylint: disable=too-many-instance-attributes
     @property
     def first_name(self) -> str:
         """Return the user_name."""
-        return self._first_name
+        return self._token_info.get('firstname', None)
 
     @property
     def bearer_token(self) -> str:
@@ -76,7 +127,7 @@ class UserContext:  # pylint: disable=too-many-instance-attributes
     @property
     def sub(self) -> str:
         """Return the subject."""
-        return self._sub
+        return self._token_info.get('sub', None)
 
     @property
     def account_id(self) -> str:
@@ -88,18 +139,18 @@ class UserContext:  # pylint: disable=too-many-instance-attributes
         """Return the permission."""
         return self._permission
 
-    @property
+    @functools.cached_property
     def product_code(self) -> str:
         """Return the product_code."""
-        return self._product_code
+        return self._token_info.get('product_code', None)
 
     def has_role(self, role_name: str) -> bool:
         """Return True if the user has the role."""
-        return role_name in self._roles
+        return role_name in self._role_set
 
     def is_staff(self) -> bool:
         """Return True if the user is staff user."""
-        return Role.STAFF.value in self._roles if self._roles else False
+        return Role.STAFF.value in self._role_set
 
     def can_view_bank_info(self) -> bool:
         """Return True if the user is staff user."""
@@ -111,16 +162,16 @@ class UserContext:  # pylint: disable=too-many-instance-attributes
 
     def is_system(self) -> bool:
         """Return True if the user is system user."""
-        return Role.SYSTEM.value in self._roles if self._roles else False
+        return Role.SYSTEM.value in self._role_set
 
     def is_sandbox(self) -> bool:
         """Return True if the user token has sandbox role."""
-        return Role.SANDBOX.value in self._roles if self._roles else False
+        return Role.SANDBOX.value in self._role_set
 
     @property
     def name(self) -> str:
         """Return the name."""
-        return self._name
+        return self._token_info.get('name', None)
 
 
 def user_context(function):
@@ -17,6 +17,8 @@
 A simple decorator to add the options method to a Request Class.
 """
 import ast
+import base64
+import binascii
 import calendar
 from datetime import datetime, timedelta, timezone
 from typing import Dict
@@ -32,7 +34,7 @@ from flask import current_app
 from pay_api.services.code import Code as CodeService
 
 from .constants import DT_SHORT_FORMAT
-from .converter import Converter
+from .converter import get_converter
 from .enums import Code, CorpType, Product, StatementFrequency
 
 
@@ -298,6 +300,21 @@ def get_topic_for_corp_type(corp_type: str):
 def unstructure_schema_items(schema, items):
     """Return unstructured results by schema."""
     results = [schema.from_row(item) for item in items]
-    converter = Converter()
+    converter = get_converter()
 
     return converter.unstructure(results)
+
+
+def encode_cursor(last_id: int) -> str:
+    """Return an opaque cursor for keyset pagination."""
+    return base64.urlsafe_b64encode(str(last_id).encode('utf-8')).decode('utf-8')
+
+
+def decode_cursor(cursor: str) -> int:
+    """Return the last seen id from an opaque cursor, raises ValueError if the cursor is invalid."""
+    if not cursor:
+        return None
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode('utf-8')).decode('utf-8'))
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError(f'Invalid cursor: {cursor}') from e
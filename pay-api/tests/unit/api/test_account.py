@@ -111,6 +111,42 @@ def test_account_purchase_history_pagination(session, client, jwt, app):
     assert len(rv.json.get('items')) == 5
 
 
+def test_account_purchase_history_cursor_pagination(session, client, jwt, app):
+    """Assert that cursor pagination walks through every invoice without repeating."""
+    token = jwt.create_jwt(get_claims(), token_header)
+    headers = {'Authorization': f'Bearer {token}', 'content-type': 'application/json'}
+
+    for i in range(7):
+        rv = client.post('/api/v1/payment-requests', data=json.dumps(get_payment_request()), headers=headers)
+
+    invoice: Invoice = Invoice.find_by_id(rv.json.get('id'))
+    pay_account: PaymentAccount = PaymentAccount.find_by_id(invoice.payment_account_id)
+    url = f'/api/v1/accounts/{pay_account.auth_account_id}/payments/queries?limit=5'
+
+    rv = client.post(f'{url}&cursor=&includeTotal=true', data=json.dumps({}), headers=headers)
+    assert rv.status_code == 200
+    assert rv.json.get('total') == 7
+    assert len(rv.json.get('items')) == 5
+    assert rv.json.get('nextCursor')
+    first_page_ids = [item['id'] for item in rv.json.get('items')]
+    assert first_page_ids == sorted(first_page_ids, reverse=True)
+
+    rv = client.post(f'{url}&cursor={rv.json.get("nextCursor")}', data=json.dumps({}), headers=headers)
+    assert rv.status_code == 200
+    assert 'total' not in rv.json
+    assert len(rv.json.get('items')) == 2
+    assert not rv.json.get('nextCursor')
+    assert not set(first_page_ids) & {item['id'] for item in rv.json.get('items')}
+
+    rv = client.post(f'{url}&cursor=not-a-cursor', data=json.dumps({}), headers=headers)
+    assert rv.status_code == 400
+
+    for limit in (0, -1):
+        rv = client.post(f'/api/v1/accounts/{pay_account.auth_account_id}/payments/queries?limit={limit}&cursor=',
+                         data=json.dumps({}), headers=headers)
+        assert rv.status_code == 400
+
+
 def test_account_purchase_history_with_service_account(session, client, jwt, app):
     """Assert that purchase history returns only invoices for that product."""
     # Point CSO fee schedule to a valid distribution code.
@@ -19,6 +19,8 @@ Test-Suite to ensure that the /ops endpoint is working as expected.
 """
 from sqlalchemy.exc import SQLAlchemyError
 from pay_api.models import db
+from pay_api.utils.enums import Role
+from tests.utilities.base_test import get_claims, token_header
 
 
 def test_ops_healthz_success(client):
@@ -46,3 +48,18 @@ def test_ops_readyz(client):
 
     assert rv.status_code == 200
     assert rv.json == {'message': 'api is ready'}
+
+
+def test_ops_metrics(client, jwt):
+    """Asserts that the cache metrics are exposed to system users only."""
+    rv = client.get('/ops/metrics')
+    assert rv.status_code == 401
+
+    token = jwt.create_jwt(get_claims(), token_header)
+    rv = client.get('/ops/metrics', headers={'Authorization': f'Bearer {token}'})
+    assert rv.status_code == 401
+
+    token = jwt.create_jwt(get_claims(roles=[Role.SYSTEM.value]), token_header)
+    rv = client.get('/ops/metrics', headers={'Authorization': f'Bearer {token}'})
+    assert rv.status_code == 200
+    assert 'hitRatio' in rv.json['authorizationCache']
@@ -300,7 +300,7 @@ def test_payment_delete_when_paybc_is_down(session, client, jwt, app):
     rv = client.post('/api/v1/payment-requests', data=json.dumps(get_payment_request()), headers=headers)
     pay_id = rv.json.get('id')
 
-    with patch('pay_api.services.oauth_service.requests.post', side_effect=ConnectionError('mocked error')):
+    with patch('pay_api.services.http_client.requests.Session.post', side_effect=ConnectionError('mocked error')):
         rv = client.delete(f'/api/v1/payment-requests/{pay_id}', headers=headers)
         assert rv.status_code == 202
 
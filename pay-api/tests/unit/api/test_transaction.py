@@ -294,7 +294,7 @@ def test_transaction_patch_when_paybc_down(session, client, jwt, app):
     rv = client.post(f'/api/v1/payment-requests/{invoice_id}/transactions', data=json.dumps(data),
                      headers={'content-type': 'application/json'})
     txn_id = rv.json.get('id')
-    with patch('pay_api.services.oauth_service.requests.post', side_effect=ConnectionError('mocked error')):
+    with patch('pay_api.services.http_client.requests.Session.post', side_effect=ConnectionError('mocked error')):
         rv = client.patch(
             f'/api/v1/payment-requests/{invoice_id}/transactions/{txn_id}',
             data=json.dumps({'receipt_number': receipt_number}),
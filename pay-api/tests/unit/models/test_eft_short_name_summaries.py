@@ -0,0 +1,64 @@
+# Copyright © 2024 Province of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests to assure the EFT short name summaries model.
+
+Test-Suite to ensure that the EFT short name summaries are kept up to date as credits, links and transactions change.
+"""
+from datetime import datetime
+
+from pay_api.models import EFTCredit, EFTShortnameSummaries, EFTTransaction, db
+from pay_api.utils.enums import EFTFileLineType, EFTProcessStatus, EFTShortnameStatus
+from tests.utilities.base_test import factory_eft_file, factory_eft_shortname, factory_eft_shortname_link
+
+
+def _summary(short_name_id: int) -> EFTShortnameSummaries:
+    db.session.expire_all()
+    return db.session.get(EFTShortnameSummaries, short_name_id)
+
+
+def test_eft_short_name_summaries(session):
+    """Assert the summary is refreshed as credits, links and transactions are saved."""
+    eft_short_name = factory_eft_shortname(short_name='TESTSHORTNAME').save()
+    summary = _summary(eft_short_name.id)
+    assert summary.credits_remaining == 0
+    assert summary.linked_accounts_count == 0
+    assert summary.last_payment_received_date is None
+
+    eft_file = factory_eft_file()
+    deposit_date = datetime(2024, 8, 1, 10, 0)
+    eft_transaction = EFTTransaction(file_id=eft_file.id, line_number=1, short_name_id=eft_short_name.id,
+                                     line_type=EFTFileLineType.TRANSACTION.value, deposit_date=deposit_date,
+                                     status_code=EFTProcessStatus.IN_PROGRESS.value).save()
+    eft_credit = EFTCredit(eft_file_id=eft_file.id, short_name_id=eft_short_name.id, amount=100,
+                           remaining_amount=100, eft_transaction_id=eft_transaction.id).save()
+    link = factory_eft_shortname_link(short_name_id=eft_short_name.id).save()
+    summary = _summary(eft_short_name.id)
+    assert summary.credits_remaining == 100
+    assert summary.linked_accounts_count == 1
+    assert summary.last_payment_received_date is None
+
+    # Bulk updates skip the session events, the same as the EFT reconciliation.
+    db.session.query(EFTTransaction).filter(EFTTransaction.file_id == eft_file.id) \
+        .update({EFTTransaction.status_code: EFTProcessStatus.COMPLETED.value}, synchronize_session='fetch')
+    EFTShortnameSummaries.refresh_for_file(eft_file.id)
+    eft_credit.remaining_amount = 25
+    eft_credit.save()
+    summary = _summary(eft_short_name.id)
+    assert summary.credits_remaining == 25
+    assert summary.last_payment_received_date == deposit_date
+
+    link.status_code = EFTShortnameStatus.INACTIVE.value
+    link.save()
+    assert _summary(eft_short_name.id).linked_accounts_count == 0
@@ -17,10 +17,12 @@
 Test-Suite to ensure that the auth Service is working as expected.
 """
 
+from unittest.mock import patch
+
 import pytest
 from werkzeug.exceptions import HTTPException
 
-from pay_api.services.auth import check_auth
+from pay_api.services.auth import auth_cache, check_auth
 from pay_api.utils.constants import EDIT_ROLE, VIEW_ROLE
 
 
@@ -92,3 +94,45 @@ def test_auth_for_client_user_roles_for_error(session, public_user_mock, roles,
     with pytest.raises(HTTPException) as excinfo:
         check_auth('CP0000000', param_name=roles)
         assert excinfo.exception.code == 403
+
+
+def test_auth_cache(session, app, monkeypatch):
+    """Assert authorization responses are cached per user and account, and can be invalidated."""
+    def token_info():  # pylint: disable=unused-argument; mocks of library methods
+        return {
+            'username': 'public user',
+            'sub': 'abc-123',
+            'realm_access': {
+                'roles': [
+                    'public_user',
+                    'edit'
+                ]
+            }
+        }
+
+    monkeypatch.setattr('pay_api.utils.user_context._get_token', lambda: 'test')
+    monkeypatch.setattr('pay_api.utils.user_context._get_token_info', token_info)
+    app.config['AUTH_CACHE_TTL'] = 60
+    try:
+        with patch('pay_api.services.auth.RestService.get') as mock_get:
+            mock_get.return_value.json.return_value = {'roles': [EDIT_ROLE, VIEW_ROLE], 'account': {'id': 1}}
+            auth_response = check_auth(None, account_id='1', one_of_roles=[EDIT_ROLE])
+            auth_response['account']['contact'] = 'modified by caller'
+            auth_response = check_auth(None, account_id='1', contains_role=VIEW_ROLE)
+            assert mock_get.call_count == 1
+            assert 'contact' not in auth_response['account']
+
+            check_auth(None, account_id='2', one_of_roles=[EDIT_ROLE])
+            assert mock_get.call_count == 2
+
+            auth_cache.invalidate(account_id='1')
+            check_auth(None, account_id='1', one_of_roles=[EDIT_ROLE])
+            check_auth(None, account_id='2', one_of_roles=[EDIT_ROLE])
+            assert mock_get.call_count == 3
+
+        stats = auth_cache.stats()
+        assert stats['hits'] >= 2
+        assert 0 < stats['hit_ratio'] < 1
+    finally:
+        app.config['AUTH_CACHE_TTL'] = 0
+        auth_cache.invalidate()
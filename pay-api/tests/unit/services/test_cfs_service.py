@@ -19,10 +19,13 @@ Test-Suite to ensure that the CFS Service layer is working as expected.
 from decimal import Decimal
 from unittest.mock import patch
 
-from requests import ConnectTimeout
+import pytest
+from requests import ConnectTimeout, HTTPError
+
 from pay_api.models import DistributionCode as DistributionCodeModel
 from pay_api.models import PaymentLineItem as PaymentLineItemModel
-from pay_api.services.cfs_service import CFSService
+from pay_api.services.cfs_service import CFSService, cfs_token_manager
+from pay_api.utils.enums import AuthHeaderType, ContentType
 
 
 cfs_service = CFSService()
@@ -35,7 +38,7 @@ def test_validate_bank_account_valid(session):
         'bankTransitNumber': '00720',
         'bankAccountNumber': '1234567',
     }
-    with patch('pay_api.services.oauth_service.requests.post') as mock_post:
+    with patch('pay_api.services.http_client.requests.Session.post') as mock_post:
         # Configure the mock to return a response with an OK status code.
         mock_post.return_value.ok = True
         mock_post.return_value.status_code = 200
@@ -63,7 +66,7 @@ def test_validate_bank_account_invalid(session):
         'bankTransitNumber': '00720',
         'bankAccountNumber': '1234567',
     }
-    with patch('pay_api.services.oauth_service.requests.post') as mock_post:
+    with patch('pay_api.services.http_client.requests.Session.post') as mock_post:
         # Configure the mock to return a response with an OK status code.
         mock_post.return_value.ok = True
         mock_post.return_value.status_code = 400
@@ -95,7 +98,7 @@ def test_validate_bank_account_exception(session):
         'bankTransitNumber': 222,
         'bankAccountNumber': 33333333
     }
-    with patch('pay_api.services.oauth_service.requests.post', side_effect=ConnectTimeout('mocked error')):
+    with patch('pay_api.services.http_client.requests.Session.post', side_effect=ConnectTimeout('mocked error')):
         # Configure the mock to return a response with an OK status code.
         bank_details = cfs_service.validate_bank_account(input_bank_details)
         assert bank_details.get('status_code') == 503
@@ -133,3 +136,24 @@ def test_ensure_totals_quantized(session):
     lines = cfs_service._build_lines(payment_line_items)  # pylint: disable=protected-access
     # Same distribution code for filing fees and service fees.
     assert float(lines[0]['unit_price']) == 2.8
+
+
+def test_access_token_cached(session):
+    """Assert the CFS token is requested once and requested again after CFS rejects it."""
+    cfs_token_manager.invalidate()
+    with patch.object(CFSService, 'get_token') as mock_get_token:
+        mock_get_token.return_value.json.return_value = {'access_token': 'token-1', 'expires_in': 3600}
+        assert CFSService.get_access_token() == 'token-1'
+        assert CFSService.get_access_token() == 'token-1'
+        assert mock_get_token.call_count == 1
+
+        with patch('pay_api.services.http_client.requests.Session.get') as mock_get:
+            mock_get.return_value.status_code = 401
+            mock_get.return_value.raise_for_status.side_effect = HTTPError(response=mock_get.return_value)
+            with pytest.raises(HTTPError):
+                CFSService.get('http://localhost/cfs', 'token-1', AuthHeaderType.BEARER, ContentType.JSON)
+
+        mock_get_token.return_value.json.return_value = {'access_token': 'token-2', 'expires_in': 3600}
+        assert CFSService.get_access_token() == 'token-2'
+        assert mock_get_token.call_count == 2
+    cfs_token_manager.invalidate()
@@ -233,7 +233,7 @@ def test_process_cfs_refund_duplicate_refund(session, monkeypatch):
     invoice_reference.save()
     direct_pay_service = DirectPayService()
 
-    with patch('pay_api.services.oauth_service.requests.post') as mock_post:
+    with patch('pay_api.services.http_client.requests.Session.post') as mock_post:
         mock_post.side_effect = HTTPError()
         mock_post.return_value.ok = False
         mock_post.return_value.status_code = 400
@@ -247,7 +247,7 @@ def test_process_cfs_refund_duplicate_refund(session, monkeypatch):
             direct_pay_service.process_cfs_refund(invoice, payment_account, None)
             assert invoice.invoice_status_code == InvoiceStatus.PAID.value
 
-    with patch('pay_api.services.oauth_service.requests.post') as mock_post:
+    with patch('pay_api.services.http_client.requests.Session.post') as mock_post:
         mock_post.return_value.ok = True
         mock_post.return_value.status_code = 200
         mock_post.return_value.json.return_value = {
@@ -20,11 +20,13 @@ Test-Suite to ensure that the FeeSchedule Service is working as expected.
 from datetime import datetime, timedelta, timezone
 
 import pytest
+from sqlalchemy import update
+from sqlalchemy.exc import MultipleResultsFound
 
 from pay_api import services
 from pay_api.models import CorpType, FeeCode
 from pay_api.models import FeeSchedule as FeesScheduleModel
-from pay_api.models import FilingType
+from pay_api.models import FilingType, db
 from pay_api.utils.errors import Error
 
 
@@ -246,6 +248,76 @@ def test_fee_schedule_with_service_fees_for_basic_user(session):
     assert fee_schedule.service_fees == 10
 
 
+def test_fee_schedule_index(session, app):
+    """Assert that fee lookups are served from the index, and that saving a fee schedule invalidates it."""
+    from pay_api.services.fee_schedule_index import fee_schedule_index
+    app.config['FEE_SCHEDULE_INDEX_ENABLED'] = True
+    try:
+        create_linked_data(FILING_TYPE_CODE, CORP_TYPE_CODE, FEE_CODE, priority_fee='PR001')
+        FeesScheduleModel(filing_type_code=FILING_TYPE_CODE,
+                          corp_type_code=CORP_TYPE_CODE,
+                          fee_code=FEE_CODE,
+                          priority_fee_code='PR001').save()
+
+        fee_schedule = services.FeeSchedule.find_by_corp_type_and_filing_type(CORP_TYPE_CODE, FILING_TYPE_CODE,
+                                                                              None, is_priority=True)
+        version = fee_schedule_index.version
+        assert fee_schedule.fee_schedule_id is not None
+        assert fee_schedule.priority_fee > 0
+
+        # Served from the index without rebuilding it.
+        services.FeeSchedule.find_by_corp_type_and_filing_type(CORP_TYPE_CODE, FILING_TYPE_CODE,
+                                                               datetime.now(tz=timezone.utc).strftime('%Y-%m-%d'))
+        assert fee_schedule_index.version == version
+        items = services.FeeSchedule.find_all(corp_type=CORP_TYPE_CODE)['items']
+        assert [item['fee_schedule_id'] for item in items] == [fee_schedule.fee_schedule_id]
+        assert not services.FeeSchedule.find_all(corp_type=CORP_TYPE_CODE, description='does not exist')['items']
+
+        fee_code = FeeCode.find_by_code(FEE_CODE)
+        fee_code.amount = 999
+        fee_code.save()
+        fee_schedule = services.FeeSchedule.find_by_corp_type_and_filing_type(CORP_TYPE_CODE, FILING_TYPE_CODE, None)
+        assert fee_schedule_index.version > version
+        assert fee_schedule.fee_amount == 999
+    finally:
+        app.config['FEE_SCHEDULE_INDEX_ENABLED'] = False
+        fee_schedule_index.invalidate()
+
+
+def test_fee_schedule_index_external_change(session, app):
+    """Assert that the index is rebuilt when a column changes outside the ORM, and overlapping schedules raise."""
+    from pay_api.services.fee_schedule_index import fee_schedule_index
+    app.config['FEE_SCHEDULE_INDEX_ENABLED'] = True
+    app.config['FEE_SCHEDULE_INDEX_TTL'] = 0
+    try:
+        create_linked_data(FILING_TYPE_CODE, CORP_TYPE_CODE, FEE_CODE, priority_fee='PR001')
+        fee_schedule = FeesScheduleModel(filing_type_code=FILING_TYPE_CODE,
+                                         corp_type_code=CORP_TYPE_CODE,
+                                         fee_code=FEE_CODE)
+        fee_schedule.save()
+        services.FeeSchedule.find_by_corp_type_and_filing_type(CORP_TYPE_CODE, FILING_TYPE_CODE, None)
+        version = fee_schedule_index.version
+
+        # Same as a migration or another pod, the ORM events don't fire.
+        db.session.execute(update(FeesScheduleModel.__table__)
+                           .where(FeesScheduleModel.fee_schedule_id == fee_schedule.fee_schedule_id)
+                           .values(priority_fee_code='PR001'))
+        fee_schedule = services.FeeSchedule.find_by_corp_type_and_filing_type(CORP_TYPE_CODE, FILING_TYPE_CODE,
+                                                                              None, is_priority=True)
+        assert fee_schedule_index.version > version
+        assert fee_schedule.priority_fee == 10
+
+        FeesScheduleModel(filing_type_code=FILING_TYPE_CODE,
+                          corp_type_code=CORP_TYPE_CODE,
+                          fee_code=FEE_CODE).save()
+        with pytest.raises(MultipleResultsFound):
+            fee_schedule_index.find_by_corp_type_and_filing_type(CORP_TYPE_CODE, FILING_TYPE_CODE)
+    finally:
+        app.config['FEE_SCHEDULE_INDEX_ENABLED'] = False
+        app.config.pop('FEE_SCHEDULE_INDEX_TTL')
+        fee_schedule_index.invalidate()
+
+
 def create_linked_data(
         filing_type_code: str,
         corp_type_code: str,
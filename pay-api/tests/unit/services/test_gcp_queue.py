@@ -27,7 +27,7 @@ import pytest
 from pay_api import create_app
 from pay_api.services import gcp_queue_publisher
 from pay_api.services.payment_transaction import PaymentToken
-from pay_api.services.gcp_queue_publisher import QueueMessage, publish_to_queue
+from pay_api.services.gcp_queue_publisher import QueueMessage, publish_batch_to_queue, publish_to_queue
 from pay_api.utils.enums import TransactionStatus
 
 
@@ -75,6 +75,26 @@ def test_publish_to_queue_no_topic(app, mock_credentials, mock_publisher_client)
             mock_publisher.publish.assert_not_called()
 
 
+def test_publish_batch_to_queue(app):
+    """Assert a batch is published without waiting on each message, and errors resume the ordering key."""
+    with patch('pay_api.services.gcp_queue_publisher.queue') as mock_queue:
+        with app.app_context():
+            queue_messages = [QueueMessage(source='test-source', message_type='test-message-type',
+                                           payload={'fileName': f'file{index}'},
+                                           topic='projects/project-id/topics/topic', ordering_key='CAS')
+                              for index in range(3)]
+            publish_batch_to_queue(queue_messages)
+            assert mock_queue.publisher.publish.call_count == 3
+            mock_queue.publisher.publish.assert_called_with('projects/project-id/topics/topic', ANY,
+                                                            ordering_key='CAS')
+            mock_queue.publish.assert_not_called()
+
+            mock_queue.publisher.publish.return_value.result.side_effect = Exception('Publish failed')
+            with pytest.raises(Exception):
+                publish_batch_to_queue(queue_messages)
+            mock_queue.publisher.resume_publish.assert_called_with('projects/project-id/topics/topic', 'CAS')
+
+
 @pytest.mark.skip(reason='ADHOC only test.')
 def test_gcp_pubsub_connectivity(monkeypatch):
     """Test that a queue can publish to gcp pubsub."""
@@ -29,7 +29,7 @@ from pay_api.utils.enums import AuthHeaderType, ContentType
 def test_get(app):
     """Test Get."""
     with app.app_context():
-        mock_get_token = patch('pay_api.services.oauth_service.requests.Session.get')
+        mock_get_token = patch('pay_api.services.http_client.requests.Session.get')
         mock_get = mock_get_token.start()
         mock_get.return_value = Mock(status_code=201)
         mock_get.return_value.json.return_value = {}
@@ -44,7 +44,7 @@ def test_get(app):
 def test_post(app):
     """Test Post."""
     with app.app_context():
-        mock_get_token = patch('pay_api.services.oauth_service.requests.post')
+        mock_get_token = patch('pay_api.services.http_client.requests.Session.post')
         mock_get = mock_get_token.start()
         mock_get.return_value = Mock(status_code=201)
         mock_get.return_value.json.return_value = {}
@@ -59,7 +59,7 @@ def test_post(app):
 def test_get_with_connection_errors(app):
     """Test Get with errors."""
     with app.app_context():
-        mock_get_token = patch('pay_api.services.oauth_service.requests.Session.get')
+        mock_get_token = patch('pay_api.services.http_client.requests.Session.get')
         mock_get = mock_get_token.start()
         mock_get.side_effect = HTTPError()
         mock_get.return_value.json.return_value = {}
@@ -68,11 +68,11 @@ def test_get_with_connection_errors(app):
         assert excinfo.type == HTTPError
         mock_get_token.stop()
 
-        with patch('pay_api.services.oauth_service.requests.Session.get', side_effect=ConnectionError('mocked error')):
+        with patch('pay_api.services.http_client.requests.Session.get', side_effect=ConnectionError('mocked error')):
             with pytest.raises(ServiceUnavailableException) as excinfo:
                 OAuthService.get('http://google.com/', '', AuthHeaderType.BEARER, ContentType.JSON)
             assert excinfo.type == ServiceUnavailableException
-        with patch('pay_api.services.oauth_service.requests.Session.get', side_effect=ConnectTimeout('mocked error')):
+        with patch('pay_api.services.http_client.requests.Session.get', side_effect=ConnectTimeout('mocked error')):
             with pytest.raises(ServiceUnavailableException) as excinfo:
                 OAuthService.get('http://google.com/', '', AuthHeaderType.BEARER, ContentType.JSON)
             assert excinfo.type == ServiceUnavailableException
@@ -81,7 +81,7 @@ def test_get_with_connection_errors(app):
 def test_post_with_connection_errors(app):
     """Test Get with errors."""
     with app.app_context():
-        mock_get_token = patch('pay_api.services.oauth_service.requests.post')
+        mock_get_token = patch('pay_api.services.http_client.requests.Session.post')
         mock_get = mock_get_token.start()
         mock_get.side_effect = HTTPError()
         mock_get.return_value.json.return_value = {}
@@ -90,11 +90,31 @@ def test_post_with_connection_errors(app):
         assert excinfo.type == HTTPError
         mock_get_token.stop()
 
-        with patch('pay_api.services.oauth_service.requests.post', side_effect=ConnectionError('mocked error')):
+        with patch('pay_api.services.http_client.requests.Session.post', side_effect=ConnectionError('mocked error')):
             with pytest.raises(ServiceUnavailableException) as excinfo:
                 OAuthService.post('http://google.com/', '', AuthHeaderType.BEARER, ContentType.JSON, {})
             assert excinfo.type == ServiceUnavailableException
-        with patch('pay_api.services.oauth_service.requests.post', side_effect=ConnectTimeout('mocked error')):
+        with patch('pay_api.services.http_client.requests.Session.post', side_effect=ConnectTimeout('mocked error')):
             with pytest.raises(ServiceUnavailableException) as excinfo:
                 OAuthService.post('http://google.com/', '', AuthHeaderType.BEARER, ContentType.JSON, {})
             assert excinfo.type == ServiceUnavailableException
+
+
+def test_pooled_sessions(app):
+    """Assert sessions are reused per host and retry policy, and metrics are recorded per host."""
+    from pay_api.services.http_client import RETRY_ON_NOT_FOUND, http_client
+    with app.app_context():
+        session = http_client.get_session('http://pooled.example.com/api/v1/one')
+        assert session is http_client.get_session('http://pooled.example.com/api/v1/two')
+        assert session is not http_client.get_session('http://pooled.example.com/api/v1/one', RETRY_ON_NOT_FOUND)
+        assert session is not http_client.get_session('http://other.example.com/api/v1/one')
+
+        with patch('pay_api.services.http_client.requests.Session.get') as mock_get:
+            mock_get.return_value = Mock(status_code=200)
+            OAuthService.get('http://pooled.example.com/api/v1/one', '', AuthHeaderType.BEARER, ContentType.JSON)
+            OAuthService.get('http://pooled.example.com/api/v1/two', '', AuthHeaderType.BEARER, ContentType.JSON)
+
+        stats = http_client.stats()['http://pooled.example.com']
+        assert stats['requests'] == 2
+        assert stats['in_flight'] == 0
+        assert stats['max_in_flight'] == 1
@@ -16,6 +16,8 @@
 
 Test-Suite to ensure that the FeeSchedule Service is working as expected.
 """
+import csv
+import io
 from datetime import datetime, timezone
 
 import pytest
@@ -211,6 +213,31 @@ def test_create_payment_report_csv(session, rest_call_mock):
     assert True  # If no error, then good
 
 
+def test_create_payment_report_csv_stream(session, app):
+    """Assert that the streamed payment report is chunked and capped by the default total with no filter."""
+    payment_account = factory_payment_account()
+    payment_account.save()
+    auth_account_id = PaymentAccount.find_by_id(payment_account.id).auth_account_id
+
+    for i in range(20):
+        invoice = factory_invoice(payment_account)
+        invoice.save()
+        factory_invoice_reference(invoice.id).save()
+
+    chunk_size = app.config['TRANSACTION_REPORT_STREAM_CHUNK_SIZE']
+    app.config['TRANSACTION_REPORT_STREAM_CHUNK_SIZE'] = 3
+    chunks = list(Payment_service.create_payment_report_csv_stream(auth_account_id=auth_account_id,
+                                                                   search_filter={}))
+    app.config['TRANSACTION_REPORT_STREAM_CHUNK_SIZE'] = chunk_size
+
+    # Header, then chunks of 3, 3, 3 and 1 as TRANSACTION_REPORT_DEFAULT_TOTAL is 10 for tests.
+    assert len(chunks) == 5
+    assert chunks[0].startswith('Transaction,Transaction Details')
+    rows = list(csv.reader(io.StringIO(''.join(chunks[1:]))))
+    assert len(rows) == 10
+    assert len({row[11] for row in rows}) == 10
+
+
 def test_create_payment_report_pdf(session, rest_call_mock):
     """Assert that the create payment report is working."""
     payment_account = factory_payment_account()
@@ -126,17 +126,18 @@ def test_create_payment_record_rollback_on_paybc_connection_error(session, publi
     factory_payment_account()
 
     # Mock here that the invoice update fails here to test the rollback scenario
-    with patch('pay_api.services.oauth_service.requests.post', side_effect=ConnectionError('mocked error')):
+    with patch('pay_api.services.http_client.requests.Session.post', side_effect=ConnectionError('mocked error')):
         with pytest.raises(ServiceUnavailableException) as excinfo:
             PaymentService.create_invoice(get_payment_request(), get_auth_basic_user())
         assert excinfo.type == ServiceUnavailableException
 
-    with patch('pay_api.services.oauth_service.requests.post', side_effect=ConnectTimeout('mocked error')):
+    with patch('pay_api.services.http_client.requests.Session.post', side_effect=ConnectTimeout('mocked error')):
         with pytest.raises(ServiceUnavailableException) as excinfo:
             PaymentService.create_invoice(get_payment_request(), get_auth_basic_user())
         assert excinfo.type == ServiceUnavailableException
 
-    with patch('pay_api.services.oauth_service.requests.post', side_effect=HTTPError('mocked error')) as post_mock:
+    with patch('pay_api.services.http_client.requests.Session.post',
+               side_effect=HTTPError('mocked error')) as post_mock:
         post_mock.status_Code = 503
         with pytest.raises(HTTPError) as excinfo:
             PaymentService.create_invoice(get_payment_request(), get_auth_basic_user())
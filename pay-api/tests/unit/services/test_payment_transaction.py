@@ -385,11 +385,11 @@ def test_transaction_update_on_paybc_connection_error(session):
     from requests.exceptions import ConnectionError, ConnectTimeout
 
     # Mock here that the invoice update fails here to test the rollback scenario
-    with patch('pay_api.services.oauth_service.requests.post', side_effect=ConnectionError('mocked error')):
+    with patch('pay_api.services.http_client.requests.Session.post', side_effect=ConnectionError('mocked error')):
         transaction = PaymentTransactionService.update_transaction(transaction.id,
                                                                    pay_response_url=None)
         assert transaction.pay_system_reason_code == 'SERVICE_UNAVAILABLE'
-    with patch('pay_api.services.oauth_service.requests.post', side_effect=ConnectTimeout('mocked error')):
+    with patch('pay_api.services.http_client.requests.Session.post', side_effect=ConnectTimeout('mocked error')):
         transaction = PaymentTransactionService.update_transaction(transaction.id,
                                                                    pay_response_url=None)
         assert transaction.pay_system_reason_code == 'SERVICE_UNAVAILABLE'
@@ -698,3 +698,44 @@ def localize_date(date: datetime):
     """Localize date object by adding timezone information."""
     pst = pytz.timezone('America/Vancouver')
     return pst.localize(date)
+
+
+def test_statement_totals(session):
+    """Assert the statement totals are refreshed as its invoices are linked and paid."""
+    payment_account = factory_payment_account(payment_method_code=PaymentMethod.EFT.value)
+    payment_account.save()
+    settings_model = factory_statement_settings(payment_account_id=payment_account.id,
+                                                frequency=StatementFrequency.MONTHLY.value)
+    statement_model = factory_statement(payment_account_id=payment_account.id,
+                                        frequency=StatementFrequency.MONTHLY.value,
+                                        statement_settings_id=settings_model.id)
+    assert statement_model.total_fees == 0
+    assert statement_model.total_due == 0
+
+    overdue_date = datetime.now(tz=timezone.utc) - timedelta(days=5)
+    invoice_1 = factory_invoice(payment_account, payment_method_code=PaymentMethod.EFT.value,
+                                status_code=InvoiceStatus.OVERDUE.value, total=200, service_fees=1.5, paid=0)
+    invoice_1.overdue_date = overdue_date
+    invoice_1.save()
+    invoice_2 = factory_invoice(payment_account, payment_method_code=PaymentMethod.EFT.value,
+                                status_code=InvoiceStatus.APPROVED.value, total=50, paid=0).save()
+    factory_statement_invoices(statement_id=statement_model.id, invoice_id=invoice_1.id)
+    factory_statement_invoices(statement_id=statement_model.id, invoice_id=invoice_2.id)
+
+    assert statement_model.total_fees == 250
+    assert statement_model.total_service_fees == 1.5
+    assert statement_model.total_paid == 0
+    assert statement_model.total_due == 250
+    assert statement_model.oldest_overdue_date.date() == overdue_date.date()
+
+    invoice_1.paid = 200
+    invoice_1.invoice_status_code = InvoiceStatus.PAID.value
+    invoice_1.save()
+
+    assert statement_model.total_paid == 200
+    assert statement_model.total_due == 50
+    assert statement_model.oldest_overdue_date is None
+
+    summary = StatementService.get_summary(payment_account.auth_account_id, statement_model.id)
+    assert summary['total_due'] == 50
+    assert summary['oldest_overdue_date'] is None
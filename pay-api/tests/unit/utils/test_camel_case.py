@@ -0,0 +1,77 @@
+# Copyright © 2024 Province of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests to assure the camelCase serialization.
+
+Test-Suite to ensure that camelCase keys are serialized natively, and match the after request rewrite.
+"""
+import json
+import time
+
+from flask import jsonify
+from sbc_common_components.utils.camel_case_response import camelcase_dict
+
+from pay_api.utils.camel_case import convert_response_to_camel, native_camel_case
+from pay_api.utils.converter import Converter, get_converter
+from tests.utilities.base_test import factory_invoice_search_models
+
+
+def _items(invoices, camel_case: bool):
+    converter = get_converter(snake_case_to_camel=camel_case)
+    return [converter.remove_nones(invoice_dict) for invoice_dict in converter.unstructure(invoices)]
+
+
+def test_native_camel_case_matches_rewrite(app):
+    """Assert the native camelCase response matches the rewrite, and time both for 1,000 invoices."""
+    invoices = factory_invoice_search_models(1000)
+    with app.test_request_context():
+        start = time.perf_counter()
+        response = jsonify({'total': 1000, 'page': 1, 'limit': 1000, 'items': _items(invoices, False)})
+        response = convert_response_to_camel(response)
+        rewrite_elapsed = time.perf_counter() - start
+
+    @native_camel_case
+    def search():
+        return jsonify({'total': 1000, 'page': 1, 'limit': 1000, 'items': _items(invoices, True)})
+
+    with app.test_request_context():
+        start = time.perf_counter()
+        native_response = convert_response_to_camel(search())
+        native_elapsed = time.perf_counter() - start
+
+    app.logger.info(f'1,000 invoices, rewrite: {rewrite_elapsed * 1000:.1f}ms, '
+                    f'native: {native_elapsed * 1000:.1f}ms')
+    native = json.loads(native_response.get_data())
+    assert native == json.loads(response.get_data())
+    assert native['items'][0]['lineItems'][0]['filingTypeCode'] == 'BCINC'
+    assert native['items'][0]['paymentAccount']['accountId'] == '1234'
+
+
+def test_native_camel_case_error_rewritten(app):
+    """Assert an error response from a camelCase endpoint is still rewritten."""
+    @native_camel_case
+    def search():
+        return jsonify({'invalid_params': 'limit'})
+
+    with app.test_request_context():
+        response = search()
+        response.status_code = 400
+        response = convert_response_to_camel(response)
+        assert json.loads(response.get_data()) == {'invalidParams': 'limit'}
+
+
+def test_camel_case_dict_matches_rewrite():
+    """Assert plain dicts are renamed the same as the rewrite."""
+    data = {'line_items': [{'filing_type_code': 'BCINC', 'details': {'corp_name': 'Test'}}], 'id': 1}
+    assert Converter(snake_case_to_camel=True).unstructure(data) == camelcase_dict(data, {})
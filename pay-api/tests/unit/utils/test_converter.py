@@ -0,0 +1,99 @@
+# Copyright © 2024 Province of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests to assure the shared converters and schemas.
+
+Test-Suite to ensure that shared converters and schemas serialize the same as new ones, and time the difference.
+"""
+import time
+
+from flask import current_app
+
+from pay_api.models import InvoiceSchema, PaymentSchema
+from pay_api.models.base_schema import get_schema
+from pay_api.utils.converter import Converter, get_converter
+from tests.utilities.base_test import (
+    factory_invoice, factory_invoice_search_models, factory_payment, factory_payment_account)
+
+
+def test_get_converter():
+    """Assert a converter is shared for the same options."""
+    assert get_converter() is get_converter()
+    assert get_converter(snake_case_to_camel=True) is not get_converter()
+
+
+def test_shared_converter_matches_new(app):
+    """Assert the shared converter unstructures invoices the same as a new converter."""
+    invoices = factory_invoice_search_models(50)
+    assert get_converter().unstructure(invoices) == Converter().unstructure(invoices)
+
+
+def test_shared_converter_benchmark(app):
+    """Time 100 purchase history pages of 50 invoices, with a new converter per page and with a shared one."""
+    invoices = factory_invoice_search_models(50)
+    start = time.perf_counter()
+    for _ in range(100):
+        new_items = Converter().unstructure(invoices)
+    new_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(100):
+        shared_items = get_converter().unstructure(invoices)
+    shared_elapsed = time.perf_counter() - start
+
+    app.logger.info(f'100 pages of 50 invoices, new converter: {new_elapsed * 1000:.1f}ms, '
+                    f'shared converter: {shared_elapsed * 1000:.1f}ms')
+    assert shared_items == new_items
+
+
+def test_shared_schema_matches_new(session):
+    """Assert the shared schemas dump payments and invoices the same as new schemas."""
+    payment_account = factory_payment_account()
+    payment_account.save()
+    payment = factory_payment(payment_account_id=payment_account.id)
+    payment.save()
+    invoice = factory_invoice(payment_account=payment_account)
+    invoice.save()
+    exclude = ('receipts', 'references', '_links')
+
+    assert get_schema(PaymentSchema).dump(payment) == PaymentSchema().dump(payment)
+    assert get_schema(InvoiceSchema, exclude=exclude).dump(invoice) == InvoiceSchema(exclude=exclude).dump(invoice)
+    assert get_schema(InvoiceSchema, exclude=exclude) is get_schema(InvoiceSchema, exclude=exclude)
+
+
+def test_shared_schema_benchmark(session):
+    """Time dumping 200 payment rows, with new schemas per row and with shared ones."""
+    payment_account = factory_payment_account()
+    payment_account.save()
+    payment = factory_payment(payment_account_id=payment_account.id)
+    payment.save()
+    invoice = factory_invoice(payment_account=payment_account)
+    invoice.save()
+    exclude = ('receipts', 'references', '_links')
+
+    start = time.perf_counter()
+    for _ in range(200):
+        new_dump = (PaymentSchema().dump(payment), InvoiceSchema(exclude=exclude).dump(invoice))
+    new_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(200):
+        shared_dump = (get_schema(PaymentSchema).dump(payment),
+                       get_schema(InvoiceSchema, exclude=exclude).dump(invoice))
+    shared_elapsed = time.perf_counter() - start
+
+    current_app.logger.info(f'200 payment rows, new schemas: {new_elapsed * 1000:.1f}ms, '
+                            f'shared schemas: {shared_elapsed * 1000:.1f}ms')
+    assert shared_dump == new_dump
+    assert get_schema(InvoiceSchema, exclude=exclude) is get_schema(InvoiceSchema, exclude=exclude)
@@ -0,0 +1,63 @@
+# Copyright © 2024 Province of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests to assure the user context.
+
+Test-Suite to ensure that the user context is built once per request, and an explicit context is used outside one.
+"""
+from flask import g
+
+from pay_api.utils.user_context import UserContext, use_user_context, user_context
+
+
+@user_context
+def _get_user(**kwargs):
+    return kwargs['user']
+
+
+def test_user_context_per_request(app, monkeypatch):
+    """Assert the context is built once per request, and the token is only read once."""
+    reads = []
+
+    def token_info():
+        reads.append(1)
+        return {'username': 'staff user', 'realm_access': {'roles': ['staff', 'edit']}, 'product_code': 'BUSINESS'}
+
+    monkeypatch.setattr('pay_api.utils.user_context._get_token_info', token_info)
+    with app.test_request_context(headers={'Authorization': 'Bearer test'}):
+        user = _get_user()
+        assert _get_user() is user
+        assert user.user_name == 'STAFF USER'
+        assert user.is_staff() and not user.is_system()
+        assert user.product_code == 'BUSINESS'
+        assert user.bearer_token == 'test'
+        assert len(reads) == 1
+        # The account is set part way through the request by check_auth.
+        g.account_id = 1234
+        assert user.account_id == '1234'
+
+    with app.test_request_context():
+        assert _get_user() is not user
+
+
+def test_explicit_user_context(app):
+    """Assert an explicit context is used outside a request, and the previous one is restored after."""
+    with app.app_context():
+        user = UserContext(token_info={'username': 'job'})
+        with use_user_context(user):
+            assert _get_user() is user
+            assert _get_user().user_name == 'JOB'
+            assert _get_user().account_id is None
+        assert _get_user() is not user
+        assert _get_user().user_name is None
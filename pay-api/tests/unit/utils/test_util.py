@@ -20,7 +20,7 @@ from holidays.constants import GOVERNMENT, OPTIONAL, PUBLIC
 from holidays.countries import Canada
 from datetime import datetime
 
-from pay_api.utils.util import get_nearest_business_day
+from pay_api.utils.util import decode_cursor, encode_cursor, get_nearest_business_day
 from pay_api.schemas import utils as schema_utils
 
 
@@ -111,3 +111,10 @@ def test_validate_schema():
     """Assert get_schema works."""
     schema_utils.get_schema('transaction_request.json')
     assert True
+
+
+def test_cursor_round_trip():
+    """Assert a cursor decodes to the id it was encoded from, including 0."""
+    assert decode_cursor(encode_cursor(1234)) == 1234
+    assert decode_cursor(encode_cursor(0)) == 0
+    assert decode_cursor(None) is None
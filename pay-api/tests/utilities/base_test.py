@@ -28,6 +28,9 @@ from pay_api.models import (
     CfsAccount, Comment, DistributionCode, DistributionCodeLink, EFTFile, EFTShortnameLinks, EFTShortnames, Invoice,
     InvoiceReference, NonSufficientFunds, Payment, PaymentAccount, PaymentLineItem, PaymentTransaction, Receipt,
     RoutingSlip, Statement, StatementInvoices, StatementSettings)
+from pay_api.models.invoice import InvoiceSearchModel
+from pay_api.models.payment_account import PaymentAccountSearchModel
+from pay_api.models.payment_line_item import PaymentLineItemSearchModel
 from pay_api.utils.constants import DT_SHORT_FORMAT
 from pay_api.utils.enums import (
     CfsAccountStatus, EFTShortnameStatus, InvoiceReferenceStatus, InvoiceStatus, LineItemStatus, PaymentMethod,
@@ -937,3 +940,20 @@ def factory_distribution_link(distribution_code_id: int, fee_schedule_id: int):
     """Return Factory."""
     return DistributionCodeLink(fee_schedule_id=fee_schedule_id,
                                 distribution_code_id=distribution_code_id)
+
+
+def factory_invoice_search_models(count: int) -> List[InvoiceSearchModel]:
+    """Return invoice search models, without touching the database."""
+    now = datetime.now(tz=timezone.utc)
+    return [InvoiceSearchModel(
+        id=invoice_id, bcol_account='BCOL1234', business_identifier='BC1234567', corp_type_code='BEN',
+        created_by='TEST_USER', created_on=now, paid=Decimal('31.50'), refund=None, service_fees=Decimal('1.50'),
+        total=Decimal('31.50'), status_code='COMPLETED', filing_id=None, folio_number='FOLIO-1',
+        payment_method='PAD', created_name='Test User', details=[{'label': 'Name:', 'value': 'Benchmark'}],
+        payment_account=PaymentAccountSearchModel(account_name='Test Account', billable=True, account_id='1234',
+                                                  branch_name=None),
+        line_items=[PaymentLineItemSearchModel(total=Decimal('30.00'), gst=Decimal('0'), pst=Decimal('0'),
+                                               service_fees=Decimal('1.50'), description='Incorporation',
+                                               filing_type_code='BCINC')],
+        product='BUSINESS', invoice_number='REG01234567', payment_date=now, refund_date=None,
+        disbursement_date=None, disbursement_reversal_date=None) for invoice_id in range(1, count + 1)]
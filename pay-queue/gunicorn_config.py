@@ -16,6 +16,7 @@
 """
 
 import os
+import signal
 
 # https://docs.gunicorn.org/en/stable/settings.html#workers
 workers = int(os.environ.get('GUNICORN_PROCESSES', '1'))  # gunicorn default - 1
@@ -25,3 +26,16 @@ threads = int(os.environ.get('GUNICORN_THREADS', '4'))  # gunicorn default - 1
 timeout = int(os.environ.get('GUNICORN_TIMEOUT', '100'))  # gunicorn default - 30
 keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', '2'))  # gunicorn default - 2
 # WHEN MIGRATING TO GCP -  GUNICORN_THREADS = 8, GUNICORN_TIMEOUT = 0, GUNICORN_PROCESSES = 1
+
+
+def post_worker_init(worker):
+    """Report the files the dispatcher won't finish when the worker is asked to stop."""
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def handle_term(signum, frame):
+        from pay_queue.dispatcher import dispatcher  # pylint: disable=import-outside-toplevel
+        dispatcher.shutdown()
+        if callable(previous):
+            previous(signum, frame)
+
+    signal.signal(signal.SIGTERM, handle_term)
@@ -30,6 +30,7 @@ from pay_api.utils.run_version import get_run_version
 from sentry_sdk.integrations.flask import FlaskIntegration
 
 from pay_queue import config
+from pay_queue.dispatcher import dispatcher
 from pay_queue.version import __version__
 
 from .resources import register_endpoints
@@ -56,6 +57,7 @@ def create_app(run_mode=os.getenv('DEPLOYMENT_ENV', 'production')) -> Flask:
     queue.init_app(app)
     flags.init_app(app)
     db.init_app(app)
+    dispatcher.init_app(app)
 
     register_endpoints(app)
 
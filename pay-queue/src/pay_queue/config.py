@@ -108,6 +108,14 @@ class _Config():  # pylint: disable=too-few-public-methods,protected-access
     DISABLE_EJV_ERROR_EMAIL = os.getenv('DISABLE_EJV_ERROR_EMAIL', 'true').lower() == 'true'
     DISABLE_CSV_ERROR_EMAIL = os.getenv('DISABLE_CSV_ERROR_EMAIL', 'true').lower() == 'true'
 
+    # Number of settlement file rows applied per database transaction.
+    CAS_SETTLEMENT_CHUNK_SIZE = int(os.getenv('CAS_SETTLEMENT_CHUNK_SIZE', '500'))
+
+    # Files reconciled in the background at once, 0 reconciles them inside the push request.
+    QUEUE_DISPATCH_WORKERS = int(os.getenv('QUEUE_DISPATCH_WORKERS', '2'))
+    # Files waiting for a worker, past this pushes are rejected so Pub/Sub redelivers them later.
+    QUEUE_DISPATCH_MAX_PENDING = int(os.getenv('QUEUE_DISPATCH_MAX_PENDING', '20'))
+
     # PUB/SUB - PUB: account-mailer-dev, auth-event-dev, SUB to ftp-poller-payment-reconciliation-dev, business-events
     ACCOUNT_MAILER_TOPIC = os.getenv('ACCOUNT_MAILER_TOPIC', 'account-mailer-dev')
     AUTH_EVENT_TOPIC = os.getenv('AUTH_EVENT_TOPIC', 'auth-event-dev')
@@ -168,6 +176,8 @@ class TestConfig(_Config):  # pylint: disable=too-few-public-methods
     GCP_AUTH_KEY = None
     DISABLE_EJV_ERROR_EMAIL = False
     DISABLE_CSV_ERROR_EMAIL = False
+    # Reconcile inline, so the tests see the results in their session.
+    QUEUE_DISPATCH_WORKERS = 0
 
 
 class ProdConfig(_Config):  # pylint: disable=too-few-public-methods
@@ -0,0 +1,167 @@
+# Copyright © 2024 Province of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Dispatch queue messages to their handlers.
+
+File reconciliation (CAS, CGI and EFT) can take minutes for a large file, so those messages are run on a bounded pool
+of background threads and the push is acknowledged straight away. A file that is already queued or running on this
+instance is not queued again. Small messages, like identifier updates, are still handled inline.
+
+Cloud Run only keeps the CPU allocated outside of requests when CPU throttling is turned off for the service, which
+the deploy does. A message is acknowledged once it is queued, so a file still queued or running when an instance is
+shut down has to be sent again; the instance reports them to Sentry as it shuts down.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable, Dict, Optional, Set
+
+from flask import Flask, current_app
+from pay_api.utils.user_context import UserContext, use_user_context
+from sentry_sdk import capture_message
+
+
+class DispatchStatus(Enum):
+    """Outcome of dispatching a message."""
+
+    QUEUED = 'QUEUED'
+    DUPLICATE = 'DUPLICATE'
+    FULL = 'FULL'
+
+
+@dataclass
+class TypeMetrics:
+    """Processing time for a message type."""
+
+    processed: int = 0
+    errors: int = 0
+    total_ms: float = 0
+    max_ms: float = 0
+
+    def asdict(self) -> Dict:
+        """Return the metrics as a dict."""
+        return {
+            'processed': self.processed,
+            'errors': self.errors,
+            'avg_ms': round(self.total_ms / self.processed, 2) if self.processed else 0,
+            'max_ms': round(self.max_ms, 2)
+        }
+
+
+class MessageDispatcher:
+    """Run messages inline or on a bounded background executor, QUEUE_DISPATCH_WORKERS=0 runs everything inline."""
+
+    def __init__(self):
+        """Initialize the dispatcher, the executor is created by init_app."""
+        self._lock = threading.Lock()
+        self._app: Optional[Flask] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._max_pending = 0
+        self._accepting = False
+        self._pending: Set[str] = set()
+        self._running: Set[str] = set()
+        self._metrics: Dict[str, TypeMetrics] = {}
+
+    def init_app(self, app: Flask):
+        """Create the executor for the app."""
+        self._app = app
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if (workers := app.config.get('QUEUE_DISPATCH_WORKERS', 0)) > 0:
+            # Threads are joined when the interpreter exits, so the running files finish within the grace period.
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='pay-queue')
+            self._max_pending = app.config.get('QUEUE_DISPATCH_MAX_PENDING', 20)
+            self._accepting = True
+
+    @property
+    def is_async(self) -> bool:
+        """Return True if messages are run in the background."""
+        return self._executor is not None
+
+    def run(self, message_type: str, handler: Callable, *args, **kwargs):
+        """Run the handler inline, recording its processing time."""
+        self._timed(message_type, handler, *args, **kwargs)
+
+    def submit(self, message_type: str, key: str, handler: Callable, *args, **kwargs) -> DispatchStatus:
+        """Queue the handler in the background, unless the key is already queued or running or the queue is full."""
+        if not self.is_async:
+            self.run(message_type, handler, *args, **kwargs)
+            return DispatchStatus.QUEUED
+        dedupe_key = f'{message_type}:{key}'
+        with self._lock:
+            if dedupe_key in self._pending or dedupe_key in self._running:
+                return DispatchStatus.DUPLICATE
+            if not self._accepting or len(self._pending) >= self._max_pending:
+                return DispatchStatus.FULL
+            self._pending.add(dedupe_key)
+        self._executor.submit(self._run_in_background, message_type, dedupe_key, handler, *args, **kwargs)
+        return DispatchStatus.QUEUED
+
+    def shutdown(self):
+        """Stop queueing files, cancel the ones that haven't started and report the files that won't finish."""
+        if not self.is_async:
+            return
+        with self._lock:
+            self._accepting = False
+            unfinished = sorted(self._pending | self._running)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if unfinished:
+            capture_message(f'pay-queue is shutting down, these files need to be sent again: {", ".join(unfinished)}',
+                            level='error')
+
+    def _run_in_background(self, message_type: str, dedupe_key: str, handler: Callable, *args, **kwargs):
+        with self._lock:
+            self._pending.discard(dedupe_key)
+            self._running.add(dedupe_key)
+        try:
+            # Each app context gets its own scoped session, which is removed when the context is popped.
+            # There is no request in the background, so the audit columns are filled from an empty context.
+            with self._app.app_context(), use_user_context(UserContext(token_info={})):
+                try:
+                    self._timed(message_type, handler, *args, **kwargs)
+                except Exception as e:  # NOQA # pylint: disable=broad-except
+                    current_app.logger.error(f'Error processing {dedupe_key}', exc_info=True)
+                    capture_message(f'Error processing {dedupe_key}, ERROR : {str(e)}', level='error')
+        finally:
+            with self._lock:
+                self._running.discard(dedupe_key)
+
+    def _timed(self, message_type: str, handler: Callable, *args, **kwargs):
+        start = time.perf_counter()
+        failed = True
+        try:
+            handler(*args, **kwargs)
+            failed = False
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                metrics = self._metrics.setdefault(message_type, TypeMetrics())
+                metrics.processed += 1
+                metrics.errors += 1 if failed else 0
+                metrics.total_ms += elapsed_ms
+                metrics.max_ms = max(metrics.max_ms, elapsed_ms)
+
+    def stats(self) -> Dict:
+        """Return the queue depth, the number of messages in flight and the processing time per message type."""
+        with self._lock:
+            return {
+                'queue_depth': len(self._pending),
+                'in_flight': len(self._running),
+                'types': {message_type: metrics.asdict() for message_type, metrics in self._metrics.items()}
+            }
+
+
+dispatcher = MessageDispatcher()  # pylint: disable=invalid-name
@@ -21,6 +21,7 @@ from flask import Blueprint, current_app, request
 from pay_api.services.gcp_queue_publisher import queue
 from sbc_common_components.utils.enums import QueueMessageTypes
 
+from pay_queue.dispatcher import DispatchStatus, dispatcher
 from pay_queue.external.gcp_auth import ensure_authorized_queue_user
 from pay_queue.services import update_temporary_identifier
 from pay_queue.services.cgi_reconciliations import reconcile_distributions
@@ -41,21 +42,36 @@ def worker():
 
     try:
         current_app.logger.info('Event Message Received: %s ', json.dumps(dataclasses.asdict(ce)))
+        status = DispatchStatus.QUEUED
         if ce.type == QueueMessageTypes.CAS_MESSAGE_TYPE.value:
-            reconcile_payments(ce)
+            status = dispatcher.submit(ce.type, ce.data.get('fileName'), reconcile_payments, ce)
         elif ce.type == QueueMessageTypes.CGI_ACK_MESSAGE_TYPE.value:
-            reconcile_distributions(ce.data)
+            status = dispatcher.submit(ce.type, ce.data.get('fileName'), reconcile_distributions, ce.data)
         elif ce.type == QueueMessageTypes.CGI_FEEDBACK_MESSAGE_TYPE.value:
-            reconcile_distributions(ce.data, is_feedback=True)
+            status = dispatcher.submit(ce.type, ce.data.get('fileName'), reconcile_distributions, ce.data,
+                                       is_feedback=True)
         elif ce.type == QueueMessageTypes.EFT_FILE_UPLOADED.value:
-            reconcile_eft_payments(ce.data)
+            status = dispatcher.submit(ce.type, ce.data.get('fileName'), reconcile_eft_payments, ce.data)
         elif ce.type in [QueueMessageTypes.INCORPORATION.value, QueueMessageTypes.REGISTRATION.value]:
-            update_temporary_identifier(ce.data)
+            dispatcher.run(ce.type, update_temporary_identifier, ce.data)
         else:
             current_app.logger.warning('Invalid queue message type: %s', ce.type)
 
+        if status == DispatchStatus.DUPLICATE:
+            current_app.logger.info('File %s is already being processed, skipping.', ce.data.get('fileName'))
+        elif status == DispatchStatus.FULL:
+            # Not acknowledged, so Pub/Sub redelivers it with backoff once the backlog has cleared.
+            current_app.logger.warning('Dispatch queue is full, %s will be redelivered.', ce.data.get('fileName'))
+            return {}, HTTPStatus.SERVICE_UNAVAILABLE
         return {}, HTTPStatus.OK
     except Exception: # NOQA # pylint: disable=broad-except
         # Catch Exception so that any error is still caught and the message is removed from the queue
         current_app.logger.error('Error processing event:', exc_info=True)
         return {}, HTTPStatus.OK
+
+
+@bp.route('/metrics', methods=('GET',))
+@ensure_authorized_queue_user
+def metrics():
+    """Return the dispatch queue depth, the number of files in flight and the processing time per message type."""
+    return dispatcher.stats(), HTTPStatus.OK
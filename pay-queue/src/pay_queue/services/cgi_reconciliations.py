@@ -13,8 +13,9 @@
 # limitations under the License.
 """CGI reconciliation file."""
 import os
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from flask import current_app
 from pay_api.models import DistributionCode as DistributionCodeModel
@@ -36,6 +37,7 @@ from pay_api.utils.enums import (
     PaymentSystem, QueueSources, RoutingSlipStatus)
 from sbc_common_components.utils.enums import QueueMessageTypes
 from sentry_sdk import capture_message
+from sqlalchemy.orm import joinedload
 
 from pay_queue import config
 from pay_queue.minio import get_object
@@ -128,69 +130,210 @@ def _is_processed_or_processing(group_batches, file_name) -> bool:
     return False
 
 
-def _process_ejv_feedback(group_batches) -> bool:  # pylint:disable=too-many-locals
+@dataclass
+class _BatchGroupRecord:
+    """Batch group (BG) line of an EJV feedback file."""
+
+    batch_number: int
+
+
+@dataclass
+class _BatchHeaderRecord:
+    """Batch header (BH) line of an EJV feedback file."""
+
+    return_code: str
+    return_message: str
+
+
+@dataclass
+class _JVHeaderRecord:
+    """JV header (JH) line of an EJV feedback file, the amount is only parsed for payment files."""
+
+    ejv_header_id: int
+    return_code: str
+    return_message: str
+    receipt_number: str
+    amount_text: str
+
+    @property
+    def amount(self) -> float:
+        """Return the amount of the journal."""
+        return float(self.amount_text)
+
+
+@dataclass
+class _JVDetailRecord:  # pylint: disable=too-many-instance-attributes
+    """JV detail (JD) line of an EJV feedback file, the date and amount are only parsed where they are used."""
+
+    ejv_header_id: int
+    invoice_id: int
+    credit_debit: str
+    return_code: str
+    return_message: str
+    effective_date_text: str
+    amount_text: str
+
+    @property
+    def effective_date(self) -> datetime:
+        """Return the effective date of the line."""
+        return datetime.strptime(self.effective_date_text, '%Y%m%d')
+
+    @property
+    def amount(self) -> float:
+        """Return the amount of the line."""
+        return float(self.amount_text)
+
+
+def _parse_ejv_batch(group_batch: str) -> List:
+    """Parse an EJV batch into records, lines other than BG, BH, JH and JD are skipped."""
+    records = []
+    for line in group_batch.splitlines():
+        # For all these indexes refer the sharepoint docs refer : https://github.com/bcgov/entity/issues/6226
+        record_type = line[2:4]
+        if record_type == 'BG':
+            records.append(_BatchGroupRecord(batch_number=int(line[15:24])))
+        elif record_type == 'BH':
+            records.append(_BatchHeaderRecord(return_code=line[7:11], return_message=line[11:161]))
+        elif record_type == 'JH':
+            journal_name: str = line[7:17]  # {ministry}{ejv_header_model.id:0>8}
+            records.append(_JVHeaderRecord(ejv_header_id=int(journal_name[2:]),
+                                           return_code=line[271:275],
+                                           return_message=line[275:425],
+                                           receipt_number=line[0:42].strip(),
+                                           amount_text=line[42:57]))
+        elif record_type == 'JD':
+            journal_name: str = line[7:17]  # {ministry}{ejv_header_model.id:0>8}
+            # Work around for CAS, they said fix the feedback files.
+            line = _fix_invoice_line(line)
+            records.append(_JVDetailRecord(ejv_header_id=int(journal_name[2:]),
+                                           invoice_id=int(line[205:315]),
+                                           credit_debit=line[104:105],
+                                           return_code=line[315:319],
+                                           return_message=line[319:469],
+                                           effective_date_text=line[22:30],
+                                           amount_text=line[89:104]))
+    return records
+
+
+class _FeedbackLookup:
+    """Records referenced by an EJV feedback batch, loaded with one IN query per table instead of per JD line."""
+
+    def __init__(self, records: List):
+        """Load the JV headers, invoices, invoice links, active invoice references and receipts for the batch."""
+        header_ids = {record.ejv_header_id for record in records if isinstance(record, _JVHeaderRecord)}
+        details = [record for record in records if isinstance(record, _JVDetailRecord)]
+        invoice_ids = {detail.invoice_id for detail in details}
+        detail_header_ids = {detail.ejv_header_id for detail in details}
+        self._ejv_headers: Dict[int, EjvHeaderModel] = {}
+        self._invoices: Dict[int, InvoiceModel] = {}
+        self._invoice_links: Dict[Tuple[int, int], EjvLinkModel] = {}
+        self._inv_references: Dict[int, InvoiceReferenceModel] = {}
+        self._receipts: Dict[int, ReceiptModel] = {}
+        self._distribution_codes: Optional[Dict[int, DistributionCodeModel]] = None
+        if header_ids:
+            self._ejv_headers = {ejv_header.id: ejv_header for ejv_header in db.session.query(EjvHeaderModel)
+                                 .filter(EjvHeaderModel.id.in_(header_ids)).all()}
+        if not invoice_ids:
+            return
+        self._invoices = {invoice.id: invoice for invoice in db.session.query(InvoiceModel)
+                          .filter(InvoiceModel.id.in_(invoice_ids)).all()}
+        self._invoice_links = {(link.ejv_header_id, link.link_id): link for link in db.session.query(EjvLinkModel)
+                               .filter(EjvLinkModel.ejv_header_id.in_(detail_header_ids))
+                               .filter(EjvLinkModel.link_id.in_(invoice_ids))
+                               .filter(EjvLinkModel.link_type == EJVLinkType.INVOICE.value).all()}
+        self._inv_references = {inv_ref.invoice_id: inv_ref for inv_ref in db.session.query(InvoiceReferenceModel)
+                                .filter(InvoiceReferenceModel.invoice_id.in_(invoice_ids))
+                                .filter(InvoiceReferenceModel.status_code == InvoiceReferenceStatus.ACTIVE.value)
+                                .all()}
+        # Same as find_by_invoice_id_and_receipt_number, which matches on the invoice only.
+        self._receipts = {receipt.invoice_id: receipt for receipt in db.session.query(ReceiptModel)
+                          .filter(ReceiptModel.invoice_id.in_(invoice_ids)).all()}
+
+    def ejv_header(self, ejv_header_id: int) -> EjvHeaderModel:
+        """Return the JV header."""
+        return self._ejv_headers.get(ejv_header_id)
+
+    def invoice(self, invoice_id: int) -> InvoiceModel:
+        """Return the invoice."""
+        return self._invoices.get(invoice_id)
+
+    def invoice_link(self, ejv_header_id: int, invoice_id: int) -> EjvLinkModel:
+        """Return the invoice link for the JV header."""
+        return self._invoice_links.get((ejv_header_id, invoice_id))
+
+    def active_invoice_reference(self, invoice_id: int) -> Optional[InvoiceReferenceModel]:
+        """Return the invoice reference, if it hasn't been completed or cancelled by an earlier line."""
+        inv_ref = self._inv_references.get(invoice_id)
+        return inv_ref if inv_ref and inv_ref.status_code == InvoiceReferenceStatus.ACTIVE.value else None
+
+    def receipt(self, invoice_id: int) -> Optional[ReceiptModel]:
+        """Return the receipt for the invoice."""
+        return self._receipts.get(invoice_id)
+
+    def add_receipt(self, receipt: ReceiptModel):
+        """Add a new receipt, so the next lines for the invoice add to it."""
+        db.session.add(receipt)
+        self._receipts[receipt.invoice_id] = receipt
+
+    def distribution_code(self, distribution_code_id: int) -> DistributionCodeModel:
+        """Return the fee distribution code with the partner distribution code it disburses to."""
+        if self._distribution_codes is None:
+            distribution_code_ids = {line_item.fee_distribution_id for invoice in self._invoices.values()
+                                     for line_item in invoice.payment_line_items}
+            self._distribution_codes = {
+                distribution_code.distribution_code_id: distribution_code
+                for distribution_code in db.session.query(DistributionCodeModel)
+                .options(joinedload(DistributionCodeModel.disbursement_distribution_code))
+                .filter(DistributionCodeModel.distribution_code_id.in_(distribution_code_ids)).all()
+            }
+        return self._distribution_codes.get(distribution_code_id)
+
+
+def _process_ejv_feedback(group_batches) -> bool:
     """Process EJV Feedback contents."""
     has_errors = False
     for group_batch in group_batches:
+        records = _parse_ejv_batch(group_batch)
+        lookup = _FeedbackLookup(records)
         ejv_file: Optional[EjvFileModel] = None
         receipt_number: Optional[str] = None
-        for line in group_batch.splitlines():
-            # For all these indexes refer the sharepoint docs refer : https://github.com/bcgov/entity/issues/6226
-            is_batch_group: bool = line[2:4] == 'BG'
-            is_batch_header: bool = line[2:4] == 'BH'
-            is_jv_header: bool = line[2:4] == 'JH'
-            is_jv_detail: bool = line[2:4] == 'JD'
-            if is_batch_group:
-                batch_number = int(line[15:24])
-                ejv_file = EjvFileModel.find_by_id(batch_number)
-            elif is_batch_header:
-                return_code = line[7:11]
-                return_message = line[11:161]
-                ejv_file.disbursement_status_code = _get_disbursement_status(return_code)
-                ejv_file.message = return_message
+        for record in records:
+            if isinstance(record, _BatchGroupRecord):
+                ejv_file = EjvFileModel.find_by_id(record.batch_number)
+            elif isinstance(record, _BatchHeaderRecord):
+                ejv_file.disbursement_status_code = _get_disbursement_status(record.return_code)
+                ejv_file.message = record.return_message
                 if ejv_file.disbursement_status_code == DisbursementStatus.ERRORED.value:
                     has_errors = True
-            elif is_jv_header:
-                journal_name: str = line[7:17]  # {ministry}{ejv_header_model.id:0>8}
-                ejv_header_model_id = int(journal_name[2:])
-                ejv_header: EjvHeaderModel = EjvHeaderModel.find_by_id(ejv_header_model_id)
-                ejv_header_return_code = line[271:275]
-                ejv_header.disbursement_status_code = _get_disbursement_status(ejv_header_return_code)
-                ejv_header_error_message = line[275:425]
-                ejv_header.message = ejv_header_error_message
+            elif isinstance(record, _JVHeaderRecord):
+                ejv_header: EjvHeaderModel = lookup.ejv_header(record.ejv_header_id)
+                ejv_header.disbursement_status_code = _get_disbursement_status(record.return_code)
+                ejv_header.message = record.return_message
                 if ejv_header.disbursement_status_code == DisbursementStatus.ERRORED.value:
                     has_errors = True
                 # Create a payment record if its a gov account payment.
                 elif ejv_file.file_type == EjvFileType.PAYMENT.value:
-                    amount = float(line[42:57])
-                    receipt_number = line[0:42].strip()
-                    _create_payment_record(amount, ejv_header, receipt_number)
-
-            elif is_jv_detail:
-                has_errors = _process_jv_details_feedback(ejv_file, has_errors, line, receipt_number)
+                    receipt_number = record.receipt_number
+                    _create_payment_record(record.amount, ejv_header, receipt_number)
+            elif isinstance(record, _JVDetailRecord):
+                has_errors = _process_jv_details_feedback(ejv_file, has_errors, record, receipt_number, lookup)
 
     db.session.commit()
     return has_errors
 
 
-def _process_jv_details_feedback(ejv_file, has_errors, line, receipt_number):  # pylint:disable=too-many-locals
-    journal_name: str = line[7:17]  # {ministry}{ejv_header_model.id:0>8}
-    ejv_header_model_id = int(journal_name[2:])
-    # Work around for CAS, they said fix the feedback files.
-    line = _fix_invoice_line(line)
-    invoice_id = int(line[205:315])
+def _process_jv_details_feedback(ejv_file, has_errors, detail: _JVDetailRecord,  # pylint:disable=too-many-arguments
+                                 receipt_number, lookup: _FeedbackLookup):
+    invoice_id = detail.invoice_id
     current_app.logger.info('Invoice id - %s', invoice_id)
-    invoice: InvoiceModel = InvoiceModel.find_by_id(invoice_id)
-    invoice_link: EjvLinkModel = db.session.query(EjvLinkModel).filter(
-        EjvLinkModel.ejv_header_id == ejv_header_model_id).filter(
-        EjvLinkModel.link_id == invoice_id).filter(
-        EjvLinkModel.link_type == EJVLinkType.INVOICE.value).one_or_none()
-    invoice_return_code = line[315:319]
-    invoice_return_message = line[319:469]
+    invoice: InvoiceModel = lookup.invoice(invoice_id)
+    invoice_link: EjvLinkModel = lookup.invoice_link(detail.ejv_header_id, invoice_id)
+    invoice_return_code = detail.return_code
+    invoice_return_message = detail.return_message
     # If the JV process failed, then mark the GL code against the invoice to be stopped
     # for further JV process for the credit GL.
-    current_app.logger.info('Is Credit or Debit %s - %s', line[104:105], ejv_file.file_type)
-    if line[104:105] == 'C' and ejv_file.file_type == EjvFileType.DISBURSEMENT.value:
+    current_app.logger.info('Is Credit or Debit %s - %s', detail.credit_debit, ejv_file.file_type)
+    if detail.credit_debit == 'C' and ejv_file.file_type == EjvFileType.DISBURSEMENT.value:
         disbursement_status = _get_disbursement_status(invoice_return_code)
         invoice_link.disbursement_status_code = disbursement_status
         invoice_link.message = invoice_return_message
@@ -201,23 +344,19 @@ def _process_jv_details_feedback(ejv_file, has_errors, line, receipt_number):  #
             line_items: List[PaymentLineItemModel] = invoice.payment_line_items
             for line_item in line_items:
                 # Line debit distribution
-                debit_distribution: DistributionCodeModel = DistributionCodeModel \
-                    .find_by_id(line_item.fee_distribution_id)
-                credit_distribution: DistributionCodeModel = DistributionCodeModel \
-                    .find_by_id(debit_distribution.disbursement_distribution_code_id)
+                debit_distribution: DistributionCodeModel = lookup.distribution_code(line_item.fee_distribution_id)
+                credit_distribution: DistributionCodeModel = debit_distribution.disbursement_distribution_code
                 credit_distribution.stop_ejv = True
         else:
-            effective_date = datetime.strptime(line[22:30], '%Y%m%d')
-            _update_invoice_disbursement_status(invoice, effective_date)
+            _update_invoice_disbursement_status(invoice, detail.effective_date)
 
-    elif line[104:105] == 'D' and ejv_file.file_type == EjvFileType.PAYMENT.value:
+    elif detail.credit_debit == 'D' and ejv_file.file_type == EjvFileType.PAYMENT.value:
         # This is for gov account payment JV.
         invoice_link.disbursement_status_code = _get_disbursement_status(invoice_return_code)
 
         invoice_link.message = invoice_return_message
         current_app.logger.info('Invoice ID %s', invoice_id)
-        inv_ref: InvoiceReferenceModel = InvoiceReferenceModel.find_by_invoice_id_and_status(
-            invoice_id, InvoiceReferenceStatus.ACTIVE.value)
+        inv_ref: InvoiceReferenceModel = lookup.active_invoice_reference(invoice_id)
         current_app.logger.info('invoice_link.disbursement_status_code %s', invoice_link.disbursement_status_code)
         if invoice_link.disbursement_status_code == DisbursementStatus.ERRORED.value:
             has_errors = True
@@ -230,7 +369,7 @@ def _process_jv_details_feedback(ejv_file, has_errors, line, receipt_number):  #
             dist_code.stop_ejv = True
         elif invoice_link.disbursement_status_code == DisbursementStatus.COMPLETED.value:
             # Set the invoice status as REFUNDED if it's a JV reversal, else mark as PAID
-            effective_date = datetime.strptime(line[22:30], '%Y%m%d')
+            effective_date = detail.effective_date
             # No need for credited here as these are just for EJV payments, which are never credited.
             is_reversal = invoice.invoice_status_code in (
                 InvoiceStatus.REFUNDED.value, InvoiceStatus.REFUND_REQUESTED.value)
@@ -241,13 +380,11 @@ def _process_jv_details_feedback(ejv_file, has_errors, line, receipt_number):  #
                 inv_ref.status_code = InvoiceReferenceStatus.COMPLETED.value
             # Find receipt and add total to it, as single invoice can be multiple rows in the file
             if not is_reversal:
-                receipt = ReceiptModel.find_by_invoice_id_and_receipt_number(invoice_id=invoice_id,
-                                                                             receipt_number=receipt_number)
-                if receipt:
-                    receipt.receipt_amount += float(line[89:104])
+                if receipt := lookup.receipt(invoice_id):
+                    receipt.receipt_amount += detail.amount
                 else:
-                    ReceiptModel(invoice_id=invoice_id, receipt_number=receipt_number, receipt_date=datetime.now(),
-                                 receipt_amount=float(line[89:104])).flush()
+                    lookup.add_receipt(ReceiptModel(invoice_id=invoice_id, receipt_number=receipt_number,
+                                                    receipt_date=datetime.now(), receipt_amount=detail.amount))
     return has_errors
 
 
@@ -299,20 +436,17 @@ def _group_batches(content: str) -> Dict[str, List]:
     """Group batches based on the group and trailer."""
     # A batch starts from BG to BT.
     group_batches: Dict[str, List] = {'EJV': [], 'AP': []}
-    batch_content: str = ''
+    batch_lines: List[str] = []
 
     is_ejv = True
     for line in content.splitlines():
         if line[:4] in ('GABG', 'GIBG', 'APBG'):  # batch starts from GIBG or GABG for JV
             is_ejv = line[:4] in ('GABG', 'GIBG')
-            batch_content = line
+            batch_lines = [line]
         else:
-            batch_content = batch_content + os.linesep + line
+            batch_lines.append(line)
             if line[2:4] == 'BT':  # batch ends with BT
-                if is_ejv:
-                    group_batches['EJV'].append(batch_content)
-                else:
-                    group_batches['AP'].append(batch_content)
+                group_batches['EJV' if is_ejv else 'AP'].append(os.linesep.join(batch_lines))
     return group_batches
 
 
@@ -13,19 +13,21 @@
 # limitations under the License.
 """EFT reconciliation file."""
 from datetime import datetime
-from typing import Dict, List
+from decimal import Decimal
+from typing import Dict, Iterable, List
 
 from flask import current_app
 from pay_api import db
 from pay_api.models import EFTCredit as EFTCreditModel
 from pay_api.models import EFTFile as EFTFileModel
 from pay_api.models import EFTShortnames as EFTShortnameModel
+from pay_api.models import EFTShortnameSummaries as EFTShortnameSummaryModel
 from pay_api.models import EFTTransaction as EFTTransactionModel
 from pay_api.services.eft_short_name_historical import EFTShortnameHistorical as EFTHistoryService
 from pay_api.services.eft_short_name_historical import EFTShortnameHistory as EFTHistory
-from pay_api.services.eft_short_names import EFTShortnames as EFTShortnamesService
 from pay_api.utils.enums import EFTFileLineType, EFTProcessStatus
 from sentry_sdk import capture_message
+from sqlalchemy import func
 
 from pay_queue.minio import get_object
 from pay_queue.services.eft import EFTHeader, EFTRecord, EFTTrailer
@@ -96,20 +98,15 @@ def reconcile_eft_payments(msg: Dict[str, any]):  # pylint: disable=too-many-loc
         eft_file_model.save()
         return
 
-    has_eft_transaction_errors = False
-
     # Include only transactions that are eft or has an error - ignore non EFT
     eft_transactions = [transaction for transaction in eft_transactions
                         if transaction.has_errors() or transaction.is_eft]
 
-    # Parse EFT Transactions
-    for eft_transaction in eft_transactions:
-        if eft_transaction.has_errors():  # Flag any instance of an error - will indicate file is partially processed
-            has_eft_transaction_errors = True
-            _save_eft_transaction(eft_record=eft_transaction, eft_file_model=eft_file_model, is_error=True)
-        else:
-            # Save TDI17 transaction record
-            _save_eft_transaction(eft_record=eft_transaction, eft_file_model=eft_file_model, is_error=False)
+    # Flag any instance of an error - will indicate file is partially processed
+    has_eft_transaction_errors = any(eft_transaction.has_errors() for eft_transaction in eft_transactions)
+
+    # Save TDI17 transaction records
+    _save_eft_transactions(eft_records=eft_transactions, eft_file_model=eft_file_model)
 
     # EFT Transactions have parsing errors - stop and FAIL transactions
     # We want a full file to be parseable as we want to get a full accurate balance before applying them to invoices
@@ -181,45 +178,63 @@ def _process_eft_trailer(eft_trailer: EFTTrailer, eft_file_model: EFTFileModel)
 def _process_eft_credits(shortname_balance, eft_file_id):
     """Credit shortname for each transaction."""
     has_credit_errors = False
-    for shortname in shortname_balance.keys():
+    eft_shortnames = _get_shortnames(shortname_balance.keys())
+    # Existing eft credits for this file, keyed by short name and transaction
+    eft_credits = {(eft_credit.short_name_id, eft_credit.eft_transaction_id): eft_credit
+                   for eft_credit in db.session.query(EFTCreditModel).filter(EFTCreditModel.eft_file_id == eft_file_id)}
+    credit_balances = _get_eft_credit_balances([eft_shortname.id for eft_shortname in eft_shortnames.values()])
+    models = []
+    for shortname, balance in shortname_balance.items():
         try:
-            eft_shortname = _get_shortname(shortname)
-            eft_transactions = shortname_balance[shortname]['transactions']
-
-            for eft_transaction in eft_transactions:
-                # Check if there is an existing eft credit for this file and transaction
-                eft_credit_model = db.session.query(EFTCreditModel) \
-                    .filter(EFTCreditModel.eft_file_id == eft_file_id) \
-                    .filter(EFTCreditModel.short_name_id == eft_shortname.id) \
-                    .filter(EFTCreditModel.eft_transaction_id == eft_transaction['id']) \
-                    .one_or_none()
-
-                if eft_credit_model is None:
-                    eft_credit_model = EFTCreditModel()
+            eft_shortname = eft_shortnames[shortname]
+            credit_balance = credit_balances.get(eft_shortname.id, Decimal(0))
 
+            for eft_transaction in balance['transactions']:
                 # Skip if there is no deposit amount
                 deposit_amount = eft_transaction['deposit_amount']
                 if not deposit_amount > 0:
                     continue
 
+                eft_credit_model = eft_credits.get((eft_shortname.id, eft_transaction['id']))
+                if eft_credit_model is None:
+                    eft_credit_model = EFTCreditModel()
+                else:
+                    credit_balance -= eft_credit_model.remaining_amount
+
                 eft_credit_model.eft_file_id = eft_file_id
                 eft_credit_model.short_name_id = eft_shortname.id
                 eft_credit_model.amount = deposit_amount
                 eft_credit_model.remaining_amount = deposit_amount
                 eft_credit_model.eft_transaction_id = eft_transaction['id']
-                eft_credit_model.flush()
 
-                credit_balance = EFTShortnamesService.get_eft_credit_balance(eft_credit_model.short_name_id)
-                EFTHistoryService.create_funds_received(EFTHistory(short_name_id=eft_credit_model.short_name_id,
-                                                                   amount=deposit_amount,
-                                                                   credit_balance=credit_balance)).flush()
+                # Running balance, same as summing the credits after this one is added.
+                credit_balance += Decimal(str(deposit_amount))
+                models.append(eft_credit_model)
+                models.append(EFTHistoryService.create_funds_received(EFTHistory(short_name_id=eft_shortname.id,
+                                                                                 amount=deposit_amount,
+                                                                                 credit_balance=credit_balance)))
         except Exception as e:  # NOQA pylint: disable=broad-exception-caught
             has_credit_errors = True
             current_app.logger.error(e)
             capture_message('EFT Failed to set EFT balance.', level='error')
+    try:
+        db.session.add_all(models)
+        db.session.flush()
+    except Exception as e:  # NOQA pylint: disable=broad-exception-caught
+        has_credit_errors = True
+        current_app.logger.error(e)
+        capture_message('EFT Failed to set EFT balance.', level='error')
     return has_credit_errors
 
 
+def _get_eft_credit_balances(short_name_ids: List[int]) -> Dict[int, Decimal]:
+    """Return the eft credit balance for each short name."""
+    return {short_name_id: Decimal(credit_balance) for short_name_id, credit_balance in
+            db.session.query(EFTCreditModel.short_name_id, func.sum(EFTCreditModel.remaining_amount))
+            .filter(EFTCreditModel.short_name_id.in_(short_name_ids))
+            .group_by(EFTCreditModel.short_name_id)}
+
+
 def _set_eft_header_on_file(eft_header: EFTHeader, eft_file_model: EFTFileModel):
     """Set EFT Header information on EFTFile model."""
     eft_file_model.file_creation_date = getattr(eft_header, 'creation_datetime', None)
@@ -270,39 +285,45 @@ def _save_eft_trailer_error(eft_trailer: EFTTrailer, eft_file_model: EFTFileMode
     eft_transaction_model.save()
 
 
-def _save_eft_transaction(eft_record: EFTRecord, eft_file_model: EFTFileModel, is_error: bool):
-    """Save or update EFT Transaction details record."""
+def _save_eft_transactions(eft_records: List[EFTRecord], eft_file_model: EFTFileModel):
+    """Save or update the EFT Transaction detail records for the file, in one flush."""
     line_type = EFTFileLineType.TRANSACTION.value
-    status_code = EFTProcessStatus.FAILED.value if is_error else EFTProcessStatus.IN_PROGRESS.value
-
-    eft_transaction_model = db.session.query(EFTTransactionModel) \
-        .filter(EFTTransactionModel.file_id == eft_file_model.id) \
-        .filter(EFTTransactionModel.line_number == eft_record.index) \
-        .filter(EFTTransactionModel.line_type == line_type).one_or_none()
-
-    if eft_transaction_model is None:
-        eft_transaction_model = EFTTransactionModel()
-
-    if eft_record.transaction_description:
-        eft_short_name: EFTShortnameModel = _get_shortname(eft_record.transaction_description)
-        eft_transaction_model.short_name_id = eft_short_name.id if eft_short_name else None
-
-    eft_transaction_model.line_type = line_type
-    eft_transaction_model.line_number = eft_record.index
-    eft_transaction_model.file_id = eft_file_model.id
-    eft_transaction_model.status_code = status_code
-    eft_transaction_model.error_messages = eft_record.get_error_messages()
-    eft_transaction_model.batch_number = getattr(eft_record, 'batch_number', None)
-    eft_transaction_model.sequence_number = getattr(eft_record, 'transaction_sequence', None)
-    eft_transaction_model.jv_type = getattr(eft_record, 'jv_type', None)
-    eft_transaction_model.jv_number = getattr(eft_record, 'jv_number', None)
-    deposit_amount_cad = getattr(eft_record, 'deposit_amount_cad', None)
-    eft_transaction_model.deposit_date = getattr(eft_record, 'deposit_datetime')
-    eft_transaction_model.transaction_date = getattr(eft_record, 'transaction_date')
-    eft_transaction_model.deposit_amount_cents = deposit_amount_cad
-    eft_transaction_model.save()
-
-    eft_record.id = eft_transaction_model.id
+    # Existing records are from a previous attempt at the same file
+    eft_transaction_models = {eft_transaction_model.line_number: eft_transaction_model for eft_transaction_model in
+                              db.session.query(EFTTransactionModel)
+                              .filter(EFTTransactionModel.file_id == eft_file_model.id)
+                              .filter(EFTTransactionModel.line_type == line_type)}
+    eft_shortnames = _get_shortnames(eft_record.transaction_description for eft_record in eft_records
+                                     if eft_record.transaction_description)
+
+    models = []
+    for eft_record in eft_records:
+        eft_transaction_model = eft_transaction_models.get(eft_record.index) or EFTTransactionModel()
+
+        if eft_record.transaction_description:
+            eft_transaction_model.short_name_id = eft_shortnames[eft_record.transaction_description].id
+
+        eft_transaction_model.line_type = line_type
+        eft_transaction_model.line_number = eft_record.index
+        eft_transaction_model.file_id = eft_file_model.id
+        eft_transaction_model.status_code = EFTProcessStatus.FAILED.value if eft_record.has_errors() \
+            else EFTProcessStatus.IN_PROGRESS.value
+        eft_transaction_model.error_messages = eft_record.get_error_messages()
+        eft_transaction_model.batch_number = getattr(eft_record, 'batch_number', None)
+        eft_transaction_model.sequence_number = getattr(eft_record, 'transaction_sequence', None)
+        eft_transaction_model.jv_type = getattr(eft_record, 'jv_type', None)
+        eft_transaction_model.jv_number = getattr(eft_record, 'jv_number', None)
+        deposit_amount_cad = getattr(eft_record, 'deposit_amount_cad', None)
+        eft_transaction_model.deposit_date = getattr(eft_record, 'deposit_datetime')
+        eft_transaction_model.transaction_date = getattr(eft_record, 'transaction_date')
+        eft_transaction_model.deposit_amount_cents = deposit_amount_cad
+        models.append(eft_transaction_model)
+
+    db.session.add_all(models)
+    db.session.flush()
+    for eft_record, eft_transaction_model in zip(eft_records, models):
+        eft_record.id = eft_transaction_model.id
+    db.session.commit()
 
 
 def _update_transactions_to_fail(eft_file_model: EFTFileModel) -> int:
@@ -311,6 +332,8 @@ def _update_transactions_to_fail(eft_file_model: EFTFileModel) -> int:
         .filter(EFTTransactionModel.file_id == eft_file_model.id,
                 EFTTransactionModel.line_type == EFTFileLineType.TRANSACTION.value) \
         .update({EFTTransactionModel.status_code: EFTProcessStatus.FAILED.value}, synchronize_session='fetch')
+    # Bulk updates skip the session events that keep the short name summaries up to date.
+    EFTShortnameSummaryModel.refresh_for_file(eft_file_model.id)
 
     eft_file_model.status_code = EFTProcessStatus.FAILED.value
     eft_file_model.save()
@@ -324,23 +347,27 @@ def _update_transactions_to_complete(eft_file_model: EFTFileModel) -> int:
         .filter(EFTTransactionModel.file_id == eft_file_model.id) \
         .filter(EFTTransactionModel.status_code == EFTProcessStatus.IN_PROGRESS.value) \
         .update({EFTTransactionModel.status_code: EFTProcessStatus.COMPLETED.value}, synchronize_session='fetch')
+    # Bulk updates skip the session events that keep the short name summaries up to date.
+    EFTShortnameSummaryModel.refresh_for_file(eft_file_model.id)
     db.session.commit()
 
     return result
 
 
-def _get_shortname(short_name: str) -> EFTShortnameModel:
-    """Save short name if it doesn't exist."""
-    eft_shortname = db.session.query(EFTShortnameModel) \
-        .filter(EFTShortnameModel.short_name == short_name) \
-        .one_or_none()
+def _get_shortnames(short_names: Iterable[str]) -> Dict[str, EFTShortnameModel]:
+    """Return the short names by name, saving any that don't exist in the order they are first seen."""
+    short_names = list(dict.fromkeys(short_names))
+    eft_shortnames = {eft_shortname.short_name: eft_shortname for eft_shortname in
+                      db.session.query(EFTShortnameModel).filter(EFTShortnameModel.short_name.in_(short_names))}
 
-    if eft_shortname is None:
-        eft_shortname = EFTShortnameModel()
-        eft_shortname.short_name = short_name
-        eft_shortname.save()
+    new_shortnames = [EFTShortnameModel(short_name=short_name)
+                      for short_name in short_names if short_name not in eft_shortnames]
+    if new_shortnames:
+        db.session.add_all(new_shortnames)
+        db.session.flush()
+        eft_shortnames.update((eft_shortname.short_name, eft_shortname) for eft_shortname in new_shortnames)
 
-    return eft_shortname
+    return eft_shortnames
 
 
 def _shortname_balance_as_dict(eft_transactions: List[EFTRecord]) -> Dict:
@@ -19,7 +19,8 @@ import os
 import traceback
 from datetime import datetime
 from decimal import Decimal
-from typing import Dict, List, Tuple
+from itertools import batched
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from flask import current_app
 from jinja2 import Environment, FileSystemLoader
@@ -30,6 +31,7 @@ from pay_api.models import DistributionCode as DistributionCodeModel
 from pay_api.models import FeeSchedule as FeeScheduleModel
 from pay_api.models import Invoice as InvoiceModel
 from pay_api.models import InvoiceReference as InvoiceReferenceModel
+from pay_api.models import NonSufficientFunds as NonSufficientFundsModel
 from pay_api.models import Payment as PaymentModel
 from pay_api.models import PaymentAccount as PaymentAccountModel
 from pay_api.models import PaymentLineItem as PaymentLineItemModel
@@ -48,6 +50,8 @@ from pay_api.utils.enums import (
 from pay_api.utils.util import get_topic_for_corp_type
 from sbc_common_components.utils.enums import QueueMessageTypes
 from sentry_sdk import capture_message
+from sqlalchemy import or_
+from sqlalchemy.exc import MultipleResultsFound
 
 from pay_queue import config
 from pay_queue.auth import get_token
@@ -58,14 +62,142 @@ from ..enums import Column, RecordType, SourceTransaction, Status, TargetTransac
 
 APP_CONFIG = config.get_named_config(os.getenv('DEPLOYMENT_ENV', 'production'))
 
+PAYMENT_ACCOUNT_CFS_STATUSES = [CfsAccountStatus.ACTIVE.value, CfsAccountStatus.FREEZE.value,
+                                CfsAccountStatus.INACTIVE.value]
 
-def _create_payment_records(csv_content: str):
+
+class _SettlementLookup:
+    """Records referenced by a chunk of settlement rows, loaded with one IN query per table instead of per row.
+
+    Each kind of record is loaded on first use. Invoices and CFS accounts are held here so find_by_id is served from
+    the session identity map. Numbers not seen in the chunk, or forgotten after new rows were created for them, fall
+    back to a query.
+    """
+
+    def __init__(self, rows: Iterable[Dict[str, str]]):
+        """Collect the invoice, receipt and customer account numbers in the rows."""
+        self._target_numbers = set()
+        self._source_numbers = set()
+        self._account_numbers = set()
+        for row in rows:
+            self._target_numbers.add(_get_row_value(row, Column.TARGET_TXN_NO))
+            self._source_numbers.add(_get_row_value(row, Column.SOURCE_TXN_NO))
+            self._account_numbers.add(_get_row_value(row, Column.CUSTOMER_ACC))
+        self._target_numbers.discard(None)
+        self._source_numbers.discard(None)
+        self._account_numbers.discard(None)
+        self._inv_references: Optional[Dict[str, List[InvoiceReferenceModel]]] = None
+        self._invoices: Dict[int, InvoiceModel] = {}
+        self._cfs_accounts: Dict[int, CfsAccountModel] = {}
+        self._payment_accounts: Optional[Dict[str, List[PaymentAccountModel]]] = None
+        self._payments_by_inv_number: Optional[Dict[str, List[PaymentModel]]] = None
+        self._payments_by_receipt_number: Optional[Dict[str, List[PaymentModel]]] = None
+        self._credits: Optional[Dict[str, CreditModel]] = None
+
+    def invoice_references(self, inv_number: str, status: str) -> List[InvoiceReferenceModel]:
+        """Return the invoice references for the invoice number with the status."""
+        if self._inv_references is None:
+            self._inv_references = {number: [] for number in self._target_numbers}
+            self._load_invoice_references(self._target_numbers)
+        if inv_number not in self._inv_references:
+            self._inv_references[inv_number] = []
+            self._load_invoice_references({inv_number})
+        return [inv_ref for inv_ref in self._inv_references[inv_number] if inv_ref.status_code == status]
+
+    def forget_invoice_number(self, inv_number: str):
+        """Drop the invoice references for the invoice number, after new ones have been created for it."""
+        if self._inv_references is not None:
+            self._inv_references.pop(inv_number, None)
+
+    def _load_invoice_references(self, inv_numbers):
+        inv_references = db.session.query(InvoiceReferenceModel) \
+            .filter(InvoiceReferenceModel.invoice_number.in_(inv_numbers)).all()
+        for inv_ref in inv_references:
+            self._inv_references[inv_ref.invoice_number].append(inv_ref)
+        invoice_ids = {inv_ref.invoice_id for inv_ref in inv_references} - self._invoices.keys()
+        if invoice_ids:
+            self._invoices.update((invoice.id, invoice) for invoice in db.session.query(InvoiceModel)
+                                  .filter(InvoiceModel.id.in_(invoice_ids)).all())
+        cfs_account_ids = {invoice.cfs_account_id for invoice in self._invoices.values()
+                           if invoice.cfs_account_id} - self._cfs_accounts.keys()
+        if cfs_account_ids:
+            self._cfs_accounts.update((cfs_account.id, cfs_account) for cfs_account in db.session.query(CfsAccountModel)
+                                      .filter(CfsAccountModel.id.in_(cfs_account_ids)).all())
+
+    def payment_accounts(self, account_number: str) -> List[PaymentAccountModel]:
+        """Return the payment accounts for the CFS account number."""
+        if self._payment_accounts is None:
+            self._payment_accounts = _find_payment_accounts_by_cfs_account_numbers(self._account_numbers)
+        if account_number not in self._payment_accounts:
+            self._payment_accounts.update(_find_payment_accounts_by_cfs_account_numbers({account_number}))
+        return self._payment_accounts.get(account_number, [])
+
+    def _load_payments(self):
+        if self._payments_by_inv_number is not None:
+            return
+        self._payments_by_inv_number = {}
+        self._payments_by_receipt_number = {}
+        for payment in db.session.query(PaymentModel) \
+                .filter(or_(PaymentModel.invoice_number.in_(self._target_numbers),
+                            PaymentModel.receipt_number.in_(self._source_numbers))).all():
+            self.add_payment(payment)
+
+    def add_payment(self, payment: PaymentModel):
+        """Track a payment created while processing the chunk."""
+        self._load_payments()
+        if payment.invoice_number is not None:
+            self._payments_by_inv_number.setdefault(payment.invoice_number, []).append(payment)
+        if payment.receipt_number is not None:
+            self._payments_by_receipt_number.setdefault(payment.receipt_number, []).append(payment)
+
+    def payments_by_inv_number(self, inv_number: str, status: str) -> List[PaymentModel]:
+        """Return the payments for the invoice number with the status."""
+        self._load_payments()
+        return [payment for payment in self._payments_by_inv_number.get(inv_number, [])
+                if payment.payment_status_code == status]
+
+    def payment_by_receipt_number(self, receipt_number: str) -> Optional[PaymentModel]:
+        """Return the payment for the receipt number."""
+        self._load_payments()
+        return _one_or_none(self._payments_by_receipt_number.get(receipt_number, []))
+
+    def credit(self, receipt_number: str) -> Optional[CreditModel]:
+        """Return the on account credit for the receipt number."""
+        if self._credits is None:
+            self._credits = {}
+            for credit in db.session.query(CreditModel) \
+                    .filter(CreditModel.cfs_identifier.in_(self._source_numbers)) \
+                    .filter(CreditModel.is_credit_memo.is_(False)).all():
+                self.add_credit(credit)
+        return self._credits.get(receipt_number)
+
+    def add_credit(self, credit: CreditModel):
+        """Track a credit created while processing the chunk."""
+        self.credit(credit.cfs_identifier)
+        self._credits[credit.cfs_identifier] = credit
+
+
+def _one_or_none(matches: List):
+    """Return the only match, same as Query.one_or_none."""
+    if len(matches) > 1:
+        raise MultipleResultsFound('Multiple rows were found when one or none was required')
+    return matches[0] if matches else None
+
+
+def _parse_rows(content: str) -> List[Dict[str, str]]:
+    """Parse the settlement file once, with lower case keys to avoid any key mismatch."""
+    return [{k.lower(): v for k, v in row.items()} for row in csv.DictReader(content.splitlines())]
+
+
+def _get_chunk_size() -> int:
+    return current_app.config.get('CAS_SETTLEMENT_CHUNK_SIZE', 500)
+
+
+def _create_payment_records(rows: List[Dict[str, str]]):
     """Create payment records by grouping the lines with target transaction number."""
     # Iterate the rows and create a dict with key as the source transaction number.
     source_txns: Dict[str, List[Dict[str, str]]] = {}
-    for row in csv.DictReader(csv_content.splitlines()):
-        # Convert lower case keys to avoid any key mismatch
-        row = dict((k.lower(), v) for k, v in row.items())
+    for row in rows:
         source_txn_number = _get_row_value(row, Column.SOURCE_TXN_NO)
         if not source_txns.get(source_txn_number):
             source_txns[source_txn_number] = [row]
@@ -76,79 +208,86 @@ def _create_payment_records(csv_content: str):
     # For Online Banking payments, add up the ONAC receipts and payments against invoices.
     # For EFT, WIRE, Drawdown balance transfer mark the payment as COMPLETED
     # For Credit Memos, do nothing.
-    for source_txn_number, payment_lines in source_txns.items():
-        settlement_type: str = _get_settlement_type(payment_lines)
-        if settlement_type in (RecordType.PAD.value, RecordType.PADR.value, RecordType.PAYR.value):
-            for row in payment_lines:
-                inv_number = _get_row_value(row, Column.TARGET_TXN_NO)
-                invoice_amount = float(_get_row_value(row, Column.TARGET_TXN_ORIGINAL))
-
-                payment_date: datetime = datetime.strptime(_get_row_value(row, Column.APP_DATE), '%d-%b-%y')
-                status = PaymentStatus.COMPLETED.value \
-                    if _get_row_value(row, Column.TARGET_TXN_STATUS).lower() == Status.PAID.value.lower() \
-                    else PaymentStatus.FAILED.value
-                paid_amount = 0
-                if status == PaymentStatus.COMPLETED.value:
-                    paid_amount = float(_get_row_value(row, Column.APP_AMOUNT))
-                elif _get_row_value(row, Column.TARGET_TXN_STATUS).lower() == Status.PARTIAL.value.lower():
-                    paid_amount = invoice_amount - float(_get_row_value(row, Column.TARGET_TXN_OUTSTANDING))
-
-                _save_payment(payment_date, inv_number, invoice_amount, paid_amount, row, status,
-                              PaymentMethod.PAD.value,
-                              source_txn_number)
-        elif settlement_type == RecordType.BOLP.value:
-            # Add up the amount together for Online Banking
-            paid_amount = 0
-            inv_number = None
-            invoice_amount = 0
-            payment_date: datetime = datetime.strptime(_get_row_value(payment_lines[0], Column.APP_DATE), '%d-%b-%y')
-            for row in payment_lines:
-                paid_amount += float(_get_row_value(row, Column.APP_AMOUNT))
-
-            # If the payment exactly covers the amount for invoice, then populate invoice amount and number
-            if len(payment_lines) == 1:
-                row = payment_lines[0]
-                invoice_amount = float(_get_row_value(row, Column.TARGET_TXN_ORIGINAL))
-                inv_number = _get_row_value(row, Column.TARGET_TXN_NO)
-
-            _save_payment(payment_date, inv_number, invoice_amount, paid_amount, row, PaymentStatus.COMPLETED.value,
-                          PaymentMethod.ONLINE_BANKING.value, source_txn_number)
-            _publish_online_banking_mailer_events(payment_lines, paid_amount)
-
-        elif settlement_type == RecordType.EFTP.value:
-            # Find the payment using receipt_number and mark it as COMPLETED
-            payment: PaymentModel = db.session.query(PaymentModel).filter(
-                PaymentModel.receipt_number == source_txn_number).one_or_none()
-            payment.payment_status_code = PaymentStatus.COMPLETED.value
-
+    for chunk in batched(source_txns.items(), _get_chunk_size()):
+        lookup = _SettlementLookup(row for _, payment_lines in chunk for row in payment_lines)
+        for source_txn_number, payment_lines in chunk:
+            _create_payment_record(source_txn_number, payment_lines, lookup)
         db.session.commit()
 
 
+def _create_payment_record(source_txn_number: str, payment_lines: List[Dict[str, str]], lookup: _SettlementLookup):
+    """Create the payment record for the lines of a source transaction."""
+    settlement_type: str = _get_settlement_type(payment_lines)
+    if settlement_type in (RecordType.PAD.value, RecordType.PADR.value, RecordType.PAYR.value):
+        for row in payment_lines:
+            inv_number = _get_row_value(row, Column.TARGET_TXN_NO)
+            invoice_amount = float(_get_row_value(row, Column.TARGET_TXN_ORIGINAL))
+
+            payment_date: datetime = datetime.strptime(_get_row_value(row, Column.APP_DATE), '%d-%b-%y')
+            status = PaymentStatus.COMPLETED.value \
+                if _get_row_value(row, Column.TARGET_TXN_STATUS).lower() == Status.PAID.value.lower() \
+                else PaymentStatus.FAILED.value
+            paid_amount = 0
+            if status == PaymentStatus.COMPLETED.value:
+                paid_amount = float(_get_row_value(row, Column.APP_AMOUNT))
+            elif _get_row_value(row, Column.TARGET_TXN_STATUS).lower() == Status.PARTIAL.value.lower():
+                paid_amount = invoice_amount - float(_get_row_value(row, Column.TARGET_TXN_OUTSTANDING))
+
+            _save_payment(payment_date, inv_number, invoice_amount, paid_amount, row, status,
+                          PaymentMethod.PAD.value,
+                          source_txn_number, lookup)
+    elif settlement_type == RecordType.BOLP.value:
+        # Add up the amount together for Online Banking
+        paid_amount = 0
+        inv_number = None
+        invoice_amount = 0
+        payment_date: datetime = datetime.strptime(_get_row_value(payment_lines[0], Column.APP_DATE), '%d-%b-%y')
+        for row in payment_lines:
+            paid_amount += float(_get_row_value(row, Column.APP_AMOUNT))
+
+        # If the payment exactly covers the amount for invoice, then populate invoice amount and number
+        if len(payment_lines) == 1:
+            row = payment_lines[0]
+            invoice_amount = float(_get_row_value(row, Column.TARGET_TXN_ORIGINAL))
+            inv_number = _get_row_value(row, Column.TARGET_TXN_NO)
+
+        _save_payment(payment_date, inv_number, invoice_amount, paid_amount, row, PaymentStatus.COMPLETED.value,
+                      PaymentMethod.ONLINE_BANKING.value, source_txn_number, lookup)
+        _publish_online_banking_mailer_events(payment_lines, paid_amount, lookup)
+
+    elif settlement_type == RecordType.EFTP.value:
+        # Find the payment using receipt_number and mark it as COMPLETED
+        payment: PaymentModel = lookup.payment_by_receipt_number(source_txn_number)
+        payment.payment_status_code = PaymentStatus.COMPLETED.value
+
+
 def _save_payment(payment_date, inv_number, invoice_amount,  # pylint: disable=too-many-arguments
-                  paid_amount, row, status, payment_method, receipt_number):
+                  paid_amount, row, status, payment_method, receipt_number, lookup: _SettlementLookup):
     # pylint: disable=import-outside-toplevel
     from pay_api.factory.payment_system_factory import PaymentSystemFactory
 
-    payment_account = _get_payment_account(row)
+    payment_account = _get_payment_account(row, lookup)
     pay_service = PaymentSystemFactory.create_from_payment_method(payment_method)
     # If status is failed, which means NSF. We already have a COMPLETED payment record, find and update iit.
     payment: PaymentModel = None
+    is_new = False
     if status == PaymentStatus.FAILED.value:
-        payment = _get_payment_by_inv_number_and_status(inv_number, PaymentStatus.COMPLETED.value)
+        payment = _get_payment_by_inv_number_and_status(inv_number, PaymentStatus.COMPLETED.value, lookup)
         # Just to handle duplicate rows in settlement file,
         # pull out failed payment record if it exists and no COMPLETED payments are present.
         if not payment:
             # Select the latest failure.
-            payment = _get_failed_payment_by_inv_number(inv_number)
+            payment = _get_failed_payment_by_inv_number(inv_number, lookup)
     elif status == PaymentStatus.COMPLETED.value:
         # if the payment status is COMPLETED, then make sure there are
         # no other COMPLETED payment for same invoice_number.If found, return. This is to avoid duplicate entries.
-        payment = _get_payment_by_inv_number_and_status(inv_number, PaymentStatus.COMPLETED.value)
+        payment = _get_payment_by_inv_number_and_status(inv_number, PaymentStatus.COMPLETED.value, lookup)
         if payment:
             return
 
     if not payment:
         payment = PaymentModel()
+        is_new = True
     payment.payment_method_code = pay_service.get_payment_method_code()
     payment.payment_status_code = status
     payment.payment_system_code = pay_service.get_payment_system_code()
@@ -159,27 +298,23 @@ def _save_payment(payment_date, inv_number, invoice_amount,  # pylint: disable=t
     payment.paid_amount = paid_amount
     payment.receipt_number = receipt_number
     db.session.add(payment)
+    if is_new:
+        lookup.add_payment(payment)
 
 
-def _get_failed_payment_by_inv_number(inv_number: str) -> PaymentModel:
-    """Get the failed payment record for the invoice number."""
-    payment: PaymentModel = db.session.query(PaymentModel) \
-        .filter(PaymentModel.invoice_number == inv_number,
-                PaymentModel.payment_status_code == PaymentStatus.FAILED.value) \
-        .order_by(PaymentModel.payment_date.desc()).first()
-    return payment
+def _get_failed_payment_by_inv_number(inv_number: str, lookup: _SettlementLookup) -> PaymentModel:
+    """Get the latest failed payment record for the invoice number."""
+    payments = lookup.payments_by_inv_number(inv_number, PaymentStatus.FAILED.value)
+    # Same as ORDER BY payment_date DESC, where nulls sort first.
+    return max(payments, key=lambda p: (p.payment_date is None, p.payment_date or datetime.min), default=None)
 
 
-def _get_payment_by_inv_number_and_status(inv_number: str, status: str) -> PaymentModel:
+def _get_payment_by_inv_number_and_status(inv_number: str, status: str, lookup: _SettlementLookup) -> PaymentModel:
     """Get payment by invoice number and status."""
     # It's possible to look up null inv_number and return more than one.
     if inv_number is None:
         return None
-    payment: PaymentModel = db.session.query(PaymentModel) \
-        .filter(PaymentModel.invoice_number == inv_number,
-                PaymentModel.payment_status_code == status) \
-        .one_or_none()
-    return payment
+    return _one_or_none(lookup.payments_by_inv_number(inv_number, status))
 
 
 def reconcile_payments(ce):
@@ -221,47 +356,17 @@ def _process_file_content(content: str, cas_settlement: CasSettlementModel,
                           msg: Dict[str, any], error_messages: List[Dict[str, any]]):
     """Process the content of the feedback file."""
     has_errors = False
-    # Iterate the rows and create key value pair for each row
-    for row in csv.DictReader(content.splitlines()):
-        # Convert lower case keys to avoid any key mismatch
-        row = dict((k.lower(), v) for k, v in row.items())
-        current_app.logger.debug('Processing %s', row)
-
-        # IF not PAD and application amount is zero, continue
-        record_type = _get_row_value(row, Column.RECORD_TYPE)
-        pad_record_types: Tuple[str] = (RecordType.PAD.value, RecordType.PADR.value, RecordType.PAYR.value)
-        if float(_get_row_value(row, Column.APP_AMOUNT)) == 0 and record_type not in pad_record_types:
-            continue
-
-        # If PAD, lookup the payment table and mark status based on the payment status
-        # If BCOL, lookup the invoices and set the status:
-        # Create payment record by looking the receipt_number
-        # If EFT/WIRE, lookup the invoices and set the status:
-        # Create payment record by looking the receipt_number
-        # PS : Duplicating some code to make the code more readable.
-        if record_type in pad_record_types:
-            # Handle invoices
-            has_errors = _process_consolidated_invoices(row, error_messages) or has_errors
-        elif record_type in (RecordType.BOLP.value, RecordType.EFTP.value):
-            # EFT, WIRE and Online Banking are one-to-one invoice. So handle them in same way.
-            has_errors = _process_unconsolidated_invoices(row, error_messages) or has_errors
-        elif record_type in (RecordType.ONAC.value, RecordType.CMAP.value, RecordType.DRWP.value):
-            has_errors = _process_credit_on_invoices(row, error_messages) or has_errors
-        elif record_type == RecordType.ADJS.value:
-            current_app.logger.info('Adjustment received for %s.', msg)
-        else:
-            # For any other transactions like DM log error and continue.
-            error_msg = f'Record Type is received as {record_type}, and cannot process {msg}.'
-            has_errors = True
-            _csv_error_handling(row, error_msg, error_messages)
-            # Continue processing
-
-        # Commit the transaction and process next row.
+    rows = _parse_rows(content)
+    # Apply the rows in chunks, loading what the chunk refers to up front and committing once per chunk.
+    for chunk in batched(rows, _get_chunk_size()):
+        lookup = _SettlementLookup(chunk)
+        for row in chunk:
+            has_errors = _process_row(row, msg, error_messages, lookup) or has_errors
         db.session.commit()
 
     # Create payment records for lines other than PAD
     try:
-        _create_payment_records(content)
+        _create_payment_records(rows)
     except Exception as e: # NOQA # pylint: disable=broad-except
         error_msg = f'Error creating payment records: {str(e)}'
         has_errors = True
@@ -270,7 +375,7 @@ def _process_file_content(content: str, cas_settlement: CasSettlementModel,
 
     # Create Credit Records.
     try:
-        _create_credit_records(content)
+        _create_credit_records(rows)
     except Exception as e: # NOQA # pylint: disable=broad-except
         error_msg = f'Error creating credit records: {str(e)}'
         has_errors = True
@@ -291,6 +396,43 @@ def _process_file_content(content: str, cas_settlement: CasSettlementModel,
     return has_errors, error_messages
 
 
+def _process_row(row: Dict[str, str], msg: Dict[str, any], error_messages: List[Dict[str, any]],
+                 lookup: _SettlementLookup) -> bool:
+    """Process a row of the feedback file, return True if it has errors."""
+    current_app.logger.debug('Processing %s', row)
+    has_errors = False
+
+    # IF not PAD and application amount is zero, continue
+    record_type = _get_row_value(row, Column.RECORD_TYPE)
+    pad_record_types: Tuple[str] = (RecordType.PAD.value, RecordType.PADR.value, RecordType.PAYR.value)
+    if float(_get_row_value(row, Column.APP_AMOUNT)) == 0 and record_type not in pad_record_types:
+        return has_errors
+
+    # If PAD, lookup the payment table and mark status based on the payment status
+    # If BCOL, lookup the invoices and set the status:
+    # Create payment record by looking the receipt_number
+    # If EFT/WIRE, lookup the invoices and set the status:
+    # Create payment record by looking the receipt_number
+    # PS : Duplicating some code to make the code more readable.
+    if record_type in pad_record_types:
+        # Handle invoices
+        has_errors = _process_consolidated_invoices(row, error_messages, lookup)
+    elif record_type in (RecordType.BOLP.value, RecordType.EFTP.value):
+        # EFT, WIRE and Online Banking are one-to-one invoice. So handle them in same way.
+        has_errors = _process_unconsolidated_invoices(row, error_messages, lookup)
+    elif record_type in (RecordType.ONAC.value, RecordType.CMAP.value, RecordType.DRWP.value):
+        has_errors = _process_credit_on_invoices(row, error_messages, lookup)
+    elif record_type == RecordType.ADJS.value:
+        current_app.logger.info('Adjustment received for %s.', msg)
+    else:
+        # For any other transactions like DM log error and continue.
+        error_msg = f'Record Type is received as {record_type}, and cannot process {msg}.'
+        has_errors = True
+        _csv_error_handling(row, error_msg, error_messages)
+        # Continue processing
+    return has_errors
+
+
 def _send_error_email(file_name: str, minio_location: str,  # pylint:disable=too-many-locals
                       error_messages: List[Dict[str, any]],
                       ce, table_name: str):
@@ -333,7 +475,7 @@ def _send_error_email(file_name: str, minio_location: str,  # pylint:disable=too
             current_app.logger.info('_send_error_email failed')
 
 
-def _process_consolidated_invoices(row, error_messages: List[Dict[str, any]]) -> bool:
+def _process_consolidated_invoices(row, error_messages: List[Dict[str, any]], lookup: _SettlementLookup) -> bool:
     has_errors = False
     target_txn_status = _get_row_value(row, Column.TARGET_TXN_STATUS)
     if (target_txn := _get_row_value(row, Column.TARGET_TXN)) == TargetTransaction.INV.value:
@@ -341,16 +483,14 @@ def _process_consolidated_invoices(row, error_messages: List[Dict[str, any]]) ->
         record_type = _get_row_value(row, Column.RECORD_TYPE)
         current_app.logger.debug('Processing invoice :  %s', inv_number)
 
-        inv_references = _find_invoice_reference_by_number_and_status(inv_number, InvoiceReferenceStatus.ACTIVE.value)
+        inv_references = lookup.invoice_references(inv_number, InvoiceReferenceStatus.ACTIVE.value)
 
-        payment_account: PaymentAccountModel = _get_payment_account(row)
+        payment_account: PaymentAccountModel = _get_payment_account(row, lookup)
 
         if target_txn_status.lower() == Status.PAID.value.lower():
             current_app.logger.debug('Fully PAID payment.')
             # if no inv reference is found, and if there are no COMPLETED inv ref, raise alert
-            completed_inv_references = _find_invoice_reference_by_number_and_status(
-                inv_number, InvoiceReferenceStatus.COMPLETED.value
-            )
+            completed_inv_references = lookup.invoice_references(inv_number, InvoiceReferenceStatus.COMPLETED.value)
 
             if not inv_references and not completed_inv_references:
                 error_msg = f'No invoice found for {inv_number} in the system, and cannot process {row}.'
@@ -362,7 +502,7 @@ def _process_consolidated_invoices(row, error_messages: List[Dict[str, any]]) ->
                 or record_type in (RecordType.PADR.value, RecordType.PAYR.value):
             current_app.logger.info('NOT PAID. NSF identified.')
             # NSF Condition. Publish to account events for NSF.
-            if _process_failed_payments(row):
+            if _process_failed_payments(row, lookup):
                 # Send mailer and account events to update status and send email notification
                 _publish_account_events(QueueMessageTypes.NSF_LOCK_ACCOUNT.value, payment_account, row)
         else:
@@ -372,33 +512,19 @@ def _process_consolidated_invoices(row, error_messages: List[Dict[str, any]]) ->
     return has_errors
 
 
-def _find_invoice_reference_by_number_and_status(inv_number: str, status: str):
-    inv_references: List[InvoiceReferenceModel] = db.session.query(InvoiceReferenceModel). \
-        filter(InvoiceReferenceModel.status_code == status). \
-        filter(InvoiceReferenceModel.invoice_number == inv_number). \
-        all()
-    return inv_references
-
-
-def _process_unconsolidated_invoices(row, error_messages: List[Dict[str, any]]) -> bool:
+def _process_unconsolidated_invoices(row, error_messages: List[Dict[str, any]], lookup: _SettlementLookup) -> bool:
     has_errors = False
     target_txn_status = _get_row_value(row, Column.TARGET_TXN_STATUS)
     record_type = _get_row_value(row, Column.RECORD_TYPE)
     if (target_txn := _get_row_value(row, Column.TARGET_TXN)) == TargetTransaction.INV.value:
         inv_number = _get_row_value(row, Column.TARGET_TXN_NO)
 
-        inv_references: List[InvoiceReferenceModel] = db.session.query(InvoiceReferenceModel). \
-            filter(InvoiceReferenceModel.status_code == InvoiceReferenceStatus.ACTIVE.value). \
-            filter(InvoiceReferenceModel.invoice_number == inv_number). \
-            all()
+        inv_references = lookup.invoice_references(inv_number, InvoiceReferenceStatus.ACTIVE.value)
 
         if len(inv_references) != 1:
             # There could be case where same invoice can appear as PAID in 2 lines, especially when there are credits.
             # Make sure there is one invoice_reference with completed status, else raise error.
-            completed_inv_references: List[InvoiceReferenceModel] = db.session.query(InvoiceReferenceModel). \
-                filter(InvoiceReferenceModel.status_code == InvoiceReferenceStatus.COMPLETED.value). \
-                filter(InvoiceReferenceModel.invoice_number == inv_number). \
-                all()
+            completed_inv_references = lookup.invoice_references(inv_number, InvoiceReferenceStatus.COMPLETED.value)
             current_app.logger.info('Found %s completed invoice references for invoice number %s',
                                     len(completed_inv_references), inv_number)
             if len(completed_inv_references) != 1:
@@ -434,7 +560,7 @@ def _csv_error_handling(row, error_msg: str, error_messages: List[Dict[str, any]
     error_messages.append({'error': error_msg, 'row': row})
 
 
-def _process_credit_on_invoices(row, error_messages: List[Dict[str, any]]) -> bool:
+def _process_credit_on_invoices(row, error_messages: List[Dict[str, any]], lookup: _SettlementLookup) -> bool:
     has_errors = False
     # Credit memo can happen for any type of accounts.
     target_txn_status = _get_row_value(row, Column.TARGET_TXN_STATUS)
@@ -442,10 +568,7 @@ def _process_credit_on_invoices(row, error_messages: List[Dict[str, any]]) -> bo
         inv_number = _get_row_value(row, Column.TARGET_TXN_NO)
         current_app.logger.debug('Processing invoice :  %s', inv_number)
 
-        inv_references: List[InvoiceReferenceModel] = db.session.query(InvoiceReferenceModel). \
-            filter(InvoiceReferenceModel.status_code == InvoiceReferenceStatus.ACTIVE.value). \
-            filter(InvoiceReferenceModel.invoice_number == inv_number). \
-            all()
+        inv_references = lookup.invoice_references(inv_number, InvoiceReferenceStatus.ACTIVE.value)
 
         if target_txn_status.lower() == Status.PAID.value.lower():
             current_app.logger.debug('Fully PAID payment.')
@@ -525,7 +648,7 @@ def _process_partial_paid_invoices(inv_ref: InvoiceReferenceModel, row):
     db.session.add(receipt)
 
 
-def _process_failed_payments(row):
+def _process_failed_payments(row, lookup: _SettlementLookup):
     """Handle failed payments."""
     # 1. Check if there is an NSF record for this account, if there isn't, proceed.
     # 2. SET cfs_account status to FREEZE.
@@ -535,7 +658,7 @@ def _process_failed_payments(row):
     # 6. Create invoice reference for the newly created NSF invoice.
     # 7. Adjust invoice in CFS to include NSF fees.
     inv_number = _get_row_value(row, Column.TARGET_TXN_NO)
-    payment_account: PaymentAccountModel = _get_payment_account(row)
+    payment_account: PaymentAccountModel = _get_payment_account(row, lookup)
 
     # If there is a FAILED payment record for this; it means it's a duplicate event. Ignore it.
     payment: PaymentModel = PaymentModel.find_payment_by_invoice_number_and_status(
@@ -554,16 +677,13 @@ def _process_failed_payments(row):
     is_already_frozen = cfs_account.status == CfsAccountStatus.FREEZE.value
     current_app.logger.info('setting payment account id : %s status as FREEZE', payment_account.id)
     cfs_account.status = CfsAccountStatus.FREEZE.value
-    # Call CFS to stop any further PAD transactions on this account.
-    CFSService.update_site_receipt_method(cfs_account, receipt_method=RECEIPT_METHOD_PAD_STOP)
     if is_already_frozen:
+        # Call CFS to stop any further PAD transactions on this account, setting the receipt method is idempotent.
+        CFSService.update_site_receipt_method(cfs_account, receipt_method=RECEIPT_METHOD_PAD_STOP)
         current_app.logger.info('Ignoring NSF message for invoice : %s as the account is already FREEZE', inv_number)
         return False
     # Find the invoice_reference for this invoice and mark it as ACTIVE.
-    inv_references: List[InvoiceReferenceModel] = db.session.query(InvoiceReferenceModel). \
-        filter(InvoiceReferenceModel.status_code == InvoiceReferenceStatus.COMPLETED.value). \
-        filter(InvoiceReferenceModel.invoice_number == inv_number). \
-        all()
+    inv_references = lookup.invoice_references(inv_number, InvoiceReferenceStatus.COMPLETED.value)
 
     # Update status to ACTIVE, if it was marked COMPLETED
     for inv_reference in inv_references:
@@ -582,29 +702,38 @@ def _process_failed_payments(row):
     # Create an invoice for NSF for this account
     reason_description = _get_row_value(row, Column.REVERSAL_REASON_DESC)
     invoice = _create_nsf_invoice(cfs_account, inv_number, payment_account, reason_description)
+    lookup.forget_invoice_number(inv_number)
+
+    # CFS isn't rolled back with the database, so call it only once the row is flushed and commit right after.
+    # If CFS fails nothing for the row is committed, and the retry repeats both calls.
+    CFSService.update_site_receipt_method(cfs_account, receipt_method=RECEIPT_METHOD_PAD_STOP)
     # Adjust CFS invoice
     CFSService.add_nsf_adjustment(cfs_account=cfs_account, inv_number=inv_number, amount=invoice.total)
+    db.session.commit()
     return True
 
 
-def _create_credit_records(csv_content: str):
+def _create_credit_records(rows: List[Dict[str, str]]):
     """Create credit records and sync them up with CFS."""
     # Iterate the rows and store any ONAC RECEIPTs to credit table .
-    for row in csv.DictReader(csv_content.splitlines()):
-        # Convert lower case keys to avoid any key mismatch
-        row = dict((k.lower(), v) for k, v in row.items())
-        if _get_row_value(row, Column.TARGET_TXN) == TargetTransaction.RECEIPT.value:
+    receipt_rows = [row for row in rows if _get_row_value(row, Column.TARGET_TXN) == TargetTransaction.RECEIPT.value]
+    for chunk in batched(receipt_rows, _get_chunk_size()):
+        lookup = _SettlementLookup(chunk)
+        for row in chunk:
             receipt_number = _get_row_value(row, Column.SOURCE_TXN_NO)
-            pay_account = _get_payment_account(row)
+            pay_account = _get_payment_account(row, lookup)
             # Create credit if a record doesn't exists for this receipt number.
-            if not CreditModel.find_by_cfs_identifier(cfs_identifier=receipt_number):
-                CreditModel(
+            if not lookup.credit(receipt_number):
+                credit = CreditModel(
                     cfs_identifier=receipt_number,
                     is_credit_memo=False,
                     amount=float(_get_row_value(row, Column.TARGET_TXN_ORIGINAL)),
                     remaining_amount=float(_get_row_value(row, Column.TARGET_TXN_ORIGINAL)),
                     account_id=pay_account.id
-                ).save()
+                )
+                db.session.add(credit)
+                lookup.add_credit(credit)
+        db.session.commit()
 
 
 def _check_cfs_accounts_for_pad_and_ob(credit):
@@ -665,15 +794,19 @@ def _sync_credit_records():
         pay_account.save()
 
 
-def _get_payment_account(row) -> PaymentAccountModel:
-    account_number: str = _get_row_value(row, Column.CUSTOMER_ACC)
-    payment_accounts: PaymentAccountModel = db.session.query(PaymentAccountModel) \
-        .join(CfsAccountModel, CfsAccountModel.account_id == PaymentAccountModel.id) \
-        .filter(CfsAccountModel.cfs_account == account_number) \
-        .filter(
-        CfsAccountModel.status.in_(
-            [CfsAccountStatus.ACTIVE.value, CfsAccountStatus.FREEZE.value, CfsAccountStatus.INACTIVE.value]
-        )).all()
+def _find_payment_accounts_by_cfs_account_numbers(account_numbers) -> Dict[str, List[PaymentAccountModel]]:
+    """Return the payment accounts for each CFS account number."""
+    payment_accounts: Dict[str, List[PaymentAccountModel]] = {}
+    for payment_account, account_number in db.session.query(PaymentAccountModel, CfsAccountModel.cfs_account) \
+            .join(CfsAccountModel, CfsAccountModel.account_id == PaymentAccountModel.id) \
+            .filter(CfsAccountModel.cfs_account.in_(account_numbers)) \
+            .filter(CfsAccountModel.status.in_(PAYMENT_ACCOUNT_CFS_STATUSES)).all():
+        payment_accounts.setdefault(account_number, []).append(payment_account)
+    return payment_accounts
+
+
+def _get_payment_account(row, lookup: _SettlementLookup) -> PaymentAccountModel:
+    payment_accounts = lookup.payment_accounts(_get_row_value(row, Column.CUSTOMER_ACC))
     if not all(payment_account.id == payment_accounts[0].id for payment_account in payment_accounts):
         raise Exception('Multiple unique payment accounts for cfs_account.')  # pylint: disable=broad-exception-raised
     return payment_accounts[0] if payment_accounts else None
@@ -733,10 +866,11 @@ def _publish_mailer_events(message_type: str, pay_account: PaymentAccountModel,
             auth_account_id=pay_account.auth_account_id, msg=payload), level='error')
 
 
-def _publish_online_banking_mailer_events(rows: List[Dict[str, str]], paid_amount: float):
+def _publish_online_banking_mailer_events(rows: List[Dict[str, str]], paid_amount: float,
+                                          lookup: _SettlementLookup):
     """Publish payment message to the mailer queue."""
     # Publish message to the Queue, saying account has been created. Using the event spec.
-    pay_account = _get_payment_account(rows[0])  # All rows are for same account.
+    pay_account = _get_payment_account(rows[0], lookup)  # All rows are for same account.
     # Check for credit, or fully paid or under paid payment
     credit_rows = list(
         filter(lambda r: (_get_row_value(r, Column.TARGET_TXN) == TargetTransaction.RECEIPT.value), rows))
@@ -844,12 +978,13 @@ def _create_nsf_invoice(cfs_account: CfsAccountModel, inv_number: str,
         created_on=datetime.now(),
         created_by='SYSTEM'
     )
-    invoice = invoice.save()
+    invoice = invoice.flush()
 
-    NonSufficientFundsService.save_non_sufficient_funds(invoice_id=invoice.id,
-                                                        invoice_number=inv_number,
-                                                        cfs_account=cfs_account.cfs_account,
-                                                        description=reason_description)
+    # The NSF row marks the event as handled, it is committed with the CFS calls.
+    NonSufficientFundsModel(invoice_id=invoice.id,
+                            invoice_number=inv_number,
+                            cfs_account=cfs_account.cfs_account,
+                            description=reason_description).flush()
 
     distribution: DistributionCodeModel = DistributionCodeModel.find_by_active_for_fee_schedule(
         fee_schedule.fee_schedule_id)
@@ -867,7 +1002,7 @@ def _create_nsf_invoice(cfs_account: CfsAccountModel, inv_number: str,
         line_item_status_code=LineItemStatus.ACTIVE.value,
         service_fees=0,
         fee_distribution_id=distribution.distribution_code_id if distribution else 1)
-    line_item.save()
+    line_item.flush()
 
     inv_ref: InvoiceReferenceModel = InvoiceReferenceModel(
         invoice_id=invoice.id,
@@ -876,7 +1011,7 @@ def _create_nsf_invoice(cfs_account: CfsAccountModel, inv_number: str,
             invoice_number=inv_number).reference_number,
         status_code=InvoiceReferenceStatus.ACTIVE.value
     )
-    inv_ref.save()
+    inv_ref.flush()
 
     return invoice
 
@@ -37,6 +37,7 @@ from pay_api.utils.enums import (
     PaymentMethod, PaymentStatus, RoutingSlipStatus)
 from sbc_common_components.utils.enums import QueueMessageTypes
 
+from pay_queue.services.cgi_reconciliations import _group_batches
 from tests.integration.utils import add_file_event_to_queue_and_process
 
 from .factory import (
@@ -1306,3 +1307,18 @@ def test_failure_ap_disbursement(session, app, client):
         .filter(EjvLinkModel.link_id == invoice_ids[1])\
         .one_or_none()
     assert invoice_link.disbursement_status_code == DisbursementStatus.ERRORED.value
+
+
+def test_group_batches():
+    """Assert feedback content is split into EJV and AP batches, from the batch group to the batch trailer."""
+    content = '\n'.join(['GABG...000000001', 'GABH0000', 'GAJH...', 'GAJD...', 'GABT...',
+                         'APBG...000000002', 'APBH0000', 'APIH...', 'APBT...',
+                         'GIBG...000000003', 'GIBH0000', 'GIBT...'])
+    group_batches = _group_batches(content)
+    assert [batch.splitlines() for batch in group_batches['EJV']] == [
+        ['GABG...000000001', 'GABH0000', 'GAJH...', 'GAJD...', 'GABT...'],
+        ['GIBG...000000003', 'GIBH0000', 'GIBT...']
+    ]
+    assert [batch.splitlines() for batch in group_batches['AP']] == [
+        ['APBG...000000002', 'APBH0000', 'APIH...', 'APBT...']
+    ]
@@ -31,6 +31,7 @@ from pay_api.models import Invoice as InvoiceModel
 from pay_api.models import PaymentAccount as PaymentAccountModel
 from pay_api.utils.enums import EFTFileLineType, EFTHistoricalTypes, EFTProcessStatus, EFTShortnameStatus, PaymentMethod
 from sbc_common_components.utils.enums import QueueMessageTypes
+from sqlalchemy import func
 
 from pay_queue.services.eft.eft_enums import EFTConstants
 from tests.integration.factory import factory_create_eft_account, factory_invoice
@@ -474,6 +475,75 @@ def test_eft_tdi17_rerun(session, app, client):
     assert eft_transactions[0].deposit_amount_cents == 13500
 
 
+def test_eft_tdi17_new_and_existing_short_names(session, app, client):
+    """Test EFT Reconciliations with new and existing short names, repeated lines and an existing credit balance."""
+    _, eft_shortname, _ = create_test_data()
+    previous_file = EFTFileModel(file_ref='test_eft_tdi17_previous.txt').save()
+    EFTCreditModel(eft_file_id=previous_file.id, short_name_id=eft_shortname.id, amount=20,
+                   remaining_amount=20).save()
+
+    file_name: str = 'test_eft_tdi17_short_names.txt'
+    header = factory_eft_header(record_type=EFTConstants.HEADER_RECORD_TYPE.value, file_creation_date='20230814',
+                                file_creation_time='1601', deposit_start_date='20230810', deposit_end_date='20230810')
+    trailer = factory_eft_trailer(record_type=EFTConstants.TRAILER_RECORD_TYPE.value, number_of_details='4',
+                                  total_deposit_amount='17050')
+    transactions = [
+        factory_eft_record(record_type=EFTConstants.TRANSACTION_RECORD_TYPE.value, ministry_code='AT',
+                           program_code='0146', deposit_date='20230810', deposit_time='0000',
+                           location_id='85004', transaction_sequence=sequence,
+                           transaction_description=f'MISC PAYMENT {short_name}', deposit_amount=amount,
+                           currency='', exchange_adj_amount='0', deposit_amount_cad=amount,
+                           destination_bank_number='0003', batch_number='002400986', jv_type='I',
+                           jv_number='002425669', transaction_date='')
+        for sequence, short_name, amount in (('001', 'TESTSHORTNAME', '10000'),
+                                             ('002', 'NEWSHORTNAME', '1000'),
+                                             ('003', 'TESTSHORTNAME', '5050'),
+                                             ('004', 'NEWSHORTNAME', '1000'))
+    ]
+    create_and_upload_eft_file(file_name, [header, *transactions, trailer])
+
+    add_file_event_to_queue_and_process(client,
+                                        file_name=file_name,
+                                        message_type=QueueMessageTypes.EFT_FILE_UPLOADED.value)
+
+    eft_file_model: EFTFileModel = db.session.query(EFTFileModel).filter(
+        EFTFileModel.file_ref == file_name).one_or_none()
+    assert eft_file_model.status_code == EFTProcessStatus.COMPLETED.value
+
+    # The existing short name is reused, the new one is created once for both of its lines.
+    eft_shortnames = db.session.query(EFTShortnameModel).order_by(EFTShortnameModel.id).all()
+    assert [eft_shortname.short_name for eft_shortname in eft_shortnames] == ['TESTSHORTNAME', 'NEWSHORTNAME']
+    new_shortname = eft_shortnames[1]
+
+    eft_transactions: List[EFTTransactionModel] = db.session.query(EFTTransactionModel) \
+        .filter(EFTTransactionModel.file_id == eft_file_model.id) \
+        .filter(EFTTransactionModel.line_type == EFTFileLineType.TRANSACTION.value) \
+        .order_by(EFTTransactionModel.line_number).all()
+    assert [eft_transaction.short_name_id for eft_transaction in eft_transactions] == \
+        [eft_shortname.id, new_shortname.id, eft_shortname.id, new_shortname.id]
+    assert all(eft_transaction.status_code == EFTProcessStatus.COMPLETED.value
+               for eft_transaction in eft_transactions)
+
+    # Each line is credited, and the history balance runs on from the existing credit.
+    eft_credits: List[EFTCreditModel] = db.session.query(EFTCreditModel) \
+        .filter(EFTCreditModel.eft_file_id == eft_file_model.id).order_by(EFTCreditModel.id).all()
+    assert len(eft_credits) == 4
+    assert {eft_credit.eft_transaction_id for eft_credit in eft_credits} == \
+        {eft_transaction.id for eft_transaction in eft_transactions}
+
+    history: List[EFTHistoryModel] = db.session.query(EFTHistoryModel) \
+        .filter(EFTHistoryModel.transaction_type == EFTHistoricalTypes.FUNDS_RECEIVED.value) \
+        .order_by(EFTHistoryModel.id).all()
+    assert [(item.short_name_id, item.amount, item.credit_balance) for item in history] == [
+        (eft_shortname.id, 100, 120), (eft_shortname.id, 50.5, 170.5),
+        (new_shortname.id, 10, 10), (new_shortname.id, 10, 20)
+    ]
+
+    credit_balances = dict(db.session.query(EFTCreditModel.short_name_id, func.sum(EFTCreditModel.remaining_amount))
+                           .group_by(EFTCreditModel.short_name_id).all())
+    assert credit_balances == {eft_shortname.id: 170.5, new_shortname.id: 20}
+
+
 def create_test_data():
     """Create test seed data."""
     payment_account: PaymentAccountModel = factory_create_eft_account()
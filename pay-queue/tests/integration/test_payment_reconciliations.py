@@ -83,6 +83,41 @@ def test_online_banking_reconciliations(session, app, client):
     assert payment.invoice_number == invoice_number
 
 
+def test_online_banking_reconciliations_in_chunks(session, app, client, monkeypatch):
+    """Test Reconciliations worker applies a file spanning several chunks."""
+    monkeypatch.setitem(app.config, 'CAS_SETTLEMENT_CHUNK_SIZE', 2)
+    cfs_account_number = '1234'
+    pay_account: PaymentAccountModel = factory_create_online_banking_account(status=CfsAccountStatus.ACTIVE.value,
+                                                                             cfs_account=cfs_account_number)
+    date = datetime.now().strftime('%d-%b-%y')
+    rows = []
+    invoice_ids = []
+    for index in range(5):
+        invoice: InvoiceModel = factory_invoice(payment_account=pay_account, total=100, service_fees=10.0,
+                                                payment_method_code=PaymentMethod.ONLINE_BANKING.value)
+        factory_payment_line_item(invoice_id=invoice.id, filing_fees=90.0, service_fees=10.0, total=90.0)
+        invoice_number = f'12345678{index}'
+        factory_invoice_reference(invoice_id=invoice.id, invoice_number=invoice_number)
+        invoice.invoice_status_code = InvoiceStatus.SETTLEMENT_SCHEDULED.value
+        invoice = invoice.save()
+        invoice_ids.append(invoice.id)
+        rows.append([RecordType.BOLP.value, SourceTransaction.ONLINE_BANKING.value, f'RCPT{index}', 100001, date,
+                     invoice.total, cfs_account_number, TargetTransaction.INV.value, invoice_number,
+                     invoice.total, 0, Status.PAID.value])
+
+    file_name: str = 'cas_settlement_file.csv'
+    create_and_upload_settlement_file(file_name, rows)
+    add_file_event_to_queue_and_process(client,
+                                        file_name=file_name,
+                                        message_type=QueueMessageTypes.CAS_MESSAGE_TYPE.value)
+
+    for index, invoice_id in enumerate(invoice_ids):
+        assert InvoiceModel.find_by_id(invoice_id).invoice_status_code == InvoiceStatus.PAID.value
+        payment: PaymentModel = PaymentModel.find_payment_by_receipt_number(f'RCPT{index}')
+        assert payment.payment_status_code == PaymentStatus.COMPLETED.value
+        assert payment.invoice_number == f'12345678{index}'
+
+
 def test_online_banking_reconciliations_over_payment(session, app, client):
     """Test Reconciliations worker."""
     # 1. Create payment account
@@ -0,0 +1,92 @@
+# Copyright © 2024 Province of British Columbia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests to assure the message dispatcher.
+
+Test-Suite to ensure that file messages are run in the background, once per file, and small messages inline.
+"""
+import threading
+
+from pay_queue.dispatcher import DispatchStatus, MessageDispatcher
+
+
+def test_dispatch_background(app, monkeypatch):
+    """Assert a file already queued or running isn't queued again, and a full queue is rejected."""
+    monkeypatch.setitem(app.config, 'QUEUE_DISPATCH_WORKERS', 1)
+    monkeypatch.setitem(app.config, 'QUEUE_DISPATCH_MAX_PENDING', 1)
+    dispatcher = MessageDispatcher()
+    dispatcher.init_app(app)
+    started, release = threading.Event(), threading.Event()
+    processed = []
+
+    def reconcile(file_name):
+        started.set()
+        release.wait(5)
+        processed.append(file_name)
+
+    assert dispatcher.submit('cas', 'FILE1.CSV', reconcile, 'FILE1.CSV') == DispatchStatus.QUEUED
+    assert started.wait(5)
+    assert dispatcher.submit('cas', 'FILE1.CSV', reconcile, 'FILE1.CSV') == DispatchStatus.DUPLICATE
+    assert dispatcher.submit('cas', 'FILE2.CSV', reconcile, 'FILE2.CSV') == DispatchStatus.QUEUED
+    assert dispatcher.submit('cas', 'FILE3.CSV', reconcile, 'FILE3.CSV') == DispatchStatus.FULL
+    assert dispatcher.stats()['queue_depth'] == 1
+    assert dispatcher.stats()['in_flight'] == 1
+
+    release.set()
+    dispatcher._executor.shutdown(wait=True)  # pylint: disable=protected-access
+    assert processed == ['FILE1.CSV', 'FILE2.CSV']
+    stats = dispatcher.stats()
+    assert stats['in_flight'] == 0
+    assert stats['types']['cas']['processed'] == 2
+
+
+def test_dispatch_shutdown(app, monkeypatch):
+    """Assert a shutdown cancels the files that haven't started, reports the unfinished ones and rejects new files."""
+    monkeypatch.setitem(app.config, 'QUEUE_DISPATCH_WORKERS', 1)
+    dispatcher = MessageDispatcher()
+    dispatcher.init_app(app)
+    started, release = threading.Event(), threading.Event()
+    processed = []
+
+    def reconcile(file_name):
+        started.set()
+        release.wait(5)
+        processed.append(file_name)
+
+    assert dispatcher.submit('cgi', 'FILE1.TXT', reconcile, 'FILE1.TXT') == DispatchStatus.QUEUED
+    assert started.wait(5)
+    assert dispatcher.submit('cgi', 'FILE2.TXT', reconcile, 'FILE2.TXT') == DispatchStatus.QUEUED
+    captured = []
+    monkeypatch.setattr('pay_queue.dispatcher.capture_message', lambda message, level: captured.append(message))
+
+    dispatcher.shutdown()
+    assert dispatcher.submit('cgi', 'FILE3.TXT', reconcile, 'FILE3.TXT') == DispatchStatus.FULL
+    assert len(captured) == 1
+    assert 'cgi:FILE1.TXT' in captured[0] and 'cgi:FILE2.TXT' in captured[0]
+
+    release.set()
+    dispatcher._executor.shutdown(wait=True)  # pylint: disable=protected-access
+    assert processed == ['FILE1.TXT']
+
+
+def test_dispatch_inline(app):
+    """Assert messages are run inline when there are no background workers."""
+    dispatcher = MessageDispatcher()
+    dispatcher.init_app(app)
+    processed = []
+    assert not dispatcher.is_async
+    assert dispatcher.submit('eft', 'TDI17.TXT', processed.append, 'TDI17.TXT') == DispatchStatus.QUEUED
+    dispatcher.run('bc.registry.business.incorporationApplication', processed.append, 'BC1234567')
+    assert processed == ['TDI17.TXT', 'BC1234567']
+    assert dispatcher.stats()['types']['eft']['processed'] == 1